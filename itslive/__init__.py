@@ -1,9 +1,10 @@
 from importlib.metadata import version
 
+import itslive.timeseries as timeseries
 import itslive.velocity_cubes as velocity_cubes
 import itslive.velocity_pairs as velocity_pairs
 
-__all__ = ["velocity_cubes", "velocity_pairs"]
+__all__ = ["timeseries", "velocity_cubes", "velocity_pairs"]
 
 # this comes from the installed version not the editable source
 __version__ = version("itslive")
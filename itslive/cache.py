@@ -0,0 +1,194 @@
+"""
+On-disk cache for granule search results.
+
+Each cache entry stores the asset hrefs returned by one search as a small
+zstd-compressed parquet file named after a canonical hash of the query
+(engine and its partition options, catalog, geometry, datetime range, CQL2
+filter and asset type). Entries expire after a TTL; expired entries are
+refreshed incrementally by asking the backend only for items whose
+``updated`` property is at or after the entry's watermark: the UTC time it
+was last fetched minus a safety margin, so items indexed late with an
+earlier ``updated`` are still picked up.
+"""
+
+import collections
+import datetime
+import hashlib
+import json
+import logging
+import os
+import pathlib
+
+from shapely import normalize
+from shapely.geometry import mapping, shape
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "itslive", "search")
+
+# A cached search result:
+#   hrefs      – list of asset hrefs
+#   fetched_at – UTC ``datetime`` of the last (full or incremental) fetch
+#   watermark  – ISO 8601 string used as the ``updated`` lower bound on
+#                refresh (``fetched_at`` minus the cache's watermark margin)
+#   expired    – whether the entry is older than the cache TTL
+CacheEntry = collections.namedtuple(
+    "CacheEntry", ["hrefs", "fetched_at", "watermark", "expired"]
+)
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _canonical_geometry(geojson_geometry: dict) -> dict:
+    """Normalize vertex order/orientation so equivalent ROIs hash the same."""
+    return mapping(normalize(shape(geojson_geometry)))
+
+
+class SearchCache:
+    """
+    Local result cache for ``serverless_search`` and ``find_streaming``.
+
+    Args:
+        cache_dir: Directory holding the cache entries.
+        ttl: Seconds before an entry is considered stale and refreshed.
+        max_size_bytes: Upper bound for the total size of the cache
+            directory; least recently used entries are evicted past it.
+        watermark_margin: Seconds subtracted from the fetch time to get the
+            refresh watermark. Refreshes then overlap the previous fetch,
+            which catches items whose ``updated`` predates the fetch but
+            that reached the catalog after it.
+
+    Example::
+
+        cache = SearchCache(ttl=3600)
+        urls = itslive.velocity_pairs.find(bbox=[-50, 65, -40, 75], cache=cache)
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        ttl: float = 24 * 3600,
+        max_size_bytes: int = 512 * 1024 * 1024,
+        watermark_margin: float = 3600,
+    ):
+        self.cache_dir = pathlib.Path(cache_dir or DEFAULT_CACHE_DIR)
+        self.ttl = ttl
+        self.max_size_bytes = max_size_bytes
+        self.watermark_margin = watermark_margin
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(
+        engine: str,
+        catalog: str,
+        geometry: dict,
+        datetime_range: str,
+        cql2_filter: dict | None = None,
+        asset_type: str = ".nc",
+        collection: str | None = None,
+        options: dict | None = None,
+    ) -> str:
+        """Return the canonical hash identifying a search.
+
+        *options* holds the engine and ROI options that change which items
+        are scanned (partitioning, manifest use, ROI simplification, ...).
+        """
+        query = {
+            "engine": engine,
+            "options": options,
+            "catalog": catalog.rstrip("/"),
+            "collection": collection,
+            "geometry": _canonical_geometry(geometry),
+            "datetime": datetime_range,
+            "filter": cql2_filter,
+            "asset_type": asset_type,
+        }
+        payload = json.dumps(query, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.cache_dir / f"{key}.parquet"
+
+    def get(self, key: str) -> CacheEntry | None:
+        """Return the entry for *key*, or ``None`` if it is not cached."""
+        import pyarrow.parquet as pq
+
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            table = pq.read_table(path)
+        except Exception as e:
+            logging.warning(f"Dropping unreadable cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        metadata = table.schema.metadata or {}
+        fetched_at = datetime.datetime.fromisoformat(
+            metadata[b"fetched_at"].decode("utf-8")
+        )
+        # Touch the file so size-based eviction is least-recently-used.
+        os.utime(path)
+        return CacheEntry(
+            hrefs=table.column("href").to_pylist(),
+            fetched_at=fetched_at,
+            watermark=metadata[b"watermark"].decode("utf-8"),
+            expired=(_utcnow() - fetched_at).total_seconds() > self.ttl,
+        )
+
+    def put(
+        self,
+        key: str,
+        hrefs: list[str],
+        fetched_at: datetime.datetime | None = None,
+    ) -> None:
+        """Store *hrefs* for *key* and evict old entries if over budget."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        fetched_at = fetched_at or _utcnow()
+        watermark = (
+            fetched_at - datetime.timedelta(seconds=self.watermark_margin)
+        ).astimezone(datetime.timezone.utc).replace(tzinfo=None).isoformat(
+            timespec="seconds"
+        ) + "Z"
+        table = pa.table(
+            {"href": pa.array(sorted(set(hrefs)), type=pa.string())}
+        ).replace_schema_metadata(
+            {
+                b"fetched_at": fetched_at.isoformat().encode("utf-8"),
+                b"watermark": watermark.encode("utf-8"),
+            }
+        )
+        tmp = self._path(key).with_suffix(".tmp")
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def merge(
+        self, key: str, new_hrefs: list[str], fetched_at: datetime.datetime
+    ) -> list[str]:
+        """Add *new_hrefs* to an existing entry and return the merged list."""
+        entry = self.get(key)
+        hrefs = set(new_hrefs)
+        if entry is not None:
+            hrefs.update(entry.hrefs)
+        merged = sorted(hrefs)
+        self.put(key, merged, fetched_at)
+        return merged
+
+    def evict(self) -> None:
+        """Delete least recently used entries until under ``max_size_bytes``."""
+        entries = [(p, p.stat()) for p in self.cache_dir.glob("*.parquet")]
+        total = sum(st.st_size for _, st in entries)
+        for path, st in sorted(entries, key=lambda e: e[1].st_mtime):
+            if total <= self.max_size_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+            logging.info(f"Evicted search cache entry {path.name}")
+
+    def clear(self) -> None:
+        """Remove every cache entry."""
+        for path in self.cache_dir.glob("*.parquet"):
+            path.unlink(missing_ok=True)
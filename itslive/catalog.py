@@ -0,0 +1,501 @@
+"""
+Tools to rewrite a STAC geoparquet catalog into a layout optimized for
+``serverless_search``.
+
+The optimized layout keeps the Hive-style H3 partitions that the search
+engines already understand::
+
+    {output}/grid=h3/level={resolution}/tile={hex_id}/part-0.parquet
+
+but every partition file is rewritten so that
+
+* rows are clustered spatially (Hilbert curve or H3 cell order) and by
+  ``datetime`` inside each spatial cluster,
+* row groups are small enough for min/max statistics to prune them,
+* a GeoParquet 1.1 ``bbox`` covering column is present, and
+* a ``_manifest.json`` at the catalog root records the extent, time range
+  and row counts of every partition.
+
+``serverless_search`` reads the manifest (when present) to pick partition
+files directly instead of probing every candidate prefix with
+``path_exists``.
+"""
+
+import copy
+import datetime
+import json
+import logging
+import math
+import os
+import pathlib
+import shutil
+import tempfile
+
+import numpy as np
+import s3fs
+from shapely.geometry import box, shape
+
+MANIFEST_NAME = "_manifest.json"
+MANIFEST_VERSION = 1
+
+_BBOX_FIELDS = ("xmin", "ymin", "xmax", "ymax")
+
+
+def _get_filesystem(href: str):
+    """Return an anonymous S3 filesystem for ``s3://`` hrefs, else ``None``."""
+    if href.startswith("s3://"):
+        return s3fs.S3FileSystem(anon=True)
+    return None
+
+
+def _fingerprint(path: str, fs=None) -> str:
+    """Size and modification time (or ETag) of a file."""
+    if fs is not None:
+        info = fs.info(path)
+        return json.dumps(
+            [info.get("size"), info.get("ETag") or info.get("LastModified")],
+            default=str,
+        )
+    st = os.stat(path)
+    return json.dumps([st.st_size, st.st_mtime_ns])
+
+
+def _list_parquet_files(href: str, fs=None) -> list[str]:
+    if fs is not None:
+        return sorted(fs.glob(f"{href.rstrip('/')}/**/*.parquet"))
+    return sorted(str(p) for p in pathlib.Path(href).rglob("*.parquet"))
+
+
+def _to_utc_iso(value) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="seconds") + "Z"
+
+
+def parse_datetime(value: str, end_of_day: bool = False) -> datetime.datetime:
+    """Parse an ISO 8601 date or datetime into a naive UTC ``datetime``.
+
+    Args:
+        value: ISO 8601 string, e.g. ``"2020-01-01"`` or
+            ``"2020-01-01T12:00:00Z"``.
+        end_of_day: When *value* is a bare date, return the last second of
+            that day instead of midnight (used for inclusive end dates).
+    """
+    value = value.strip()
+    if len(value) == 10:
+        parsed = datetime.datetime.fromisoformat(value)
+        if end_of_day:
+            parsed = parsed.replace(hour=23, minute=59, second=59)
+        return parsed
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def hilbert_index(x: np.ndarray, y: np.ndarray, order: int) -> np.ndarray:
+    """Vectorized Hilbert curve index for integer grid coordinates.
+
+    Args:
+        x: Integer x coordinates in ``[0, 2**order)``.
+        y: Integer y coordinates in ``[0, 2**order)``.
+        order: Number of bits per axis.
+
+    Returns:
+        ``int64`` array with the position of each (x, y) along the curve.
+    """
+    x = np.asarray(x, dtype=np.int64).copy()
+    y = np.asarray(y, dtype=np.int64).copy()
+    n = 1 << order
+    d = np.zeros_like(x)
+    s = n >> 1
+    while s > 0:
+        rx = ((x & s) > 0).astype(np.int64)
+        ry = ((y & s) > 0).astype(np.int64)
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve stays continuous.
+        flip = (ry == 0) & (rx == 1)
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        swap = ry == 0
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s >>= 1
+    return d
+
+
+def _bbox_arrays(table) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Return (xmin, ymin, xmax, ymax) numpy arrays for every row of *table*.
+
+    Uses the ``bbox`` covering column when it exists (struct or list form)
+    and falls back to computing bounds from the WKB ``geometry`` column.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import shapely
+
+    if "bbox" in table.column_names:
+        column = table.column("bbox").combine_chunks()
+        if pa.types.is_struct(column.type):
+            return tuple(
+                np.asarray(pc.struct_field(column, name).to_numpy(False), dtype=float)
+                for name in _BBOX_FIELDS
+            )
+        if pa.types.is_list(column.type) or pa.types.is_fixed_size_list(column.type):
+            values = np.asarray(
+                column.flatten().to_numpy(zero_copy_only=False), dtype=float
+            ).reshape(-1, 4)
+            return tuple(values[:, i] for i in range(4))
+
+    geoms = shapely.from_wkb(table.column("geometry").to_numpy(zero_copy_only=False))
+    bounds = shapely.bounds(geoms)
+    return tuple(bounds[:, i] for i in range(4))
+
+
+def _with_bbox_covering(table):
+    """Return *table* with a struct ``bbox`` covering column."""
+    import pyarrow as pa
+
+    xmin, ymin, xmax, ymax = _bbox_arrays(table)
+    bbox = pa.StructArray.from_arrays(
+        [pa.array(a, type=pa.float64()) for a in (xmin, ymin, xmax, ymax)],
+        names=list(_BBOX_FIELDS),
+    )
+    if "bbox" in table.column_names:
+        return table.set_column(table.column_names.index("bbox"), "bbox", bbox)
+    return table.append_column("bbox", bbox)
+
+
+def _geo_metadata_with_covering(metadata: dict | None) -> dict:
+    geo = json.loads(metadata[b"geo"]) if metadata and b"geo" in metadata else None
+    if geo is None:
+        geo = {
+            "primary_column": "geometry",
+            "columns": {"geometry": {"encoding": "WKB", "geometry_types": []}},
+        }
+    geo["version"] = "1.1.0"
+    primary = geo.get("primary_column", "geometry")
+    geo["columns"].setdefault(primary, {"encoding": "WKB", "geometry_types": []})
+    geo["columns"][primary]["covering"] = {
+        "bbox": {name: ["bbox", name] for name in _BBOX_FIELDS}
+    }
+    return geo
+
+
+def _tile_ids(xmin, ymin, xmax, ymax, resolution: int) -> np.ndarray:
+    """Assign every row to the H3 cell containing its bbox center."""
+    import h3
+
+    cx = (xmin + xmax) / 2.0
+    cy = (ymin + ymax) / 2.0
+    return np.array(
+        [h3.latlng_to_cell(lat, lon, resolution) for lon, lat in zip(cx, cy)],
+        dtype=object,
+    )
+
+
+def _spatial_sort_key(
+    xmin, ymin, xmax, ymax, sort_by: str, precision: int
+) -> np.ndarray:
+    cx = (xmin + xmax) / 2.0
+    cy = (ymin + ymax) / 2.0
+    if sort_by == "hilbert":
+        n = (1 << precision) - 1
+        span_x = max(float(np.nanmax(cx) - np.nanmin(cx)), 1e-12)
+        span_y = max(float(np.nanmax(cy) - np.nanmin(cy)), 1e-12)
+        gx = np.floor((cx - np.nanmin(cx)) / span_x * n)
+        gy = np.floor((cy - np.nanmin(cy)) / span_y * n)
+        return hilbert_index(np.nan_to_num(gx), np.nan_to_num(gy), precision)
+    elif sort_by == "h3":
+        import h3
+
+        return np.array(
+            [
+                h3.str_to_int(h3.latlng_to_cell(lat, lon, precision))
+                for lon, lat in zip(cx, cy)
+            ],
+            dtype=np.uint64,
+        )
+    else:
+        raise NotImplementedError(f"Sort order {sort_by} not implemented.")
+
+
+def _partition_dir(tile: str, resolution: int, use_hive_partitions: bool) -> str:
+    if use_hive_partitions:
+        return f"grid=h3/level={resolution}/tile={tile}"
+    return str(int(tile, 16))
+
+
+def build_optimized_catalog(
+    source_href: str,
+    output_dir: str,
+    resolution: int = 1,
+    sort_by: str = "hilbert",
+    sort_precision: int | None = None,
+    row_group_size: int = 8192,
+    compression: str = "zstd",
+    use_hive_partitions: bool = True,
+    batch_size: int = 65536,
+) -> dict:
+    """
+    Rewrite a STAC geoparquet catalog into a sorted, compacted H3 layout.
+
+    Parameters
+    ----------
+    source_href : str
+        Root of the source geoparquet catalog, local path or ``s3://`` URI.
+        Every ``*.parquet`` file below it is read, whatever its layout.
+    output_dir : str
+        Local directory where the optimized catalog is written. Mirror it to
+        object storage afterwards if needed. Rebuilding into an existing
+        catalog replaces its partitions and removes the ones whose tile no
+        longer has rows; rows are staged in a temporary directory outside
+        of it.
+    resolution : int
+        H3 resolution of the output partitions.
+    sort_by : str
+        Spatial ordering inside each partition: ``"hilbert"`` (Hilbert curve
+        over bbox centers) or ``"h3"`` (H3 cell id order). Rows sharing a
+        spatial key are ordered by ``datetime``.
+    sort_precision : int, optional
+        Bits per axis for ``"hilbert"`` or the H3 resolution for ``"h3"``.
+        Coarser keys give longer ``datetime`` runs, finer keys tighter
+        bbox statistics. Defaults to 6 bits / ``resolution + 3``.
+    row_group_size : int
+        Maximum rows per parquet row group.
+    compression : str
+        Parquet compression codec.
+    use_hive_partitions : bool
+        Write ``grid=h3/level=/tile=`` directories (default) or the legacy
+        integer-prefix layout.
+    batch_size : int
+        Rows read from the source per batch while partitioning.
+
+    Returns
+    -------
+    dict
+        The partition manifest, also written to ``{output_dir}/_manifest.json``.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as pads
+    import pyarrow.parquet as pq
+
+    if sort_by not in ("hilbert", "h3"):
+        raise NotImplementedError(f"Sort order {sort_by} not implemented.")
+    if sort_precision is None:
+        sort_precision = 6 if sort_by == "hilbert" else resolution + 3
+
+    fs = _get_filesystem(source_href)
+    files = _list_parquet_files(source_href, fs)
+    if not files:
+        raise FileNotFoundError(f"No parquet files found under {source_href}")
+
+    schemas = [pq.read_schema(f, filesystem=fs) for f in files]
+    geo_metadata = _geo_metadata_with_covering(schemas[0].metadata)
+    schema = pa.unify_schemas(schemas).remove_metadata()
+    dataset = pads.dataset(files, schema=schema, format="parquet", filesystem=fs)
+
+    output = pathlib.Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    # Staged rows never land in the output, even when the build fails
+    staging = pathlib.Path(tempfile.mkdtemp(prefix="itslive-catalog-"))
+    try:
+        # Pass 1: spill rows into one staging file per output partition so
+        # that memory stays bounded by the largest partition, not the whole
+        # catalog.
+        writers = {}
+        try:
+            for batch in dataset.to_batches(batch_size=batch_size):
+                if batch.num_rows == 0:
+                    continue
+                table = _with_bbox_covering(pa.Table.from_batches([batch]))
+                tiles = _tile_ids(*_bbox_arrays(table), resolution)
+                for tile in np.unique(tiles):
+                    part = table.filter(pa.array(tiles == tile))
+                    if tile not in writers:
+                        writers[tile] = pq.ParquetWriter(
+                            staging / f"{tile}.parquet", part.schema
+                        )
+                    writers[tile].write_table(part)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        # Pass 2: sort every partition and write it with small row groups.
+        partitions = []
+        for tile in sorted(writers):
+            staged = staging / f"{tile}.parquet"
+            table = pq.read_table(staged)
+            xmin, ymin, xmax, ymax = _bbox_arrays(table)
+            spatial_key = _spatial_sort_key(
+                xmin, ymin, xmax, ymax, sort_by, sort_precision
+            )
+            if "datetime" in table.column_names:
+                order = np.lexsort(
+                    (
+                        table.column("datetime").to_numpy(zero_copy_only=False),
+                        spatial_key,
+                    )
+                )
+            else:
+                order = np.argsort(spatial_key, kind="stable")
+            table = table.take(pa.array(order))
+            table = table.replace_schema_metadata(
+                {b"geo": json.dumps(geo_metadata).encode("utf-8")}
+            )
+
+            directory = _partition_dir(tile, resolution, use_hive_partitions)
+            relative = f"{directory}/part-0.parquet"
+            target = output / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            pq.write_table(
+                table,
+                target,
+                row_group_size=row_group_size,
+                compression=compression,
+                write_statistics=True,
+            )
+            staged.unlink()
+
+            entry = {
+                "path": relative,
+                "tile": tile,
+                "num_rows": table.num_rows,
+                "num_row_groups": math.ceil(table.num_rows / row_group_size),
+                "bbox": [
+                    float(np.nanmin(xmin)),
+                    float(np.nanmin(ymin)),
+                    float(np.nanmax(xmax)),
+                    float(np.nanmax(ymax)),
+                ],
+                "datetime": [None, None],
+            }
+            if "datetime" in table.column_names:
+                bounds = pc.min_max(table.column("datetime"))
+                entry["datetime"] = [
+                    _to_utc_iso(bounds["min"].as_py()),
+                    _to_utc_iso(bounds["max"].as_py()),
+                ]
+            partitions.append(entry)
+            logging.info(f"Partition {tile}: {table.num_rows} rows -> {relative}")
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    # Staging files left in the output by an interrupted older build and
+    # partitions of a previous build whose tile has no rows anymore
+    shutil.rmtree(output / "_staging", ignore_errors=True)
+    written = {p["path"] for p in partitions}
+    for path in list(output.rglob("part-*.parquet")):
+        relative = path.relative_to(output).as_posix()
+        if relative not in written:
+            logging.info(f"Removing stale partition {relative}")
+            path.unlink()
+            for parent in path.parents:
+                if parent == output or any(parent.iterdir()):
+                    break
+                parent.rmdir()
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created": _to_utc_iso(datetime.datetime.now(datetime.timezone.utc)),
+        "source": source_href,
+        "partition_type": "h3",
+        "resolution": resolution,
+        "use_hive_partitions": use_hive_partitions,
+        "sort_by": sort_by,
+        "sort_precision": sort_precision,
+        "row_group_size": row_group_size,
+        "covering": geo_metadata["columns"][geo_metadata["primary_column"]]["covering"],
+        "num_rows": sum(p["num_rows"] for p in partitions),
+        "partitions": partitions,
+    }
+    with open(output / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+    _MANIFESTS.clear()
+    return manifest
+
+
+# Parsed manifests by href, with the fingerprint of the file they came from
+_MANIFESTS: dict[str, tuple[str, dict]] = {}
+_MAX_MANIFESTS = 16
+
+
+def read_partition_manifest(base_href: str) -> dict | None:
+    """
+    Load ``_manifest.json`` from the root of a geoparquet catalog.
+
+    Returns ``None`` when the catalog has no manifest (e.g. it was not built
+    with ``build_optimized_catalog``) or the manifest cannot be read.
+    Parsed manifests are reused while the file's size and modification time
+    (or ETag) are unchanged; every call returns its own copy.
+    """
+    href = f"{base_href.rstrip('/')}/{MANIFEST_NAME}"
+    fs = _get_filesystem(href)
+    try:
+        if fs is None and not os.path.exists(href):
+            return None
+        fingerprint = _fingerprint(href, fs)
+        cached = _MANIFESTS.get(href)
+        if cached is not None and cached[0] == fingerprint:
+            return copy.deepcopy(cached[1])
+        if fs is not None:
+            with fs.open(href, "r") as f:
+                manifest = json.load(f)
+        else:
+            with open(href) as f:
+                manifest = json.load(f)
+    except Exception as e:
+        # Not cached: a transient error must not hide the manifest later
+        logging.debug(f"No usable partition manifest at {href}: {e}")
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        logging.warning(f"Ignoring manifest {href} with unknown version.")
+        return None
+    _MANIFESTS.pop(href, None)
+    if len(_MANIFESTS) >= _MAX_MANIFESTS:
+        _MANIFESTS.pop(next(iter(_MANIFESTS)))
+    _MANIFESTS[href] = (fingerprint, manifest)
+    return copy.deepcopy(manifest)
+
+
+def select_manifest_partitions(
+    manifest: dict,
+    base_href: str,
+    geojson_geometry: dict,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> list[str]:
+    """
+    Return the partition files whose extent and time range overlap the query.
+
+    Args:
+        manifest: Manifest dict as returned by ``read_partition_manifest``.
+        base_href: Catalog root the manifest paths are relative to.
+        geojson_geometry: GeoJSON geometry of the region of interest.
+        start_date: Inclusive ISO 8601 start of the query window.
+        end_date: Inclusive ISO 8601 end of the query window.
+
+    Returns:
+        Full paths of the matching parquet files.
+    """
+    geom = shape(geojson_geometry)
+    if not geom.is_valid:
+        geom = geom.buffer(0)
+    start = parse_datetime(start_date) if start_date else None
+    end = parse_datetime(end_date, end_of_day=True) if end_date else None
+
+    selected = []
+    for partition in manifest["partitions"]:
+        if not geom.intersects(box(*partition["bbox"])):
+            continue
+        first, last = partition.get("datetime") or (None, None)
+        if end is not None and first is not None and parse_datetime(first) > end:
+            continue
+        if start is not None and last is not None and parse_datetime(last) < start:
+            continue
+        selected.append(f"{base_href.rstrip('/')}/{partition['path']}")
+    return selected
@@ -1,3 +1,5 @@
+import datetime
+
 import pandas as pd
 import rich_click as click
 
@@ -42,6 +44,17 @@ def validate_longitude(ctx, param, lon):
     return lon
 
 
+def validate_date(ctx, param, value):
+    if value:
+        try:
+            return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise click.BadParameter(
+                "date must be in YYYY-MM-DD format, e.g., 2020-01-01"
+            )
+    return value
+
+
 def validate_csv(ctx, param, value):
     if value:
         try:
@@ -0,0 +1,134 @@
+import rich_click as click
+from rich import print as rprint
+
+# Use Rich markup
+click.rich_click.USE_RICH_MARKUP = True
+
+
+@click.group()
+def catalog():
+    """
+    Maintain local or mirrored ITS_LIVE geoparquet catalogs.
+    """
+
+
+@catalog.command()
+@click.argument("source_href")
+@click.argument("output_dir", type=click.Path(file_okay=False))
+@click.option(
+    "--resolution",
+    type=int,
+    default=1,
+    show_default=True,
+    help="H3 resolution of the output partitions",
+)
+@click.option(
+    "--sort-by",
+    type=click.Choice(["hilbert", "h3"], case_sensitive=False),
+    default="hilbert",
+    show_default=True,
+    help="Spatial ordering of rows inside each partition",
+)
+@click.option(
+    "--sort-precision",
+    type=int,
+    help=(
+        "Bits per axis for hilbert or H3 resolution for h3 "
+        "[dim](default: 6 / resolution + 3)[/]"
+    ),
+)
+@click.option(
+    "--row-group-size",
+    type=int,
+    default=8192,
+    show_default=True,
+    help="Maximum rows per parquet row group",
+)
+@click.option(
+    "--compression",
+    type=str,
+    default="zstd",
+    show_default=True,
+    help="Parquet compression codec",
+)
+@click.option(
+    "--legacy-partitions",
+    is_flag=True,
+    help="Write integer-prefix partition directories instead of Hive-style ones",
+)
+def build(
+    source_href,
+    output_dir,
+    resolution,
+    sort_by,
+    sort_precision,
+    row_group_size,
+    compression,
+    legacy_partitions,
+):
+    """
+    Rewrite the geoparquet catalog at SOURCE_HREF into OUTPUT_DIR using a
+    sorted, compacted H3 layout plus a partition manifest.
+
+    [bold]Example:[/]
+
+      $ itslive-catalog build s3://its-live-data/test-space/stac/geoparquet/h3r1 \\
+          ./h3r1-optimized --resolution 1 --sort-by hilbert
+    """
+    from itslive.catalog import build_optimized_catalog
+
+    manifest = build_optimized_catalog(
+        source_href,
+        output_dir,
+        resolution=resolution,
+        sort_by=sort_by,
+        sort_precision=sort_precision,
+        row_group_size=row_group_size,
+        compression=compression,
+        use_hive_partitions=not legacy_partitions,
+    )
+    rprint(
+        f"[green]Wrote {manifest['num_rows']} items in "
+        f"{len(manifest['partitions'])} partitions to {output_dir}[/]"
+    )
+
+
+@catalog.command()
+@click.argument("catalog_href")
+@click.option(
+    "--resolution",
+    type=int,
+    default=3,
+    show_default=True,
+    help="H3 resolution of the index cells",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    help="Coverage index directory [dim](default: ~/.cache/itslive/coverage)[/]",
+)
+@click.option(
+    "--full",
+    is_flag=True,
+    help="Re-read every parquet file instead of only new and changed ones",
+)
+def coverage(catalog_href, resolution, cache_dir, full):
+    """
+    Build or refresh the coverage index of the geoparquet catalog at
+    CATALOG_HREF: granule counts and mean valid-pixel percentage per
+    H3 cell, year, month and platform, cached locally for
+    itslive.velocity_pairs.coverage(..., index=...).
+
+    [bold]Example:[/]
+
+      $ itslive-catalog coverage s3://its-live-data/test-space/stac/geoparquet/h3r1
+    """
+    from itslive.coverage import CoverageIndex
+
+    index = CoverageIndex(catalog_href, resolution=resolution, cache_dir=cache_dir)
+    summary = index.build(full=full)
+    rprint(
+        f"[green]Indexed {summary['files']} files ({summary['read']} read, "
+        f"{summary['unchanged']} unchanged, {summary['removed']} removed) "
+        f"into {summary['rows']} rows at {index.path}[/]"
+    )
@@ -5,6 +5,7 @@ import itslive
 from itslive.cli._shared import (
     Mutex,
     validate_csv,
+    validate_date,
     validate_latitude,
     validate_longitude,
 )
@@ -13,15 +14,25 @@ from itslive.cli._shared import (
 click.rich_click.USE_RICH_MARKUP = True
 
 
-def export_time_series(points, variables, format, outdir):
-    if format == "csv":
-        itslive.velocity_cubes.export_csv(points, variables, outdir)
+def export_time_series(
+    points, variables, format, outdir, compression="zstd", **time_filters
+):
+    if format in ("ndjson", "arrow-ipc") or (format == "csv" and outdir == "-"):
+        itslive.velocity_cubes.export_stream(
+            points, variables, format=format, **time_filters
+        )
+    elif format == "csv":
+        itslive.velocity_cubes.export_csv(points, variables, outdir, **time_filters)
     elif format == "netcdf":
-        itslive.velocity_cubes.export_netcdf(points, variables, outdir)
+        itslive.velocity_cubes.export_netcdf(points, variables, outdir, **time_filters)
     elif format == "parquet":
-        itslive.velocity_cubes.export_parquet(points, variables, outdir)
+        itslive.velocity_cubes.export_parquet(points, variables, outdir, **time_filters)
+    elif format == "zarr":
+        itslive.velocity_cubes.export_zarr(
+            points, variables, outdir, compression=compression, **time_filters
+        )
     else:
-        itslive.velocity_cubes.export_stdout(points, variables)
+        itslive.velocity_cubes.export_stdout(points, variables, **time_filters)
     return None
 
 
@@ -66,19 +77,78 @@ def export_time_series(points, variables, format, outdir):
 @click.option(
     "--outdir",
     type=str,
-    help="output directory",
+    help=(
+        "output directory [dim](a .zarr store path with --format zarr, "
+        "- to stream csv to stdout)[/]"
+    ),
 )
 @click.option(
     "--format",
-    type=click.Choice(["csv", "netcdf", "parquet", "stdout"]),
-    help="export to fortmat",
+    type=click.Choice(
+        ["csv", "netcdf", "parquet", "zarr", "stdout", "ndjson", "arrow-ipc"]
+    ),
+    help=(
+        "export to fortmat [dim](ndjson and arrow-ipc stream to stdout as "
+        "each batch of points is read)[/]"
+    ),
+)
+@click.option(
+    "--compression",
+    type=click.Choice(["zstd", "blosc", "gzip", "none"]),
+    default="zstd",
+    help="Compression of the zarr store [dim](--format zarr)[/]",
+)
+@click.option(
+    "--start",
+    callback=validate_date,
+    help="Only export layers with mid_date on or after this date (YYYY-MM-DD)",
+)
+@click.option(
+    "--end",
+    callback=validate_date,
+    help="Only export layers with mid_date on or before this date (YYYY-MM-DD)",
+)
+@click.option(
+    "--min-interval",
+    type=int,
+    help="Minimum image pair separation (date_dt) in days",
+)
+@click.option(
+    "--max-interval",
+    type=int,
+    help="Maximum image pair separation (date_dt) in days",
+)
+@click.option(
+    "--mission",
+    multiple=True,
+    help="Only export these missions [dim](e.g., landsatOLI, sentinel1, sentinel2)[/]",
+)
+@click.option(
+    "--satellite",
+    multiple=True,
+    help="Only export these satellites as in satellite_img1 [dim](e.g., 1A, 2B, 8)[/]",
 )
 @click.option(
     "--debug",
     is_flag=True,
     help="Verbose output",
 )
-def export(input_coordinates, lat, lon, variables, outdir, format, debug):
+def export(
+    input_coordinates,
+    lat,
+    lon,
+    variables,
+    outdir,
+    format,
+    compression,
+    start,
+    end,
+    min_interval,
+    max_interval,
+    mission,
+    satellite,
+    debug,
+):
     """
     ITS_LIVE Global Glacier Veolocity
 
@@ -98,6 +168,18 @@ def export(input_coordinates, lat, lon, variables, outdir, format, debug):
             points.append((lon, lat))
 
     if len(points) and format is not None:
-        export_time_series(points, variables, format, outdir)
+        export_time_series(
+            points,
+            variables,
+            format,
+            outdir,
+            compression=compression,
+            start=start,
+            end=end,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            mission=list(mission) or None,
+            satellite=list(satellite) or None,
+        )
     else:
         rprint(" At least one set of coordinates are needed, --help")
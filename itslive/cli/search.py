@@ -1,12 +1,12 @@
 import csv
-import datetime
 import json
 import sys
 
 import rich_click as click
 from rich import print as rprint
 
-from itslive.cli._shared import Mutex
+from itslive.cli._shared import Mutex, validate_date
+from itslive.engines import available_engines
 from itslive.search import EQ, GT, GTE, LT, LTE, NEQ
 
 # Use Rich markup
@@ -49,17 +49,6 @@ def validate_polygon(ctx, param, value):
     return value
 
 
-def validate_date(ctx, param, value):
-    if value:
-        try:
-            return datetime.datetime.strptime(value, "%Y-%m-%d").date()
-        except ValueError:
-            raise click.BadParameter(
-                "date must be in YYYY-MM-DD format, e.g., 2020-01-01"
-            )
-    return value
-
-
 def validate_filter(ctx, param, value):
     """
     Parse filter string(s) in format 'property:operator:value'.
@@ -140,11 +129,139 @@ def validate_filter(ctx, param, value):
     return result
 
 
+def validate_properties(ctx, param, value):
+    if value:
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        if not names:
+            raise click.BadParameter("properties must be e.g. datetime,platform")
+        return names
+    return []
+
+
+# Rows per record batch / row group of the binary formats
+_BATCH_SIZE = 10_000
+
+
+def _records(results):
+    """Search results as dicts with a ``url`` key."""
+    for result in results:
+        yield result if isinstance(result, dict) else {"url": result}
+
+
+def _write_json_array(items, out):
+    """Write *items* as an indented JSON array without buffering them."""
+    first = True
+    out.write("[")
+    for item in items:
+        out.write("\n  " if first else ",\n  ")
+        out.write(json.dumps(item))
+        first = False
+    out.write("]\n" if first else "\n]\n")
+
+
+def _column_type(name):
+    """Arrow type of an output column of the binary formats.
+
+    The ITEM_PROPERTIES fields have fixed types; any other column is
+    written as strings (JSON for non-string values).
+    """
+    import pyarrow as pa
+
+    return {
+        "datetime": pa.timestamp("us", tz="UTC"),
+        "date_dt": pa.float64(),
+        "percent_valid_pixels": pa.float64(),
+        "bbox": pa.list_(pa.float64()),
+    }.get(name, pa.string())
+
+
+def _column(values, type):
+    """Arrow array of one output column of type *type*."""
+    import pyarrow as pa
+
+    from itslive.catalog import parse_datetime
+
+    if pa.types.is_timestamp(type):
+        values = [None if v is None else parse_datetime(v) for v in values]
+    elif pa.types.is_string(type):
+        values = [
+            v if v is None or isinstance(v, str) else json.dumps(v) for v in values
+        ]
+    return pa.array(values, type)
+
+
+def _write_tables(records, format, out, columns, batch_size=None):
+    """Write *records* as an Arrow IPC stream or a parquet file in batches.
+
+    The schema is fixed up front from the *columns* names (see
+    ``_column_type``), so a column without values in
+    the first batch cannot clash with a later one; memory is bounded by
+    one batch of *batch_size* rows (default ``_BATCH_SIZE``).
+    """
+    import itertools
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    batch_size = batch_size or _BATCH_SIZE
+    schema = pa.schema([(name, _column_type(name)) for name in columns])
+    if format == "parquet":
+        writer = pq.ParquetWriter(out, schema)
+    else:
+        writer = pa.ipc.new_stream(out, schema)
+    while batch := list(itertools.islice(records, batch_size)):
+        arrays = [
+            _column([record.get(field.name) for record in batch], field.type)
+            for field in schema
+        ]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        out.flush()
+    writer.close()
+    out.flush()
+
+
+def _write_results(results, format, properties):
+    """Stream search results to stdout in *format*."""
+    if format == "url":
+        for result in results:
+            print(result["url"] if isinstance(result, dict) else result)
+    elif format == "json":
+        _write_json_array(results, sys.stdout)
+    elif format == "ndjson":
+        for record in _records(results):
+            sys.stdout.write(json.dumps(record) + "\n")
+    elif format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["url", "filename", *properties])
+        for record in _records(results):
+            values = [record.get(name) for name in properties]
+            writer.writerow(
+                [
+                    record["url"],
+                    record["url"].split("/")[-1],
+                    *(json.dumps(v) if isinstance(v, list) else v for v in values),
+                ]
+            )
+    else:
+        sys.stdout.flush()
+        _write_tables(
+            _records(results), format, sys.stdout.buffer, ["url", *properties]
+        )
+
+
+def _close_stdout():
+    """Point stdout at devnull after the reader went away (e.g. ``| head``)."""
+    import os
+
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+
+
 @click.command()
 @click.option(
     "--bbox",
     cls=Mutex,
-    not_required_if=["polygon"],
+    not_required_if=["polygon", "rois"],
     callback=validate_bbox,
     help=(
         "Bounding box as 'min_lon,min_lat,max_lon,max_lat'. "
@@ -154,16 +271,34 @@ def validate_filter(ctx, param, value):
 @click.option(
     "--polygon",
     cls=Mutex,
-    not_required_if=["bbox"],
+    not_required_if=["bbox", "rois"],
     callback=validate_polygon,
     help=(
         "Polygon as comma-separated lon,lat pairs. "
         "[dim]Example: lon1,lat1,lon2,lat2,lon3,lat3,lon1,lat1[/]"
     ),
 )
+@click.option(
+    "--rois",
+    cls=Mutex,
+    not_required_if=["bbox", "polygon"],
+    type=click.Path(exists=True, dir_okay=False),
+    help=(
+        "GeoJSON FeatureCollection or GeoParquet file with many regions of "
+        "interest, searched in one pass. Outputs roi_id,url rows "
+        "(and the --properties fields). "
+        "[dim]Example: glaciers.geojson[/]"
+    ),
+)
+@click.option(
+    "--roi-id-property",
+    default="id",
+    show_default=True,
+    help="Feature property (or GeoParquet column) identifying each ROI in --rois",
+)
 @click.option(
     "--engine",
-    type=click.Choice(["stac", "duckdb", "rustac"], case_sensitive=False),
+    type=click.Choice(available_engines(), case_sensitive=False),
     default="stac",
     help=(
         "Search engine backend. "
@@ -268,14 +403,49 @@ def validate_filter(ctx, param, value):
 )
 @click.option(
     "--format",
-    type=click.Choice(["url", "json", "csv"], case_sensitive=False),
+    type=click.Choice(
+        ["url", "json", "csv", "ndjson", "arrow-ipc", "parquet"], case_sensitive=False
+    ),
     default="url",
-    help="Output format [dim]url: one URL per line (default), json: JSON array, csv: CSV with metadata[/]",
+    help=(
+        "Output format [dim]url: one URL per line (default), json: JSON array, "
+        "csv: CSV with metadata, ndjson: one JSON object per line, "
+        "arrow-ipc/parquet: binary tables written in batches[/]"
+    ),
+)
+@click.option(
+    "--properties",
+    callback=validate_properties,
+    help=(
+        "Comma-separated item fields to output with each URL "
+        "[dim](json, csv, ndjson, arrow-ipc, parquet). Example: "
+        "datetime,date_dt,platform,percent_valid_pixels,proj:code,bbox[/]"
+    ),
 )
 @click.option(
     "--count-only",
     is_flag=True,
-    help="Only print the count of matching URLs, don't output URLs",
+    help=(
+        "Only print the count of matching URLs, computed by the catalog "
+        "[dim](COUNT(*) for duckdb, numberMatched for the STAC API)[/]"
+    ),
+)
+@click.option(
+    "--cache",
+    is_flag=True,
+    help="Reuse cached results of identical searches [dim](stored under --cache-dir)[/]",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    help="Search cache directory [dim](default: ~/.cache/itslive/search)[/]",
+)
+@click.option(
+    "--cache-ttl",
+    type=float,
+    default=24 * 3600,
+    show_default=True,
+    help="Seconds before a cached result is refreshed",
 )
 @click.option(
     "--quiet",
@@ -286,6 +456,8 @@ def validate_filter(ctx, param, value):
 def search(
     bbox,
     polygon,
+    rois,
+    roi_id_property,
     engine,
     collection,
     percent_valid_pixels,
@@ -302,7 +474,11 @@ def search(
     use_hive_partitions,
     filters,
     format,
+    properties,
     count_only,
+    cache,
+    cache_dir,
+    cache_ttl,
     quiet,
 ):
     """
@@ -335,6 +511,13 @@ def search(
 
       [dim]# Example 6: Count results only[/]
       $ itslive-search --bbox -50,65,-40,75 --count-only
+
+      [dim]# Example 7: Reuse results of an identical search for up to an hour[/]
+      $ itslive-search --bbox -50,65,-40,75 --cache --cache-ttl 3600
+
+      [dim]# Example 8: Search many glacier outlines at once[/]
+      $ itslive-search --rois glaciers.geojson --roi-id-property rgi_id \\
+          --engine duckdb > roi_urls.csv
     """
     import itslive
 
@@ -358,9 +541,33 @@ def search(
     if base_catalog_href:
         stac_kwargs["base_catalog_href"] = base_catalog_href
 
+    if cache:
+        from itslive.cache import SearchCache
+
+        stac_kwargs["cache"] = SearchCache(cache_dir=cache_dir, ttl=cache_ttl)
+
+    if rois:
+        _search_batch(
+            rois,
+            roi_id_property,
+            format=format,
+            count_only=count_only,
+            quiet=quiet,
+            properties=properties,
+            percent_valid_pixels=percent_valid_pixels,
+            mission=mission,
+            start=start,
+            end=end,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            engine=engine,
+            **stac_kwargs,
+        )
+        return
+
     # Validate required parameters
     if not bbox and not polygon:
-        rprint("[red]Error: Either --bbox or --polygon is required[/]")
+        rprint("[red]Error: Either --bbox, --polygon or --rois is required[/]")
         sys.exit(1)
 
     # Build geometry parameter
@@ -371,6 +578,25 @@ def search(
         geometry_arg = None
         bbox_arg = bbox
 
+    if count_only:
+        # The catalog counts the matches; no URL is transferred
+        stac_kwargs.pop("cache", None)
+        print(
+            itslive.velocity_pairs.count(
+                bbox=bbox_arg,
+                polygon=geometry_arg,
+                percent_valid_pixels=percent_valid_pixels,
+                mission=mission,
+                start=start,
+                end=end,
+                min_interval=min_interval,
+                max_interval=max_interval,
+                engine=engine,
+                **stac_kwargs,
+            )
+        )
+        return
+
     # Perform streaming search
     url_generator = itslive.velocity_pairs.find_streaming(
         bbox=bbox_arg,
@@ -382,6 +608,7 @@ def search(
         min_interval=min_interval,
         max_interval=max_interval,
         engine=engine,
+        properties=properties if format != "url" else None,
         **stac_kwargs,
     )
 
@@ -389,40 +616,72 @@ def search(
     if not quiet:
         rprint(f"[dim]Using {engine.upper()} engine[/]")
 
-    if format == "json":
-        urls_list = []
-        for url in url_generator:
-            urls_list.append(url)
+    total = 0
 
-        if count_only:
-            print(len(urls_list))
-        else:
-            print(json.dumps(urls_list, indent=2))
+    def counted(results):
+        nonlocal total
+        for result in results:
+            total += 1
+            yield result
 
-    elif format == "csv":
-        writer = None
-        for i, url in enumerate(url_generator):
-            if count_only:
-                pass
-            else:
-                # Extract filename from URL
-                filename = url.split("/")[-1]
-
-                if writer is None:
-                    writer = csv.writer(sys.stdout)
-                    writer.writerow(["url", "filename"])
-
-                writer.writerow([url, filename])
-
-        if count_only and url_generator:
-            print(i + 1)
-
-    else:  # url format (default)
-        count = 0
-        for url in url_generator:
-            count += 1
-            if not count_only:
-                print(url)
-
-        if not quiet:
-            rprint(f"[green]Total URLs: {count}[/]")
+    try:
+        _write_results(counted(url_generator), format, properties)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        _close_stdout()
+        return
+
+    if not quiet:
+        rprint(f"[green]Total URLs: {total}[/]", file=sys.stderr)
+
+
+def _search_batch(
+    rois, roi_id_property, format, count_only, quiet, properties, **find_kwargs
+):
+    """Stream (roi_id, url) matches of a multi-ROI search to stdout."""
+    import itslive
+
+    if find_kwargs.pop("cache", None) is not None and not quiet:
+        rprint("[yellow]--cache is ignored for --rois searches[/]")
+
+    pairs = itslive.velocity_pairs.find_batch(
+        rois,
+        roi_id_property=roi_id_property,
+        properties=None if count_only else properties,
+        **find_kwargs,
+    )
+
+    if count_only:
+        print(sum(1 for _ in pairs))
+        return
+
+    records = (
+        {"roi_id": roi_id, **(result if isinstance(result, dict) else {"url": result})}
+        for roi_id, result in pairs
+    )
+    try:
+        if format == "json":
+            _write_json_array(records, sys.stdout)
+        elif format == "ndjson":
+            for record in records:
+                sys.stdout.write(json.dumps(record) + "\n")
+        elif format in ("arrow-ipc", "parquet"):
+            sys.stdout.flush()
+            _write_tables(
+                records, format, sys.stdout.buffer, ["roi_id", "url", *properties]
+            )
+        else:
+            writer = csv.writer(sys.stdout)
+            writer.writerow(["roi_id", "url", *properties])
+            for record in records:
+                values = [record.get(name) for name in properties]
+                writer.writerow(
+                    [
+                        record["roi_id"],
+                        record["url"],
+                        *(json.dumps(v) if isinstance(v, list) else v for v in values),
+                    ]
+                )
+        sys.stdout.flush()
+    except BrokenPipeError:
+        _close_stdout()
@@ -0,0 +1,443 @@
+"""
+Precomputed coverage summary of a STAC geoparquet catalog.
+
+The coverage index holds one row per (footprint, year, month, platform)
+with the number of granules and the sum and number of their
+``percent_valid_pixels`` values, so the mean of any group of rows only
+weighs the granules that have one. The footprint of a granule is the set of H3 cells its bbox overlaps, so a
+region counts every granule touching it exactly once, however small the
+region or large the granule. The index is built once from the geoparquet
+catalog and cached locally, so coverage maps and histograms for any region
+come from a small table lookup instead of a catalog scan::
+
+    {cache_dir}/{catalog hash}-r{resolution}/
+        coverage.parquet      # the index
+        _sources.json         # fingerprint of every source parquet file
+        parts/{file hash}.parquet
+
+Every source file contributes one partial aggregate under ``parts/``. A
+refresh only reads the source files that are new or whose fingerprint
+(size and modification time or ETag) changed, drops the parts of removed
+files and recombines the parts into ``coverage.parquet``.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+
+import numpy as np
+
+from itslive.catalog import (
+    _bbox_arrays,
+    _fingerprint,
+    _get_filesystem,
+    _list_parquet_files,
+    parse_datetime,
+)
+
+DEFAULT_COVERAGE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "itslive", "coverage"
+)
+INDEX_NAME = "coverage.parquet"
+SOURCES_NAME = "_sources.json"
+
+_KEYS = ["cells", "year", "month", "platform"]
+# Version of the index layout; indexes of another version are rebuilt
+_FORMAT = 3
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+def _footprints(xmin, ymin, xmax, ymax, resolution: int) -> list[str]:
+    """Comma-joined sorted H3 cells overlapped by every bbox."""
+    import h3
+
+    footprints = []
+    known = {}
+    for bounds in zip(xmin, ymin, xmax, ymax):
+        if bounds not in known:
+            x0, y0, x1, y1 = bounds
+            shape = h3.LatLngPoly([(y0, x0), (y0, x1), (y1, x1), (y1, x0)])
+            known[bounds] = ",".join(
+                sorted(h3.h3shape_to_cells_experimental(shape, resolution, "overlap"))
+            )
+        footprints.append(known[bounds])
+    return footprints
+
+
+def _aggregate_file(path: str, resolution: int, fs=None, batch_size: int = 65536):
+    """Partial coverage aggregate of one source parquet file.
+
+    Returns a table with the ``_KEYS`` columns plus ``count``,
+    ``valid_sum`` and ``valid_count`` (sum and number of non-null
+    ``percent_valid_pixels``), one row per key.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as pads
+
+    dataset = pads.dataset(path, format="parquet", filesystem=fs)
+    names = dataset.schema.names
+    columns = [
+        name
+        for name in ("bbox", "datetime", "platform", "percent_valid_pixels")
+        if name in names
+    ]
+    if "bbox" not in names:
+        columns.append("geometry")
+
+    parts = []
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if batch.num_rows == 0:
+            continue
+        table = pa.Table.from_batches([batch])
+        n = table.num_rows
+        dates = table.column("datetime") if "datetime" in columns else None
+        valid = (
+            table.column("percent_valid_pixels").cast(pa.float64())
+            if "percent_valid_pixels" in columns
+            else pa.nulls(n, pa.float64())
+        )
+        rows = pa.table(
+            {
+                "cells": pa.array(
+                    _footprints(*_bbox_arrays(table), resolution), pa.string()
+                ),
+                "year": (
+                    pc.year(dates).cast(pa.int16())
+                    if dates is not None
+                    else pa.nulls(n, pa.int16())
+                ),
+                "month": (
+                    pc.month(dates).cast(pa.int8())
+                    if dates is not None
+                    else pa.nulls(n, pa.int8())
+                ),
+                "platform": (
+                    table.column("platform").cast(pa.string())
+                    if "platform" in columns
+                    else pa.nulls(n, pa.string())
+                ),
+                "count": pa.array(np.ones(n, dtype=np.int64)),
+                "valid": valid,
+            }
+        )
+        parts.append(
+            rows.group_by(_KEYS).aggregate(
+                [("count", "sum"), ("valid", "sum"), ("valid", "count")]
+            )
+        )
+
+    schema = pa.schema(
+        [
+            ("cells", pa.string()),
+            ("year", pa.int16()),
+            ("month", pa.int8()),
+            ("platform", pa.string()),
+            ("count", pa.int64()),
+            ("valid_sum", pa.float64()),
+            ("valid_count", pa.int64()),
+        ]
+    )
+    if not parts:
+        return schema.empty_table()
+    return _combine(pa.concat_tables(parts), ["count_sum", "valid_sum", "valid_count"])
+
+
+def _combine(table, sums: list[str]):
+    """Sum the partial aggregates of *table* per ``_KEYS``."""
+    import pyarrow as pa
+
+    grouped = table.group_by(_KEYS).aggregate([(name, "sum") for name in sums])
+    return pa.table(
+        {
+            **{key: grouped.column(key) for key in _KEYS},
+            "count": grouped.column(f"{sums[0]}_sum"),
+            "valid_sum": grouped.column(f"{sums[1]}_sum").cast(pa.float64()),
+            "valid_count": grouped.column(f"{sums[2]}_sum"),
+        }
+    )
+
+
+class CoverageIndex:
+    """
+    Granule counts of a geoparquet catalog per H3 cell, year, month and
+    platform, cached locally.
+
+    Args:
+        catalog_href: Root of the geoparquet catalog, local path or
+            ``s3://`` URI. Every ``*.parquet`` file below it is indexed.
+        resolution: H3 resolution of the index cells.
+        cache_dir: Directory holding the indexes.
+
+    Example::
+
+        index = CoverageIndex("s3://its-live-data/test-space/stac/geoparquet/h3r1")
+        index.build()  # reads only new or changed files after the first time
+        index.query(roi, start="2018-01-01", group_by=("year", "platform"))
+    """
+
+    def __init__(
+        self,
+        catalog_href: str,
+        resolution: int = 3,
+        cache_dir: str | None = None,
+    ):
+        self.catalog_href = catalog_href.rstrip("/")
+        self.resolution = resolution
+        self.directory = pathlib.Path(cache_dir or DEFAULT_COVERAGE_DIR) / (
+            f"{_hash(self.catalog_href)}-r{resolution}"
+        )
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self.directory / INDEX_NAME
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _read_sources(self) -> dict:
+        sources_path = self.directory / SOURCES_NAME
+        if not sources_path.exists():
+            return {}
+        with open(sources_path) as f:
+            sources = json.load(f)
+        if (
+            sources.get("resolution") != self.resolution
+            or sources.get("format") != _FORMAT
+        ):
+            return {}
+        return sources["files"]
+
+    def build(self, full: bool = False, batch_size: int = 65536) -> dict:
+        """
+        Build or incrementally refresh the index.
+
+        Args:
+            full: Re-read every source file instead of only the new and
+                changed ones.
+            batch_size: Rows read from a source file at a time.
+
+        Returns:
+            Summary dict with the number of source ``files``, the files
+            ``read``, ``removed`` and ``unchanged``, and the index ``rows``.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        fs = _get_filesystem(self.catalog_href)
+        files = _list_parquet_files(self.catalog_href, fs)
+        if not files:
+            raise FileNotFoundError(f"No parquet files found under {self.catalog_href}")
+
+        parts_dir = self.directory / "parts"
+        parts_dir.mkdir(parents=True, exist_ok=True)
+        known = {} if full else self._read_sources()
+        fingerprints = {path: _fingerprint(path, fs) for path in files}
+
+        read = 0
+        for path, fingerprint in fingerprints.items():
+            part = parts_dir / f"{_hash(path)}.parquet"
+            if known.get(path) == fingerprint and part.exists():
+                continue
+            table = _aggregate_file(path, self.resolution, fs, batch_size)
+            pq.write_table(table, part.with_suffix(".tmp"), compression="zstd")
+            os.replace(part.with_suffix(".tmp"), part)
+            read += 1
+            logging.info(f"Coverage of {path}: {table.num_rows} rows")
+
+        removed = [path for path in known if path not in fingerprints]
+        for path in removed:
+            (parts_dir / f"{_hash(path)}.parquet").unlink(missing_ok=True)
+
+        parts = [pq.read_table(parts_dir / f"{_hash(path)}.parquet") for path in files]
+        combined = _combine(
+            pa.concat_tables(parts), ["count", "valid_sum", "valid_count"]
+        )
+        index = pa.table(
+            {
+                **{key: combined.column(key) for key in _KEYS},
+                "count": combined.column("count"),
+                "valid_sum": combined.column("valid_sum"),
+                "valid_count": combined.column("valid_count"),
+                "mean_percent_valid_pixels": _mean(
+                    combined.column("valid_sum"), combined.column("valid_count")
+                ),
+            }
+        ).sort_by([(key, "ascending") for key in _KEYS])
+        index = index.replace_schema_metadata(
+            {
+                b"catalog": self.catalog_href.encode("utf-8"),
+                b"resolution": str(self.resolution).encode("utf-8"),
+                b"format": str(_FORMAT).encode("utf-8"),
+            }
+        )
+        pq.write_table(index, self.path.with_suffix(".tmp"), compression="zstd")
+        os.replace(self.path.with_suffix(".tmp"), self.path)
+        with open(self.directory / SOURCES_NAME, "w") as f:
+            json.dump(
+                {
+                    "catalog": self.catalog_href,
+                    "resolution": self.resolution,
+                    "format": _FORMAT,
+                    "files": fingerprints,
+                },
+                f,
+                indent=2,
+            )
+        return {
+            "files": len(files),
+            "read": read,
+            "removed": len(removed),
+            "unchanged": len(files) - read,
+            "rows": index.num_rows,
+        }
+
+    def read(self):
+        """Return the index as an Arrow table."""
+        import pyarrow.parquet as pq
+
+        if not self.exists():
+            raise FileNotFoundError(
+                f"No coverage index for {self.catalog_href} at {self.path}; "
+                "build it with CoverageIndex.build() or `itslive-catalog coverage`"
+            )
+        table = pq.read_table(self.path)
+        if "valid_count" not in table.column_names:
+            raise FileNotFoundError(
+                f"The coverage index at {self.path} was built by an older "
+                "version; rebuild it with CoverageIndex.build()"
+            )
+        return table
+
+    def cells(self, roi: dict) -> list[str]:
+        """H3 cells of the index resolution overlapping a GeoJSON geometry."""
+        import h3
+        from shapely.geometry import mapping, shape
+
+        geom = shape(roi)
+        if geom.geom_type not in ("Polygon", "MultiPolygon"):
+            # Points and lines become thin polygons so H3 can cover them
+            roi = mapping(geom.buffer(1e-6))
+        return sorted(
+            h3.h3shape_to_cells_experimental(
+                h3.geo_to_h3shape(roi), self.resolution, "overlap"
+            )
+        )
+
+    def query(
+        self,
+        roi: dict,
+        start: str | None = None,
+        end: str | None = None,
+        platforms: list[str] | None = None,
+        group_by: tuple[str, ...] = ("year", "platform"),
+    ) -> list[dict]:
+        """
+        Coverage of a region from the index.
+
+        Args:
+            roi: GeoJSON geometry; every granule whose footprint shares an
+                index cell with it is counted once.
+            start: Inclusive ISO 8601 start; the index has monthly
+                resolution, so the whole month of *start* is included.
+            end: Inclusive ISO 8601 end, rounded out to its month as well.
+            platforms: Platform codes or prefixes to keep, e.g. ``["S1"]``
+                for every Sentinel-1 satellite.
+            group_by: Any of ``"cell"``, ``"year"``, ``"month"`` and
+                ``"platform"``; ``("cell",)`` gives a coverage map of the
+                region's cells (a granule counts in every cell it overlaps)
+                and an empty tuple the total.
+
+        Returns:
+            ``{key: value, ..., "count": n, "mean_percent_valid_pixels": m}``
+            rows sorted by key. Groups without granules are omitted, except
+            for the total row when ``group_by`` is empty.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        group_by = list(group_by)
+        unknown = set(group_by) - {"cell", "year", "month", "platform"}
+        if unknown:
+            raise ValueError(f"Cannot group the coverage index by {sorted(unknown)}")
+
+        table = self.read()
+        footprints = pc.split_pattern(table.column("cells").combine_chunks(), ",")
+        cells = pc.list_flatten(footprints)
+        parents = pc.list_parent_indices(footprints).to_numpy()
+        in_roi = pc.is_in(cells, value_set=pa.array(self.cells(roi), pa.string()))
+        in_roi = in_roi.to_numpy(zero_copy_only=False)
+        if "cell" in group_by:
+            # One row per (granule group, cell of the region it overlaps)
+            table = table.take(parents[in_roi]).append_column(
+                "cell", cells.filter(pa.array(in_roi))
+            )
+            mask = pa.array(np.ones(table.num_rows, dtype=bool))
+        else:
+            touched = np.zeros(table.num_rows, dtype=bool)
+            touched[parents[in_roi]] = True
+            mask = pa.array(touched)
+        months = pc.add(
+            pc.multiply(table.column("year").cast(pa.int32()), 12),
+            table.column("month").cast(pa.int32()),
+        )
+        if start is not None:
+            first = parse_datetime(start)
+            mask = pc.and_(
+                mask, pc.greater_equal(months, first.year * 12 + first.month)
+            )
+        if end is not None:
+            last = parse_datetime(end, end_of_day=True)
+            mask = pc.and_(mask, pc.less_equal(months, last.year * 12 + last.month))
+        if platforms:
+            matches = [
+                pc.starts_with(table.column("platform"), pattern=p) for p in platforms
+            ]
+            mask = pc.and_(mask, _any(matches))
+        table = table.filter(pc.fill_null(mask, False))
+
+        grouped = table.group_by(group_by).aggregate(
+            [("count", "sum"), ("valid_sum", "sum"), ("valid_count", "sum")]
+        )
+        means = _mean(
+            grouped.column("valid_sum_sum"), grouped.column("valid_count_sum")
+        )
+        rows = [
+            {
+                **{key: grouped.column(key)[i].as_py() for key in group_by},
+                "count": grouped.column("count_sum")[i].as_py() or 0,
+                "mean_percent_valid_pixels": means[i].as_py(),
+            }
+            for i in range(grouped.num_rows)
+        ]
+        if group_by:
+            rows = [row for row in rows if row["count"]]
+        return sorted(
+            rows, key=lambda row: tuple((row[k] is None, row[k]) for k in group_by)
+        )
+
+
+def _mean(valid_sum, valid_count):
+    """``valid_sum / valid_count``, null where no value was valid."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    return pc.if_else(
+        pc.greater(valid_count, 0),
+        pc.divide(pc.cast(valid_sum, pa.float64()), pc.cast(valid_count, pa.float64())),
+        pa.scalar(None, pa.float64()),
+    )
+
+
+def _any(masks):
+    import pyarrow.compute as pc
+
+    result = masks[0]
+    for mask in masks[1:]:
+        result = pc.or_(result, mask)
+    return result
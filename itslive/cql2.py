@@ -0,0 +1,265 @@
+"""
+CQL2-JSON to DuckDB SQL.
+
+``to_sql`` compiles a CQL2-JSON filter expression into a SQL predicate for
+DuckDB (with the ``spatial`` extension for the spatial operators). Given a
+``params`` list, every literal becomes a ``?`` placeholder appended to
+``params``, so the statement is run as
+``con.execute(sql, params)`` and values are never spliced into SQL text::
+
+    params = []
+    where = to_sql({"op": "in", "args": [{"property": "platform"}, ["S1A", "S1B"]]}, params)
+    # where == 'platform IN (?, ?)', params == ["S1A", "S1B"]
+
+Without ``params`` the literals are inlined as escaped SQL literals, which
+is what ``itslive.search.expr_to_sql`` returns for logging and for callers
+that cannot pass parameters.
+
+Supported operators:
+
+* logical: ``and``, ``or``, ``not``
+* comparison: ``=``, ``<>`` (``!=``), ``<``, ``<=``, ``>``, ``>=``,
+  ``between``, ``in``, ``like``, ``isNull``, and the ``casei`` /
+  ``accenti`` functions
+* arithmetic: ``+``, ``-``, ``*``, ``/``, ``%``, ``div``, ``^``
+* temporal: ``t_after``, ``t_before``, ``t_contains``, ``t_disjoint``,
+  ``t_during``, ``t_equals``, ``t_finishedBy``, ``t_finishes``,
+  ``t_intersects``, ``t_meets``, ``t_metBy``, ``t_overlappedBy``,
+  ``t_overlaps``, ``t_startedBy``, ``t_starts`` over properties,
+  ``{"timestamp": ...}``, ``{"date": ...}`` and ``{"interval": [...]}``
+* spatial: ``s_intersects``, ``s_equals``, ``s_disjoint``, ``s_touches``,
+  ``s_within``, ``s_overlaps``, ``s_crosses``, ``s_contains`` over
+  properties, GeoJSON geometries and ``{"bbox": [...]}``
+* array: ``a_equals``, ``a_contains``, ``a_containedBy``, ``a_overlaps``
+
+Anything else raises ``ValueError`` instead of being dropped.
+"""
+
+import json
+import math
+
+_COMPARISONS = {
+    "=": "=",
+    "==": "=",
+    "<>": "<>",
+    "!=": "<>",
+    "<": "<",
+    "<=": "<=",
+    ">": ">",
+    ">=": ">=",
+}
+
+_ARITHMETIC = {"+": "+", "-": "-", "*": "*", "/": "/", "%": "%", "div": "//", "^": "^"}
+
+_SPATIAL = {
+    "s_intersects": "ST_Intersects",
+    "s_equals": "ST_Equals",
+    "s_disjoint": "ST_Disjoint",
+    "s_touches": "ST_Touches",
+    "s_within": "ST_Within",
+    "s_overlaps": "ST_Overlaps",
+    "s_crosses": "ST_Crosses",
+    "s_contains": "ST_Contains",
+}
+
+# CQL2 temporal relations between a = [a0, a1] and b = [b0, b1], as
+# conjunctions of endpoint comparisons (an instant is [t, t])
+_TEMPORAL = {
+    "t_after": [("a0", ">", "b1")],
+    "t_before": [("a1", "<", "b0")],
+    "t_contains": [("a0", "<", "b0"), ("a1", ">", "b1")],
+    "t_disjoint": None,  # NOT t_intersects
+    "t_during": [("a0", ">", "b0"), ("a1", "<", "b1")],
+    "t_equals": [("a0", "=", "b0"), ("a1", "=", "b1")],
+    "t_finishedBy": [("a0", "<", "b0"), ("a1", "=", "b1")],
+    "t_finishes": [("a0", ">", "b0"), ("a1", "=", "b1")],
+    "t_intersects": [("a0", "<=", "b1"), ("a1", ">=", "b0")],
+    "t_meets": [("a1", "=", "b0")],
+    "t_metBy": [("a0", "=", "b1")],
+    "t_overlappedBy": [("a0", ">", "b0"), ("a0", "<", "b1"), ("a1", ">", "b1")],
+    "t_overlaps": [("a0", "<", "b0"), ("a1", ">", "b0"), ("a1", "<", "b1")],
+    "t_startedBy": [("a0", "=", "b0"), ("a1", ">", "b1")],
+    "t_starts": [("a0", "=", "b0"), ("a1", "<", "b1")],
+}
+
+_ARRAY = {
+    "a_equals": "{a} = {b}",
+    "a_contains": "list_has_all({a}, {b})",
+    "a_containedBy": "list_has_all({b}, {a})",
+    "a_overlaps": "list_has_any({a}, {b})",
+}
+
+
+def quote_identifier(name: str) -> str:
+    """SQL identifier of a property: bare when it is a plain identifier."""
+    if name.isidentifier():
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sql_literal(value) -> str:
+    """*value* as an escaped SQL literal."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and not math.isfinite(value):
+            raise ValueError(f"Not a finite number: {value}")
+        return repr(value)
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(sql_literal(v) for v in value) + "]"
+    raise ValueError(f"Unsupported CQL2 literal: {value!r}")
+
+
+class _Compiler:
+    def __init__(self, params: list | None):
+        self.params = params
+
+    def literal(self, value) -> str:
+        if self.params is None:
+            return sql_literal(value)
+        if isinstance(value, float) and not math.isfinite(value):
+            raise ValueError(f"Not a finite number: {value}")
+        if not isinstance(value, (str, int, float, bool, list, tuple)):
+            raise ValueError(f"Unsupported CQL2 literal: {value!r}")
+        self.params.append(list(value) if isinstance(value, tuple) else value)
+        return "?"
+
+    def typed(self, value, sql_type: str) -> str:
+        return f"CAST({self.literal(value)} AS {sql_type})"
+
+    def expr(self, node) -> str:
+        """SQL of a predicate or value node."""
+        if isinstance(node, dict):
+            if "op" in node:
+                return self.operation(node["op"], node.get("args", []))
+            if "property" in node:
+                return quote_identifier(node["property"])
+            if "timestamp" in node:
+                return self.typed(node["timestamp"], "TIMESTAMPTZ")
+            if "date" in node:
+                return self.typed(node["date"], "DATE")
+            if "bbox" in node:
+                return self.envelope(node["bbox"])
+            if "type" in node and ("coordinates" in node or "geometries" in node):
+                return f"ST_GeomFromGeoJSON({self.literal(json.dumps(node))})"
+            raise ValueError(f"Unsupported CQL2 node: {node!r}")
+        if isinstance(node, (list, tuple)):
+            return self.literal(list(node))
+        return self.literal(node)
+
+    def envelope(self, bbox) -> str:
+        if len(bbox) == 6:
+            bbox = [bbox[0], bbox[1], bbox[3], bbox[4]]
+        if len(bbox) != 4:
+            raise ValueError(f"Not a 2D or 3D bbox: {bbox!r}")
+        return "ST_MakeEnvelope(" + ", ".join(self.literal(v) for v in bbox) + ")"
+
+    def endpoints(self, node) -> tuple:
+        """Start and end of a temporal operand, compiled when called.
+
+        Placeholders must be created in the order they appear in the SQL,
+        so each endpoint is compiled where it is used.
+        """
+        if isinstance(node, dict) and "interval" in node:
+            start, end = node["interval"]
+            return (
+                lambda: self.bound(start, end=False),
+                lambda: self.bound(end, end=True),
+            )
+        return (lambda: self.expr(node),) * 2
+
+    def bound(self, value, end: bool) -> str:
+        if value in ("..", None):
+            return f"'{'infinity' if end else '-infinity'}'::TIMESTAMPTZ"
+        if isinstance(value, dict):
+            return self.expr(value)
+        if len(value) == 10:
+            # A date bound covers the whole day
+            value += "T23:59:59.999999Z" if end else "T00:00:00Z"
+        return f"CAST({self.literal(value)} AS TIMESTAMPTZ)"
+
+    def operation(self, op: str, args: list) -> str:
+        if op in ("and", "or"):
+            if not args:
+                raise ValueError(f"'{op}' needs arguments")
+            joined = f" {op.upper()} ".join(self.expr(arg) for arg in args)
+            return f"({joined})" if len(args) > 1 else joined
+        if op == "not":
+            return f"NOT ({self.expr(args[0])})"
+        if op in _COMPARISONS:
+            left, right = self.binary(op, args)
+            return f"{left} {_COMPARISONS[op]} {right}"
+        if op in _ARITHMETIC:
+            left, right = self.binary(op, args)
+            return f"({left} {_ARITHMETIC[op]} {right})"
+        if op == "between":
+            if len(args) != 3:
+                raise ValueError("'between' takes a value and two bounds")
+            value, low, high = (self.expr(arg) for arg in args)
+            return f"{value} BETWEEN {low} AND {high}"
+        if op == "in":
+            value, options = self.binary(op, args, compile_right=False)
+            if not isinstance(options, (list, tuple)):
+                raise ValueError("'in' takes a value and a list")
+            if not options:
+                return "FALSE"
+            return f"{value} IN ({', '.join(self.expr(o) for o in options)})"
+        if op == "like":
+            value, pattern = self.binary(op, args)
+            return f"{value} LIKE {pattern} ESCAPE '\\'"
+        if op == "isNull":
+            return f"{self.expr(args[0])} IS NULL"
+        if op == "casei":
+            return f"lower({self.expr(args[0])})"
+        if op == "accenti":
+            return f"strip_accents({self.expr(args[0])})"
+        if op in _TEMPORAL:
+            return self.temporal(op, args)
+        if op in _SPATIAL:
+            left, right = self.binary(op, args)
+            return f"{_SPATIAL[op]}({left}, {right})"
+        if op in _ARRAY:
+            left, right = self.binary(op, args)
+            return _ARRAY[op].format(a=left, b=right)
+        raise ValueError(f"Unsupported CQL2 operator: {op}")
+
+    def binary(self, op: str, args: list, compile_right: bool = True):
+        if len(args) != 2:
+            raise ValueError(f"'{op}' takes two arguments, got {len(args)}")
+        left, right = args
+        return self.expr(left), self.expr(right) if compile_right else right
+
+    def temporal(self, op: str, args: list) -> str:
+        if len(args) != 2:
+            raise ValueError(f"'{op}' takes two arguments, got {len(args)}")
+        if op == "t_disjoint":
+            return f"NOT ({self.temporal('t_intersects', args)})"
+        a0, a1 = self.endpoints(args[0])
+        b0, b1 = self.endpoints(args[1])
+        ends = {"a0": a0, "a1": a1, "b0": b0, "b1": b1}
+        terms = []
+        for x, cmp, y in _TEMPORAL[op]:
+            left = ends[x]()
+            terms.append(f"{left} {cmp} {ends[y]()}")
+        return terms[0] if len(terms) == 1 else "(" + " AND ".join(terms) + ")"
+
+
+def to_sql(expr: dict, params: list | None = None) -> str:
+    """
+    Compile a CQL2-JSON expression into a DuckDB SQL predicate.
+
+    Args:
+        expr: CQL2-JSON expression (or a bare ``true``/``false``).
+        params: List the literal values are appended to, one per ``?``
+            placeholder of the returned SQL. When ``None`` the values are
+            inlined as escaped SQL literals.
+
+    Raises:
+        ValueError: For operators, literals or arities this compiler does
+            not support.
+    """
+    return _Compiler(params).expr(expr)
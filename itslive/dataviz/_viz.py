@@ -6,6 +6,13 @@ import pandas as pd
 import plotext
 import xarray as xr
 
+from itslive.timeseries import (
+    drop_duplicate_times,
+    forward_fill,
+    period_edges,
+    window_statistic,
+)
+
 
 def plot_terminal(
     lon: float,
@@ -64,9 +71,14 @@ def plot_terminal(
             print(f"Warning: Variable '{variable}' not found in dataset")
             continue
 
-        # Convert to pandas and process
-        ts = dataset[variable].to_pandas().sort_index()
-        ts = ts[~ts.index.duplicated(keep="first")].resample("ME").max().ffill()
+        # Monthly maximum, forward filled over empty months
+        da = dataset[variable]
+        times, obs = drop_duplicate_times(da[da.dims[0]].values, da.values)
+        edges, periods = period_edges(times, "M")
+        monthly = window_statistic(times, obs, edges[:-1], edges[1:], "max")
+        ts = pd.Series(
+            forward_fill(monthly), index=periods.to_timestamp(how="end").normalize()
+        )
 
         date_strs = [d.strftime("%Y-%m-%d") for d in ts.index.to_pydatetime()]
         values = [float(v) for v in ts.values]
@@ -0,0 +1,32 @@
+from itslive.engines._base import (
+    ENGINES,
+    Match,
+    SearchEngine,
+    SearchQuery,
+    available_engines,
+    compare_engines,
+    get_engine,
+    make_query,
+    register_engine,
+)
+from itslive.engines._geoparquet import DuckDBEngine, GeoparquetEngine, RustacEngine
+from itslive.engines._memory import MemoryCatalog, MemoryEngine
+from itslive.engines._stac import StacEngine
+
+__all__ = [
+    "ENGINES",
+    "DuckDBEngine",
+    "GeoparquetEngine",
+    "Match",
+    "MemoryCatalog",
+    "MemoryEngine",
+    "RustacEngine",
+    "SearchEngine",
+    "SearchQuery",
+    "StacEngine",
+    "available_engines",
+    "compare_engines",
+    "get_engine",
+    "make_query",
+    "register_engine",
+]
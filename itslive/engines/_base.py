@@ -0,0 +1,384 @@
+"""
+Search engine interface and registry.
+
+A search engine runs one catalog query against one backend (a STAC API,
+geoparquet files read with DuckDB or rustac, ...). Every engine takes the
+same ``SearchQuery`` and streams the same ``Match`` records, so
+``serverless_search``, ``find_streaming``, the batch search and the
+aggregates do not depend on the backend. Engines hold their connection
+between queries and release it with ``close()`` (or a ``with`` block).
+
+New backends subclass ``SearchEngine`` and are registered by name::
+
+    @register_engine
+    class MyEngine(SearchEngine):
+        name = "mine"
+
+        def _connect(self):
+            ...
+
+        def search(self, query):
+            ...
+
+    serverless_search(..., engine="mine")
+"""
+
+import asyncio
+import collections
+import datetime
+import logging
+import math
+import time
+
+import numpy as np
+
+from itslive.catalog import parse_datetime
+from itslive.search import (
+    build_cql2_filter,
+    build_cql2_filters_from_dict,
+    prepare_roi,
+)
+
+# A catalog query as the engines see it:
+#   roi         – ``PreparedROI`` of the region of interest
+#   start_date  – inclusive ISO 8601 start
+#   end_date    – inclusive ISO 8601 end
+#   filters     – list of CQL2 comparison expressions, all of them must hold
+#   asset_type  – suffix of the data asset hrefs to return (e.g. ".nc")
+#   collection  – STAC collection (STAC API engines only)
+#   properties  – item fields the matches must carry (see ``item_record``)
+#   geometry    – whether the matches must carry the item geometry
+SearchQuery = collections.namedtuple(
+    "SearchQuery",
+    [
+        "roi",
+        "start_date",
+        "end_date",
+        "filters",
+        "asset_type",
+        "collection",
+        "properties",
+        "geometry",
+    ],
+    defaults=([], ".nc", "itslive-granules", (), False),
+)
+
+# One matching data asset:
+#   href       – asset href
+#   properties – item properties (at least the requested ones)
+#   bbox       – item bbox, list or stac-geoparquet struct, or None
+#   geometry   – GeoJSON dict or WKB of the item, when requested
+Match = collections.namedtuple("Match", ["href", "properties", "bbox", "geometry"])
+
+
+def _record_value(value):
+    """Plain (JSON and Arrow friendly) value of an item field."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict) and {"xmin", "ymin", "xmax", "ymax"} <= set(value):
+        # stac-geoparquet stores bbox as a struct
+        return [value["xmin"], value["ymin"], value["xmax"], value["ymax"]]
+    if isinstance(value, (list, tuple)):
+        return [_record_value(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        # NaT is a datetime too
+        return None if value != value else value.isoformat()
+    return value
+
+
+# Group keys derived from the item ``datetime``; any other group key is an
+# item property (e.g. ``platform``).
+_DATE_PARTS = ("year", "month")
+
+
+def _group_value(name: str, item_properties: dict):
+    """Value of the group key *name* for one item."""
+    if name in _DATE_PARTS:
+        value = item_properties.get("datetime")
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = parse_datetime(value)
+        return getattr(value, name)
+    return _record_value(item_properties.get(name))
+
+
+def _date_buckets(start_date: str, end_date: str, group_by: tuple) -> list:
+    """``(key, "start/end")`` intervals of the year/month buckets of a range.
+
+    Keys hold the bucket's year and month in *group_by* order; the first
+    and last buckets are clipped to the range.
+    """
+    start = parse_datetime(start_date).replace(tzinfo=None)
+    end = parse_datetime(end_date, end_of_day=True).replace(tzinfo=None)
+    buckets = []
+    current = start
+    while current <= end:
+        if not group_by:
+            following = end + datetime.timedelta(seconds=1)
+        elif "month" in group_by:
+            following = (current.replace(day=1) + datetime.timedelta(days=32)).replace(
+                day=1, hour=0, minute=0, second=0, microsecond=0
+            )
+        else:
+            following = datetime.datetime(current.year + 1, 1, 1)
+        stop = min(following - datetime.timedelta(seconds=1), end)
+        key = tuple(getattr(current, name) for name in group_by)
+        buckets.append((key, f"{current:%Y-%m-%dT%H:%M:%SZ}/{stop:%Y-%m-%dT%H:%M:%SZ}"))
+        current = following
+    return buckets
+
+
+def _group_rows(counts: collections.Counter, group_by: tuple) -> list[dict]:
+    """``{key: value, ..., "count": n}`` rows sorted by key (missing last)."""
+    return [
+        {**dict(zip(group_by, key)), "count": int(n)}
+        for key, n in sorted(
+            counts.items(), key=lambda kv: tuple((v is None, v) for v in kv[0])
+        )
+        if n or not group_by
+    ]
+
+
+def make_query(
+    roi: dict,
+    start_date: str,
+    end_date: str,
+    filters: dict | None = None,
+    extra_cql2_exprs: list[dict] | None = None,
+    asset_type: str = ".nc",
+    collection: str = "itslive-granules",
+    properties=(),
+    geometry: bool = False,
+    roi_max_vertices: int = 1000,
+    roi_tile_size: float = 5.0,
+) -> SearchQuery:
+    """Build a ``SearchQuery`` from ``serverless_search`` style arguments.
+
+    *filters* is a ``{property: PropertyFilter}`` mapping and
+    *extra_cql2_exprs* a list of CQL2 expressions (or ``"and"`` groups of
+    them); both end up in one flat list of comparisons.
+    """
+    cql2_filters = build_cql2_filters_from_dict(filters) if filters else []
+    for expr in extra_cql2_exprs or []:
+        cql2_filters.extend(expr["args"] if expr["op"] == "and" else [expr])
+    return SearchQuery(
+        roi=prepare_roi(roi, max_vertices=roi_max_vertices, tile_size=roi_tile_size),
+        start_date=start_date,
+        end_date=end_date,
+        filters=cql2_filters,
+        asset_type=asset_type,
+        collection=collection,
+        properties=tuple(properties or ()),
+        geometry=geometry,
+    )
+
+
+def cql2_filter(query: SearchQuery) -> dict | None:
+    """The CQL2-JSON filter of *query*, or ``None`` without filters."""
+    return build_cql2_filter(query.filters) if query.filters else None
+
+
+class SearchEngine:
+    """
+    Base class of the catalog search backends.
+
+    Args:
+        base_catalog_href: Catalog the engine queries (STAC API root or
+            geoparquet root, depending on the engine).
+
+    Capability flags, so callers can pick or compare engines:
+
+    * ``supports_pushdown`` – property filters and the ROI are evaluated by
+      the backend instead of client-side.
+    * ``supports_counts`` – ``count`` is answered by the backend without
+      enumerating the matching items.
+    * ``supports_async`` – ``asearch`` is native; otherwise it runs
+      ``search`` in a worker thread.
+
+    Engines connect lazily on the first query and keep the connection
+    until ``close()``; they are context managers.
+    """
+
+    name = None
+    # Keyword options of the constructor; ``get_engine`` drops the others
+    # so one set of options can be passed to any engine.
+    options = ()
+    supports_pushdown = False
+    supports_counts = False
+    supports_async = False
+
+    def __init__(self, base_catalog_href: str):
+        self.base_catalog_href = base_catalog_href
+        self.connection = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.base_catalog_href!r})"
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self):
+        """Connect to the backend if not connected yet; returns the engine."""
+        if self.connection is None:
+            self.connection = self._connect()
+        return self
+
+    def close(self) -> None:
+        """Release the backend connection."""
+        if self.connection is not None:
+            close = getattr(self.connection, "close", None)
+            if callable(close):
+                close()
+            self.connection = None
+
+    def _connect(self):
+        raise NotImplementedError
+
+    def search(self, query: SearchQuery):
+        """Yield a ``Match`` for every data asset matching *query*.
+
+        Matches are streamed in scan order; an asset can be yielded more
+        than once when the backend stores its item more than once.
+        """
+        raise NotImplementedError
+
+    async def asearch(self, query: SearchQuery) -> list:
+        """All matches of *query*, without blocking the event loop."""
+        return await asyncio.to_thread(lambda: list(self.search(query)))
+
+    def count(self, query: SearchQuery, group_by=()) -> list[dict]:
+        """
+        Count the items matching *query*, optionally grouped.
+
+        Args:
+            query: The query.
+            group_by: ``"year"``, ``"month"`` (of the item ``datetime``) or
+                item property names.
+
+        Returns:
+            ``{key: value, ..., "count": n}`` rows sorted by key, see
+            ``serverless_aggregate``.
+
+        The base implementation enumerates ``search`` and counts the
+        unique hrefs (one data asset per item).
+        """
+        group_by = tuple(group_by)
+        fields = {"datetime"} if set(group_by) & {"year", "month"} else set()
+        fields.update(name for name in group_by if name not in ("year", "month"))
+        query = query._replace(properties=tuple(sorted(fields)))
+        counts = collections.Counter({(): 0} if not group_by else {})
+        seen = set()
+        for match in self.search(query):
+            if match.href in seen:
+                continue
+            seen.add(match.href)
+            key = tuple(_group_value(name, match.properties) for name in group_by)
+            counts[key] += 1
+        return _group_rows(counts, group_by)
+
+    def _count_matched(self, query, group_by, matched) -> list[dict] | None:
+        """Count year/month buckets with a ``matched(query)`` callable.
+
+        Returns ``None`` when *matched* does (the backend cannot count).
+        """
+        counts = collections.Counter({(): 0} if not group_by else {})
+        for key, interval in _date_buckets(query.start_date, query.end_date, group_by):
+            start_date, end_date = interval.split("/")
+            found = matched(query._replace(start_date=start_date, end_date=end_date))
+            if found is None:
+                return None
+            counts[key] += found
+        return _group_rows(counts, group_by)
+
+
+# Registered engine classes by name
+ENGINES: dict[str, type] = {}
+
+
+def register_engine(cls):
+    """Class decorator registering a ``SearchEngine`` under ``cls.name``."""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} needs a name to be registered")
+    ENGINES[cls.name] = cls
+    return cls
+
+
+def available_engines() -> list[str]:
+    """Names of the registered engines."""
+    return sorted(ENGINES)
+
+
+def get_engine(name: str, base_catalog_href: str, **options) -> SearchEngine:
+    """
+    Create the engine registered as *name*.
+
+    Options the engine does not take (see ``SearchEngine.options``) are
+    ignored.
+
+    Raises:
+        NotImplementedError: If no engine is registered as *name*.
+    """
+    try:
+        cls = ENGINES[name]
+    except KeyError:
+        raise NotImplementedError(f"Not a valid query engine: {name}") from None
+    return cls(
+        base_catalog_href,
+        **{key: value for key, value in options.items() if key in cls.options},
+    )
+
+
+def compare_engines(
+    engines: list[SearchEngine], query: SearchQuery, repeat: int = 1
+) -> list[dict]:
+    """
+    Run the same query on several engines, e.g. to benchmark a new backend.
+
+    Engines do not all evaluate the same CQL2 filters: the memory engine
+    raises ``NotImplementedError`` for the ``casei``/``accenti`` functions,
+    arithmetic, temporal (``t_*``), spatial (``s_*``) and array (``a_*``)
+    operators, which duckdb compiles. Such an engine is reported with an
+    ``"error"`` instead of ending the comparison.
+
+    Args:
+        engines: Engines to compare; each is opened and closed here.
+        query: The query.
+        repeat: Runs per engine; the first one includes the connection.
+
+    Returns:
+        One ``{"engine", "matches", "hrefs", "seconds"}`` dict per engine,
+        with the number of matches and unique hrefs of the last run and
+        the wall time of every run, or ``{"engine", "error"}`` when the
+        engine does not support the query.
+    """
+    results = []
+    for engine in engines:
+        seconds = []
+        try:
+            with engine:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    matches = list(engine.search(query))
+                    seconds.append(time.perf_counter() - start)
+        except NotImplementedError as e:
+            results.append({"engine": engine.name, "error": str(e)})
+            logging.warning(f"{engine!r} does not support the query: {e}")
+            continue
+        results.append(
+            {
+                "engine": engine.name,
+                "matches": len(matches),
+                "hrefs": len({match.href for match in matches}),
+                "seconds": seconds,
+            }
+        )
+        logging.info(f"{engine!r}: {len(matches)} matches in {seconds}")
+    return results
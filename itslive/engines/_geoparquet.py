@@ -0,0 +1,281 @@
+"""Search engines over partitioned stac-geoparquet catalogs."""
+
+import collections
+import logging
+
+from itslive.catalog import parse_datetime
+from itslive.cql2 import sql_literal
+from itslive.engines._base import (
+    Match,
+    SearchEngine,
+    SearchQuery,
+    _group_rows,
+    _record_value,
+    cql2_filter,
+    register_engine,
+)
+from itslive.engines._sql import _group_sql, _pruning_sql, _tiles_to_sql
+from itslive.search import (
+    filters_to_where,
+    resolve_search_prefixes,
+    roi_intersects,
+)
+
+
+class GeoparquetEngine(SearchEngine):
+    """
+    Base class of the engines reading geoparquet partitions directly.
+
+    Args:
+        base_catalog_href: Root URI of the geoparquet collection.
+        reduce_spatial_search: Only read the spatial partitions that
+            overlap the ROI.
+        partition_type: Spatial partitioning scheme, ``"h3"`` or
+            ``"latlon"``.
+        resolution: H3 resolution of the partitions.
+        overlap: Overlap mode of the H3 cell lookup.
+        use_hive_partitions: Hive-style (``grid=h3/level=/tile=``) or
+            legacy integer-prefix partition paths.
+        use_manifest: Pick partitions from the catalog's
+            ``_manifest.json`` when it has one.
+
+    See ``resolve_search_prefixes``.
+    """
+
+    options = (
+        "reduce_spatial_search",
+        "partition_type",
+        "resolution",
+        "overlap",
+        "use_hive_partitions",
+        "use_manifest",
+    )
+
+    def __init__(
+        self,
+        base_catalog_href: str,
+        reduce_spatial_search: bool = True,
+        partition_type: str = "h3",
+        resolution: int = 1,
+        overlap: str = "bbox_overlap",
+        use_hive_partitions: bool = True,
+        use_manifest: bool = True,
+    ):
+        super().__init__(base_catalog_href)
+        self.reduce_spatial_search = reduce_spatial_search
+        self.partition_type = partition_type
+        self.resolution = resolution
+        self.overlap = overlap
+        self.use_hive_partitions = use_hive_partitions
+        self.use_manifest = use_manifest
+
+    def prefixes(self, query: SearchQuery) -> tuple[list[str], dict | None]:
+        """Parquet paths (or globs) to scan for *query* and the manifest."""
+        prefixes, manifest = resolve_search_prefixes(
+            self.base_catalog_href,
+            query.roi.coarse,
+            start_date=query.start_date,
+            end_date=query.end_date,
+            reduce_spatial_search=self.reduce_spatial_search,
+            partition_type=self.partition_type,
+            resolution=self.resolution,
+            overlap=self.overlap,
+            use_hive_partitions=self.use_hive_partitions,
+            use_manifest=self.use_manifest,
+        )
+        logging.info(f"Searching in {prefixes}")
+        return prefixes, manifest
+
+
+@register_engine
+class DuckDBEngine(GeoparquetEngine):
+    """
+    Query geoparquet partitions with DuckDB (``spatial`` extension).
+
+    Every predicate runs in SQL: bbox/datetime pruning on the row-group
+    statistics (with a manifest), the tiled ROI test, the date range, the
+    property filters and the asset type. Counts are ``COUNT(*) ... GROUP
+    BY`` queries. Works for local and ``s3://`` catalogs.
+    """
+
+    name = "duckdb"
+    supports_pushdown = True
+    supports_counts = True
+
+    def _connect(self):
+        import duckdb
+
+        con = duckdb.connect()
+        con.execute("INSTALL spatial")
+        con.execute("LOAD spatial")
+        # year()/month() of a TIMESTAMPTZ follow the session time zone
+        con.execute("SET TimeZone = 'UTC'")
+        return con
+
+    @staticmethod
+    def _where_sql(query: SearchQuery, manifest: dict | None) -> tuple[str, list]:
+        """WHERE clause of *query* and the values of its ``?`` parameters."""
+        start_ts = parse_datetime(query.start_date).isoformat(sep=" ")
+        end_ts = parse_datetime(query.end_date, end_of_day=True).isoformat(sep=" ")
+        params = [query.asset_type]
+        filters_sql = (
+            filters_to_where(query.filters, params) if query.filters else "TRUE"
+        )
+        where_sql = (
+            f"{_pruning_sql(manifest, query.roi.bbox, query.start_date, query.end_date)}"
+            f" AND datetime >= '{start_ts}+00'::TIMESTAMPTZ"
+            f" AND datetime <= '{end_ts}+00'::TIMESTAMPTZ"
+            " AND suffix(assets -> 'data' ->> 'href', ?)"
+            f" AND {_tiles_to_sql(query.roi)} AND {filters_sql}"
+        )
+        return where_sql, params
+
+    def _execute(self, query_sql: str, params: list, prefix: str):
+        """Run *query_sql* as a DataFrame, ``None`` when *prefix* is empty."""
+        import duckdb
+
+        try:
+            return self.connection.execute(query_sql, params).df()
+        except duckdb.IOException:
+            logging.debug(f"No parquet files matched under {prefix}, skipping.")
+            return None
+
+    def search(self, query: SearchQuery):
+        self.open()
+        prefixes, manifest = self.prefixes(query)
+        where_sql, params = self._where_sql(query, manifest)
+        logging.info(f"Filters as SQL: {where_sql} {params}")
+        # Candidates of a simplified ROI come back with their geometry so
+        # the exact test runs client-side on the (few) candidate rows only.
+        with_wkb = query.roi.simplified or query.geometry
+        wkb_sql = ", ST_AsWKB(geometry) AS wkb" if with_wkb else ""
+        columns_sql = "".join(
+            ", {0} AS {0}".format('"' + name.replace('"', '""') + '"')
+            for name in query.properties
+        )
+        for prefix in prefixes:
+            items = self._execute(
+                f"""
+                SELECT
+                    {sql_literal(prefix)} AS source_parquet,
+                    assets -> 'data' ->> 'href' AS data_href{wkb_sql}{columns_sql}
+                FROM read_parquet({sql_literal(prefix)}, union_by_name=true)
+                WHERE {where_sql}
+                """,
+                params,
+                prefix,
+            )
+            if items is None:
+                continue
+            if query.roi.simplified and len(items):
+                items = items[roi_intersects(query.roi, items["wkb"])]
+            logging.info(f"Prefix: {prefix} items found: {len(items)}")
+            for row in items.to_dict("records"):
+                if not isinstance(row["data_href"], str):
+                    continue
+                yield Match(row["data_href"], row, row.get("bbox"), row.get("wkb"))
+
+    def count(self, query: SearchQuery, group_by=()) -> list[dict]:
+        group_by = tuple(group_by)
+        self.open()
+        prefixes, manifest = self.prefixes(query)
+        where_sql, params = self._where_sql(query, manifest)
+        keys_sql = "".join(
+            f'{_group_sql(name)} AS "g{i}", ' for i, name in enumerate(group_by)
+        )
+        counts = collections.Counter({(): 0} if not group_by else {})
+        for prefix in prefixes:
+            source_sql = f"read_parquet({sql_literal(prefix)}, union_by_name=true)"
+            if query.roi.simplified:
+                # The exact ROI test runs client-side, so fetch the keys and
+                # geometry of the candidates and count them here.
+                rows = self._execute(
+                    f"""
+                    SELECT {keys_sql}ST_AsWKB(geometry) AS wkb
+                    FROM {source_sql}
+                    WHERE {where_sql}
+                    """,
+                    params,
+                    prefix,
+                )
+                if rows is not None and len(rows):
+                    rows = rows[roi_intersects(query.roi, rows["wkb"])]
+                    rows = rows.drop(columns="wkb").assign(count=1)
+            else:
+                rows = self._execute(
+                    f"""
+                    SELECT {keys_sql}COUNT(*) AS count
+                    FROM {source_sql}
+                    WHERE {where_sql}
+                    {"GROUP BY ALL" if group_by else ""}
+                    """,
+                    params,
+                    prefix,
+                )
+            if rows is None or "count" not in rows:
+                continue
+            for row in rows.itertuples(index=False):
+                key = tuple(_record_value(v) for v in row[: len(group_by)])
+                counts[key] += int(row[-1])
+        return _group_rows(counts, group_by)
+
+
+# DuckDB's error message for a glob without files
+_NO_FILES_MATCHED = "No files found that match the pattern"
+
+
+@register_engine
+class RustacEngine(GeoparquetEngine):
+    """
+    Query geoparquet partitions with ``rustac``'s DuckDB client.
+
+    rustac evaluates the ROI, date range and CQL2 filter; counts enumerate
+    the matching items.
+    """
+
+    name = "rustac"
+    supports_pushdown = True
+
+    def _connect(self):
+        import rustac
+
+        return rustac.DuckdbClient()
+
+    def search(self, query: SearchQuery):
+        self.open()
+        prefixes, _ = self.prefixes(query)
+        search_kwargs = {
+            "intersects": query.roi.coarse,
+            "datetime": f"{query.start_date}/{query.end_date}",
+        }
+        cql2 = cql2_filter(query)
+        if cql2 is not None:
+            search_kwargs["filter"] = cql2
+
+        for prefix in prefixes:
+            try:
+                items = list(self.connection.search(prefix, **search_kwargs))
+            except Exception as e:
+                # rustac passes DuckDB's error through for an empty glob;
+                # anything else is an outage, not an empty result.
+                if _NO_FILES_MATCHED not in str(e):
+                    raise
+                logging.debug(f"No parquet files matched under {prefix}, skipping.")
+                continue
+            if query.roi.simplified:
+                matches = roi_intersects(
+                    query.roi, [item["geometry"] for item in items]
+                )
+                items = [item for item, match in zip(items, matches) if match]
+            logging.info(f"Prefix: {prefix} items found: {len(items)}")
+            for item in items:
+                for asset in item["assets"].values():
+                    if "data" in asset["roles"] and asset["href"].endswith(
+                        query.asset_type
+                    ):
+                        yield Match(
+                            asset["href"],
+                            item.get("properties", item),
+                            item.get("bbox"),
+                            item.get("geometry"),
+                        )
@@ -0,0 +1,473 @@
+"""
+In-memory search engine over a geoparquet catalog.
+
+The catalog (or a local mirror of a subset of it) is read once into Arrow
+and numpy arrays::
+
+    hrefs       data asset href of every item
+    properties  Arrow table of the item properties (no geometry/assets)
+    geometries  shapely geometries
+    tree        STRtree over the item bboxes
+    order/times datetime index: row order sorted by datetime and the
+                sorted datetimes (int64 ns)
+
+A query is a bbox tree lookup plus a ``searchsorted`` on the datetime index,
+an exact geometry test and vectorized property filters on the remaining
+candidates, with no I/O. Loaded catalogs are shared by every engine opened
+on the same href and reloaded when the catalog files change.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from itslive.catalog import (
+    _bbox_arrays,
+    _get_filesystem,
+    _list_parquet_files,
+    parse_datetime,
+)
+from itslive.engines._base import (
+    Match,
+    SearchEngine,
+    SearchQuery,
+    _group_rows,
+    _record_value,
+    register_engine,
+)
+
+# Columns that are not item properties
+_ITEM_COLUMNS = ("geometry", "assets", "links", "bbox")
+
+_COMPARISONS = {
+    "=": "equal",
+    "==": "equal",
+    "!=": "not_equal",
+    "<>": "not_equal",
+    "<": "less",
+    "<=": "less_equal",
+    ">": "greater",
+    ">=": "greater_equal",
+}
+
+
+def _fingerprints(href: str, fs=None) -> dict[str, str]:
+    """Size and modification time (or ETag) of every parquet file."""
+    if fs is None:
+        return {
+            path: json.dumps([st.st_size, st.st_mtime_ns])
+            for path in _list_parquet_files(href)
+            for st in [os.stat(path)]
+        }
+    # One listing instead of one request per file
+    fs.invalidate_cache(href)
+    files = fs.find(href.rstrip("/"), detail=True)
+    return {
+        path: json.dumps(
+            [info.get("size"), info.get("ETag") or info.get("LastModified")],
+            default=str,
+        )
+        for path, info in sorted(files.items())
+        if path.endswith(".parquet")
+    }
+
+
+def _data_hrefs(table) -> np.ndarray:
+    """``assets.data.href`` of every row, ``""`` when missing."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    column = table.column("assets").combine_chunks()
+    if pa.types.is_struct(column.type) and column.type.get_field_index("data") >= 0:
+        data = pc.struct_field(column, "data")
+        if pa.types.is_struct(data.type) and data.type.get_field_index("href") >= 0:
+            hrefs = pc.struct_field(data, "href").cast(pa.string())
+            return np.asarray(pc.fill_null(hrefs, "").to_pylist(), dtype=object)
+    assets = column.to_pylist()
+    if assets and isinstance(assets[0], str):
+        assets = [json.loads(a) if a else {} for a in assets]
+    return np.asarray(
+        [((a or {}).get("data") or {}).get("href") or "" for a in assets],
+        dtype=object,
+    )
+
+
+class MemoryCatalog:
+    """
+    The arrays of one loaded catalog, see the module docstring.
+
+    Built by ``MemoryCatalog.load``; never modified afterwards, so a reload
+    swaps whole catalogs and concurrent queries see either one.
+    """
+
+    def __init__(self, table, fingerprints: dict[str, str]):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import shapely
+
+        self.fingerprints = fingerprints
+        self.loaded_at = self.checked_at = time.monotonic()
+        self.hrefs = _data_hrefs(table)
+        self.bounds = np.column_stack(_bbox_arrays(table))
+        self.geometries = shapely.from_wkb(
+            table.column("geometry").to_numpy(zero_copy_only=False)
+        )
+        self.wkb = table.column("geometry").to_numpy(zero_copy_only=False)
+        self.tree = shapely.STRtree(shapely.box(*self.bounds.T))
+        self.properties = table.drop_columns(
+            [name for name in _ITEM_COLUMNS if name in table.column_names]
+        )
+        if "datetime" in table.column_names:
+            times = pc.cast(
+                table.column("datetime"), pa.timestamp("ns", tz="UTC")
+            ).to_numpy(zero_copy_only=False)
+            # Items without a datetime sort first and never match a range
+            times = np.where(
+                np.isnat(times), np.iinfo(np.int64).min, times.astype(np.int64)
+            )
+        else:
+            times = np.full(len(self.hrefs), np.iinfo(np.int64).min)
+        self.order = np.argsort(times, kind="stable")
+        self.times = times[self.order]
+
+    def __len__(self):
+        return len(self.hrefs)
+
+    @classmethod
+    def load(
+        cls,
+        href: str,
+        fingerprints: dict[str, str],
+        fs=None,
+        extent: tuple[float, float, float, float] | None = None,
+    ) -> "MemoryCatalog":
+        """Read the files in *fingerprints*, keeping items in *extent*."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tables = []
+        for path in fingerprints:
+            table = pq.read_table(path, filesystem=fs)
+            if extent is not None and table.num_rows:
+                xmin, ymin, xmax, ymax = _bbox_arrays(table)
+                keep = (
+                    (xmin <= extent[2])
+                    & (xmax >= extent[0])
+                    & (ymin <= extent[3])
+                    & (ymax >= extent[1])
+                )
+                table = table.filter(pa.array(keep))
+            tables.append(table)
+        if tables:
+            table = pa.concat_tables(tables, promote_options="default")
+        else:
+            table = pa.table(
+                {"geometry": pa.array([], pa.binary()), "assets": pa.nulls(0)}
+            )
+        if "id" in table.column_names and table.num_rows:
+            # Items are stored once per partition they overlap
+            _, first = np.unique(
+                np.asarray(table.column("id").to_pylist(), dtype=object),
+                return_index=True,
+            )
+            table = table.take(np.sort(first))
+        logging.info(f"Loaded {table.num_rows} items from {href} in memory")
+        return cls(table, fingerprints)
+
+    def select(self, query: SearchQuery) -> np.ndarray:
+        """Sorted row indices of the items matching *query*."""
+        import shapely
+
+        start = np.datetime64(
+            parse_datetime(query.start_date).replace(tzinfo=None), "ns"
+        ).astype(np.int64)
+        end = np.datetime64(
+            parse_datetime(query.end_date, end_of_day=True).replace(tzinfo=None), "ns"
+        ).astype(np.int64)
+        lo = np.searchsorted(self.times, start, side="left")
+        hi = np.searchsorted(self.times, end, side="right")
+        in_range = np.zeros(len(self), dtype=bool)
+        in_range[self.order[lo:hi]] = True
+
+        rows = self.tree.query(query.roi.geometry, predicate="intersects")
+        rows = np.sort(rows[in_range[rows]])
+        if len(rows):
+            rows = rows[shapely.intersects(self.geometries[rows], query.roi.geometry)]
+        if len(rows) and query.asset_type:
+            hrefs = self.hrefs[rows].astype(str)
+            rows = rows[np.char.endswith(hrefs, query.asset_type)]
+        if len(rows) and query.filters:
+            mask = _filters_mask(self.properties.take(rows), query.filters)
+            rows = rows[mask]
+        return rows
+
+
+def _scalar(value, arrow_type):
+    """*value* as a scalar comparable with a column of *arrow_type*."""
+    import pyarrow as pa
+
+    if pa.types.is_timestamp(arrow_type) and isinstance(value, str):
+        value = parse_datetime(value)
+        if arrow_type.tz is None:
+            value = value.replace(tzinfo=None)
+        return pa.scalar(value, type=arrow_type)
+    return pa.scalar(value)
+
+
+def _column(table, arg):
+    """Column of a ``{"property": name}`` argument, all null when missing."""
+    import pyarrow as pa
+
+    if not (isinstance(arg, dict) and "property" in arg):
+        raise NotImplementedError(f"CQL2 argument not supported in memory: {arg}")
+    if arg["property"] not in table.column_names:
+        return pa.nulls(table.num_rows)
+    return table.column(arg["property"])
+
+
+def _expr_mask(table, expr):
+    """Arrow boolean mask of one CQL2 expression, null where SQL gives NULL."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    op, args = expr["op"], expr.get("args", [])
+    if op in ("and", "or"):
+        masks = [_expr_mask(table, arg) for arg in args]
+        combine = pc.and_kleene if op == "and" else pc.or_kleene
+        mask = masks[0]
+        for other in masks[1:]:
+            mask = combine(mask, other)
+        return mask
+    if op == "not":
+        return pc.invert(_expr_mask(table, args[0]))
+    if op == "isNull":
+        return pc.is_null(_column(table, args[0]))
+    if op == "between":
+        value, low, high = args
+        return _expr_mask(
+            table,
+            {
+                "op": "and",
+                "args": [
+                    {"op": ">=", "args": [value, low]},
+                    {"op": "<=", "args": [value, high]},
+                ],
+            },
+        )
+
+    column = _column(table, args[0])
+    if pa.types.is_null(column.type):
+        return pa.nulls(table.num_rows, pa.bool_())
+    if op == "in":
+        values = [_scalar(v, column.type).as_py() for v in args[1]]
+        mask = pc.is_in(column, value_set=pa.array(values, type=column.type))
+        # x IN (...) is NULL for a NULL x
+        return pc.if_else(pc.is_null(column), pa.scalar(None, pa.bool_()), mask)
+    if op == "like":
+        return pc.match_like(column, args[1])
+    if op not in _COMPARISONS:
+        raise NotImplementedError(f"CQL2 operator not supported in memory: {op}")
+    if isinstance(args[1], dict):
+        raise NotImplementedError(f"CQL2 argument not supported in memory: {args[1]}")
+    return getattr(pc, _COMPARISONS[op])(column, _scalar(args[1], column.type))
+
+
+def _filters_mask(table, filters: list[dict]) -> np.ndarray:
+    """numpy mask of the rows of *table* matching every filter."""
+    import pyarrow.compute as pc
+
+    mask = _expr_mask(table, {"op": "and", "args": list(filters)})
+    # Rows where the filter is NULL do not match, as in SQL
+    mask = pc.fill_null(mask, False)
+    return np.asarray(mask.to_numpy(zero_copy_only=False), dtype=bool)
+
+
+# Loaded catalogs by (href, extent), shared by the engines
+_CATALOGS: dict[tuple, MemoryCatalog] = {}
+_CATALOGS_LOCK = threading.Lock()
+# Held by the one engine loading or checking a catalog, by (href, extent)
+_RELOAD_LOCKS: dict[tuple, threading.Lock] = {}
+
+
+@register_engine
+class MemoryEngine(SearchEngine):
+    """
+    Answer queries from a geoparquet catalog held in memory.
+
+    Meant for services answering many small queries: the first query (or
+    ``open()``) loads the catalog, later ones take milliseconds. Point
+    *base_catalog_href* at a local mirror of the partitions you serve, or
+    pass *extent* to keep only the items in a bbox.
+
+    Args:
+        base_catalog_href: Root of the geoparquet catalog, local path or
+            ``s3://`` URI. Every ``*.parquet`` file below it is loaded.
+        reload_interval: Seconds between checks of the catalog files; when
+            one was added, removed or changed the catalog is reloaded
+            before the next query. Only one query checks and reloads, the
+            ones arriving meanwhile are answered from the current catalog.
+            ``None`` only reloads on ``reload()``.
+        extent: ``(minx, miny, maxx, maxy)`` of the items to keep.
+
+    Filters are evaluated with Arrow compute and support the CQL2 ``and``,
+    ``or``, ``not``, ``=``, ``<>``, ``<``, ``<=``, ``>``, ``>=``,
+    ``between``, ``in``, ``like`` and ``isNull`` operators on item
+    properties against literal values. The ``casei``/``accenti``
+    functions, arithmetic, temporal (``t_*``), spatial (``s_*``) and array
+    (``a_*``) operators, which the duckdb engine compiles (see
+    ``itslive.cql2``), raise ``NotImplementedError`` here.
+
+    Example::
+
+        engine = MemoryEngine("./h3r1-mirror", reload_interval=300).open()
+        query = make_query(roi, "2020-01-01", "2020-12-31")
+        hrefs = [match.href for match in engine.search(query)]
+    """
+
+    name = "memory"
+    options = ("reload_interval", "extent")
+    supports_pushdown = True
+    supports_counts = True
+
+    def __init__(
+        self,
+        base_catalog_href: str,
+        reload_interval: float | None = 60.0,
+        extent: tuple[float, float, float, float] | None = None,
+    ):
+        super().__init__(base_catalog_href.rstrip("/"))
+        self.reload_interval = reload_interval
+        self.extent = tuple(extent) if extent is not None else None
+
+    @property
+    def _key(self) -> tuple:
+        return (self.base_catalog_href, self.extent)
+
+    def _reload_lock(self) -> threading.Lock:
+        with _CATALOGS_LOCK:
+            return _RELOAD_LOCKS.setdefault(self._key, threading.Lock())
+
+    def _connect(self) -> MemoryCatalog:
+        with _CATALOGS_LOCK:
+            catalog = _CATALOGS.get(self._key)
+        if catalog is None:
+            # Engines opened at the same time wait for a single load
+            with self._reload_lock():
+                with _CATALOGS_LOCK:
+                    catalog = _CATALOGS.get(self._key)
+                if catalog is None:
+                    self._reload(force=True)
+                    catalog = self.connection
+        return catalog
+
+    def _due(self) -> bool:
+        return (
+            self.reload_interval is not None
+            and time.monotonic() - self.connection.checked_at >= self.reload_interval
+        )
+
+    def open(self):
+        super().open()
+        with _CATALOGS_LOCK:
+            # Pick up a catalog another engine reloaded
+            self.connection = _CATALOGS.get(self._key, self.connection)
+        if self._due():
+            lock = self._reload_lock()
+            # Without waiting: while one query checks the files and reloads,
+            # the others are answered from the current catalog.
+            if lock.acquire(blocking=False):
+                try:
+                    with _CATALOGS_LOCK:
+                        self.connection = _CATALOGS.get(self._key, self.connection)
+                    if self._due():
+                        self._reload()
+                finally:
+                    lock.release()
+        return self
+
+    def close(self) -> None:
+        # The catalog stays loaded for the next engine, see ``evict``
+        self.connection = None
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Reload the catalog if its files changed (or always with *force*).
+
+        Queries running meanwhile keep using the previous catalog.
+
+        Returns:
+            Whether the catalog was reloaded.
+        """
+        with self._reload_lock():
+            return self._reload(force)
+
+    def _reload(self, force: bool = False) -> bool:
+        fs = _get_filesystem(self.base_catalog_href)
+        fingerprints = _fingerprints(self.base_catalog_href, fs)
+        with _CATALOGS_LOCK:
+            catalog = _CATALOGS.get(self._key)
+        if not force and catalog is not None and catalog.fingerprints == fingerprints:
+            catalog.checked_at = time.monotonic()
+            self.connection = catalog
+            return False
+        catalog = MemoryCatalog.load(
+            self.base_catalog_href, fingerprints, fs, extent=self.extent
+        )
+        with _CATALOGS_LOCK:
+            _CATALOGS[self._key] = catalog
+        self.connection = catalog
+        return True
+
+    @staticmethod
+    def evict(base_catalog_href: str | None = None) -> None:
+        """Drop the loaded catalogs of *base_catalog_href* (or all of them)."""
+        with _CATALOGS_LOCK:
+            for key in list(_CATALOGS):
+                if base_catalog_href is None or key[0] == base_catalog_href.rstrip("/"):
+                    del _CATALOGS[key]
+                    _RELOAD_LOCKS.pop(key, None)
+
+    def search(self, query: SearchQuery):
+        catalog = self.open().connection
+        rows = catalog.select(query)
+        logging.info(f"{len(rows)} items found in memory")
+        names = [n for n in query.properties if n in catalog.properties.column_names]
+        columns = {
+            n: catalog.properties.column(n).take(rows).to_pylist() for n in names
+        }
+        for i, row in enumerate(rows):
+            yield Match(
+                catalog.hrefs[row],
+                {name: values[i] for name, values in columns.items()},
+                catalog.bounds[row].tolist(),
+                catalog.wkb[row] if query.geometry else None,
+            )
+
+    def count(self, query: SearchQuery, group_by=()) -> list[dict]:
+        import collections
+
+        import pyarrow.compute as pc
+
+        group_by = tuple(group_by)
+        catalog = self.open().connection
+        rows = catalog.select(query)
+        counts = collections.Counter({(): 0} if not group_by else {})
+        if not group_by:
+            counts[()] = len(rows)
+            return _group_rows(counts, group_by)
+
+        table = catalog.properties.take(rows)
+        keys = []
+        for name in group_by:
+            if name in ("year", "month") and "datetime" in table.column_names:
+                keys.append(getattr(pc, name)(table.column("datetime")).to_pylist())
+            elif name in table.column_names:
+                keys.append(table.column(name).to_pylist())
+            else:
+                keys.append([None] * len(rows))
+        counts.update(tuple(_record_value(v) for v in key) for key in zip(*keys))
+        return _group_rows(counts, group_by)
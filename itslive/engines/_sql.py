@@ -0,0 +1,58 @@
+"""DuckDB SQL fragments of the geoparquet engines."""
+
+import json
+
+from shapely.geometry import shape
+
+from itslive.catalog import parse_datetime
+from itslive.engines._base import _DATE_PARTS
+from itslive.search import PreparedROI
+
+
+def _pruning_sql(
+    manifest: dict | None, bbox: tuple, start_date: str, end_date: str
+) -> str:
+    """Row-group pruning predicate for catalogs built with a manifest.
+
+    Optimized catalogs carry a bbox covering column and sorted datetimes,
+    so these predicates prune most row groups before the (expensive) exact
+    geometry test runs.
+    """
+    if manifest is None:
+        return "TRUE"
+    minx, miny, maxx, maxy = bbox
+    start_ts = parse_datetime(start_date).isoformat(sep=" ")
+    end_ts = parse_datetime(end_date, end_of_day=True).isoformat(sep=" ")
+    return (
+        f"bbox.xmin <= {maxx} AND bbox.xmax >= {minx} "
+        f"AND bbox.ymin <= {maxy} AND bbox.ymax >= {miny} "
+        f"AND datetime >= '{start_ts}+00'::TIMESTAMPTZ "
+        f"AND datetime <= '{end_ts}+00'::TIMESTAMPTZ"
+    )
+
+
+def _tiles_to_sql(prepared_roi: PreparedROI) -> str:
+    """DuckDB spatial predicate for a prepared ROI.
+
+    Each tile gets a cheap extent check before the exact ``ST_Intersects``
+    so that most rows are rejected without a full geometry test.
+    """
+    if len(prepared_roi.tiles) == 1:
+        geojson_str = json.dumps(prepared_roi.coarse)
+        return f"ST_Intersects(geometry, ST_GeomFromGeoJSON('{geojson_str}'))"
+    clauses = []
+    for tile in prepared_roi.tiles:
+        minx, miny, maxx, maxy = shape(tile).bounds
+        clauses.append(
+            f"(ST_Intersects_Extent(geometry, "
+            f"ST_MakeEnvelope({minx}, {miny}, {maxx}, {maxy})) "
+            f"AND ST_Intersects(geometry, ST_GeomFromGeoJSON('{json.dumps(tile)}')))"
+        )
+    return "(" + " OR ".join(clauses) + ")"
+
+
+def _group_sql(name: str) -> str:
+    """DuckDB expression of the group key *name*."""
+    if name in _DATE_PARTS:
+        return f"{name}(datetime)"
+    return '"' + name.replace('"', '""') + '"'
@@ -0,0 +1,86 @@
+"""STAC API search engine (``pystac_client``)."""
+
+import logging
+
+from itslive.engines._base import (
+    Match,
+    SearchEngine,
+    SearchQuery,
+    cql2_filter,
+    register_engine,
+)
+from itslive.search import roi_intersects
+
+
+@register_engine
+class StacEngine(SearchEngine):
+    """
+    Search a STAC API with ``pystac_client``.
+
+    The API evaluates the spatial, temporal and property filters; only the
+    exact test of a simplified ROI runs client-side. Counts come from the
+    ``numberMatched`` / ``context.matched`` of the API when it reports
+    them.
+
+    Args:
+        base_catalog_href: Root of the STAC API,
+            e.g. ``"https://stac.itslive.cloud"``.
+    """
+
+    name = "stac"
+    supports_pushdown = True
+    supports_counts = True
+
+    def _connect(self):
+        import pystac_client
+
+        logging.info(f"Connecting to STAC API at {self.base_catalog_href}")
+        return pystac_client.Client.open(self.base_catalog_href)
+
+    def close(self) -> None:
+        # pystac_client clients hold no resources to release
+        self.connection = None
+
+    def _search_kwargs(self, query: SearchQuery) -> dict:
+        kwargs = {
+            "intersects": query.roi.coarse,
+            "datetime": f"{query.start_date}/{query.end_date}",
+            "collections": [query.collection],
+        }
+        cql2 = cql2_filter(query)
+        if cql2 is not None:
+            kwargs["filter"] = cql2
+            kwargs["filter_lang"] = "cql2-json"
+        return kwargs
+
+    def search(self, query: SearchQuery):
+        self.open()
+        kwargs = self._search_kwargs(query)
+        logging.info(f"STAC search kwargs: {kwargs}")
+        # API errors propagate: an empty result must mean "no items", or
+        # callers would cache an outage as an empty search
+        for item in self.connection.search(**kwargs).items():
+            if (
+                query.roi.simplified
+                and not roi_intersects(query.roi, [item.geometry])[0]
+            ):
+                continue
+            for asset in item.assets.values():
+                roles = asset.roles or []
+                if "data" in roles and asset.href.endswith(query.asset_type):
+                    yield Match(asset.href, item.properties, item.bbox, item.geometry)
+
+    def _matched(self, query: SearchQuery) -> int | None:
+        return self.connection.search(**self._search_kwargs(query)).matched()
+
+    def count(self, query: SearchQuery, group_by=()) -> list[dict]:
+        group_by = tuple(group_by)
+        self.open()
+        # numberMatched cannot group by properties and counts the coarse
+        # ROI's items, so those cases enumerate the items instead.
+        if not query.roi.simplified and set(group_by) <= {"year", "month"}:
+            rows = self._count_matched(query, group_by, self._matched)
+            if rows is not None:
+                return rows
+            logging.info(f"{self.base_catalog_href} does not report counts")
+        return super().count(query, group_by)
@@ -1,6 +1,6 @@
 import collections
+import datetime
 import functools
-import json
 import logging
 import math
 import os
@@ -12,6 +12,13 @@ import pyproj
 import s3fs
 from shapely.geometry import box, shape
 
+from itslive.cache import SearchCache
+from itslive.catalog import (
+    read_partition_manifest,
+    select_manifest_partitions,
+)
+from itslive.cql2 import to_sql
+
 
 def timing_decorator(func):
     """Decorator to time function execution.
@@ -184,46 +191,22 @@ def build_default_filters(
     }
 
 
-def expr_to_sql(expr):
+def expr_to_sql(expr, params: list | None = None):
     """
     Transform a CQL2 expression into SQL.
+
+    Literals are escaped, or bound as ``?`` parameters appended to
+    *params* when given. See ``itslive.cql2.to_sql`` for the supported
+    operators.
     """
-    op = expr["op"]
-    left, right = expr["args"]
-
-    def val_to_sql(val):
-        if isinstance(val, dict) and "property" in val:
-            prop = val["property"]
-            if not prop.isidentifier():
-                return f'"{prop}"'
-            return prop
-        elif isinstance(val, str):
-            return f"'{val}'"
-        else:
-            return str(val)
-
-    left_sql = val_to_sql(left)
-    right_sql = val_to_sql(right)
-
-    op_map = {
-        "=": "=",
-        "==": "=",
-        ">=": ">=",
-        "<=": "<=",
-        ">": ">",
-        "<": "<",
-        "!=": "<>",
-        "<>": "<>",
-    }
-    sql_op = op_map.get(op, op)
-    return f"{left_sql} {sql_op} {right_sql}"
+    return to_sql(expr, params)
 
 
-def filters_to_where(filters):
+def filters_to_where(filters, params: list | None = None):
     """
     Convert a list of CQL2 expressions to a SQL WHERE clause string.
     """
-    sql_parts = [expr_to_sql(f) for f in filters]
+    sql_parts = [expr_to_sql(f, params) for f in filters]
     return " AND ".join(sql_parts)
 
 
@@ -355,6 +338,210 @@ def get_overlapping_grid_names(
         raise NotImplementedError(f"Partition {partition_type} not implemented.")
 
 
+def resolve_search_prefixes(
+    store: str,
+    geojson_geometry: dict,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    reduce_spatial_search: bool = True,
+    partition_type: str = "h3",
+    resolution: int = 1,
+    overlap: str = "bbox_overlap",
+    use_hive_partitions: bool = True,
+    use_manifest: bool = True,
+) -> tuple[list[str], dict | None]:
+    """
+    Resolve the parquet paths of a geoparquet catalog to scan for a query.
+
+    Uses the catalog's partition manifest when there is one, the spatial
+    partitions overlapping *geojson_geometry* when ``reduce_spatial_search``
+    is set, and a catch-all glob otherwise.
+
+    Returns:
+        Tuple of (paths or glob patterns, manifest dict or ``None``).
+    """
+    manifest = read_partition_manifest(store) if use_manifest else None
+    if manifest is not None:
+        search_prefixes = select_manifest_partitions(
+            manifest,
+            store,
+            geojson_geometry,
+            start_date=start_date,
+            end_date=end_date,
+        )
+    elif reduce_spatial_search:
+        search_prefixes = get_overlapping_grid_names(
+            base_href=store,
+            geojson_geometry=geojson_geometry,
+            partition_type=partition_type,
+            resolution=resolution,
+            overlap=overlap,
+            use_hive_partitions=use_hive_partitions,
+        )
+        # Multi-part ROIs can share cells; scan every partition only once.
+        search_prefixes = list(dict.fromkeys(search_prefixes))
+    elif partition_type == "latlon":
+        search_prefixes = [
+            f"{store}/{mission}/**/*.parquet"
+            for mission in ["landsatOLI", "sentinel1", "sentinel2"]
+        ]
+    elif partition_type == "h3" and use_hive_partitions:
+        search_prefixes = [f"{store}/grid=h3/level={resolution}/tile=*/**/*.parquet"]
+    else:
+        search_prefixes = [f"{store}/**/*.parquet"]
+    return search_prefixes, manifest
+
+
+# A region of interest prepared for spatial queries:
+#   geometry   – the exact (valid, prepared) shapely geometry
+#   coarse     – GeoJSON of a simplified geometry that covers ``geometry``,
+#                used for API payloads, partition lookup and SQL predicates
+#   tiles      – GeoJSON pieces of ``coarse`` (one per polygon part, large
+#                parts split on a regular lon/lat grid)
+#   bbox       – (minx, miny, maxx, maxy) of ``geometry``
+#   simplified – whether ``coarse`` differs from ``geometry``; when True the
+#                candidates found with ``coarse`` need an exact check
+PreparedROI = collections.namedtuple(
+    "PreparedROI", ["geometry", "coarse", "tiles", "bbox", "simplified"]
+)
+
+
+def prepare_roi(
+    geojson_geometry: dict,
+    max_vertices: int = 1000,
+    tolerance: float | None = None,
+    tile_size: float = 5.0,
+) -> PreparedROI:
+    """
+    Simplify and tile a region of interest before running spatial queries.
+
+    Complex outlines (e.g. glacier polygons with tens of thousands of
+    vertices) are slow to evaluate in ``ST_Intersects``, slow to polyfill
+    with H3 and can exceed the STAC API payload limit. When the ROI has more
+    than *max_vertices* vertices it is simplified with Douglas-Peucker and
+    buffered by the same tolerance, so the coarse geometry always covers the
+    original one and no candidate is lost. Candidates are then checked
+    against the exact geometry with ``roi_intersects``.
+
+    Args:
+        geojson_geometry: GeoJSON geometry of the region of interest.
+        max_vertices: Vertex budget for the coarse geometry.
+        tolerance: Simplification tolerance in degrees. When omitted it
+            starts at 1/1000 of the ROI extent and doubles until the vertex
+            budget is met.
+        tile_size: Maximum tile edge in degrees; larger polygon parts are
+            split on a grid of this size.
+
+    Returns:
+        PreparedROI
+    """
+    import shapely
+    from shapely.geometry import mapping
+
+    geom = shape(geojson_geometry)
+    if not geom.is_valid:
+        geom = geom.buffer(0)
+    shapely.prepare(geom)
+
+    coarse = geom
+    simplified = False
+    if shapely.get_num_coordinates(geom) > max_vertices:
+        minx, miny, maxx, maxy = geom.bounds
+        tol = tolerance or max(maxx - minx, maxy - miny, 1e-9) / 1000.0
+        while True:
+            coarse = geom.simplify(tol, preserve_topology=True).buffer(
+                tol, join_style="mitre", mitre_limit=5.0
+            )
+            if tolerance is not None or shapely.get_num_coordinates(coarse) <= (
+                max_vertices
+            ):
+                break
+            tol *= 2.0
+        if not coarse.covers(geom):
+            logging.debug("Simplified ROI does not cover the input, using its bbox.")
+            coarse = box(*geom.bounds)
+        simplified = True
+        logging.info(
+            f"Simplified ROI from {shapely.get_num_coordinates(geom)} to "
+            f"{shapely.get_num_coordinates(coarse)} vertices (tolerance {tol:.6f})"
+        )
+
+    tiles = []
+    for part in getattr(coarse, "geoms", [coarse]):
+        minx, miny, maxx, maxy = part.bounds
+        if max(maxx - minx, maxy - miny) <= tile_size:
+            tiles.append(mapping(part))
+            continue
+        for x0 in np.arange(minx, maxx, tile_size):
+            for y0 in np.arange(miny, maxy, tile_size):
+                piece = part.intersection(box(x0, y0, x0 + tile_size, y0 + tile_size))
+                for p in getattr(piece, "geoms", [piece]):
+                    if not p.is_empty and p.area > 0:
+                        tiles.append(mapping(p))
+
+    return PreparedROI(
+        geometry=geom,
+        coarse=mapping(coarse),
+        tiles=tiles,
+        bbox=geom.bounds,
+        simplified=simplified,
+    )
+
+
+def roi_intersects(prepared_roi: PreparedROI, geometries) -> np.ndarray:
+    """
+    Exact intersection test of candidate geometries against a prepared ROI.
+
+    Args:
+        prepared_roi: Output of ``prepare_roi``.
+        geometries: Sequence of shapely geometries, GeoJSON dicts or WKB bytes.
+
+    Returns:
+        Boolean array, True where the candidate intersects the exact ROI.
+    """
+    import shapely
+
+    geometries = list(geometries)
+    if not prepared_roi.simplified:
+        return np.ones(len(geometries), dtype=bool)
+    geoms = [
+        (
+            shapely.from_wkb(g)
+            if isinstance(g, (bytes, bytearray))
+            else shape(g) if isinstance(g, dict) else g
+        )
+        for g in geometries
+    ]
+    return shapely.intersects(prepared_roi.geometry, np.asarray(geoms, dtype=object))
+
+
+# Item fields most often requested with ``properties``; any other STAC
+# property name can be requested too.
+ITEM_PROPERTIES = (
+    "datetime",
+    "date_dt",
+    "platform",
+    "percent_valid_pixels",
+    "proj:code",
+    "bbox",
+)
+
+
+def item_record(href: str, item_properties: dict, bbox=None, properties=()) -> dict:
+    """``{"url": href, ...}`` with the requested fields of one item.
+
+    ``bbox`` is taken from the item itself; every other name is looked up
+    in *item_properties* (None when the item does not have it).
+    """
+    from itslive.engines._base import _record_value
+
+    record = {"url": href}
+    for name in properties:
+        value = bbox if name == "bbox" else item_properties.get(name)
+        record[name] = _record_value(value)
+    return record
+
+
 @timing_decorator
 @retry_decorator()
 def serverless_search(
@@ -371,6 +558,13 @@ def serverless_search(
     asset_type: str = ".nc",
     use_hive_partitions: bool = True,
     collection: str = "itslive-granules",
+    use_manifest: bool = True,
+    cache: SearchCache | None = None,
+    incremental_refresh: bool = True,
+    roi_max_vertices: int = 1000,
+    roi_tile_size: float = 5.0,
+    properties: list[str] | None = None,
+    extra_cql2_exprs: list[dict] | None = None,
 ):
     """
     Performs a serverless search over partitioned STAC catalogs stored in
@@ -417,7 +611,8 @@ def serverless_search(
         For ``"stac"``: root URI of the STAC API
         (e.g. ``"https://stac.its-live.org"``).
     engine : str
-        Query backend: ``"duckdb"``, ``"rustac"``, or ``"stac"``.
+        Query backend: ``"duckdb"``, ``"rustac"``, ``"stac"`` or any other
+        engine registered with ``itslive.engines.register_engine``.
 
         ``"stac"`` issues a standard STAC API search against
         ``base_catalog_href`` using ``pystac_client``.  Spatial filtering
@@ -445,6 +640,38 @@ def serverless_search(
         ``base_catalog_href`` already points at the collection's parquet
         root so this parameter is ignored.  Defaults to
         ``"itslive-granules"``.
+    use_manifest : bool
+        When the catalog root holds a ``_manifest.json`` written by
+        ``itslive.catalog.build_optimized_catalog``, pick partition files
+        from it instead of probing prefixes with ``path_exists``, and push
+        bbox/datetime predicates down to the row-group statistics.
+        Ignored when engine is ``"stac"``.
+    cache : SearchCache, optional
+        Result cache. A fresh entry for the same query is returned without
+        touching the catalog; a stale one is refreshed and rewritten.
+    incremental_refresh : bool
+        Refresh stale cache entries by fetching only items whose
+        ``updated`` property is at or after the entry's watermark, instead
+        of re-running the full search. Only used when ``cache`` is given.
+    roi_max_vertices : int
+        ROIs with more vertices are simplified (see ``prepare_roi``) before
+        being sent to the API, the H3 polyfill or the SQL predicate; the
+        candidates are then checked against the exact geometry.
+    roi_tile_size : float
+        Maximum tile edge in degrees used to split large ROIs into pieces
+        with their own bbox prefilter (``"duckdb"`` only).
+    properties : list[str], optional
+        Item fields to return with each URL (e.g. ``ITEM_PROPERTIES``:
+        datetime, date_dt, platform, percent_valid_pixels, proj:code,
+        bbox). When given, the result is a list of ``{"url": ..., name:
+        value}`` dicts (see ``item_record``) instead of URLs, and
+        ``cache`` is not used since it only stores URLs.
+    extra_cql2_exprs : list of dict, optional
+        Additional CQL2-JSON expressions, ANDed with ``filters``, for what a
+        ``{property: PropertyFilter}`` mapping cannot express (``in``,
+        ``between``, ``or``, a ``date_dt`` range, ...). See
+        ``itslive.cql2.to_sql`` for the operators the duckdb engine
+        supports.
     epsg_code : str, optional
         **Deprecated.** Use ``filters={"proj:code": EQ(f"EPSG:{epsg_code}")}``
         instead.
@@ -454,146 +681,418 @@ def serverless_search(
 
     Returns
     -------
-    List[str]
-        Asset URLs matching the search criteria.
+    List[str] or List[dict]
+        Asset URLs matching the search criteria (sorted, unique), or one
+        record per URL when ``properties`` is given.
     """
+    from itslive.engines import get_engine, make_query
+
+    properties = list(properties or [])
 
-    # ------------------------------------------------------------------
-    # Build CQL2 filter expressions from the generic filters dict.
-    # ------------------------------------------------------------------
     cql2_filter_list = build_cql2_filters_from_dict(filters) if filters else []
-    filters_sql = filters_to_where(cql2_filter_list) if cql2_filter_list else "TRUE"
+    cql2_filter_list.extend(extra_cql2_exprs or [])
     cql2_filter = build_cql2_filter(cql2_filter_list) if cql2_filter_list else None
 
     store = base_catalog_href
 
-    search_kwargs = {
-        "intersects": roi,
-        "datetime": f"{start_date}/{end_date}",
-    }
-    if cql2_filter is not None:
-        search_kwargs["filter"] = cql2_filter
+    if cache is not None and properties:
+        logging.info("The search cache only stores URLs; ignored for properties")
+        cache = None
+
+    search_engine = get_engine(
+        engine,
+        store,
+        reduce_spatial_search=reduce_spatial_search,
+        partition_type=partition_type,
+        resolution=resolution,
+        overlap=overlap,
+        use_hive_partitions=use_hive_partitions,
+        use_manifest=use_manifest,
+    )
 
-    logging.info(f"Search filters: {search_kwargs}")
+    if cache is not None:
+        cache_key = _search_cache_key(
+            search_engine,
+            roi,
+            f"{start_date}/{end_date}",
+            cql2_filter,
+            asset_type,
+            collection,
+            {"roi_max_vertices": roi_max_vertices, "roi_tile_size": roi_tile_size},
+        )
+        query_kwargs = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "roi": roi,
+            "filters": filters,
+            "base_catalog_href": base_catalog_href,
+            "engine": engine,
+            "reduce_spatial_search": reduce_spatial_search,
+            "partition_type": partition_type,
+            "resolution": resolution,
+            "overlap": overlap,
+            "asset_type": asset_type,
+            "use_hive_partitions": use_hive_partitions,
+            "collection": collection,
+            "use_manifest": use_manifest,
+            "roi_max_vertices": roi_max_vertices,
+            "roi_tile_size": roi_tile_size,
+            "extra_cql2_exprs": extra_cql2_exprs,
+        }
+        return _search_with_cache(cache, cache_key, query_kwargs, incremental_refresh)
+
+    query = make_query(
+        roi,
+        start_date,
+        end_date,
+        filters=filters,
+        extra_cql2_exprs=extra_cql2_exprs,
+        asset_type=asset_type,
+        collection=collection,
+        properties=properties,
+        roi_max_vertices=roi_max_vertices,
+        roi_tile_size=roi_tile_size,
+    )
 
-    # ------------------------------------------------------------------
-    # STAC API engine — delegates everything to pystac-client.
-    # The API handles spatial/temporal/property filtering natively, so
-    # partition pre-filtering is skipped entirely.
-    # ------------------------------------------------------------------
-    if engine == "stac":
-        import pystac_client
+    hrefs, records = set(), {}
+    with search_engine:
+        for match in search_engine.search(query):
+            hrefs.add(match.href)
+            if properties and match.href not in records:
+                records[match.href] = item_record(
+                    match.href, match.properties, match.bbox, properties
+                )
+    logging.info(f"{search_engine!r} items found: {len(hrefs)}")
 
-        logging.info(f"Querying STAC API at {store}, collection={collection}")
+    if properties:
+        return [records[href] for href in sorted(records)]
+    return sorted(hrefs)
 
-        stac_client = pystac_client.Client.open(store)
 
-        stac_search_kwargs = {
-            "intersects": roi,
-            "datetime": f"{start_date}/{end_date}",
-            "collections": [collection],
-        }
-        if cql2_filter is not None:
-            stac_search_kwargs["filter"] = cql2_filter
-            stac_search_kwargs["filter_lang"] = "cql2-json"
-
-        logging.info(f"STAC search kwargs: {stac_search_kwargs}")
-
-        try:
-            item_search = stac_client.search(**stac_search_kwargs)
-            items = list(item_search.items())
-        except Exception:
-            logging.debug(f"STAC API at {store} returned no items, skipping.")
-            items = []
-
-        hrefs = []
-        for item in items:
-            for asset in item.assets.values():
-                roles = asset.roles or []
-                if "data" in roles and asset.href.endswith(asset_type):
-                    hrefs.append(asset.href)
-
-        logging.info(f"STAC API items found: {len(items)}")
-        return sorted(list(set(hrefs)))
-
-    # ------------------------------------------------------------------
-    # Resolve which parquet prefixes to query (duckdb / rustac only).
-    # base_catalog_href already points at the collection root for these
-    # engines, so no collection scoping is needed here.
-    # ------------------------------------------------------------------
-    if reduce_spatial_search and "intersects" in search_kwargs:
-        search_prefixes = get_overlapping_grid_names(
-            base_href=store,
-            geojson_geometry=search_kwargs["intersects"],
-            partition_type=partition_type,
-            resolution=resolution,
-            overlap=overlap,
-            use_hive_partitions=use_hive_partitions,
+def _search_cache_key(
+    search_engine,
+    roi: dict,
+    datetime_range: str,
+    cql2_filter: dict | None,
+    asset_type: str,
+    collection: str,
+    roi_options: dict,
+) -> str:
+    """Cache key of a search, with the options of its engine and ROI."""
+    options = {
+        name: getattr(search_engine, name, None) for name in search_engine.options
+    }
+    return SearchCache.make_key(
+        search_engine.name,
+        search_engine.base_catalog_href,
+        roi,
+        datetime_range,
+        cql2_filter,
+        asset_type,
+        collection if search_engine.name == "stac" else None,
+        options={**options, **roi_options},
+    )
+
+
+def _stream_with_cache(
+    cache: SearchCache,
+    cache_key: str,
+    search,
+    filters: dict | None = None,
+    incremental_refresh: bool = True,
+):
+    """
+    Stream the hrefs of a search through *cache*.
+
+    ``search(updated)`` runs the search and iterates its hrefs; *updated*
+    is ``None`` for a full search, or a watermark the items' ``updated``
+    property must be at or after. A fresh entry is served without running
+    the search. A stale one is refreshed with only the items updated since
+    its watermark (unless *filters* has its own ``updated``), yielding the
+    new hrefs and then the cached ones. The entry is only written once the
+    search has run to the end without errors.
+    """
+    entry = cache.get(cache_key)
+    if entry is not None and not entry.expired:
+        logging.info(f"Search cache hit: {cache_key} ({len(entry.hrefs)} items)")
+        yield from entry.hrefs
+        return
+
+    fetched_at = datetime.datetime.now(datetime.timezone.utc)
+    if not incremental_refresh or "updated" in (filters or {}):
+        entry = None
+    if entry is not None:
+        logging.info(f"Refreshing cache entry {cache_key} since {entry.watermark}")
+    seen = set()
+    for href in search(entry.watermark if entry is not None else None):
+        if href not in seen:
+            seen.add(href)
+            yield href
+    if entry is None:
+        cache.put(cache_key, list(seen), fetched_at)
+        return
+    for href in entry.hrefs:
+        if href not in seen:
+            yield href
+    cache.merge(cache_key, list(seen), fetched_at)
+
+
+def _search_with_cache(
+    cache: SearchCache,
+    cache_key: str,
+    query_kwargs: dict,
+    incremental_refresh: bool = True,
+) -> list[str]:
+    """Serve ``serverless_search`` from *cache*, refreshing stale entries."""
+
+    def search(updated):
+        filters = query_kwargs["filters"]
+        if updated is not None:
+            filters = {**(filters or {}), "updated": GTE(updated)}
+        return serverless_search(**{**query_kwargs, "filters": filters})
+
+    return sorted(
+        _stream_with_cache(
+            cache, cache_key, search, query_kwargs["filters"], incremental_refresh
         )
-    elif partition_type == "latlon":
-        search_prefixes = [
-            f"{store}/{mission}/**/*.parquet"
-            for mission in ["landsatOLI", "sentinel1", "sentinel2"]
+    )
+
+
+def _join_rois(roi_tree, roi_ids, geometries, hrefs, seen, records=None):
+    """Yield new ``(roi_id, href)`` pairs for candidates intersecting ROIs.
+
+    *geometries* may be WKB or GeoJSON-like dicts; *seen* collects the
+    pairs already emitted so each one is yielded once. With *records*,
+    ``(roi_id, record)`` is yielded instead.
+    """
+    import shapely
+
+    geoms = [
+        shapely.from_wkb(g) if isinstance(g, (bytes, bytearray)) else shape(g)
+        for g in geometries
+    ]
+    candidate_idx, roi_idx = roi_tree.query(geoms, predicate="intersects")
+    for i, j in zip(candidate_idx, roi_idx):
+        pair = (roi_ids[j], hrefs[i])
+        if pair not in seen:
+            seen.add(pair)
+            yield pair if records is None else (roi_ids[j], records[i])
+
+
+def serverless_batch_search(
+    rois: list[tuple[str, dict]],
+    start_date: str,
+    end_date: str,
+    filters: dict = {},
+    base_catalog_href: str = "s3://its-live-data/test-space/stac/geoparquet/h3r1",
+    engine: str = "duckdb",
+    reduce_spatial_search: bool = True,
+    partition_type: str = "h3",
+    resolution: int = 1,
+    overlap: str = "bbox_overlap",
+    asset_type: str = ".nc",
+    use_hive_partitions: bool = True,
+    collection: str = "itslive-granules",
+    use_manifest: bool = True,
+    roi_max_vertices: int = 1000,
+    roi_tile_size: float = 5.0,
+    extra_cql2_exprs: list[dict] | None = None,
+    batch_size: int = 1000,
+    properties: list[str] | None = None,
+):
+    """
+    Search many regions of interest at once.
+
+    Partitions are resolved once for the union of all ROIs, each parquet
+    file (or the STAC API) is scanned once, and the candidate items are
+    joined to the ROIs client-side with an STR-tree. This is much cheaper
+    than calling ``serverless_search`` once per ROI when the ROIs share
+    partitions, e.g. neighbouring glaciers.
+
+    Parameters
+    ----------
+    rois : list of (str, dict)
+        ``(roi_id, geojson_geometry)`` pairs.
+    start_date, end_date : str
+        Date range in ISO 8601 format.
+    filters : dict[str, PropertyFilter], optional
+        Property filters, as in ``serverless_search``.
+    extra_cql2_exprs : list of dict, optional
+        Additional CQL2 comparison expressions (or ``"and"`` groups of
+        them) that cannot be written as a ``{property: PropertyFilter}``
+        mapping, such as a ``date_dt`` range.
+    batch_size : int
+        Number of candidate items joined to the ROIs at a time.
+    properties : list[str], optional
+        Item fields to return with each URL, as in ``serverless_search``.
+
+    All other parameters have the same meaning as in ``serverless_search``.
+
+    Yields
+    ------
+    tuple of (str, str) or (str, dict)
+        ``(roi_id, href)`` for every ROI an item intersects, or
+        ``(roi_id, record)`` (see ``item_record``) when ``properties`` is
+        given. Each pair is yielded once, in scan order.
+    """
+    import itertools
+
+    import shapely
+    from shapely.geometry import mapping
+
+    from itslive.engines import get_engine, make_query
+
+    if not rois:
+        return
+
+    roi_ids = [roi_id for roi_id, _ in rois]
+    roi_geoms = [shape(geometry) for _, geometry in rois]
+    roi_tree = shapely.STRtree(roi_geoms)
+
+    # Query with a simplified union of the (simplified) ROIs; the exact
+    # geometries are only used by the client-side join.
+    coarse_union = shapely.union_all(
+        [
+            shape(
+                prepare_roi(
+                    mapping(geom),
+                    max_vertices=roi_max_vertices,
+                    tile_size=roi_tile_size,
+                ).coarse
+            )
+            for geom in roi_geoms
         ]
-    elif partition_type == "h3" and use_hive_partitions:
-        search_prefixes = [f"{store}/grid=h3/level={resolution}/tile=*/**/*.parquet"]
-    else:
-        search_prefixes = [f"{store}/**/*.parquet"]
+    )
+    query = make_query(
+        mapping(coarse_union),
+        start_date,
+        end_date,
+        filters=filters,
+        extra_cql2_exprs=extra_cql2_exprs,
+        asset_type=asset_type,
+        collection=collection,
+        properties=properties,
+        geometry=True,
+        roi_max_vertices=roi_max_vertices,
+        roi_tile_size=roi_tile_size,
+    )
+    search_engine = get_engine(
+        engine,
+        base_catalog_href,
+        reduce_spatial_search=reduce_spatial_search,
+        partition_type=partition_type,
+        resolution=resolution,
+        overlap=overlap,
+        use_hive_partitions=use_hive_partitions,
+        use_manifest=use_manifest,
+    )
+    seen = set()
+    logging.info(f"Batch search for {len(rois)} ROIs")
+
+    with search_engine:
+        matches = search_engine.search(query)
+        while batch := list(itertools.islice(matches, batch_size)):
+            yield from _join_rois(
+                roi_tree,
+                roi_ids,
+                [match.geometry for match in batch],
+                [match.href for match in batch],
+                seen,
+                records=(
+                    [
+                        item_record(
+                            match.href, match.properties, match.bbox, properties
+                        )
+                        for match in batch
+                    ]
+                    if properties
+                    else None
+                ),
+            )
 
-    logging.info(f"Searching in {search_prefixes}")
-
-    # ------------------------------------------------------------------
-    # Execute queries (duckdb / rustac).
-    # ------------------------------------------------------------------
-    hrefs = []
-    if engine == "duckdb":
-        import duckdb
-
-        con = duckdb.connect()
-        con.execute("INSTALL spatial")
-        con.execute("LOAD spatial")
-        for prefix in search_prefixes:
-            logging.info(f"Filters as SQL: {filters_sql}")
-            geojson_str = json.dumps(search_kwargs["intersects"])
-            query = f"""
-                SELECT
-                    '{prefix}' AS source_parquet,
-                    assets -> 'data' ->> 'href' AS data_href
-                FROM read_parquet('{prefix}', union_by_name=true)
-                WHERE ST_Intersects(
-                    geometry,
-                    ST_GeomFromGeoJSON('{geojson_str}')
-                ) AND {filters_sql}
-            """
-            try:
-                items = con.execute(query).df()
-            except duckdb.IOException:
-                logging.debug(f"No parquet files matched under {prefix}, skipping.")
-                continue
-            links = items["data_href"].to_list()
-            hrefs.extend(links)
-            logging.info(f"Prefix: {prefix} items found: {len(items)}")
-
-    elif engine == "rustac":
-        import rustac
-
-        client = rustac.DuckdbClient()
-        for prefix in search_prefixes:
-            try:
-                items = list(client.search(prefix, **search_kwargs))
-            except Exception:
-                logging.debug(f"No items returned for {prefix}, skipping.")
-                continue
-            for item in items:
-                for asset in item["assets"].values():
-                    if "data" in asset["roles"] and asset["href"].endswith(asset_type):
-                        hrefs.append(asset["href"])
-            logging.info(f"Prefix: {prefix} items found: {len(items)}")
 
-    else:
-        raise NotImplementedError(f"Not a valid query engine: {engine}")
+@timing_decorator
+@retry_decorator()
+def serverless_aggregate(
+    start_date: str,
+    end_date: str,
+    roi: dict,
+    filters: dict = {},
+    base_catalog_href: str = "s3://its-live-data/test-space/stac/geoparquet/h3r1",
+    engine: str = "duckdb",
+    group_by: tuple[str, ...] = ("year", "platform"),
+    reduce_spatial_search: bool = True,
+    partition_type: str = "h3",
+    resolution: int = 1,
+    overlap: str = "bbox_overlap",
+    asset_type: str = ".nc",
+    use_hive_partitions: bool = True,
+    collection: str = "itslive-granules",
+    use_manifest: bool = True,
+    roi_max_vertices: int = 1000,
+    roi_tile_size: float = 5.0,
+    extra_cql2_exprs: list[dict] | None = None,
+) -> list[dict]:
+    """
+    Count the items matching a search, optionally grouped.
+
+    Takes the same query as ``serverless_search`` but never materializes
+    the matching items where the backend can count them itself:
+
+    * ``"duckdb"`` runs ``SELECT <group_by>, COUNT(*) ... GROUP BY`` over
+      the geoparquet partitions, so only the filter, geometry and group
+      columns are read and row groups are pruned with their statistics
+      (bbox/datetime, see ``use_manifest``).
+    * ``"stac"`` asks the API for ``numberMatched`` / ``context.matched``
+      (one request per year or month bucket) when grouping by date parts
+      only. Property groups, APIs without counts and simplified ROIs
+      (see ``prepare_roi``) fall back to enumerating the items.
+    * ``"rustac"`` (and engines without ``supports_counts``) enumerates
+      the items and counts them client-side.
 
-    return sorted(list(set(hrefs)))
+    Parameters
+    ----------
+    group_by : tuple of str
+        Group keys: ``"year"`` and ``"month"`` (of the item ``datetime``)
+        or any item property, e.g. ``"platform"``. An empty tuple returns
+        the total count as a single row.
+    extra_cql2_exprs : list of dict, optional
+        Additional CQL2 expressions, as in ``serverless_batch_search``.
+
+    All other parameters have the same meaning as in ``serverless_search``.
+
+    Returns
+    -------
+    list of dict
+        ``{key: value, ..., "count": n}`` rows sorted by key. Groups
+        without items are omitted, except for the single total row when
+        ``group_by`` is empty.
+    """
+    from itslive.engines import get_engine, make_query
+
+    query = make_query(
+        roi,
+        start_date,
+        end_date,
+        filters=filters,
+        extra_cql2_exprs=extra_cql2_exprs,
+        asset_type=asset_type,
+        collection=collection,
+        roi_max_vertices=roi_max_vertices,
+        roi_tile_size=roi_tile_size,
+    )
+    search_engine = get_engine(
+        engine,
+        base_catalog_href,
+        reduce_spatial_search=reduce_spatial_search,
+        partition_type=partition_type,
+        resolution=resolution,
+        overlap=overlap,
+        use_hive_partitions=use_hive_partitions,
+        use_manifest=use_manifest,
+    )
+    with search_engine:
+        return search_engine.count(query, group_by)
 
 
 def transform_coord(
@@ -0,0 +1,35 @@
+from itslive.timeseries._kernels import (
+    drop_duplicate_times,
+    forward_fill,
+    period_edges,
+    regular_windows,
+    running_count,
+    running_mean,
+    running_median,
+    window_statistic,
+)
+from itslive.timeseries._seasonal import SeasonalFit, fit_seasonal, seasonal_fit
+from itslive.timeseries._smoothing import (
+    SmoothedSeries,
+    regular_grid,
+    smooth,
+    smooth_time_series,
+)
+
+__all__ = [
+    "window_statistic",
+    "running_mean",
+    "running_median",
+    "running_count",
+    "regular_windows",
+    "period_edges",
+    "drop_duplicate_times",
+    "forward_fill",
+    "SmoothedSeries",
+    "regular_grid",
+    "smooth",
+    "smooth_time_series",
+    "SeasonalFit",
+    "seasonal_fit",
+    "fit_seasonal",
+]
@@ -0,0 +1,238 @@
+"""
+Vectorized window kernels for irregular velocity time series.
+
+All kernels take observation times (``datetime64``, any order, NaN values
+allowed) and values shaped ``(n_times,)`` or ``(n_points, n_times)`` for
+many points sharing one time axis, plus window edges ``[start, end)``.
+Times are sorted once and every window is resolved with ``searchsorted``,
+so means, sums and counts cost O(N + windows) through cumulative sums
+instead of a mask over all observations per window.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Upper bound for the (points x windows x window length) gather used by
+# order statistics, to keep memory bounded on long/dense series.
+_GATHER_LIMIT = 2**24
+
+_ORDER_STATISTICS = {
+    "median": np.nanmedian,
+    "max": np.nanmax,
+    "min": np.nanmin,
+}
+
+
+def _as_ns(times) -> np.ndarray:
+    return np.asarray(times, dtype="datetime64[ns]")
+
+
+def _sorted(times, values) -> tuple[np.ndarray, np.ndarray]:
+    """Sort *times* and the last axis of *values* by time."""
+    times = _as_ns(times)
+    values = np.asarray(values, dtype="float64")
+    if values.shape[-1] != times.shape[0]:
+        raise ValueError(
+            f"values last axis ({values.shape[-1]}) does not match times "
+            f"({times.shape[0]})"
+        )
+    order = np.argsort(times, kind="stable")
+    return times[order], values[..., order]
+
+
+def _window_bounds(times, starts, ends) -> tuple[np.ndarray, np.ndarray]:
+    lo = np.searchsorted(times, _as_ns(starts), side="left")
+    hi = np.searchsorted(times, _as_ns(ends), side="left")
+    return lo, np.maximum(hi, lo)
+
+
+def _window_sums(values, lo, hi) -> tuple[np.ndarray, np.ndarray]:
+    """NaN-aware sums and counts of ``values[..., lo:hi]`` for every window."""
+    valid = ~np.isnan(values)
+    zeros = np.zeros(values.shape[:-1] + (1,))
+    csum = np.concatenate([zeros, np.cumsum(np.where(valid, values, 0.0), -1)], -1)
+    ccount = np.concatenate([zeros, np.cumsum(valid, axis=-1)], -1)
+    return csum[..., hi] - csum[..., lo], ccount[..., hi] - ccount[..., lo]
+
+
+def window_statistic(
+    times,
+    values,
+    starts,
+    ends,
+    statistic: str = "mean",
+    min_count: int = 1,
+) -> np.ndarray:
+    """
+    Reduce observations falling in each ``[start, end)`` window.
+
+    Parameters
+    ----------
+    times : array of datetime64, shape (n_times,)
+    values : array, shape (n_times,) or (n_points, n_times)
+    starts, ends : array of datetime64, shape (n_windows,)
+    statistic : str
+        ``"mean"``, ``"sum"``, ``"count"``, ``"median"``, ``"max"`` or
+        ``"min"``. NaN values are ignored.
+    min_count : int
+        Windows with fewer valid observations are NaN (``count`` is
+        returned as is).
+
+    Returns
+    -------
+    numpy.ndarray
+        Shape ``(n_windows,)`` or ``(n_points, n_windows)``.
+    """
+    times, values = _sorted(times, values)
+    lo, hi = _window_bounds(times, starts, ends)
+    sums, counts = _window_sums(values, lo, hi)
+
+    if statistic == "count":
+        return counts
+    if statistic == "sum":
+        result = sums
+    elif statistic == "mean":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = sums / counts
+    elif statistic in _ORDER_STATISTICS:
+        result = _window_order_statistic(values, lo, hi, _ORDER_STATISTICS[statistic])
+    else:
+        raise ValueError(f"Unknown statistic: {statistic}")
+    return np.where(counts >= max(min_count, 1), result, np.nan)
+
+
+def _window_order_statistic(values, lo, hi, func) -> np.ndarray:
+    """Apply a NaN-aware reduction to variable-length windows.
+
+    Windows are gathered into a NaN-padded (..., windows, max_length)
+    block, in slices of windows sized to stay under ``_GATHER_LIMIT``.
+    """
+    n_windows = len(lo)
+    out = np.full(values.shape[:-1] + (n_windows,), np.nan)
+    width = int((hi - lo).max()) if n_windows else 0
+    if width == 0:
+        return out
+    padded = np.concatenate([values, np.full(values.shape[:-1] + (1,), np.nan)], -1)
+    pad_index = values.shape[-1]
+    n_points = int(np.prod(values.shape[:-1], dtype=int))
+    step = max(1, _GATHER_LIMIT // max(1, width * n_points))
+    offsets = np.arange(width)
+    for first in range(0, n_windows, step):
+        block_lo = lo[first : first + step, None]
+        block_hi = hi[first : first + step, None]
+        index = np.where(block_lo + offsets < block_hi, block_lo + offsets, pad_index)
+        gathered = padded[..., index]
+        nonempty = (block_hi > block_lo)[:, 0]
+        with warnings.catch_warnings():
+            # All-NaN windows are expected and become NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            reduced = func(gathered[..., nonempty, :], axis=-1)
+        block_out = out[..., first : first + step]
+        block_out[..., nonempty] = reduced
+    return out
+
+
+def running_count(times, values, starts, ends) -> np.ndarray:
+    """Number of valid observations in each window."""
+    return window_statistic(times, values, starts, ends, "count")
+
+
+def running_median(times, values, starts, ends, min_count: int = 1) -> np.ndarray:
+    """NaN-aware median of each window."""
+    return window_statistic(times, values, starts, ends, "median", min_count)
+
+
+def running_mean(
+    times, values, starts, ends, min_count: int = 1
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    NaN-aware mean of each window and the mean time of the observations
+    that went into it.
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        ``(means, mean_times)``; both are NaN/NaT where a window holds
+        fewer than *min_count* valid observations.
+    """
+    times, values = _sorted(times, values)
+    lo, hi = _window_bounds(times, starts, ends)
+    sums, counts = _window_sums(values, lo, hi)
+
+    # Times relative to the first observation, in float seconds, so the
+    # cumulative sum does not overflow int64 nanoseconds.
+    t0 = times[0] if len(times) else np.datetime64(0, "ns")
+    seconds = (times - t0) / np.timedelta64(1, "s")
+    weighted = np.where(np.isnan(values), np.nan, seconds)
+    time_sums, _ = _window_sums(weighted, lo, hi)
+
+    valid = counts >= max(min_count, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(valid, sums / counts, np.nan)
+        mean_seconds = np.where(valid, time_sums / counts, 0.0)
+    mean_times = t0 + (mean_seconds * 1e9).astype("timedelta64[ns]")
+    return means, np.where(valid, mean_times, np.datetime64("NaT"))
+
+
+def regular_windows(
+    times, step_days: float, width_days: float | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Evenly spaced windows covering *times*.
+
+    Centers are spaced *step_days* apart from the first observation;
+    windows are *width_days* wide (default: *step_days*).
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        ``(starts, ends, centers)`` as ``datetime64[ns]``.
+    """
+    times = _as_ns(times)
+    width_days = step_days if width_days is None else width_days
+    step = np.timedelta64(int(step_days * 86400e9), "ns")
+    half = np.timedelta64(int(width_days * 86400e9 / 2), "ns")
+    centers = np.arange(times.min(), times.max() + step, step)
+    return centers - half, centers + half, centers
+
+
+def period_edges(times, freq: str = "M") -> tuple[np.ndarray, pd.PeriodIndex]:
+    """
+    Calendar bins covering *times*.
+
+    Parameters
+    ----------
+    freq : str
+        pandas period frequency: ``"D"``, ``"W"``, ``"M"``, ``"Q-NOV"``
+        (DJF/MAM/JJA/SON seasons), ``"Y"``...
+
+    Returns
+    -------
+    tuple
+        ``(edges, periods)`` where ``edges`` has one more element than
+        ``periods`` and bin *i* is ``[edges[i], edges[i + 1])``.
+    """
+    times = pd.DatetimeIndex(_as_ns(times))
+    periods = pd.period_range(times.min(), times.max(), freq=freq)
+    edges = np.append(
+        periods.start_time.values, (periods[-1] + 1).start_time.to_datetime64()
+    )
+    return _as_ns(edges), periods
+
+
+def drop_duplicate_times(times, values) -> tuple[np.ndarray, np.ndarray]:
+    """Sort by time, keeping the first observation of each repeated time."""
+    times, values = _sorted(times, values)
+    keep = np.ones(len(times), dtype=bool)
+    keep[1:] = times[1:] != times[:-1]
+    return times[keep], values[..., keep]
+
+
+def forward_fill(values) -> np.ndarray:
+    """Propagate the last valid value along the last axis."""
+    values = np.asarray(values, dtype="float64")
+    index = np.where(~np.isnan(values), np.arange(values.shape[-1]), 0)
+    np.maximum.accumulate(index, axis=-1, out=index)
+    return np.take_along_axis(values, index, axis=-1)
@@ -1,10 +1,6 @@
 from itslive.velocity_cubes._cubes import (
     STAC_CATALOG_URL,
     STAC_COLLECTION,
-    export_csv,
-    export_netcdf,
-    export_parquet,
-    export_stdout,
     find,
     find_by_bbox,
     find_by_point,
@@ -13,6 +9,22 @@ from itslive.velocity_cubes._cubes import (
     get_time_series,
     list_variables,
     plot_time_series_terminal,
+    stack_time_series,
+    time_series_to_arrow,
+)
+from itslive.velocity_cubes._export import (
+    export_csv,
+    export_netcdf,
+    export_parquet,
+    export_stdout,
+    export_stream,
+    export_zarr,
+)
+from itslive.velocity_cubes._regions import (
+    aggregate,
+    get_area_time_series,
+    get_profile_time_series,
+    get_subcube,
 )
 
 __all__ = [
@@ -26,8 +38,16 @@ __all__ = [
     "export_netcdf",
     "export_parquet",
     "export_stdout",
+    "export_stream",
+    "export_zarr",
     "get_time_series",
     "get_annual_time_series",
+    "get_profile_time_series",
+    "get_area_time_series",
+    "get_subcube",
+    "aggregate",
     "list_variables",
     "plot_time_series_terminal",
+    "stack_time_series",
+    "time_series_to_arrow",
 ]
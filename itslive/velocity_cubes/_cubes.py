@@ -3,9 +3,7 @@
 # for datacube xarray/zarr access
 import functools
 import logging
-from pathlib import Path
 from typing import Any
-from uuid import uuid4
 
 import numpy as np
 import pyproj
@@ -38,6 +36,109 @@ def _open_cached_dataset(url: str) -> xr.Dataset:
     return xr.open_dataset(url, engine="zarr", decode_timedelta=True)
 
 
+# Satellite code prefixes (``satellite_img1``) for the mission names used by
+# the granule search, so both APIs accept the same ``mission`` values.
+_MISSION_SATELLITES = {
+    "sentinel1": ("1",),
+    "sentinel2": ("2",),
+    "landsatoli": ("8", "9"),
+    "landsat": ("4", "5", "7", "8", "9"),
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_time_index(url: str) -> dict[str, np.ndarray]:
+    """Load the 1-D per-layer arrays of a cube used to select time slices.
+
+    These are tiny compared to the (time, y, x) variables, so they are read
+    once per cube and reused for every point.
+    """
+    ds = _open_cached_dataset(url)
+    dim = "mid_date" if "mid_date" in ds.dims else "time"
+    index = {"time": ds[dim].values}
+    for name in ("date_dt", "satellite_img1", "mission_img1"):
+        if name in ds and ds[name].dims == (dim,):
+            index[name] = ds[name].values
+    return index
+
+
+def _select_time_indices(
+    time_index: dict[str, np.ndarray],
+    start: Any = None,
+    end: Any = None,
+    min_interval: float | None = None,
+    max_interval: float | None = None,
+    mission: str | list[str] | None = None,
+    satellite: str | list[str] | None = None,
+) -> np.ndarray | None:
+    """Resolve time filters to positional indices along the time dimension.
+
+    Returns ``None`` when no filter is given, so callers can skip ``isel``.
+    ``end`` is inclusive of the whole day; intervals are in days.
+    """
+    if all(
+        f is None for f in (start, end, min_interval, max_interval, mission, satellite)
+    ):
+        return None
+
+    times = time_index["time"]
+    mask = np.ones(times.shape, dtype=bool)
+    if start is not None:
+        mask &= times >= np.datetime64(start, "D")
+    if end is not None:
+        mask &= times < np.datetime64(end, "D") + np.timedelta64(1, "D")
+
+    if min_interval is not None or max_interval is not None:
+        date_dt = time_index.get("date_dt")
+        if date_dt is None:
+            raise timeseriesException("Cube has no date_dt to filter intervals on")
+        if np.issubdtype(date_dt.dtype, np.timedelta64):
+            date_dt = date_dt / np.timedelta64(1, "D")
+        if min_interval is not None:
+            mask &= date_dt >= min_interval
+        if max_interval is not None:
+            mask &= date_dt <= max_interval
+
+    satellites = [satellite] if isinstance(satellite, str) else list(satellite or [])
+    missions = []
+    for name in [mission] if isinstance(mission, str) else mission or []:
+        if name.lower() in _MISSION_SATELLITES:
+            satellites.extend(_MISSION_SATELLITES[name.lower()])
+        else:
+            missions.append(name.lower())
+
+    if satellites or missions:
+        keep = np.zeros(times.shape, dtype=bool)
+        if satellites:
+            if "satellite_img1" not in time_index:
+                raise timeseriesException("Cube has no satellite_img1 to filter on")
+            codes = np.char.strip(time_index["satellite_img1"].astype(str))
+            # Older cubes store numeric satellite codes (e.g. 8.0).
+            codes = np.char.replace(codes, ".0", "")
+            keep |= np.char.startswith(codes[:, None], np.array(satellites)).any(axis=1)
+        if missions:
+            if "mission_img1" not in time_index:
+                raise timeseriesException("Cube has no mission_img1 to filter on")
+            names = np.char.lower(time_index["mission_img1"].astype(str))
+            keep |= np.isin(names, missions)
+        mask &= keep
+
+    return np.flatnonzero(mask)
+
+
+def _select_time(ds: xr.Dataset, url: str, **time_filters) -> xr.Dataset:
+    """Subset *ds* along its time dimension before any data is read.
+
+    Filters are resolved against the cached 1-D index, then applied with
+    ``isel`` so only the zarr chunks holding the selected layers are read.
+    """
+    indices = _select_time_indices(_cached_time_index(url), **time_filters)
+    if indices is None:
+        return ds
+    dim = "mid_date" if "mid_date" in ds.dims else "time"
+    return ds.isel({dim: indices})
+
+
 def _get_projected_xy_point(lon: float, lat: float, projection: str) -> geometry.Point:
     reprojection = pyproj.Transformer.from_proj(
         "epsg:4326", f"epsg:{projection}", always_xy=True
@@ -226,6 +327,7 @@ def _search_cubes(
             proj_code = item.properties.get("proj:code", "EPSG:3413")
             epsg = proj_code.replace("EPSG:", "") if proj_code else "3413"
 
+            footprint = item.geometry if isinstance(item.geometry, dict) else None
             cubes.append(
                 {
                     "type": "Feature",
@@ -235,6 +337,9 @@ def _search_cubes(
                         "composite_zarr_url": _datacube_to_composite_url(zarr_url),
                         "epsg": epsg,
                         "geometry_epsg": geometry_ref,
+                        # Cube extent, used to pick the best cube near seams
+                        "footprint": footprint,
+                        "proj:bbox": item.properties.get("proj:bbox"),
                     },
                 }
             )
@@ -271,321 +376,479 @@ def find_by_polygon(points: list[tuple[float, float]] = []) -> list[dict[str, An
     return _search_cubes(roi, roi)
 
 
-def get_time_series(
-    points: list[tuple[float, float]], variables: list[str] = ["v"]
-) -> list[dict[str, Any]]:
-    """
-    For the points in the list, returns a list of dictionaries - each one containing:
-        an xarray DataArray (time series) for each variable on the list for each of the lon lat points.
+def _cube_margins(
+    lon: np.ndarray, lat: np.ndarray, cubes: list[dict[str, Any]]
+) -> np.ndarray:
+    """Signed distance in meters from each point to each cube's edge.
 
-    :params points: List of (lon, lat) coordinates (EPSG:4326) (e.g. points along the center line of a glacier)
-    :params variables: list of variables to be included in the Dataset: v, vx, vy etc.
-    :returns: list of dictionaries with coordinates and xarray time series Datasets for the nearest neighbors to the points
-                ITS_LIVE processes on a 120 m grid, so nearest points will be close to requested points
+    Points are projected once per EPSG code and compared with the cube's
+    ``proj:bbox`` (or its projected footprint); positive values are inside.
+    Cubes without extent information get 0, i.e. accepted but ranked after
+    cubes known to contain the point.
     """
-    velocity_ts: list = []
-    variables = _merge_default_variables(variables)
-    for point in points:
-        lon = point[0]
-        lat = point[1]
-        results = find_by_point(lon, lat)
-        if len(results):
-            cube = results[0]
-            projection = cube["properties"]["epsg"]
-            zarr_url = cube["properties"]["zarr_url"]
-            cube_url = zarr_url.replace("http://", "https://")
-            projected_point = _get_projected_xy_point(lon, lat, projection)
-            xr_da = _open_cached_dataset(cube_url)
-            time_series = xr_da[variables].sel(
-                x=projected_point.x, y=projected_point.y, method="nearest"
-            )
+    import shapely
 
-            if time_series is not None and isinstance(time_series, xr.Dataset):
-                x_off = time_series.x.values - projected_point.x
-                y_off = time_series.y.values - projected_point.y
-                ll_pt = _get_geographic_point_from_projected(
-                    time_series.x.values, time_series.y.values, projection
-                )
-                actual_lon = ll_pt.x
-                actual_lat = ll_pt.y
-
-                velocity_ts.append(
-                    {
-                        "requested_point_geographic_coordinates": (lon, lat),
-                        "returned_point_geographic_coordinates": (
-                            actual_lon,
-                            actual_lat,
-                        ),
-                        "returned_point_projected_coordinates": {
-                            "epsg": projection,
-                            "coords": (time_series.x.values, time_series.y.values),
-                        },
-                        "returned_point_offset_from_requested_in_projection_meters": np.sqrt(
-                            x_off**2 + y_off**2
-                        ),
-                        "time_series": time_series,
-                    }
+    margins = np.zeros((len(lon), len(cubes)))
+    by_epsg: dict = {}
+    for j, cube in enumerate(cubes):
+        by_epsg.setdefault(cube["properties"]["epsg"], []).append(j)
+
+    for projection, members in by_epsg.items():
+        transformer = pyproj.Transformer.from_crs(
+            "EPSG:4326", f"EPSG:{projection}", always_xy=True
+        )
+        x, y = (np.asarray(c) for c in transformer.transform(lon, lat))
+        for j in members:
+            properties = cubes[j]["properties"]
+            bbox = properties.get("proj:bbox")
+            footprint = properties.get("footprint")
+            if bbox is not None and len(bbox) == 4:
+                xmin, ymin, xmax, ymax = bbox
+                margins[:, j] = np.minimum.reduce(
+                    [x - xmin, xmax - x, y - ymin, ymax - y]
                 )
+            elif footprint is not None:
+                outline = _project_geometry(geometry.shape(footprint), projection)
+                distance = shapely.distance(outline.boundary, shapely.points(x, y))
+                inside = shapely.contains_xy(outline, x, y)
+                margins[:, j] = np.where(inside, distance, -distance)
+    return margins
 
-    return velocity_ts
 
+def _select_point_cubes(
+    points: list[tuple[float, float]],
+    cubes: list[dict[str, Any]],
+    merge: bool = False,
+) -> list[list[dict[str, Any]]]:
+    """Candidate cubes containing each point, best (most interior) first.
+
+    Without ``merge`` only the best cube is kept per point. Points outside
+    every candidate get an empty list instead of a read of an edge pixel
+    of the wrong cube.
+    """
+    if not points or not cubes:
+        return [[] for _ in points]
+    lon = np.array([p[0] for p in points], dtype="float64")
+    lat = np.array([p[1] for p in points], dtype="float64")
+    margins = _cube_margins(lon, lat, cubes)
+    # Stable sort keeps the catalog order between equally ranked cubes
+    order = np.argsort(-margins, axis=1, kind="stable")
+    selected = []
+    for i in range(len(points)):
+        ranked = [cubes[j] for j in order[i] if margins[i, j] >= 0]
+        selected.append(ranked if merge else ranked[:1])
+    return selected
+
+
+def _find_point_cubes(
+    points: list[tuple[float, float]], merge: bool = False
+) -> list[list[dict[str, Any]]]:
+    """Cubes for many points from a single catalog search."""
+    if not points:
+        return []
+    roi = geometry.mapping(geometry.MultiPoint([tuple(p[:2]) for p in points]))
+    cubes = [
+        cube
+        for cube in _search_cubes(roi, roi)
+        if isinstance(cube, dict) and cube.get("properties")
+    ]
+    return _select_point_cubes(points, cubes, merge=merge)
 
-def get_annual_time_series(
-    points: list[tuple[float, float]], variables: list[str] = ["v"]
+
+def _merge_point_results(
+    results: list[dict[str, Any]], owners: list[int]
 ) -> list[dict[str, Any]]:
+    """Combine the series read from several cubes for the same point.
+
+    The first (best) cube's result is kept and layers from the other cubes
+    are added for mid_dates it does not have.
     """
-    For the points in the list, returns annual composite velocity time series.
+    merged: dict[int, dict[str, Any]] = {}
+    for owner, result in zip(owners, results):
+        if owner not in merged:
+            merged[owner] = dict(result)
+            merged[owner]["cubes"] = [result["returned_point_projected_coordinates"]]
+            continue
+        base = merged[owner]
+        extra = result["time_series"].reset_coords(["x", "y"], drop=True)
+        combined = xr.concat(
+            [base["time_series"], extra],
+            dim="mid_date",
+            coords="minimal",
+            compat="override",
+            combine_attrs="override",
+        )
+        keep = np.unique(combined.mid_date.values, return_index=True)[1]
+        base["time_series"] = combined.isel(mid_date=np.sort(keep)).sortby("mid_date")
+        base["cubes"].append(result["returned_point_projected_coordinates"])
+    return [merged[i] for i in sorted(merged)]
 
-    :params points: List of (lon, lat) coordinates (EPSG:4326)
-    :params variables: list of variables to be included: v, vx, vy etc.
-    :returns: list of dictionaries with coordinates and xarray time series
-              Datasets from annual composites
+
+def _spatial_chunks(ds: xr.Dataset) -> tuple[int, int]:
+    """Return the (y, x) chunk shape of the gridded variables in *ds*.
+
+    Falls back to single pixels when the data is not chunked, which
+    reduces the scheduler below to one read per point.
     """
-    velocity_ts: list = []
-    variables = _merge_default_composite_variables(variables)
+    for var in ds.data_vars.values():
+        if "y" in var.dims and "x" in var.dims:
+            chunks = var.encoding.get("preferred_chunks") or {}
+            if var.chunks is not None:
+                chunks = {dim: sizes[0] for dim, sizes in var.chunksizes.items()}
+            if "y" in chunks and "x" in chunks:
+                return chunks["y"], chunks["x"]
+    return 1, 1
 
-    for point in points:
-        lon = point[0]
-        lat = point[1]
-        results = find_by_point(lon, lat)
 
-        if len(results):
-            cube = results[0]
-            properties = cube.get("properties") if isinstance(cube, dict) else None
-            if not properties:
-                rprint(
-                    f"[yellow]No 'properties' found for cube at point ({lon}, {lat}); "
-                    "skipping annual composite time series for this point.[/yellow]"
-                )
-                continue
-            composite_url = properties.get("composite_zarr_url")
-            if not composite_url:
-                rprint(
-                    f"[yellow]'composite_zarr_url' not available for cube at point ({lon}, {lat}); "
-                    "skipping annual composite time series for this point.[/yellow]"
+def _load_chunk_block(ds: xr.Dataset, y_slice: slice, x_slice: slice) -> xr.Dataset:
+    return ds.isel(y=y_slice, x=x_slice).load()
+
+
+def _read_points(
+    ds: xr.Dataset, xs: list[float], ys: list[float], max_workers: int = 8
+) -> list[xr.Dataset]:
+    """Nearest-neighbour time series for many points of one cube.
+
+    Points are grouped by the (y, x) zarr chunk they fall in; every chunk
+    block is loaded once (concurrently) and the per-point series are cut
+    from it, so a dense transect costs one read per distinct chunk instead
+    of one read per point.
+    """
+    from collections import defaultdict
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    iy = ds.indexes["y"].get_indexer(ys, method="nearest")
+    ix = ds.indexes["x"].get_indexer(xs, method="nearest")
+    cy, cx = _spatial_chunks(ds)
+
+    groups = defaultdict(list)
+    for i, (row, col) in enumerate(zip(iy, ix)):
+        groups[(row // cy, col // cx)].append(i)
+    logging.debug(f"Reading {len(xs)} points from {len(groups)} chunk blocks")
+
+    series: list = [None] * len(xs)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(
+                _load_chunk_block,
+                ds,
+                slice(by * cy, (by + 1) * cy),
+                slice(bx * cx, (bx + 1) * cx),
+            ): (by, bx)
+            for by, bx in groups
+        }
+        for future in as_completed(futures):
+            by, bx = futures[future]
+            block = future.result()
+            for i in groups[(by, bx)]:
+                # Copy so the block can be freed once its points are cut out.
+                series[i] = block.isel(y=iy[i] - by * cy, x=ix[i] - bx * cx).copy(
+                    deep=True
                 )
-                continue
-            projection = properties["epsg"]
-            composite_url_https = composite_url.replace("http://", "https://")
-            projected_point = _get_projected_xy_point(lon, lat, projection)
+    return series
 
-            xr_da = _open_cached_dataset(composite_url_https)
 
-            time_series = xr_da[variables].sel(
-                x=projected_point.x, y=projected_point.y, method="nearest"
+def _point_time_series(
+    point_cubes: list[tuple[float, float, str, str]],
+    variables: set[str],
+    time_filters: dict[str, Any],
+    max_workers: int = 8,
+) -> list[dict[str, Any]]:
+    """Read the time series of ``(lon, lat, epsg, cube_url)`` points.
+
+    Points are batched per cube so the chunk reads of neighbouring points
+    are shared; results keep the order of *point_cubes*.
+    """
+    by_cube: dict = {}
+    for i, (lon, lat, projection, url) in enumerate(point_cubes):
+        by_cube.setdefault((url, projection), []).append(i)
+
+    results: dict = {}
+    for (url, projection), members in by_cube.items():
+        ds = _select_time(_open_cached_dataset(url), url, **time_filters)[variables]
+        projected = [
+            _get_projected_xy_point(point_cubes[i][0], point_cubes[i][1], projection)
+            for i in members
+        ]
+        series = _read_points(
+            ds,
+            [p.x for p in projected],
+            [p.y for p in projected],
+            max_workers=max_workers,
+        )
+        for i, projected_point, time_series in zip(members, projected, series):
+            lon, lat = point_cubes[i][:2]
+            x_off = time_series.x.values - projected_point.x
+            y_off = time_series.y.values - projected_point.y
+            ll_pt = _get_geographic_point_from_projected(
+                time_series.x.values, time_series.y.values, projection
             )
+            results[i] = {
+                "requested_point_geographic_coordinates": (lon, lat),
+                "returned_point_geographic_coordinates": (ll_pt.x, ll_pt.y),
+                "returned_point_projected_coordinates": {
+                    "epsg": projection,
+                    "coords": (time_series.x.values, time_series.y.values),
+                },
+                "returned_point_offset_from_requested_in_projection_meters": np.sqrt(
+                    x_off**2 + y_off**2
+                ),
+                "time_series": time_series,
+            }
+    return [results[i] for i in sorted(results)]
+
+
+def stack_time_series(results: list[dict[str, Any]]) -> xr.Dataset:
+    """
+    Stack per-point results of get_time_series / get_annual_time_series into
+    one Dataset with a ``point`` dimension.
 
-            if time_series is not None and isinstance(time_series, xr.Dataset):
-                x_off = time_series.x.values - projected_point.x
-                y_off = time_series.y.values - projected_point.y
-                ll_pt = _get_geographic_point_from_projected(
-                    time_series.x.values, time_series.y.values, projection
-                )
+    Variables become (point, mid_date) arrays over the union of the points'
+    mid_dates (NaN where a point's cube has no such layer). The requested and
+    returned coordinates are point-indexed arrays: ``requested_lon``,
+    ``requested_lat``, ``lon``, ``lat``, ``x``, ``y``, ``epsg`` and
+    ``offset_m`` (distance from the requested point to the pixel centre).
 
-                velocity_ts.append(
-                    {
-                        "requested_point_geographic_coordinates": (lon, lat),
-                        "returned_point_geographic_coordinates": (ll_pt.x, ll_pt.y),
-                        "returned_point_projected_coordinates": {
-                            "epsg": projection,
-                            "coords": (time_series.x.values, time_series.y.values),
-                        },
-                        "returned_point_offset_from_requested_in_projection_meters": np.sqrt(
-                            x_off**2 + y_off**2
-                        ),
-                        "time_series": time_series,
-                    }
-                )
+    :params results: list of dicts as returned by get_time_series
+    :returns: xarray Dataset with dimensions (point, mid_date)
+    """
+    if not results:
+        return xr.Dataset()
+    series = [
+        r["time_series"].reset_coords(
+            [c for c in ("x", "y") if c in r["time_series"].coords], drop=True
+        )
+        for r in results
+    ]
+    time_dim = "mid_date" if "mid_date" in series[0].dims else "time"
+    stacked = xr.concat(
+        series,
+        dim="point",
+        join="outer",
+        data_vars="all",
+        coords="minimal",
+        compat="override",
+        combine_attrs="drop_conflicts",
+    )
 
-    return velocity_ts
+    def column(key, index=None):
+        values = [r[key] if index is None else r[key][index] for r in results]
+        return np.asarray(values, dtype="float64").reshape(len(results))
+
+    projected = [r["returned_point_projected_coordinates"] for r in results]
+    stacked = stacked.assign_coords(
+        point=np.arange(len(results)),
+        requested_lon=("point", column("requested_point_geographic_coordinates", 0)),
+        requested_lat=("point", column("requested_point_geographic_coordinates", 1)),
+        lon=("point", column("returned_point_geographic_coordinates", 0)),
+        lat=("point", column("returned_point_geographic_coordinates", 1)),
+        x=("point", np.array([float(p["coords"][0]) for p in projected])),
+        y=("point", np.array([float(p["coords"][1]) for p in projected])),
+        epsg=("point", np.array([str(p["epsg"]) for p in projected])),
+        offset_m=(
+            "point",
+            column("returned_point_offset_from_requested_in_projection_meters"),
+        ),
+    )
+    return stacked.transpose("point", time_dim, ...)
 
 
-def export_csv(
-    points: list[tuple[float, float]],
-    variables: list[str] = ["v"],
-    outdir: str | None = None,
-) -> None:
-    """Exports a list of ITS_LIVE glacier velocity variables to csv files"""
+def _arrow_column(values: np.ndarray):
+    import pyarrow as pa
 
-    query_variables = _merge_default_variables(variables)
+    if values.dtype.kind in "UO":
+        # Labels padded with NaN by the outer join become nulls
+        return pa.array([v if isinstance(v, str) else None for v in values])
+    return pa.array(values)
 
-    outdir = f"./itslive-{uuid4()}" if outdir is None else outdir
 
-    Path(outdir).mkdir(parents=True, exist_ok=True)
+def time_series_to_arrow(
+    stacked: xr.Dataset, variables: list[str] | None = None, dropna: bool = False
+):
+    """
+    Long-format Arrow table of a stacked time series Dataset.
 
-    for point in track(
-        points,
-        description=f"Processing {len(points)} coordinates...",
-        total=len(points),
-    ):
-        lon = round(point[0], 4)
-        lat = round(point[1], 4)
-        result_series = get_time_series([(lon, lat)], query_variables)
-        if len(result_series):
-            series = result_series[0]["time_series"]
-
-            df = series.to_dataframe()
-            df["x"] = lon
-            df["y"] = lat
-            df = df.rename(
-                columns={
-                    "x": "lon",
-                    "y": "lat",
-                    "satellite_img1": "satellite",
-                    "mission_img1": "mission",
-                    "v": "v [m/yr]",
-                    "v_error": "v_error [m/yr]",
-                    "vx": "vx [m/yr]",
-                    "vx_error": "vx_error [m/yr]",
-                    "vy": "vy [m/yr]",
-                    "vy_error": "vy_error [m/yr]",
-                }
-            )
-            df["epsg"] = series.attrs["projection"]
-            df["date_dt [days]"] = df["date_dt"].dt.days
-            ts = df.dropna()
-            file_name = f"LON{lon}--LAT{lat}.csv"
-            ts.to_csv(
-                f"{outdir}/{file_name}",
-                columns=[
-                    "lon",
-                    "lat",
-                    "v [m/yr]",
-                    "v_error [m/yr]",
-                    "vx [m/yr]",
-                    "vx_error [m/yr]",
-                    "vy [m/yr]",
-                    "vy_error [m/yr]",
-                    "date_dt [days]",
-                    "mission",
-                    "satellite",
-                    "epsg",
-                ],
-            )
-        else:
-            rprint(f"[red on black]No data found at[/] lon: {lon}, lat: {lat}")
+    One row per (point, mid_date) with ``point_id``, the time column, the
+    point coordinates and one column per variable. Numeric (point, time)
+    variables are flattened as views and wrapped without copying; NaN
+    marks missing values. Use ``table.to_pandas()`` for a DataFrame.
 
+    :params stacked: Dataset from stack_time_series (or get_time_series(as_dataset=True))
+    :params variables: variables to include (default: all data variables)
+    :params dropna: drop rows where every selected variable is NaN (copies the columns)
+    :returns: pyarrow.Table
+    """
+    import pyarrow as pa
 
-def export_parquet(
+    time_dim = "mid_date" if "mid_date" in stacked.dims else "time"
+    n_points, n_times = stacked.sizes["point"], stacked.sizes[time_dim]
+    names = variables or [
+        v for v in stacked.data_vars if set(stacked[v].dims) <= {"point", time_dim}
+    ]
+
+    def flat(da):
+        da = da.broadcast_like(stacked[[time_dim, "point"]])
+        values = np.ascontiguousarray(da.transpose("point", time_dim).values)
+        if np.issubdtype(values.dtype, np.timedelta64):
+            # Interval columns as fractional days, like the csv exports
+            values = values / np.timedelta64(1, "D")
+        return values.reshape(-1)
+
+    columns = {
+        "point_id": np.repeat(stacked.point.values, n_times),
+        time_dim: np.tile(stacked[time_dim].values, n_points),
+    }
+    for coord in ("lon", "lat", "epsg"):
+        if coord in stacked.coords:
+            columns[coord] = np.repeat(stacked[coord].values, n_times)
+    for name in names:
+        columns[name] = flat(stacked[name])
+
+    if dropna:
+        numeric = [
+            columns[n] for n in names if np.issubdtype(columns[n].dtype, np.floating)
+        ]
+        if numeric:
+            keep = ~np.logical_and.reduce([np.isnan(c) for c in numeric])
+            columns = {k: c[keep] for k, c in columns.items()}
+    return pa.table({k: _arrow_column(c) for k, c in columns.items()})
+
+
+def get_time_series(
     points: list[tuple[float, float]],
     variables: list[str] = ["v"],
-    outdir: str | None = None,
-) -> None:
-    """Exports a list of ITS_LIVE glacier velocity variables to parquet files."""
+    start: Any = None,
+    end: Any = None,
+    min_interval: float | None = None,
+    max_interval: float | None = None,
+    mission: str | list[str] | None = None,
+    satellite: str | list[str] | None = None,
+    max_workers: int = 8,
+    as_dataset: bool = False,
+    merge_cubes: bool = False,
+) -> list[dict[str, Any]] | xr.Dataset:
+    """
+    For the points in the list, returns a list of dictionaries - each one containing:
+        an xarray DataArray (time series) for each variable on the list for each of the lon lat points.
 
-    query_variables = _merge_default_variables(variables)
+    Time filters are resolved against the cube's mid_date/date_dt/satellite index
+    before any velocity data is read, so only the chunks of the selected layers are fetched.
 
-    outdir = f"./itslive-{uuid4()}" if outdir is None else outdir
-    Path(outdir).mkdir(parents=True, exist_ok=True)
+    :params points: List of (lon, lat) coordinates (EPSG:4326) (e.g. points along the center line of a glacier)
+    :params variables: list of variables to be included in the Dataset: v, vx, vy etc.
+    :params start: keep layers with mid_date on or after this date (date or ISO string)
+    :params end: keep layers with mid_date on or before this date (inclusive)
+    :params min_interval: minimum image pair separation (date_dt) in days
+    :params max_interval: maximum image pair separation (date_dt) in days
+    :params mission: mission name(s), e.g. "sentinel1", "sentinel2", "landsatOLI"
+    :params satellite: satellite code(s) as in satellite_img1, e.g. "1A", "8"
+    :params max_workers: concurrent chunk reads; points sharing a zarr chunk are read together
+    :params as_dataset: return one Dataset with a point dimension (see stack_time_series)
+    :params merge_cubes: near seams, add the layers of every other cube containing the point
+                         (e.g. the neighbouring projection) to the best cube's series
+    :returns: list of dictionaries with coordinates and xarray time series Datasets for the nearest neighbors to the points
+                ITS_LIVE processes on a 120 m grid, so nearest points will be close to requested points
 
-    for point in track(
-        points,
-        description=f"Processing {len(points)} coordinates...",
-        total=len(points),
+    All points are looked up with one catalog search; each point is read from the cube it is
+    most interior to (by projected containment), so points near cube edges or EPSG zone
+    boundaries do not end up on a far-off edge pixel of a neighbouring cube.
+    """
+    variables = _merge_default_variables(variables)
+    point_cubes, owners = [], []
+    for i, (point, cubes) in enumerate(
+        zip(points, _find_point_cubes(points, merge=merge_cubes))
     ):
-        lon = round(point[0], 4)
-        lat = round(point[1], 4)
-        result_series = get_time_series([(lon, lat)], query_variables)
-        if len(result_series):
-            series = result_series[0]["time_series"]
-
-            df = series.to_dataframe()
-            df["lon"] = lon
-            df["lat"] = lat
-            df = df.rename(
-                columns={
-                    "satellite_img1": "satellite",
-                    "mission_img1": "mission",
-                    "v": "v [m/yr]",
-                    "v_error": "v_error [m/yr]",
-                    "vx": "vx [m/yr]",
-                    "vx_error": "vx_error [m/yr]",
-                    "vy": "vy [m/yr]",
-                    "vy_error": "vy_error [m/yr]",
-                }
-            )
-            df["epsg"] = series.attrs["projection"]
-            if "date_dt" in df.columns:
-                df["date_dt [days]"] = df["date_dt"].dt.days
-            ts = df.dropna()
-            file_name = f"LON{lon}--LAT{lat}.parquet"
-            ts.to_parquet(f"{outdir}/{file_name}")
-        else:
-            rprint(f"[red on black]No data found at[/] lon: {lon}, lat: {lat}")
+        lon = point[0]
+        lat = point[1]
+        if not cubes:
+            rprint(f"[red on black]No datacube contains[/] lon: {lon}, lat: {lat}")
+        for cube in cubes:
+            projection = cube["properties"]["epsg"]
+            zarr_url = cube["properties"]["zarr_url"]
+            cube_url = zarr_url.replace("http://", "https://")
+            point_cubes.append((lon, lat, projection, cube_url))
+            owners.append(i)
+
+    time_filters = {
+        "start": start,
+        "end": end,
+        "min_interval": min_interval,
+        "max_interval": max_interval,
+        "mission": mission,
+        "satellite": satellite,
+    }
+    results = _point_time_series(point_cubes, variables, time_filters, max_workers)
+    if merge_cubes:
+        results = _merge_point_results(results, owners)
+    return stack_time_series(results) if as_dataset else results
 
 
-def export_netcdf(
+def get_annual_time_series(
     points: list[tuple[float, float]],
     variables: list[str] = ["v"],
-    outdir: str | None = None,
-) -> None:
-    """Exports a list of ITS_LIVE glacier velocity variables to netcdf files"""
+    start: Any = None,
+    end: Any = None,
+    max_workers: int = 8,
+    as_dataset: bool = False,
+) -> list[dict[str, Any]] | xr.Dataset:
+    """
+    For the points in the list, returns annual composite velocity time series.
 
-    query_variables = _merge_default_variables(variables)
+    Composites have one layer per year and no per-pair metadata, so only
+    the start/end window applies; it is resolved before any data is read.
 
-    outdir = f"./itslive-{uuid4()}" if outdir is None else outdir
-    Path(outdir).mkdir(parents=True, exist_ok=True)
+    :params points: List of (lon, lat) coordinates (EPSG:4326)
+    :params variables: list of variables to be included: v, vx, vy etc.
+    :params start: keep years on or after this date (date or ISO string)
+    :params end: keep years on or before this date (inclusive)
+    :params max_workers: concurrent chunk reads; points sharing a zarr chunk are read together
+    :params as_dataset: return one Dataset with a point dimension (see stack_time_series)
+    :returns: list of dictionaries with coordinates and xarray time series
+              Datasets from annual composites
+    """
+    variables = _merge_default_composite_variables(variables)
+    point_cubes = []
 
-    for point in track(
-        points,
-        description=f"Processing {len(points)} coordinates...",
-        total=len(points),
-    ):
-        lon = round(point[0], 4)
-        lat = round(point[1], 4)
+    for point, cubes in zip(points, _find_point_cubes(points)):
+        lon = point[0]
+        lat = point[1]
 
-        file_name = f"LON{lon}--LAT{lat}"
-        result_series = get_time_series([(lon, lat)], query_variables)
-        if len(result_series):
-            series = result_series[0]["time_series"]
-            series.to_netcdf(f"{outdir}/{file_name}.nc")
-        else:
-            rprint(f"[red on black]No data found at[/] lon:{lon}, lat: {lat}")
+        if len(cubes):
+            properties = cubes[0]["properties"]
+            composite_url = properties.get("composite_zarr_url")
+            if not composite_url:
+                rprint(
+                    f"[yellow]'composite_zarr_url' not available for cube at point ({lon}, {lat}); "
+                    "skipping annual composite time series for this point.[/yellow]"
+                )
+                continue
+            projection = properties["epsg"]
+            composite_url_https = composite_url.replace("http://", "https://")
+            point_cubes.append((lon, lat, projection, composite_url_https))
 
+    results = _point_time_series(
+        point_cubes, variables, {"start": start, "end": end}, max_workers
+    )
+    return stack_time_series(results) if as_dataset else results
 
-def export_stdout(
-    points: list[tuple[float, float]],
-    variables: list[str] = ["v"],
-) -> None:
-    """Exports a list of ITS_LIVE glacier velocity variables to stdout"""
 
-    query_variables = _merge_default_variables(variables)
+def _project_geometry(
+    roi: geometry.base.BaseGeometry, projection: str
+) -> geometry.base.BaseGeometry:
+    """Project a lon/lat *roi* to the cube projection.
 
-    for point in track(
-        points,
-        description=f"Processing {len(points)} coordinates...",
-        total=len(points),
-    ):
-        lon = round(point[0], 4)
-        lat = round(point[1], 4)
+    The outline is densified first so long edges that curve once projected
+    keep their shape.
+    """
+    import shapely
 
-        result_series = get_time_series([(lon, lat)], query_variables)
-        if len(result_series):
-            series = result_series[0]["time_series"]
-            df = series.to_dataframe()
-            df["x"] = lon
-            df["y"] = lat
-            df = df.rename(
-                columns={
-                    "x": "lon",
-                    "y": "lat",
-                    "satellite_img1": "satellite",
-                    "mission_img1": "mission",
-                    "v": "v [m/yr]",
-                    "v_error": "v_error [m/yr]",
-                    "vx": "vx [m/yr]",
-                    "vx_error": "vx_error [m/yr]",
-                    "vy": "vy [m/yr]",
-                    "vy_error": "vy_error [m/yr]",
-                }
-            )
-            df["epsg"] = series.attrs["projection"]
-            df["date_dt [days]"] = df["date_dt"].dt.days
-            ts = df.dropna()
-            outstr = ts.to_markdown()
-            rprint(outstr)
-        else:
-            rprint(f"[red on black] No data found at [/] lon: {lon}, lat: {lat}")
+    reprojection = pyproj.Transformer.from_crs(
+        "EPSG:4326", f"EPSG:{projection}", always_xy=True
+    )
+    return shapely.transform(
+        shapely.segmentize(roi, 0.01),
+        lambda xy: np.column_stack(reprojection.transform(xy[:, 0], xy[:, 1])),
+    )
 
 
 def plot_time_series_terminal(
@@ -0,0 +1,626 @@
+"""
+Exports of point time series to tables, zarr stores and streams.
+"""
+
+import datetime
+import json
+import logging
+import math
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+import numpy as np
+import xarray as xr
+from rich import print as rprint
+from rich.progress import track
+
+from itslive.velocity_cubes._cubes import (
+    _cached_time_index,
+    _find_point_cubes,
+    _merge_default_variables,
+    _open_cached_dataset,
+    _point_time_series,
+    _select_time_indices,
+    get_time_series,
+    stack_time_series,
+)
+
+# Exported column names (with units) of the cube variables
+_EXPORT_COLUMNS = {
+    "v": "v [m/yr]",
+    "v_error": "v_error [m/yr]",
+    "vx": "vx [m/yr]",
+    "vx_error": "vx_error [m/yr]",
+    "vy": "vy [m/yr]",
+    "vy_error": "vy_error [m/yr]",
+    "date_dt": "date_dt [days]",
+    "mission_img1": "mission",
+    "satellite_img1": "satellite",
+}
+
+
+def _export_batches(
+    points: list[tuple[float, float]],
+    variables: list[str],
+    time_filters: dict[str, Any],
+    batch_size: int = 100,
+    console: Any = None,
+):
+    """Read the points to export in batches of *batch_size*.
+
+    Each batch is one get_time_series call, so the points share the catalog
+    search and chunk reads. Coordinates are rounded to 4 decimals as in the
+    exported file names; yields the list of results of each batch. Progress
+    and messages go to *console* (a rich Console) when given.
+    """
+    query_variables = _merge_default_variables(variables)
+    rounded = [(round(p[0], 4), round(p[1], 4)) for p in points]
+    say = rprint if console is None else console.print
+    for start in track(
+        range(0, len(rounded), batch_size),
+        description=f"Processing {len(points)} coordinates...",
+        total=-(-len(rounded) // batch_size),
+        console=console,
+    ):
+        batch = rounded[start : start + batch_size]
+        results = get_time_series(batch, query_variables, **time_filters)
+        found = {tuple(r["requested_point_geographic_coordinates"]): r for r in results}
+        for lon, lat in batch:
+            if (lon, lat) not in found:
+                say(f"[red on black]No data found at[/] lon: {lon}, lat: {lat}")
+        yield [found[point] for point in dict.fromkeys(batch) if point in found]
+
+
+def _export_table(results: list[dict[str, Any]], dropna: bool = True):
+    """Shape a batch of get_time_series results into one typed Arrow table.
+
+    The rows of every point are contiguous, in the order of *results*, with
+    the requested lon/lat, the time column, one column per variable
+    (renamed with units, see _EXPORT_COLUMNS), date_dt as int32 whole days
+    and mission, satellite and epsg as dictionary (categorical) columns.
+    Columns are concatenated from the 1-D series arrays, without per-point
+    DataFrames. With *dropna*, rows with a missing value in any variable
+    are dropped.
+
+    :returns: (pyarrow.Table, offsets) where the rows of point i are
+              ``table.slice(offsets[i], offsets[i + 1] - offsets[i])``
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    series = [r["time_series"] for r in results]
+    if not series:
+        return pa.table({}), np.zeros(1, dtype=int)
+    time_dim = "mid_date" if "mid_date" in series[0].dims else "time"
+    lengths = np.array([s.sizes[time_dim] for s in series])
+    point_ids = np.repeat(np.arange(len(series)), lengths)
+
+    order = list(_EXPORT_COLUMNS)
+    names = list(
+        dict.fromkeys(
+            name for s in series for name in s.data_vars if s[name].dims == (time_dim,)
+        )
+    )
+    names.sort(key=lambda n: order.index(n) if n in order else len(order))
+
+    def gather(name):
+        return np.concatenate(
+            [
+                s[name].values if name in s else np.full(n, np.nan)
+                for s, n in zip(series, lengths)
+            ]
+        )
+
+    keep = np.ones(point_ids.size, dtype=bool)
+    values, missing = {}, {}
+    for name in names:
+        column = gather(name)
+        if column.dtype.kind == "m":
+            isnat = np.isnat(column)
+            days = column.astype("timedelta64[D]").astype("int64")
+            values[name], missing[name] = (
+                np.where(isnat, 0, days).astype("int32"),
+                isnat,
+            )
+        elif column.dtype.kind in "OUS":
+            isna = pd.isna(column)
+            values[name], missing[name] = np.where(isna, "", column).astype(str), isna
+        elif column.dtype.kind == "f":
+            values[name], missing[name] = column, np.isnan(column)
+        else:
+            values[name], missing[name] = column, np.zeros(column.shape, dtype=bool)
+        if dropna:
+            keep &= ~missing[name]
+    rows = None if keep.all() else np.flatnonzero(keep)
+
+    def take(array):
+        return array if rows is None else array[rows]
+
+    requested = np.array(
+        [r["requested_point_geographic_coordinates"] for r in results], dtype=float
+    ).reshape(-1, 2)
+    ids = take(point_ids)
+    columns = {
+        "lon": pa.array(requested[ids, 0]),
+        "lat": pa.array(requested[ids, 1]),
+        time_dim: pa.array(take(gather(time_dim))),
+    }
+    for name in names:
+        column = take(values[name])
+        # Floats keep NaN for missing values, like the DataFrame exports did
+        mask = None if dropna or column.dtype.kind == "f" else take(missing[name])
+        column = pa.array(column, mask=mask)
+        if pa.types.is_string(column.type):
+            column = column.dictionary_encode()
+        columns[_EXPORT_COLUMNS.get(name, name)] = column
+
+    epsgs = [
+        str(
+            s.attrs.get("projection")
+            or r["returned_point_projected_coordinates"]["epsg"]
+        )
+        for s, r in zip(series, results)
+    ]
+    codes, inverse = np.unique(epsgs, return_inverse=True)
+    columns["epsg"] = pa.DictionaryArray.from_arrays(
+        pa.array(inverse[ids].astype("int32")), pa.array(codes.tolist())
+    )
+    offsets = np.searchsorted(ids, np.arange(len(series) + 1))
+    return pa.table(columns), offsets
+
+
+def _point_tables(results: list[dict[str, Any]]):
+    """Yield ``(lon, lat, table)`` per point of a batch of results."""
+    table, offsets = _export_table(results)
+    for result, start, stop in zip(results, offsets[:-1], offsets[1:]):
+        lon, lat = result["requested_point_geographic_coordinates"]
+        yield lon, lat, table.slice(start, stop - start)
+
+
+def export_csv(
+    points: list[tuple[float, float]],
+    variables: list[str] = ["v"],
+    outdir: str | None = None,
+    batch_size: int = 100,
+    **time_filters,
+) -> None:
+    """Exports a list of ITS_LIVE glacier velocity variables to csv files.
+
+    Time filters (start, end, min_interval, max_interval, mission, satellite)
+    are passed on to get_time_series. Points are read *batch_size* at a time.
+    """
+    from pyarrow import csv
+
+    outdir = f"./itslive-{uuid4()}" if outdir is None else outdir
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+
+    for results in _export_batches(points, variables, time_filters, batch_size):
+        for lon, lat, table in _point_tables(results):
+            csv.write_csv(table, f"{outdir}/LON{lon}--LAT{lat}.csv")
+
+
+def export_parquet(
+    points: list[tuple[float, float]],
+    variables: list[str] = ["v"],
+    outdir: str | None = None,
+    batch_size: int = 100,
+    **time_filters,
+) -> None:
+    """Exports a list of ITS_LIVE glacier velocity variables to parquet files.
+
+    Time filters (start, end, min_interval, max_interval, mission, satellite)
+    are passed on to get_time_series. Points are read *batch_size* at a time.
+    """
+    import pyarrow.parquet as pq
+
+    outdir = f"./itslive-{uuid4()}" if outdir is None else outdir
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+
+    for results in _export_batches(points, variables, time_filters, batch_size):
+        for lon, lat, table in _point_tables(results):
+            pq.write_table(table, f"{outdir}/LON{lon}--LAT{lat}.parquet")
+
+
+def export_netcdf(
+    points: list[tuple[float, float]],
+    variables: list[str] = ["v"],
+    outdir: str | None = None,
+    batch_size: int = 100,
+    **time_filters,
+) -> None:
+    """Exports a list of ITS_LIVE glacier velocity variables to netcdf files.
+
+    Time filters (start, end, min_interval, max_interval, mission, satellite)
+    are passed on to get_time_series. Points are read *batch_size* at a time.
+    """
+
+    outdir = f"./itslive-{uuid4()}" if outdir is None else outdir
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+
+    for results in _export_batches(points, variables, time_filters, batch_size):
+        for result in results:
+            lon, lat = result["requested_point_geographic_coordinates"]
+            result["time_series"].to_netcdf(f"{outdir}/LON{lon}--LAT{lat}.nc")
+
+
+def _zarr_compression(compression: str) -> dict[str, Any]:
+    """Zarr encoding entry for a compression name, for the installed zarr."""
+    import numcodecs
+    import zarr
+
+    codecs = {
+        "zstd": numcodecs.Zstd(level=3),
+        "blosc": numcodecs.Blosc(
+            cname="lz4", clevel=5, shuffle=numcodecs.Blosc.SHUFFLE
+        ),
+        "gzip": numcodecs.GZip(level=5),
+        "none": None,
+    }
+    if compression not in codecs:
+        raise ValueError(f"compression must be one of {list(codecs)}")
+    codec = codecs[compression]
+    if int(zarr.__version__.split(".")[0]) < 3:
+        return {"compressor": codec}
+    return {"compressors": () if codec is None else (codec,)}
+
+
+def _fill_value(dtype: np.dtype) -> Any:
+    if dtype.kind == "U":
+        return ""
+    if dtype.kind == "M":
+        return np.datetime64("NaT")
+    return np.nan
+
+
+def _zarr_export_layout(
+    point_cubes: list[tuple[float, float, str, str]],
+    variables: set[str],
+    time_filters: dict[str, Any],
+) -> tuple[np.ndarray, dict[str, np.dtype]]:
+    """Union of the selected mid_dates and the stored dtype of each variable.
+
+    Only the cached 1-D time index of every cube is read. Labels get a
+    fixed width wide enough for all cubes so the point blocks can be
+    written into the same arrays; intervals are stored as float days and
+    integers as floats so missing layers can be NaN.
+    """
+    dates, dtypes = [], {}
+    for url in dict.fromkeys(cube[3] for cube in point_cubes):
+        index = _cached_time_index(url)
+        selected = _select_time_indices(index, **time_filters)
+        dates.append(index["time"] if selected is None else index["time"][selected])
+        ds = _open_cached_dataset(url)
+        for name in sorted(variables):
+            if name not in ds:
+                continue
+            dtype = ds[name].dtype
+            if dtype.kind in "OUS":
+                labels = index.get(name, np.array([], dtype=str)).astype(str)
+                width = max(
+                    int(np.char.str_len(labels).max(initial=1)),
+                    dtype.itemsize // 4 if dtype.kind == "U" else 1,
+                    np.dtype(dtypes.get(name, "<U1")).itemsize // 4,
+                )
+                dtype = np.dtype(f"<U{width}")
+            elif dtype.kind == "m":
+                dtype = np.dtype("float32")
+            elif dtype.kind != "M":
+                dtype = np.promote_types(dtype, np.float32)
+                if name in dtypes:
+                    dtype = np.promote_types(dtype, dtypes[name])
+            dtypes[name] = dtype
+    return np.unique(np.concatenate(dates)), dtypes
+
+
+def _write_zarr_block(
+    store: str,
+    region: slice,
+    point_cubes: dict[int, tuple[float, float, str, str]],
+    variables: set[str],
+    dtypes: dict[str, np.dtype],
+    epsg_dtype: np.dtype,
+    dates: np.ndarray,
+    time_filters: dict[str, Any],
+    max_workers: int,
+) -> int:
+    """Read the points of one ``point`` chunk and write them to its region.
+
+    *point_cubes* maps the store position of each point in the region that
+    lies in a cube to its ``(lon, lat, epsg, cube_url)``.
+    """
+    shape = (region.stop - region.start, len(dates))
+    data = {
+        name: np.full(shape, _fill_value(dtype), dtype=dtype)
+        for name, dtype in dtypes.items()
+    }
+    located = {
+        name: np.full(shape[0], np.nan) for name in ("lon", "lat", "x", "y", "offset_m")
+    }
+    located["epsg"] = np.full(shape[0], "", dtype=epsg_dtype)
+
+    if point_cubes:
+        results = _point_time_series(
+            list(point_cubes.values()), variables, time_filters, max_workers
+        )
+        stacked = stack_time_series(results)
+        rows = np.fromiter(point_cubes, dtype=int) - region.start
+        cols = np.searchsorted(dates, stacked.mid_date.values)
+        for name, dtype in dtypes.items():
+            if name not in stacked:
+                continue
+            values = stacked[name].transpose("point", "mid_date").values
+            if values.dtype.kind == "m":
+                values = values / np.timedelta64(1, "D")
+            elif dtype.kind == "U":
+                # The outer join pads labels with NaN
+                values = np.where(
+                    [[isinstance(v, str) for v in row] for row in values], values, ""
+                )
+            data[name][np.ix_(rows, cols)] = values.astype(dtype)
+        for name in located:
+            located[name][rows] = stacked[name].values
+
+    block = xr.Dataset(
+        {name: (("point", "mid_date"), values) for name, values in data.items()},
+        coords={name: ("point", values) for name, values in located.items()},
+    )
+    block.to_zarr(store, region={"point": region}, consolidated=False)
+    return len(point_cubes)
+
+
+def export_zarr(
+    points: list[tuple[float, float]],
+    variables: list[str] = ["v"],
+    outdir: str | None = None,
+    compression: str = "zstd",
+    point_chunk: int = 100,
+    workers: int = 4,
+    max_workers: int = 8,
+    **time_filters,
+) -> xr.Dataset | None:
+    """Exports the time series of many points to one chunked zarr store.
+
+    Every variable is a (point, mid_date) array over the union of the
+    selected mid_dates of all the cubes involved, chunked by *point_chunk*
+    points; point coordinates (requested_lon/lat, lon, lat, x, y, epsg,
+    offset_m) are point-indexed coordinates, date_dt is in days. The store
+    layout is written first, then the points of each chunk are read and
+    written to their own region by *workers* concurrent writers. Points
+    outside every cube are left empty. Metadata is consolidated at the end.
+
+    Time filters (start, end, min_interval, max_interval, mission, satellite)
+    are passed on to get_time_series.
+
+    :params points: List of (lon, lat) coordinates (EPSG:4326)
+    :params variables: list of variables to export: v, vx, vy etc.
+    :params outdir: the store path if it ends in .zarr, else the directory
+                    where ``itslive-time-series.zarr`` is written
+    :params compression: zstd, blosc, gzip or none
+    :params point_chunk: points per chunk (and per concurrent write)
+    :params workers: concurrent point chunks being read and written
+    :params max_workers: concurrent chunk reads within a cube
+    :returns: the store opened lazily with xarray.open_zarr, or None when
+              no datacube contains any of the points
+    """
+    import dask.array
+    import zarr
+
+    encoding = _zarr_compression(compression)
+    query_variables = _merge_default_variables(variables)
+    time_filters = {k: v for k, v in time_filters.items() if v is not None}
+
+    outdir = f"./itslive-{uuid4()}" if outdir is None else str(outdir)
+    store = outdir if outdir.endswith(".zarr") else f"{outdir}/itslive-time-series.zarr"
+    if "://" not in store:
+        Path(store).parent.mkdir(parents=True, exist_ok=True)
+
+    point_cubes, positions = [], []
+    for i, (point, cubes) in enumerate(zip(points, _find_point_cubes(points))):
+        if not cubes:
+            rprint(
+                f"[red on black]No datacube contains[/] lon: {point[0]}, lat: {point[1]}"
+            )
+            continue
+        properties = cubes[0]["properties"]
+        url = properties["zarr_url"].replace("http://", "https://")
+        point_cubes.append((point[0], point[1], properties["epsg"], url))
+        positions.append(i)
+    if not point_cubes:
+        return None
+
+    dates, dtypes = _zarr_export_layout(point_cubes, query_variables, time_filters)
+    epsg_dtype = np.dtype(f"<U{max(len(str(c[2])) for c in point_cubes)}")
+    n_points = len(points)
+    chunks = (point_chunk, max(len(dates), 1))
+
+    def lazy(dtype, shape, chunks):
+        return dask.array.full(shape, _fill_value(dtype), dtype=dtype, chunks=chunks)
+
+    located = {name: np.dtype(float) for name in ("lon", "lat", "x", "y", "offset_m")}
+    template = xr.Dataset(
+        {
+            name: (("point", "mid_date"), lazy(dtype, (n_points, len(dates)), chunks))
+            for name, dtype in dtypes.items()
+        },
+        coords={
+            "point": np.arange(n_points),
+            "mid_date": dates,
+            "requested_lon": ("point", np.array([p[0] for p in points], dtype=float)),
+            "requested_lat": ("point", np.array([p[1] for p in points], dtype=float)),
+            **{
+                name: ("point", lazy(dtype, n_points, point_chunk))
+                for name, dtype in {**located, "epsg": epsg_dtype}.items()
+            },
+        },
+        attrs={name: str(value) for name, value in time_filters.items()},
+    )
+    if "date_dt" in template:
+        template["date_dt"].attrs["units"] = "days"
+    template.to_zarr(
+        store,
+        mode="w",
+        compute=False,
+        consolidated=False,
+        zarr_format=2,
+        encoding={name: dict(encoding) for name in dtypes},
+    )
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for start in range(0, n_points, point_chunk):
+            region = slice(start, min(start + point_chunk, n_points))
+            block_cubes = {
+                i: cube
+                for i, cube in zip(positions, point_cubes)
+                if region.start <= i < region.stop
+            }
+            futures.append(
+                pool.submit(
+                    _write_zarr_block,
+                    store,
+                    region,
+                    block_cubes,
+                    query_variables,
+                    dtypes,
+                    epsg_dtype,
+                    dates,
+                    time_filters,
+                    max_workers,
+                )
+            )
+        for future in track(
+            as_completed(futures),
+            description=f"Writing {n_points} points to {store}...",
+            total=len(futures),
+        ):
+            future.result()
+
+    zarr.consolidate_metadata(store)
+    return xr.open_zarr(store, consolidated=True)
+
+
+def export_stdout(
+    points: list[tuple[float, float]],
+    variables: list[str] = ["v"],
+    batch_size: int = 100,
+    **time_filters,
+) -> None:
+    """Exports a list of ITS_LIVE glacier velocity variables to stdout.
+
+    Time filters (start, end, min_interval, max_interval, mission, satellite)
+    are passed on to get_time_series. Points are read *batch_size* at a time.
+    """
+    from rich.markup import escape
+    from tabulate import tabulate
+
+    for results in _export_batches(points, variables, time_filters, batch_size):
+        for _, _, table in _point_tables(results):
+            # Escaped so rich does not read the "[m/yr]" units as markup
+            rprint(escape(tabulate(table.to_pydict(), headers="keys", tablefmt="pipe")))
+
+
+_STREAM_FORMATS = ("ndjson", "csv", "arrow-ipc")
+
+
+def _conform(table, schema):
+    """Cast *table* to the *schema* of the first batch of a stream."""
+    import pyarrow as pa
+
+    columns = [
+        (
+            table.column(field.name).cast(field.type)
+            if field.name in table.column_names
+            else pa.nulls(table.num_rows, field.type)
+        )
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _json_value(value):
+    """JSON value of an exported cell: ISO 8601 dates, null for NaN."""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def export_stream(
+    points: list[tuple[float, float]],
+    variables: list[str] = ["v"],
+    format: str = "ndjson",
+    stream: Any = None,
+    batch_size: int = 100,
+    **time_filters,
+) -> int:
+    """Streams the time series of the points as machine-readable rows.
+
+    Rows are shaped as in export_csv (see _export_table) and written point
+    by point as each batch of *batch_size* points is read, then flushed, so
+    memory stays bounded by one batch. Formats are ``ndjson`` (one JSON
+    object per row), ``csv`` (one header) and ``arrow-ipc`` (an Arrow IPC
+    stream, one record batch per point). The columns of the first batch
+    fix the schema of the stream. Progress and messages go to stderr.
+
+    A closed pipe (e.g. ``| head``) ends the export quietly.
+
+    :params points: List of (lon, lat) coordinates (EPSG:4326)
+    :params variables: list of variables to export: v, vx, vy etc.
+    :params format: ndjson, csv or arrow-ipc
+    :params stream: binary file object to write to (default: stdout)
+    :params batch_size: points read (and flushed) at a time
+    :returns: number of rows written
+    """
+    import os
+    import sys
+
+    import pyarrow as pa
+    from pyarrow import csv
+    from rich.console import Console
+
+    if format not in _STREAM_FORMATS:
+        raise ValueError(f"format must be one of {_STREAM_FORMATS}")
+    to_stdout = stream is None
+    sink = sys.stdout.buffer if to_stdout else stream
+
+    writer, schema, rows = None, None, 0
+    batches = _export_batches(
+        points, variables, time_filters, batch_size, console=Console(stderr=True)
+    )
+    try:
+        for results in batches:
+            for _, _, table in _point_tables(results):
+                if schema is None:
+                    schema = table.schema
+                    if format == "csv":
+                        writer = csv.CSVWriter(sink, schema)
+                    elif format == "arrow-ipc":
+                        writer = pa.ipc.new_stream(sink, schema)
+                table = _conform(table, schema)
+                if format == "ndjson":
+                    lines = [
+                        json.dumps({k: _json_value(v) for k, v in row.items()}) + "\n"
+                        for row in table.to_pylist()
+                    ]
+                    sink.write("".join(lines).encode())
+                else:
+                    writer.write_table(table)
+                rows += table.num_rows
+            sink.flush()
+        if writer is not None:
+            writer.close()
+        sink.flush()
+    except BrokenPipeError:
+        logging.debug(f"Output closed after {rows} rows")
+        if to_stdout:
+            # Python flushes stdout again at exit; point it at devnull so
+            # the closed pipe does not raise a second time.
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+    finally:
+        batches.close()
+    return rows
@@ -0,0 +1,856 @@
+"""
+Regional reads of the datacubes: windows, aggregates, profiles and areas.
+"""
+
+import functools
+import logging
+import warnings
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pyproj
+import xarray as xr
+from rich import print as rprint
+from shapely import geometry
+
+from itslive.velocity_cubes._cubes import (
+    _open_cached_dataset,
+    _project_geometry,
+    _search_cubes,
+    _select_time,
+    _spatial_chunks,
+)
+
+
+def _roi_to_cube_bounds(
+    roi: geometry.base.BaseGeometry, projection: str
+) -> tuple[float, float, float, float]:
+    """Bounds of a lon/lat *roi* in the cube projection."""
+    return _project_geometry(roi, projection).bounds
+
+
+def _with_geotransform(piece: xr.Dataset) -> xr.Dataset:
+    """Reset ``mapping.GeoTransform`` to the upper-left corner of *piece*.
+
+    x and y are pixel centres, so the corner is half a pixel out.
+    """
+    if "mapping" not in piece or "GeoTransform" not in piece["mapping"].attrs:
+        return piece
+    gt = [float(v) for v in piece["mapping"].attrs["GeoTransform"].split()]
+    gt[0] = float(piece.x.min()) - gt[1] / 2.0
+    gt[3] = float(piece.y.max()) - gt[5] / 2.0
+    piece["mapping"] = piece["mapping"].copy()
+    piece["mapping"].attrs["GeoTransform"] = " ".join(str(v) for v in gt)
+    return piece
+
+
+def _open_dask_dataset(url: str) -> xr.Dataset:
+    """Open a cube as dask arrays chunked like the zarr store."""
+    return xr.open_dataset(url, engine="zarr", chunks={}, decode_timedelta=True)
+
+
+def _subcube_pieces(
+    roi: geometry.base.BaseGeometry,
+    variables: list[str],
+    time_filters: dict[str, Any],
+    chunked: bool = False,
+    optional: list[str] = (),
+) -> list[tuple[str, str, xr.Dataset]]:
+    """Lazy ``(cube_url, epsg, window)`` pieces of every cube *roi* touches.
+
+    With ``chunked`` the windows are dask-backed, for out-of-core compute;
+    the *optional* variables are kept only in the cubes that have them.
+    """
+    roi_geojson = geometry.mapping(roi)
+    pieces = []
+    for cube in _search_cubes(roi_geojson, roi_geojson):
+        projection = cube["properties"]["epsg"]
+        url = cube["properties"]["zarr_url"].replace("http://", "https://")
+        opened = _open_dask_dataset(url) if chunked else _open_cached_dataset(url)
+        ds = _select_time(opened, url, **time_filters)
+        minx, miny, maxx, maxy = _roi_to_cube_bounds(roi, projection)
+        cols = np.flatnonzero((ds.x.values >= minx) & (ds.x.values <= maxx))
+        rows = np.flatnonzero((ds.y.values >= miny) & (ds.y.values <= maxy))
+        if not len(cols) or not len(rows):
+            continue
+        names = list(variables) + [
+            name for name in [*optional, "mapping"] if name in ds
+        ]
+        piece = ds[names].isel(
+            x=slice(cols[0], cols[-1] + 1), y=slice(rows[0], rows[-1] + 1)
+        )
+        piece.attrs["url"] = url
+        pieces.append((url, projection, piece))
+    return pieces
+
+
+def _load_pieces(pieces: list[xr.Dataset], max_workers: int) -> list[xr.Dataset]:
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(lambda piece: piece.load(), pieces))
+
+
+def _mosaic(
+    pieces: list[xr.Dataset],
+    x: np.ndarray | None = None,
+    y: np.ndarray | None = None,
+    mid_date: np.ndarray | None = None,
+) -> xr.Dataset:
+    """Merge loaded pieces of one projection on the shared 120 m grid."""
+    # Each piece has its own GeoTransform; keep one mapping and fix it below.
+    mapping = pieces[0]["mapping"] if "mapping" in pieces[0] else None
+    merged = xr.merge(
+        [p.drop_vars("mapping", errors="ignore") for p in pieces],
+        join="outer",
+        compat="no_conflicts",
+        combine_attrs="drop_conflicts",
+    )
+    if mapping is not None:
+        merged["mapping"] = mapping
+    indexers = {}
+    if y is not None:
+        indexers["y"] = y
+    elif not merged.indexes["y"].is_monotonic_decreasing:
+        # Keep the north-up row order of the cubes.
+        indexers["y"] = merged.y.values[::-1]
+    if x is not None:
+        indexers["x"] = x
+    if mid_date is not None:
+        indexers["mid_date"] = mid_date
+    if indexers:
+        merged = merged.reindex(indexers)
+    return _with_geotransform(merged)
+
+
+def _write_time_blocks(
+    pieces: list[xr.Dataset],
+    outpath: str,
+    group: str | None,
+    mosaic: bool,
+    time_block: int,
+    max_workers: int,
+) -> None:
+    """Stream *pieces* (mosaicked or a single piece) to zarr by time block."""
+    if mosaic:
+        dates = np.unique(np.concatenate([p.mid_date.values for p in pieces]))
+        x = np.unique(np.concatenate([p.x.values for p in pieces]))
+        y = np.unique(np.concatenate([p.y.values for p in pieces]))[::-1]
+    else:
+        dates = pieces[0].mid_date.values
+
+    for i in range(0, len(dates), time_block):
+        if mosaic:
+            block_dates = dates[i : i + time_block]
+            selected = [
+                p.isel(mid_date=np.flatnonzero(np.isin(p.mid_date.values, block_dates)))
+                for p in pieces
+            ]
+            block = _mosaic(
+                _load_pieces(selected, max_workers), x=x, y=y, mid_date=block_dates
+            )
+        else:
+            block = _with_geotransform(
+                pieces[0].isel(mid_date=slice(i, i + time_block)).load()
+            )
+        # Source encodings (v2 compressors, chunking) do not fit the new store.
+        block = block.drop_encoding()
+        if i == 0:
+            block.to_zarr(outpath, group=group, mode="w" if group is None else "a")
+        else:
+            block.drop_vars("mapping", errors="ignore").to_zarr(
+                outpath, group=group, append_dim="mid_date"
+            )
+        logging.info(f"Wrote time block {i // time_block + 1} to {outpath}")
+
+
+def get_subcube(
+    bbox: list[float] | None = None,
+    polygon: list[tuple[float, float]] | None = None,
+    variables: list[str] = ["v"],
+    start: Any = None,
+    end: Any = None,
+    mosaic: bool = True,
+    outpath: str | None = None,
+    time_block: int = 1000,
+    max_workers: int = 4,
+) -> xr.Dataset | list[xr.Dataset]:
+    """
+    Extracts a spatial window from every datacube the region intersects.
+
+    Each piece keeps the cube projection and gets a ``mapping.GeoTransform``
+    matching its own upper-left corner. Pieces of cubes that share a
+    projection can be mosaicked onto one grid; the window covers the bounds
+    of the region in the cube projection.
+
+    :params bbox: [min_lon, min_lat, max_lon, max_lat] (EPSG:4326)
+    :params polygon: list of (lon, lat) coordinates (EPSG:4326), instead of bbox
+    :params variables: list of variables to extract: v, vx, vy etc.
+    :params start: keep layers with mid_date on or after this date
+    :params end: keep layers with mid_date on or before this date (inclusive)
+    :params mosaic: merge the pieces into one Dataset (they must share a projection);
+                    otherwise return one Dataset per cube
+    :params outpath: stream the result to this local zarr store, time_block layers at a time,
+                     instead of loading it in memory. Per-cube pieces are written as groups.
+    :params time_block: number of mid_date layers read and written at once when streaming
+    :params max_workers: cubes read concurrently
+    :returns: an xarray Dataset (mosaic) or a list of Datasets (per cube). When outpath is
+              given these are opened lazily from the written store.
+    """
+    from shapely.geometry import Polygon, box
+
+    if bbox is not None:
+        roi = box(*bbox)
+    elif polygon is not None:
+        roi = Polygon(polygon)
+    else:
+        raise ValueError("get_subcube needs a bbox or a polygon")
+
+    found = _subcube_pieces(roi, variables, {"start": start, "end": end})
+    if not found:
+        rprint("[red on black]No datacube intersects the requested region[/]")
+        return xr.Dataset() if mosaic else []
+
+    projections = {projection for _, projection, _ in found}
+    if mosaic and len(projections) > 1:
+        raise ValueError(
+            f"Region spans cubes in several projections ({sorted(projections)}); "
+            "use mosaic=False to get one piece per cube"
+        )
+    pieces = [piece for _, _, piece in found]
+
+    if outpath is None:
+        loaded = [_with_geotransform(p) for p in _load_pieces(pieces, max_workers)]
+        return _mosaic(loaded) if mosaic else loaded
+
+    if mosaic:
+        _write_time_blocks(pieces, outpath, None, True, time_block, max_workers)
+        return xr.open_zarr(outpath)
+
+    groups = []
+    for url, _, piece in found:
+        group = Path(url).stem
+        _write_time_blocks([piece], outpath, group, False, time_block, max_workers)
+        groups.append(group)
+    return [xr.open_zarr(outpath, group=group) for group in groups]
+
+
+def _as_line(line: Any) -> geometry.LineString:
+    """A lon/lat LineString from coordinates, a GeoJSON dict or a geometry."""
+    if isinstance(line, geometry.base.BaseGeometry):
+        geom = line
+    elif isinstance(line, dict):
+        geom = geometry.shape(line.get("geometry", line))
+    else:
+        geom = geometry.LineString(line)
+    if geom.geom_type != "LineString":
+        raise ValueError(f"Expected a LineString, got {geom.geom_type}")
+    return geom
+
+
+def _project_xy(
+    xs: np.ndarray, ys: np.ndarray, source: str, target: str
+) -> tuple[np.ndarray, np.ndarray]:
+    if source == target:
+        return xs, ys
+    transformer = pyproj.Transformer.from_crs(source, target, always_xy=True)
+    return transformer.transform(xs, ys)
+
+
+def _profile_piece(
+    ds: xr.Dataset, xs: np.ndarray, ys: np.ndarray, variables: list[str]
+) -> tuple[np.ndarray, xr.Dataset | None]:
+    """Read the pixels under the samples ``(xs, ys)`` that fall in *ds*.
+
+    Samples landing in the same pixel share one read; every distinct pixel
+    is fetched with a single vectorized (pointwise) selection.
+
+    :returns: the indices of the samples inside the cube and a Dataset with
+              one ``distance`` entry per inside sample
+    """
+    half_x = abs(float(ds.x[1] - ds.x[0])) / 2 if ds.sizes["x"] > 1 else 60.0
+    half_y = abs(float(ds.y[1] - ds.y[0])) / 2 if ds.sizes["y"] > 1 else 60.0
+    inside = np.flatnonzero(
+        (xs >= float(ds.x.min()) - half_x)
+        & (xs <= float(ds.x.max()) + half_x)
+        & (ys >= float(ds.y.min()) - half_y)
+        & (ys <= float(ds.y.max()) + half_y)
+    )
+    if not len(inside):
+        return inside, None
+
+    iy = ds.indexes["y"].get_indexer(ys[inside], method="nearest")
+    ix = ds.indexes["x"].get_indexer(xs[inside], method="nearest")
+    pixels, inverse = np.unique(np.column_stack([iy, ix]), axis=0, return_inverse=True)
+    logging.debug(f"Reading {len(pixels)} pixels for {len(inside)} profile samples")
+    gridded = [v for v in variables if {"y", "x"} <= set(ds[v].dims)]
+    read = (
+        ds[gridded]
+        .isel(
+            y=xr.DataArray(pixels[:, 0], dims="distance"),
+            x=xr.DataArray(pixels[:, 1], dims="distance"),
+        )
+        .load()
+    )
+    return inside, read.isel(distance=inverse.ravel())
+
+
+def _layer_metadata(cubes: list[xr.Dataset]) -> xr.Dataset:
+    """Per-layer variables (date_dt, satellite_img1...) of several cubes,
+    one entry per distinct mid_date."""
+    layers = [
+        ds[[v for v in ds.data_vars if ds[v].dims == ("mid_date",)]] for ds in cubes
+    ]
+    metadata = xr.concat(layers, dim="mid_date").load()
+    return metadata.isel(
+        mid_date=np.unique(metadata.mid_date.values, return_index=True)[1]
+    )
+
+
+def get_profile_time_series(
+    line: Any,
+    spacing: float = 120.0,
+    variables: list[str] = ["v"],
+    start: Any = None,
+    end: Any = None,
+    min_interval: float | None = None,
+    max_interval: float | None = None,
+    mission: str | list[str] | None = None,
+    satellite: str | list[str] | None = None,
+) -> xr.Dataset:
+    """
+    Velocity time series sampled along a polyline (e.g. a glacier flowline).
+
+    The line is densified every ``spacing`` meters in the projection of the
+    first cube it crosses; each sample takes the nearest cube pixel, and the
+    distinct pixels of every cube are read with one vectorized selection.
+    Lines crossing cube boundaries (also into another projection) are
+    stitched along ``distance``; samples outside every cube are NaN.
+
+    :params line: list of (lon, lat) coordinates (EPSG:4326), a GeoJSON LineString
+                  (or Feature) or a shapely LineString
+    :params spacing: distance between samples in meters along the line
+    :params variables: gridded variables to sample: v, vx, vy etc.
+    :params start, end, min_interval, max_interval, mission, satellite: time filters,
+            as in get_time_series
+    :returns: Dataset with (distance, mid_date) variables; distance is in meters along
+              the line, with lon/lat, the sampled pixel x/y and its epsg as distance
+              coordinates, and the per-layer date_dt/satellite metadata over mid_date
+    """
+    if spacing <= 0:
+        raise ValueError("spacing must be positive")
+    line = _as_line(line)
+    cubes = _search_cubes(geometry.mapping(line), geometry.mapping(line))
+    if not cubes:
+        rprint("[red on black]No datacube intersects the requested line[/]")
+        return xr.Dataset()
+
+    import shapely
+
+    primary = f"EPSG:{cubes[0]['properties']['epsg']}"
+    projected = shapely.transform(
+        line,
+        lambda xy: np.column_stack(
+            _project_xy(xy[:, 0], xy[:, 1], "EPSG:4326", primary)
+        ),
+    )
+    distance = np.append(np.arange(0.0, projected.length, spacing), projected.length)
+    distance = np.unique(distance)
+    samples = shapely.get_coordinates(
+        shapely.line_interpolate_point(projected, distance)
+    )
+    lon, lat = _project_xy(samples[:, 0], samples[:, 1], primary, "EPSG:4326")
+
+    time_filters = {
+        "start": start,
+        "end": end,
+        "min_interval": min_interval,
+        "max_interval": max_interval,
+        "mission": mission,
+        "satellite": satellite,
+    }
+    remaining = np.ones(len(distance), dtype=bool)
+    pieces, layers = [], []
+    for cube in cubes:
+        if not remaining.any():
+            break
+        projection = cube["properties"]["epsg"]
+        url = cube["properties"]["zarr_url"].replace("http://", "https://")
+        ds = _select_time(_open_cached_dataset(url), url, **time_filters)
+        todo = np.flatnonzero(remaining)
+        xs, ys = _project_xy(lon[todo], lat[todo], "EPSG:4326", f"EPSG:{projection}")
+        inside, piece = _profile_piece(
+            ds, np.asarray(xs), np.asarray(ys), list(variables)
+        )
+        if piece is None:
+            continue
+        taken = todo[inside]
+        remaining[taken] = False
+        pieces.append(
+            piece.assign_coords(
+                distance=distance[taken],
+                epsg=("distance", np.full(len(taken), projection)),
+            ).reset_coords(["x", "y"])
+        )
+        layers.append(ds)
+
+    if not pieces:
+        rprint("[red on black]The line does not cross any datacube grid[/]")
+        return xr.Dataset()
+
+    profile = xr.concat(pieces, dim="distance", join="outer", data_vars="all")
+    profile = profile.sortby("distance").reindex(distance=distance)
+    profile = profile.set_coords(["x", "y"]).assign_coords(
+        lon=("distance", lon), lat=("distance", lat)
+    )
+    profile = xr.merge([profile, _layer_metadata(layers)], join="left")
+    profile = profile.sortby("mid_date")
+    profile = profile.transpose("distance", "mid_date", ...)
+    profile.distance.attrs.update(
+        {"units": "m", "description": f"distance along the line in {primary}"}
+    )
+    profile.attrs["spacing"] = spacing
+    return profile
+
+
+_AREA_STATISTICS = ("mean", "median", "min", "max", "std", "count")
+
+# Maximum number of (time x pixel) values held at once for medians, which
+# need every masked pixel of a layer; the time block shrinks to fit.
+_AREA_MEDIAN_BUDGET = 2**25
+
+
+def _as_polygon(polygon: Any) -> geometry.base.BaseGeometry:
+    """A lon/lat (Multi)Polygon from coordinates, a GeoJSON dict or a geometry."""
+    if isinstance(polygon, geometry.base.BaseGeometry):
+        geom = polygon
+    elif isinstance(polygon, dict):
+        geom = geometry.shape(polygon.get("geometry", polygon))
+    else:
+        geom = geometry.Polygon(polygon)
+    if geom.geom_type not in ("Polygon", "MultiPolygon"):
+        raise ValueError(f"Expected a Polygon, got {geom.geom_type}")
+    return geom
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_area_mask(
+    url: str, roi_wkb: bytes, projection: str
+) -> tuple[int, int, np.ndarray] | None:
+    """Rasterize a lon/lat polygon (WKB) on the grid of the cube at *url*.
+
+    Pixels whose centre falls inside the polygon are selected. Masks are
+    cached per cube and polygon, so repeated queries (other variables,
+    statistics or time windows) skip the rasterization.
+
+    :returns: ``(row0, col0, mask)`` with the mask trimmed to its bounding
+              box in grid indices, or None when no pixel centre is inside
+    """
+    import shapely
+
+    ds = _open_cached_dataset(url)
+    projected = _project_geometry(shapely.from_wkb(roi_wkb), projection)
+    minx, miny, maxx, maxy = projected.bounds
+    cols = np.flatnonzero((ds.x.values >= minx) & (ds.x.values <= maxx))
+    rows = np.flatnonzero((ds.y.values >= miny) & (ds.y.values <= maxy))
+    if not len(cols) or not len(rows):
+        return None
+    xs = ds.x.values[cols[0] : cols[-1] + 1]
+    ys = ds.y.values[rows[0] : rows[-1] + 1]
+    mask = shapely.contains_xy(projected, xs[np.newaxis, :], ys[:, np.newaxis])
+    if not mask.any():
+        return None
+    inside_rows = np.flatnonzero(mask.any(axis=1))
+    inside_cols = np.flatnonzero(mask.any(axis=0))
+    mask = mask[
+        inside_rows[0] : inside_rows[-1] + 1, inside_cols[0] : inside_cols[-1] + 1
+    ]
+    return rows[0] + inside_rows[0], cols[0] + inside_cols[0], mask
+
+
+def _mask_blocks(
+    row0: int, col0: int, mask: np.ndarray, cy: int, cx: int
+) -> list[tuple[slice, slice, np.ndarray]]:
+    """Chunk-aligned ``(y_slice, x_slice, submask)`` blocks holding mask pixels."""
+    ny, nx = mask.shape
+    blocks = []
+    for by in range(row0 // cy, (row0 + ny - 1) // cy + 1):
+        y0, y1 = max(by * cy, row0), min((by + 1) * cy, row0 + ny)
+        for bx in range(col0 // cx, (col0 + nx - 1) // cx + 1):
+            x0, x1 = max(bx * cx, col0), min((bx + 1) * cx, col0 + nx)
+            submask = mask[y0 - row0 : y1 - row0, x0 - col0 : x1 - col0]
+            if submask.any():
+                blocks.append((slice(y0, y1), slice(x0, x1), submask))
+    return blocks
+
+
+def _read_masked_block(
+    ds: xr.Dataset,
+    names: list[str],
+    layers: np.ndarray,
+    y_slice: slice,
+    x_slice: slice,
+    submask: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """(layers, masked pixels) arrays of *names* for one chunk block.
+
+    Per-layer variables (e.g. a 1-D ``v_error``) come back as (layers, 1).
+    """
+    block = ds[names].isel(mid_date=layers, y=y_slice, x=x_slice).load()
+    values = {}
+    for name in names:
+        var = block[name]
+        if "y" in var.dims and "x" in var.dims:
+            values[name] = var.transpose("mid_date", "y", "x").values[:, submask]
+        else:
+            values[name] = var.values.reshape(-1, 1)
+    return values
+
+
+class _AreaReduction:
+    """Running NaN-aware reduction of masked pixels for one block of layers."""
+
+    def __init__(self, n_layers: int, stat: str):
+        self.stat = stat
+        self.total = np.zeros(n_layers)
+        self.weight = np.zeros(n_layers)
+        self.squares = np.zeros(n_layers)
+        self.count = np.zeros(n_layers, dtype=np.int64)
+        self.minimum = np.full(n_layers, np.nan)
+        self.maximum = np.full(n_layers, np.nan)
+        self.pixels: list[np.ndarray] = []
+
+    def add(self, positions: np.ndarray, values: np.ndarray, weights=None) -> None:
+        valid = np.isfinite(values)
+        if weights is not None:
+            weights = np.broadcast_to(weights, values.shape)
+            valid &= np.isfinite(weights) & (weights > 0)
+        self.count[positions] += valid.sum(axis=1)
+        if self.stat == "median":
+            padded = np.full((len(self.total), values.shape[1]), np.nan)
+            padded[positions] = np.where(valid, values, np.nan)
+            self.pixels.append(padded)
+            return
+        filled = np.where(valid, values, 0.0)
+        w = np.where(valid, weights, 0.0) if weights is not None else valid
+        self.total[positions] += (w * filled).sum(axis=1)
+        self.weight[positions] += np.asarray(w, dtype=float).sum(axis=1)
+        self.squares[positions] += (valid * filled**2).sum(axis=1)
+        masked = np.where(valid, values, np.nan)
+        with warnings.catch_warnings():
+            # Layers without valid pixels in this block stay NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            self.minimum[positions] = np.fmin(
+                self.minimum[positions], np.nanmin(masked, axis=1)
+            )
+            self.maximum[positions] = np.fmax(
+                self.maximum[positions], np.nanmax(masked, axis=1)
+            )
+
+    def result(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if self.stat == "count":
+                return self.count.astype(float)
+            if self.stat == "median":
+                if not self.pixels:
+                    return np.full(len(self.total), np.nan)
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", RuntimeWarning)
+                    return np.nanmedian(np.concatenate(self.pixels, axis=1), axis=1)
+            if self.stat == "min":
+                return self.minimum
+            if self.stat == "max":
+                return self.maximum
+            mean = np.where(self.weight > 0, self.total / self.weight, np.nan)
+            if self.stat == "mean":
+                return mean
+            unweighted = self.total / self.count
+            variance = self.squares / self.count - unweighted**2
+            return np.where(self.count > 0, np.sqrt(np.maximum(variance, 0)), np.nan)
+
+
+def get_area_time_series(
+    polygon: Any,
+    variables: list[str] = ["v"],
+    stat: str = "mean",
+    error_weighting: bool = False,
+    start: Any = None,
+    end: Any = None,
+    min_interval: float | None = None,
+    max_interval: float | None = None,
+    mission: str | list[str] | None = None,
+    satellite: str | list[str] | None = None,
+    time_block: int = 1000,
+    max_workers: int = 8,
+) -> xr.Dataset:
+    """
+    Spatial statistic of every layer over the pixels inside a polygon.
+
+    The polygon is rasterized once per intersecting cube (pixel centres
+    inside) and the mask is cached. Only the zarr chunks overlapping the
+    mask are read, block by block over time, and reduced with NaN-aware
+    running sums, so memory is bounded by one chunk per worker (one block
+    of masked pixels for medians) whatever the polygon size or time span.
+    Layers of several cubes sharing a mid_date are reduced together.
+
+    :params polygon: list of (lon, lat) coordinates (EPSG:4326), a GeoJSON
+                     (Multi)Polygon (or Feature) or a shapely polygon
+    :params variables: gridded variables to reduce: v, vx, vy etc.
+    :params stat: one of mean, median, min, max, std, count
+    :params error_weighting: inverse-variance weighted mean using the <variable>_error
+                             (or v_error) layers; only valid with stat="mean"
+    :params start, end, min_interval, max_interval, mission, satellite: time filters,
+            as in get_time_series
+    :params time_block: number of mid_date layers read at once
+    :params max_workers: concurrent chunk reads
+    :returns: Dataset over mid_date with the statistic of each variable, the number of
+              valid pixels in <variable>_count and the per-layer metadata (date_dt...)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    import shapely
+
+    if stat not in _AREA_STATISTICS:
+        raise ValueError(f"Unknown stat: {stat}, use one of {_AREA_STATISTICS}")
+    if error_weighting and stat != "mean":
+        raise ValueError("error_weighting is only supported for stat='mean'")
+    roi = _as_polygon(polygon)
+    roi_geojson = geometry.mapping(roi)
+    time_filters = {
+        "start": start,
+        "end": end,
+        "min_interval": min_interval,
+        "max_interval": max_interval,
+        "mission": mission,
+        "satellite": satellite,
+    }
+
+    cubes = []
+    for cube in _search_cubes(roi_geojson, roi_geojson):
+        projection = cube["properties"]["epsg"]
+        url = cube["properties"]["zarr_url"].replace("http://", "https://")
+        area = _cached_area_mask(url, shapely.to_wkb(roi), projection)
+        if area is None:
+            continue
+        ds = _select_time(_open_cached_dataset(url), url, **time_filters)
+        errors = {}
+        if error_weighting:
+            for var in variables:
+                errors[var] = f"{var}_error" if f"{var}_error" in ds else "v_error"
+                if errors[var] not in ds:
+                    raise ValueError(f"No error variable to weight {var} with")
+        names = list(dict.fromkeys(list(variables) + list(errors.values())))
+        blocks = _mask_blocks(*area, *_spatial_chunks(ds))
+        cubes.append((ds, names, errors, blocks, int(area[2].sum())))
+    if not cubes:
+        rprint("[red on black]No datacube pixel falls inside the polygon[/]")
+        return xr.Dataset()
+
+    dates = np.unique(np.concatenate([ds.mid_date.values for ds, *_ in cubes]))
+    n_pixels = sum(pixels for *_, pixels in cubes)
+    if stat == "median":
+        time_block = max(1, min(time_block, _AREA_MEDIAN_BUDGET // n_pixels))
+    logging.info(
+        f"Reducing {n_pixels} pixels over {len(dates)} layers in "
+        f"{sum(len(blocks) for *_, blocks, _ in cubes)} chunk blocks"
+    )
+
+    series = {var: np.full(len(dates), np.nan) for var in variables}
+    counts = {var: np.zeros(len(dates), dtype=np.int64) for var in variables}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for first in range(0, len(dates), time_block):
+            block_dates = dates[first : first + time_block]
+            reductions = {
+                var: _AreaReduction(len(block_dates), stat) for var in variables
+            }
+            for ds, names, errors, blocks, _ in cubes:
+                layers = np.flatnonzero(np.isin(ds.mid_date.values, block_dates))
+                if not len(layers):
+                    continue
+                positions = np.searchsorted(block_dates, ds.mid_date.values[layers])
+                reads = pool.map(
+                    lambda block: _read_masked_block(ds, names, layers, *block),
+                    blocks,
+                )
+                for values in reads:
+                    for var in variables:
+                        weights = (
+                            1.0 / values[errors[var]] ** 2 if var in errors else None
+                        )
+                        reductions[var].add(positions, values[var], weights)
+            for var, reduction in reductions.items():
+                series[var][first : first + len(block_dates)] = reduction.result()
+                counts[var][first : first + len(block_dates)] = reduction.count
+
+    result = xr.Dataset(
+        {
+            **{var: ("mid_date", series[var]) for var in variables},
+            **{f"{var}_count": ("mid_date", counts[var]) for var in variables},
+        },
+        coords={"mid_date": dates},
+    )
+    result = xr.merge([result, _layer_metadata([ds for ds, *_ in cubes])], join="left")
+    for var in variables:
+        result[var].attrs = dict(cubes[0][0][var].attrs)
+    result.attrs.update(
+        {
+            "stat": f"{stat} (error weighted)" if error_weighting else stat,
+            "n_pixels": n_pixels,
+            "polygon": shapely.to_wkt(roi),
+        }
+    )
+    return result
+
+
+# Friendly names accepted for ``aggregate(freq=...)``; anything else is
+# passed to xarray's resample as a pandas offset alias.
+_AGGREGATE_FREQUENCIES = {
+    "d": "D",
+    "daily": "D",
+    "w": "W",
+    "weekly": "W",
+    "m": "MS",
+    "monthly": "MS",
+    "season": "QS-DEC",
+    "seasonal": "QS-DEC",
+    "y": "YS",
+    "annual": "YS",
+    "yearly": "YS",
+}
+
+_AGGREGATE_STATISTICS = ("mean", "median", "min", "max", "std", "count")
+
+
+def _weighted_resample_mean(
+    ds: xr.Dataset, variables: list[str], freq: str
+) -> xr.Dataset:
+    """Inverse-variance weighted mean per period, weights from ``*_error``."""
+    means = {}
+    for var in variables:
+        error = f"{var}_error" if f"{var}_error" in ds else "v_error"
+        if error not in ds:
+            raise ValueError(f"No error variable to weight {var} with")
+        weights = (1.0 / ds[error] ** 2).where(ds[var].notnull())
+        resampler = xr.Dataset(
+            {"weighted": ds[var] * weights, "weights": weights}
+        ).resample(mid_date=freq)
+        sums = resampler.sum(skipna=True)
+        means[var] = (sums["weighted"] / sums["weights"]).where(sums["weights"] > 0)
+        means[var].attrs = ds[var].attrs
+    return xr.Dataset(means)
+
+
+def aggregate(
+    roi: dict | list[float],
+    variables: list[str] = ["v"],
+    freq: str = "monthly",
+    statistic: str = "mean",
+    error_weighting: bool = False,
+    start: Any = None,
+    end: Any = None,
+    min_interval: float | None = None,
+    max_interval: float | None = None,
+    mission: str | list[str] | None = None,
+    satellite: str | list[str] | None = None,
+    outpath: str | None = None,
+    num_workers: int | None = None,
+) -> xr.Dataset:
+    """
+    Temporal aggregation of the datacubes covering a region, out of core.
+
+    The cubes are opened as dask arrays chunked like the zarr stores, the
+    time filters are pushed down to the mid_date index and every period is
+    reduced chunk by chunk on a local threaded scheduler, so a basin-wide
+    multi-year median never has to fit in memory. Windows of neighbouring
+    cubes (same projection) are mosaicked.
+
+    :params roi: [min_lon, min_lat, max_lon, max_lat] or a GeoJSON geometry (EPSG:4326)
+    :params variables: list of variables to aggregate: v, vx, vy etc.
+    :params freq: "monthly", "seasonal" (DJF, MAM, ...), "annual", "daily", "weekly"
+                  or any pandas offset alias, e.g. "2MS"
+    :params statistic: mean, median, min, max, std or count
+    :params error_weighting: inverse-variance weighted mean using the <variable>_error
+                             (or v_error) layers; only valid with statistic="mean"
+    :params start, end: mid_date window (end inclusive)
+    :params min_interval, max_interval: image pair separation (date_dt) range in days
+    :params mission, satellite: layer filters, as in get_time_series
+    :params outpath: write the result to this .zarr or .nc path; chunks are computed and
+                     written one at a time, and the written dataset is returned lazily
+    :params num_workers: threads used by the dask scheduler (default: one per core)
+    :returns: xarray Dataset with a "time" dimension holding the period starts
+    """
+    import dask
+    from shapely.geometry import box, shape
+
+    if statistic not in _AGGREGATE_STATISTICS:
+        raise ValueError(
+            f"Unknown statistic {statistic!r}, use one of {_AGGREGATE_STATISTICS}"
+        )
+    if error_weighting and statistic != "mean":
+        raise ValueError("error_weighting is only supported for statistic='mean'")
+    freq = _AGGREGATE_FREQUENCIES.get(freq.lower(), freq)
+
+    roi_geom = box(*roi) if isinstance(roi, (list, tuple)) else shape(roi)
+    # Cubes without a <variable>_error layer are weighted with v_error
+    errors = [f"{v}_error" for v in variables] + ["v_error"] if error_weighting else []
+    time_filters = {
+        "start": start,
+        "end": end,
+        "min_interval": min_interval,
+        "max_interval": max_interval,
+        "mission": mission,
+        "satellite": satellite,
+    }
+
+    found = _subcube_pieces(
+        roi_geom,
+        list(variables),
+        time_filters,
+        chunked=True,
+        optional=[name for name in dict.fromkeys(errors) if name not in variables],
+    )
+    if not found:
+        rprint("[red on black]No datacube intersects the requested region[/]")
+        return xr.Dataset()
+    projections = {projection for _, projection, _ in found}
+    if len(projections) > 1:
+        raise ValueError(
+            f"Region spans cubes in several projections ({sorted(projections)}); "
+            "aggregate each projection separately"
+        )
+
+    results = []
+    for _, _, window in found:
+        ds = window.sortby("mid_date")
+        if error_weighting:
+            result = _weighted_resample_mean(ds, list(variables), freq)
+        else:
+            result = getattr(ds[list(variables)].resample(mid_date=freq), statistic)()
+        results.append(result.rename(mid_date="time"))
+
+    if len(results) > 1:
+        result = xr.combine_by_coords(
+            results, join="outer", combine_attrs="drop_conflicts"
+        )
+        if not result.indexes["y"].is_monotonic_decreasing:
+            result = result.isel(y=slice(None, None, -1))
+    else:
+        result = results[0]
+    result.attrs.update(
+        {
+            "projection": next(iter(projections)),
+            "aggregation": f"{statistic} {freq}"
+            + (" (error weighted)" if error_weighting else ""),
+        }
+    )
+
+    with dask.config.set(scheduler="threads", num_workers=num_workers):
+        if outpath is None:
+            return result.compute()
+        result = result.drop_encoding()
+        if str(outpath).endswith(".nc"):
+            result.to_netcdf(outpath)
+            return xr.open_dataset(outpath, chunks={})
+        result.to_zarr(outpath, mode="w")
+        return xr.open_zarr(outpath)
@@ -1,3 +1,10 @@
-from itslive.velocity_pairs._pairs import coverage, download, find, find_streaming
+from itslive.velocity_pairs._pairs import (
+    count,
+    coverage,
+    download,
+    find,
+    find_batch,
+    find_streaming,
+)
 
-__all__ = ["find", "find_streaming", "coverage", "download"]
+__all__ = ["find", "find_streaming", "find_batch", "coverage", "count", "download"]
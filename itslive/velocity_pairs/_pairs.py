@@ -9,7 +9,15 @@ import earthaccess
 import requests
 from pqdm.threads import pqdm
 
-from itslive.search import EQ, GTE, LTE, serverless_search
+from itslive.coverage import CoverageIndex
+from itslive.engines import available_engines
+from itslive.search import (
+    GTE,
+    LTE,
+    build_cql2_filter,
+    serverless_aggregate,
+    serverless_batch_search,
+)
 
 
 def find(
@@ -45,6 +53,8 @@ def find(
               Catalog: Must specify via base_catalog_href or partition_type+resolution
             - "rustac": geoparquet with rustac
               Catalog: Must specify via base_catalog_href or partition_type+resolution
+            - any engine registered with itslive.engines.register_engine
+              Catalog: Must specify via base_catalog_href
         filters: Dict of property filters as {property_name: PropertyFilter}.
                  Use helpers: EQ(), GTE(), LTE(), GT(), LT(), NEQ().
                  Examples: {"platform": EQ("S2"), "version": EQ("002")}
@@ -64,7 +74,7 @@ def find(
 
     Common STAC properties for filtering:
         - platform: "S1", "S2", "L4", "L5", "L7", "L8", "L9"
-        - mission: "sentinel1", "sentinel2", "landsatOLI"
+        - mission: "sentinel1", "sentinel2", "landsatOLI", "landsatETM", "landsatTM"
         - version: "002", "003"
         - proj:code: "EPSG:3413", "EPSG:3031"
         - percent_valid_pixels: 0-100
@@ -92,10 +102,53 @@ def find(
     )
 
 
-def find_streaming(
-    bbox: list[float] | None = None,
-    polygon: list[float] | None = None,
-    geojson: dict | None = None,
+# Platform codes of each mission as stored in the catalog ``platform``
+_MISSION_PLATFORMS = {
+    "sentinel1": ("S1A", "S1B", "S1C"),
+    "sentinel2": ("S2A", "S2B", "S2C"),
+    "landsatTM": ("L4", "L5"),
+    "landsatETM": ("L7",),
+    "landsatOLI": ("L8", "L9"),
+}
+
+# Mission of a platform code prefix, e.g. "S1" -> "sentinel1"
+_PLATFORM_MISSIONS = {
+    platform[:2]: mission
+    for mission, platforms in _MISSION_PLATFORMS.items()
+    for platform in platforms
+}
+
+
+def _platform_mission(platform: str | None) -> str | None:
+    return _PLATFORM_MISSIONS.get((platform or "")[:2], platform)
+
+
+def _mission_platforms(mission: str) -> tuple[str, ...] | None:
+    """Platform codes of *mission* (any case), ``None`` when unknown."""
+    missions = {name.lower(): p for name, p in _MISSION_PLATFORMS.items()}
+    return missions.get(mission.lower())
+
+
+def _mission_cql2(mission: str) -> dict | None:
+    """CQL2 expression matching every platform of *mission*.
+
+    An ``or`` of equalities, which every engine (and basic CQL2 STAC APIs)
+    can evaluate; ``None`` for an unknown mission.
+    """
+    platforms = _mission_platforms(mission)
+    if platforms is None:
+        return None
+    comparisons = [
+        {"op": "=", "args": [{"property": "platform"}, platform]}
+        for platform in platforms
+    ]
+    return (
+        comparisons[0] if len(comparisons) == 1 else {"op": "or", "args": comparisons}
+    )
+
+
+def _build_search_params(
+    roi: dict,
     percent_valid_pixels: int = 1,
     mission: None | str = None,
     start: None | datetime.date = None,
@@ -104,66 +157,15 @@ def find_streaming(
     max_interval: None | int = None,
     engine: str = "stac",
     filters: dict = None,
-    **stac_kwargs,
-) -> list[str]:
-    """Yields velocity netcdf file URLs one at a time to avoid loading all into memory
-
-    This is a streaming version of find() that yields URLs as they are found,
-    making it suitable for processing large result sets (e.g., 1M+ URLs).
-
-    Args:
-        bbox: List of [min_lon, min_lat, max_lon, max_lat]
-        polygon: List of (lon, lat) tuples defining a polygon
-        geojson: A GeoJSON geometry dict (e.g. {"type": "Polygon", "coordinates": [...]})
-        percent_valid_pixels: Minimum percent of valid pixels
-        mission: Satellite mission filter (e.g., "landsatOLI", "sentinel1", "sentinel2")
-        start: Start date
-        end: End date
-        min_interval: Minimum time interval in days
-        max_interval: Maximum time interval in days
-        engine: Query backend:
-            - "stac": STAC API (default)
-              Catalog: https://stac.itslive.cloud
-            - "duckdb": geoparquet with duckdb
-              Catalog: Must specify via base_catalog_href or partition_type+resolution
-            - "rustac": geoparquet with rustac
-              Catalog: Must specify via base_catalog_href or partition_type+resolution
-        filters: Dict of property filters as {property_name: PropertyFilter}.
-                 Use helpers: EQ(), GTE(), LTE(), GT(), LT(), NEQ().
-                 Examples: {"platform": EQ("S2"), "version": EQ("002")}
-                 If provided, these override the parameter-based filters.
+    stac_kwargs: dict = None,
+) -> tuple[dict, list[dict]]:
+    """Translate find() arguments into serverless_search() parameters.
 
-    Yields:
-        URLs for matching velocity pair NetCDF files, one at a time
+    Returns the ``serverless_search`` keyword arguments and the extra CQL2
+    expressions that cannot be expressed as a ``{property: PropertyFilter}``
+    mapping (e.g. a ``date_dt`` range).
     """
-    from shapely.geometry import Polygon, box, mapping, shape
-
-    if geojson is None and polygon is None and bbox is None:
-        print("Search needs a bbox, polygon, or geojson geometry", file=sys.stderr)
-        return
-
-    # Build geometry — geojson takes priority, then polygon, then bbox
-    if geojson is not None:
-        # Accept a full GeoJSON Feature or a bare geometry dict
-        if geojson.get("type") == "Feature":
-            roi = geojson["geometry"]
-        else:
-            roi = geojson
-        # Validate it is a recognised geometry type
-        try:
-            shape(roi)  # raises if invalid
-        except Exception as e:
-            print(f"Invalid GeoJSON geometry: {e}", file=sys.stderr)
-            return
-    elif polygon is not None:
-        # Accept either a flat [lon, lat, lon, lat, ...] list (as produced
-        # by the CLI) or a list of (lon, lat) tuples / pairs.
-        if polygon and not isinstance(polygon[0], (list, tuple)):
-            it = iter(polygon)
-            polygon = list(zip(it, it))
-        roi = mapping(Polygon(polygon))
-    else:
-        roi = mapping(box(bbox[0], bbox[1], bbox[2], bbox[3]))
+    stac_kwargs = {} if stac_kwargs is None else stac_kwargs
 
     # Build date range
     if isinstance(start, datetime.date):
@@ -188,25 +190,25 @@ def find_streaming(
     extra_cql2_exprs: list[dict] = []
     if percent_valid_pixels > 0:
         param_filters["percent_valid_pixels"] = GTE(percent_valid_pixels)
-    if mission:
-        mission_to_platform = {
-            "sentinel1": "S1A",
-            "sentinel2": "S2A",
-            "landsatOLI": "L8",
-        }
-        platform = mission_to_platform.get(mission.lower() if mission else "")
-        if platform:
-            param_filters["platform"] = EQ(platform)
+    # A mission matches all of its platforms, e.g. sentinel2 is S2A, S2B and S2C
+    if mission and "platform" not in (filters or {}):
+        mission_expr = _mission_cql2(mission)
+        if mission_expr is not None:
+            extra_cql2_exprs.append(mission_expr)
+        else:
+            logging.warning(f"Unknown mission {mission!r}, not filtering on it")
     if min_interval is not None and max_interval is not None:
-        extra_cql2_exprs.append(
-            {
-                "op": "and",
-                "args": [
-                    {"op": ">=", "args": [{"property": "date_dt"}, min_interval]},
-                    {"op": "<=", "args": [{"property": "date_dt"}, max_interval]},
-                ],
-            }
-        )
+        # Skipped when filters has its own date_dt, which overrides it
+        if "date_dt" not in (filters or {}):
+            extra_cql2_exprs.append(
+                {
+                    "op": "and",
+                    "args": [
+                        {"op": ">=", "args": [{"property": "date_dt"}, min_interval]},
+                        {"op": "<=", "args": [{"property": "date_dt"}, max_interval]},
+                    ],
+                }
+            )
     elif min_interval is not None:
         param_filters["date_dt"] = GTE(min_interval)
     elif max_interval is not None:
@@ -246,9 +248,13 @@ def find_streaming(
                     f"Invalid partition_type: {partition_type}. "
                     "Must be 'h3' or 'latlon'."
                 )
+        elif engine in available_engines():
+            raise ValueError(
+                f"Engine {engine!r} has no default catalog, pass base_catalog_href."
+            )
         else:
             raise ValueError(
-                f"Invalid engine: {engine}. Must be 'stac', 'duckdb', or 'rustac'."
+                f"Invalid engine: {engine}. Must be one of {available_engines()}."
             )
 
         stac_kwargs["base_catalog_href"] = default_catalog
@@ -266,9 +272,15 @@ def find_streaming(
         "asset_type": stac_kwargs.get("asset_type", ".nc"),
         "filters": final_filters,
     }
-
-    # Add geoparquet-specific parameters
-    if engine in ["duckdb", "rustac"]:
+    if stac_kwargs.get("cache") is not None:
+        stac_params["cache"] = stac_kwargs["cache"]
+    for key in ("roi_max_vertices", "roi_tile_size"):
+        if key in stac_kwargs:
+            stac_params[key] = stac_kwargs[key]
+
+    # Add geoparquet-specific parameters (engines ignore options they do
+    # not take, see itslive.engines.get_engine)
+    if engine != "stac":
         stac_params.update(
             {
                 "reduce_spatial_search": stac_kwargs.get("reduce_spatial_search", True),
@@ -276,6 +288,7 @@ def find_streaming(
                 "resolution": stac_kwargs.get("resolution", 1),
                 "overlap": stac_kwargs.get("overlap", "bbox_overlap"),
                 "use_hive_partitions": stac_kwargs.get("use_hive_partitions", True),
+                "use_manifest": stac_kwargs.get("use_manifest", True),
             }
         )
 
@@ -284,55 +297,374 @@ def find_streaming(
         k: v for k, v in stac_params["filters"].items() if v is not None
     }
 
-    catalog_desc = "STAC API" if engine == "stac" else f"geoparquet ({engine} engine)"
-    print(f"Finding matching velocity pairs using {catalog_desc}... ", file=sys.stderr)
+    return stac_params, extra_cql2_exprs
+
+
+def _roi_geometry(
+    bbox: list[float] | None = None,
+    polygon: list[float] | None = None,
+    geojson: dict | None = None,
+) -> dict:
+    """GeoJSON geometry of the search area given to find() and friends.
+
+    geojson takes priority, then polygon, then bbox.
+
+    Raises:
+        ValueError: If no area is given or the GeoJSON is not a geometry
+    """
+    from shapely.geometry import Polygon, box, mapping, shape
+
+    if geojson is None and polygon is None and bbox is None:
+        raise ValueError("Search needs a bbox, polygon, or geojson geometry")
+
+    if geojson is not None:
+        # Accept a full GeoJSON Feature or a bare geometry dict
+        if geojson.get("type") == "Feature":
+            roi = geojson["geometry"]
+        else:
+            roi = geojson
+        # Validate it is a recognised geometry type
+        try:
+            shape(roi)  # raises if invalid
+        except Exception as e:
+            raise ValueError(f"Invalid GeoJSON geometry: {e}") from e
+        return roi
+    if polygon is not None:
+        # Accept either a flat [lon, lat, lon, lat, ...] list (as produced
+        # by the CLI) or a list of (lon, lat) tuples / pairs.
+        if polygon and not isinstance(polygon[0], (list, tuple)):
+            it = iter(polygon)
+            polygon = list(zip(it, it))
+        return mapping(Polygon(polygon))
+    return mapping(box(bbox[0], bbox[1], bbox[2], bbox[3]))
+
+
+def find_streaming(
+    bbox: list[float] | None = None,
+    polygon: list[float] | None = None,
+    geojson: dict | None = None,
+    percent_valid_pixels: int = 1,
+    mission: None | str = None,
+    start: None | datetime.date = None,
+    end: None | datetime.date = None,
+    min_interval: None | int = None,
+    max_interval: None | int = None,
+    engine: str = "stac",
+    filters: dict = None,
+    properties: list[str] | None = None,
+    **stac_kwargs,
+) -> list[str]:
+    """Yields velocity netcdf file URLs one at a time to avoid loading all into memory
+
+    This is a streaming version of find() that yields URLs as they are found,
+    making it suitable for processing large result sets (e.g., 1M+ URLs).
+
+    Args:
+        bbox: List of [min_lon, min_lat, max_lon, max_lat]
+        polygon: List of (lon, lat) tuples defining a polygon
+        geojson: A GeoJSON geometry dict (e.g. {"type": "Polygon", "coordinates": [...]})
+        percent_valid_pixels: Minimum percent of valid pixels
+        mission: Satellite mission filter (e.g., "landsatOLI", "sentinel1", "sentinel2")
+        start: Start date
+        end: End date
+        min_interval: Minimum time interval in days
+        max_interval: Maximum time interval in days
+        engine: Query backend:
+            - "stac": STAC API (default)
+              Catalog: https://stac.itslive.cloud
+            - "duckdb": geoparquet with duckdb
+              Catalog: Must specify via base_catalog_href or partition_type+resolution
+            - "rustac": geoparquet with rustac
+              Catalog: Must specify via base_catalog_href or partition_type+resolution
+            - any engine registered with itslive.engines.register_engine
+              Catalog: Must specify via base_catalog_href
+        filters: Dict of property filters as {property_name: PropertyFilter}.
+                 Use helpers: EQ(), GTE(), LTE(), GT(), LT(), NEQ().
+                 Examples: {"platform": EQ("S2"), "version": EQ("002")}
+                 If provided, these override the parameter-based filters.
+        properties: Item fields to yield with each URL, e.g.
+                 itslive.search.ITEM_PROPERTIES (datetime, date_dt, platform,
+                 percent_valid_pixels, proj:code, bbox). When given, dicts
+                 ``{"url": ..., name: value}`` are yielded instead of URLs and
+                 the cache is not used.
+        stac_kwargs: Additional arguments to pass to serverless_search(), e.g.
+                 cache=itslive.cache.SearchCache() to reuse results of
+                 identical searches.
+
+    Yields:
+        URLs for matching velocity pair NetCDF files (or records, see
+        properties), one at a time
+    """
     try:
-        if engine == "stac":
-            # Stream directly from STAC API page-by-page to avoid loading all
-            # items into memory before yielding.
-            import pystac_client
+        roi = _roi_geometry(bbox, polygon, geojson)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return
 
-            from itslive.search import build_cql2_filter, build_cql2_filters_from_dict
+    stac_params, extra_cql2_exprs = _build_search_params(
+        roi,
+        percent_valid_pixels=percent_valid_pixels,
+        mission=mission,
+        start=start,
+        end=end,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        engine=engine,
+        filters=filters,
+        stac_kwargs=stac_kwargs,
+    )
+    start_date = stac_params["start_date"]
+    end_date = stac_params["end_date"]
+    final_filters = stac_params["filters"]
+    if properties:
+        # The cache only holds URLs
+        stac_params.pop("cache", None)
+        stac_params["properties"] = list(properties)
 
-            stac_client = pystac_client.Client.open(stac_params["base_catalog_href"])
-            stac_search_kwargs = {
-                "intersects": roi,
-                "datetime": f"{start_date}/{end_date}",
-                "collections": [stac_params["collection"]],
-            }
-            cql2_filter_list = (
-                build_cql2_filters_from_dict(final_filters) if final_filters else []
+    from itslive.engines import get_engine, make_query
+    from itslive.search import _search_cache_key, _stream_with_cache, item_record
+
+    catalog_desc = "STAC API" if engine == "stac" else f"geoparquet ({engine} engine)"
+    print(f"Finding matching velocity pairs using {catalog_desc}... ", file=sys.stderr)
+    try:
+        # Complex outlines are sent simplified (a covering geometry) and the
+        # engines check candidates against the exact ROI.
+        query = make_query(
+            roi,
+            start_date,
+            end_date,
+            filters=final_filters,
+            extra_cql2_exprs=extra_cql2_exprs,
+            asset_type=stac_params["asset_type"],
+            collection=stac_params["collection"],
+            properties=properties,
+            roi_max_vertices=stac_params.get("roi_max_vertices", 1000),
+            roi_tile_size=stac_params.get("roi_tile_size", 5.0),
+        )
+        engine_options = dict(stac_params)
+        base_catalog_href = engine_options.pop("base_catalog_href")
+        search_engine = get_engine(engine, base_catalog_href, **engine_options)
+
+        def matches(updated=None):
+            # An item stored in several partitions is yielded once
+            search_query = query
+            if updated is not None:
+                updated_expr = {"op": ">=", "args": [{"property": "updated"}, updated]}
+                search_query = query._replace(filters=[*query.filters, updated_expr])
+            seen = set()
+            with search_engine:
+                for match in search_engine.search(search_query):
+                    if match.href not in seen:
+                        seen.add(match.href)
+                        yield match
+
+        # Matches are streamed as the engine finds them. With a cache, fresh
+        # entries are served without searching and stale ones are refreshed
+        # with only the items updated since their watermark.
+        cache = stac_params.get("cache")
+        if cache is not None:
+            cache_key = _search_cache_key(
+                search_engine,
+                roi,
+                f"{start_date}/{end_date}",
+                build_cql2_filter(query.filters) if query.filters else None,
+                query.asset_type,
+                query.collection,
+                {
+                    "roi_max_vertices": stac_params.get("roi_max_vertices", 1000),
+                    "roi_tile_size": stac_params.get("roi_tile_size", 5.0),
+                },
+            )
+            results = _stream_with_cache(
+                cache,
+                cache_key,
+                lambda updated: (match.href for match in matches(updated)),
+                final_filters,
             )
-            cql2_filter_list.extend(extra_cql2_exprs)
-            cql2_filter = (
-                build_cql2_filter(cql2_filter_list) if cql2_filter_list else None
+        elif properties:
+            results = (
+                item_record(match.href, match.properties, match.bbox, properties)
+                for match in matches()
             )
-            if cql2_filter is not None:
-                stac_search_kwargs["filter"] = cql2_filter
-                stac_search_kwargs["filter_lang"] = "cql2-json"
-
-            item_search = stac_client.search(**stac_search_kwargs)
-            asset_type = stac_params.get("asset_type", ".nc")
-            count = 0
-            for item in item_search.items():
-                for asset in item.assets.values():
-                    roles = asset.roles or []
-                    if "data" in roles and asset.href.endswith(asset_type):
-                        count += 1
-                        yield asset.href
-            print(f"Found {count} pairs", file=sys.stderr)
         else:
-            urls = serverless_search(**stac_params)
-            print(f"Found {len(urls)} pairs", file=sys.stderr)
-            yield from urls
+            results = (match.href for match in matches())
+        count = 0
+        for result in results:
+            count += 1
+            yield result
+        print(f"Found {count} pairs", file=sys.stderr)
     except Exception as e:
         logging.error(f"Error searching {catalog_desc}: {e}")
         return
 
 
+def _load_rois(rois: Any, roi_id_property: str = "id") -> list[tuple[str, dict]]:
+    """Normalize ROI input to a list of ``(roi_id, geojson_geometry)`` pairs.
+
+    Accepts a GeoJSON FeatureCollection dict, a path to a ``.geojson`` /
+    ``.json`` file, a path to a GeoParquet file, or an iterable of
+    ``(roi_id, geometry)`` pairs. Features without *roi_id_property* are
+    numbered by position.
+    """
+    import json
+
+    from shapely.geometry import mapping
+
+    if isinstance(rois, (str, pathlib.Path)):
+        path = pathlib.Path(rois)
+        if path.suffix.lower() in (".parquet", ".geoparquet"):
+            import pyarrow.parquet as pq
+            import shapely
+
+            table = pq.read_table(path)
+            geo = json.loads((table.schema.metadata or {}).get(b"geo", b"{}"))
+            column = geo.get("primary_column", "geometry")
+            geoms = shapely.from_wkb(table.column(column).to_pylist())
+            crs = geo.get("columns", {}).get(column, {}).get("crs")
+            if crs:
+                import numpy as np
+                import pyproj
+
+                transformer = pyproj.Transformer.from_crs(
+                    pyproj.CRS.from_user_input(crs), "EPSG:4326", always_xy=True
+                )
+                geoms = shapely.transform(
+                    geoms,
+                    lambda xy: np.column_stack(transformer.transform(*xy.T)),
+                )
+            ids = (
+                table.column(roi_id_property).to_pylist()
+                if roi_id_property in table.column_names
+                else range(len(geoms))
+            )
+            return [(str(roi_id), mapping(geom)) for roi_id, geom in zip(ids, geoms)]
+        with open(path) as f:
+            rois = json.load(f)
+
+    if isinstance(rois, dict):
+        if rois.get("type") != "FeatureCollection":
+            raise ValueError("ROIs must be a GeoJSON FeatureCollection")
+        return [
+            (
+                str(feature.get("properties", {}).get(roi_id_property, i)),
+                feature["geometry"],
+            )
+            for i, feature in enumerate(rois["features"])
+        ]
+
+    return [(str(roi_id), geometry) for roi_id, geometry in rois]
+
+
+def find_batch(
+    rois: Any,
+    roi_id_property: str = "id",
+    percent_valid_pixels: int = 1,
+    mission: None | str = None,
+    start: None | datetime.date = None,
+    end: None | datetime.date = None,
+    min_interval: None | int = None,
+    max_interval: None | int = None,
+    engine: str = "stac",
+    filters: dict = None,
+    properties: list[str] | None = None,
+    **stac_kwargs,
+):
+    """Yields (roi_id, url) pairs for many regions of interest in one pass
+
+    Partition discovery runs once for all ROIs, every catalog file is
+    scanned once and items are joined to the ROIs they intersect, which is
+    much faster than calling find() per ROI.
+
+    Args:
+        rois: GeoJSON FeatureCollection dict, path to a GeoJSON or GeoParquet
+              file, or an iterable of (roi_id, geojson_geometry) pairs
+        roi_id_property: Feature property (or GeoParquet column) holding the
+              ROI identifier; features without it are numbered by position
+        percent_valid_pixels: Minimum percent of valid pixels
+        mission: Satellite mission filter (e.g., "landsatOLI", "sentinel1", "sentinel2")
+        start: Start date
+        end: End date
+        min_interval: Minimum time interval in days
+        max_interval: Maximum time interval in days
+        engine: Query backend: "stac" (default), "duckdb" or "rustac"
+        filters: Dict of property filters as {property_name: PropertyFilter}.
+        properties: Item fields to yield with each URL, as in find_streaming()
+        stac_kwargs: Additional arguments to pass to serverless_batch_search()
+
+    Yields:
+        (roi_id, url) tuples, or (roi_id, {"url": ..., field: value}) with
+        properties; a url is yielded once for every ROI it intersects
+    """
+    roi_list = _load_rois(rois, roi_id_property)
+    if not roi_list:
+        return
+
+    stac_params, extra_cql2_exprs = _build_search_params(
+        None,
+        percent_valid_pixels=percent_valid_pixels,
+        mission=mission,
+        start=start,
+        end=end,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        engine=engine,
+        filters=filters,
+        stac_kwargs=stac_kwargs,
+    )
+    del stac_params["roi"]
+    if stac_params.pop("cache", None) is not None:
+        logging.warning("Result caching is not supported by batch searches")
+    if "batch_size" in stac_kwargs:
+        stac_params["batch_size"] = stac_kwargs["batch_size"]
+    if properties:
+        stac_params["properties"] = list(properties)
+
+    print(f"Finding velocity pairs for {len(roi_list)} ROIs... ", file=sys.stderr)
+    count = 0
+    for pair in serverless_batch_search(
+        roi_list, extra_cql2_exprs=extra_cql2_exprs, **stac_params
+    ):
+        count += 1
+        yield pair
+    print(f"Found {count} ROI/pair matches", file=sys.stderr)
+
+
+def _aggregate(
+    roi: dict,
+    group_by: tuple[str, ...],
+    percent_valid_pixels: int = 1,
+    mission: None | str = None,
+    start: None | datetime.date = None,
+    end: None | datetime.date = None,
+    min_interval: None | int = None,
+    max_interval: None | int = None,
+    engine: str = "stac",
+    filters: dict = None,
+    stac_kwargs: dict = None,
+) -> list[dict]:
+    """Run serverless_aggregate() with the find() arguments."""
+    stac_params, extra_cql2_exprs = _build_search_params(
+        roi,
+        percent_valid_pixels=percent_valid_pixels,
+        mission=mission,
+        start=start,
+        end=end,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        engine=engine,
+        filters=filters,
+        stac_kwargs=stac_kwargs,
+    )
+    # Counts are always computed by the catalog, never served from the cache
+    stac_params.pop("cache", None)
+    return serverless_aggregate(
+        group_by=group_by, extra_cql2_exprs=extra_cql2_exprs, **stac_params
+    )
+
+
 def coverage(
-    bbox: list[float],
-    polygon: list[float],
+    bbox: list[float] | None = None,
+    polygon: list[float] | None = None,
     percent_valid_pixels: int = 1,
     mission: None | str = None,
     start: None | datetime.date = None,
@@ -340,21 +672,136 @@ def coverage(
     min_interval: None | int = None,
     max_interval: None | int = None,
     engine: str = "stac",
+    geojson: dict | None = None,
+    filters: dict = None,
+    index: CoverageIndex | None = None,
     **stac_kwargs,
-) -> list[Any]:
-    """Returns a list of velocity files counts by year on a given area
+) -> list[dict]:
+    """Returns velocity pair counts per year and platform on a given area
 
-    Note: The legacy coverage API is no longer available. This function now
-    returns a placeholder indicating that feature is not yet implemented
-    for STAC/geoparquet catalogs.
+    The counts come from one aggregate query (see
+    itslive.search.serverless_aggregate): a ``GROUP BY year, platform``
+    over the geoparquet partitions for "duckdb", instead of enumerating
+    every matching granule. With a prebuilt coverage index they are a
+    lookup in a small local table instead.
 
-    To get similar statistics, you can use find() and analyze the results.
+    Args:
+        bbox, polygon, geojson: Search area, as in find()
+        percent_valid_pixels, mission, start, end, min_interval,
+        max_interval, engine, filters: Same as in find()
+        index: An itslive.coverage.CoverageIndex built for the catalog.
+            Counts are then per overlapping H3 cell and whole month, and
+            only the area, start, end and mission are applied (a warning
+            is logged for a percent_valid_pixels above 1, intervals,
+            filters or an unknown mission).
+        stac_kwargs: Additional arguments to pass to serverless_aggregate()
+
+    Returns:
+        List of {"year", "mission", "platform", "count"} dicts sorted by year
+        and platform, e.g. {"year": 2020, "mission": "sentinel2",
+        "platform": "S2A", "count": 1520}. Years or platforms without
+        granules are omitted. Rows from an index also carry the
+        "mean_percent_valid_pixels" of the granules.
+    """
+    roi = _roi_geometry(bbox, polygon, geojson)
+    if index is not None:
+        if (
+            filters
+            or min_interval is not None
+            or max_interval is not None
+            or percent_valid_pixels > 1
+        ):
+            logging.warning(
+                "The coverage index only applies the area, dates and mission"
+            )
+        platforms = None
+        if mission:
+            platforms = _mission_platforms(mission)
+            if platforms is None:
+                logging.warning(f"Unknown mission {mission!r}, not filtering on it")
+        rows = index.query(
+            roi,
+            start=start.isoformat() if isinstance(start, datetime.date) else start,
+            end=end.isoformat() if isinstance(end, datetime.date) else end,
+            platforms=list(platforms) if platforms else None,
+            group_by=("year", "platform"),
+        )
+        return [
+            {
+                "year": row["year"],
+                "mission": _platform_mission(row["platform"]),
+                "platform": row["platform"],
+                "count": row["count"],
+                "mean_percent_valid_pixels": row["mean_percent_valid_pixels"],
+            }
+            for row in rows
+        ]
+
+    rows = _aggregate(
+        roi,
+        ("year", "platform"),
+        percent_valid_pixels=percent_valid_pixels,
+        mission=mission,
+        start=start,
+        end=end,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        engine=engine,
+        filters=filters,
+        stac_kwargs=stac_kwargs,
+    )
+    return [
+        {
+            "year": row["year"],
+            "mission": _platform_mission(row["platform"]),
+            "platform": row["platform"],
+            "count": row["count"],
+        }
+        for row in rows
+    ]
+
+
+def count(
+    bbox: list[float] | None = None,
+    polygon: list[float] | None = None,
+    geojson: dict | None = None,
+    percent_valid_pixels: int = 1,
+    mission: None | str = None,
+    start: None | datetime.date = None,
+    end: None | datetime.date = None,
+    min_interval: None | int = None,
+    max_interval: None | int = None,
+    engine: str = "stac",
+    filters: dict = None,
+    **stac_kwargs,
+) -> int:
+    """Returns the number of velocity pairs find() would return
+
+    The catalog counts the matches (a ``COUNT(*)`` for "duckdb", the
+    ``numberMatched`` of the STAC API when it reports one), so the URLs
+    are not transferred.
+
+    Args:
+        Same as find()
+
+    Returns:
+        Number of matching velocity pair granules
     """
-    logging.warning(
-        "The coverage() function is not yet implemented for STAC/geoparquet catalogs. "
-        "Use find() to retrieve granule URLs and analyze them locally."
+    roi = _roi_geometry(bbox, polygon, geojson)
+    rows = _aggregate(
+        roi,
+        (),
+        percent_valid_pixels=percent_valid_pixels,
+        mission=mission,
+        start=start,
+        end=end,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        engine=engine,
+        filters=filters,
+        stac_kwargs=stac_kwargs,
     )
-    return []
+    return rows[0]["count"]
 
 
 def _download_aws(urls: list[str], path: str) -> list[str]:
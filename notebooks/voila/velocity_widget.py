@@ -20,6 +20,7 @@ from datacube_tools import DATACUBETOOLS as dctools
 # for datacube xarray/zarr access
 from IPython.display import display
 from ipywidgets import HTML, FileUpload, widgets
+from itslive.timeseries import running_mean
 
 # for plotting time series
 from matplotlib import pyplot as plt
@@ -601,22 +602,13 @@ class ITSLIVE:
         tsmax = pd.Timestamp(np.max(mid_dates))
         ts = pd.date_range(start=tsmin, end=tsmax, freq=f"{tFreq}D")
         ts = pd.to_datetime(ts).values
-        idx0 = ~np.isnan(variable)
-        runmean = np.empty([len(ts) - 1, 1])
-        runmean[:] = np.nan
-        tsmean = ts[0:-1]
-
-        t_np = mid_dates.astype(np.int64)
-
-        for i in range(len(ts) - 1):
-            idx = (
-                (mid_dates >= (ts[i] - np.timedelta64(int(tFreq / 2), "D")))
-                & (mid_dates < (ts[i + 1] + np.timedelta64(int(tFreq / 2), "D")))
-                & idx0
-            )
-            if sum(idx) >= minpts:
-                runmean[i] = np.mean(variable[idx])
-                tsmean[i] = np.mean(t_np[idx])
+        half = np.timedelta64(int(tFreq / 2), "D")
+
+        means, mean_times = running_mean(
+            mid_dates, variable, ts[:-1] - half, ts[1:] + half, min_count=minpts
+        )
+        runmean = means[:, np.newaxis]
+        tsmean = np.where(np.isnat(mean_times), ts[:-1], mean_times)
 
         tsmean = pd.to_datetime(tsmean).values
         return (runmean, tsmean)
@@ -5,6 +5,8 @@ Network-hitting tests are marked ``integration`` and are skipped in CI
 unless explicitly requested with ``-m integration``.
 """
 
+from unittest.mock import patch
+
 import pytest
 import responses as responses_lib
 
@@ -26,3 +28,162 @@ def mock_responses():
     """
     with responses_lib.RequestsMock(assert_all_requests_are_fired=False) as rsps:
         yield rsps
+
+
+def make_stac_geoparquet_table(n_items: int = 40, seed: int = 0):
+    """Build a small in-memory stac-geoparquet table over Greenland.
+
+    Items are 1x1 degree footprints scattered over two H3 resolution-1
+    cells with datetimes spread across 2019-2022.
+    """
+    import datetime
+
+    import numpy as np
+    import pyarrow as pa
+    import shapely
+    from shapely.geometry import box
+
+    rng = np.random.default_rng(seed)
+    lons = rng.uniform(-52.0, -30.0, n_items)
+    lats = rng.uniform(64.0, 76.0, n_items)
+    start = datetime.datetime(2019, 1, 1, tzinfo=datetime.timezone.utc)
+    offsets = rng.integers(0, 4 * 365, n_items)
+    geoms = [box(lon, lat, lon + 1.0, lat + 1.0) for lon, lat in zip(lons, lats)]
+    platforms = ["S1A", "S2A", "L8", "L9"]
+    ids = [f"item-{i:03d}" for i in range(n_items)]
+
+    return pa.table(
+        {
+            "id": ids,
+            "geometry": pa.array(shapely.to_wkb(geoms), type=pa.binary()),
+            "bbox": pa.StructArray.from_arrays(
+                [
+                    pa.array(lons),
+                    pa.array(lats),
+                    pa.array(lons + 1.0),
+                    pa.array(lats + 1.0),
+                ],
+                names=["xmin", "ymin", "xmax", "ymax"],
+            ),
+            "datetime": pa.array(
+                [start + datetime.timedelta(days=int(o)) for o in offsets],
+                type=pa.timestamp("us", tz="UTC"),
+            ),
+            "platform": [platforms[i % len(platforms)] for i in range(n_items)],
+            "percent_valid_pixels": pa.array(
+                rng.integers(0, 100, n_items), type=pa.int64()
+            ),
+            "date_dt": pa.array(rng.integers(1, 400, n_items), type=pa.int64()),
+            "assets": pa.array(
+                [
+                    {
+                        "data": {
+                            "href": f"https://its-live-data.s3.amazonaws.com/{i}.nc",
+                            "roles": ["data"],
+                        }
+                    }
+                    for i in ids
+                ]
+            ),
+        }
+    )
+
+
+@pytest.fixture
+def stac_geoparquet_catalog(tmp_path):
+    """Write a small unsorted stac-geoparquet catalog split over two files."""
+    import pyarrow.parquet as pq
+
+    table = make_stac_geoparquet_table()
+    root = tmp_path / "source"
+    (root / "a").mkdir(parents=True)
+    (root / "b").mkdir(parents=True)
+    half = table.num_rows // 2
+    pq.write_table(table.slice(0, half), root / "a" / "items.parquet")
+    pq.write_table(table.slice(half), root / "b" / "items.parquet")
+    return root
+
+
+# Centre of the synthetic datacube, in EPSG:4326 and EPSG:3413.
+CUBE_LON, CUBE_LAT = -49.0, 69.0
+
+
+def make_velocity_cube(
+    n_time: int = 24, ny: int = 8, nx: int = 8, seed: int = 0, x_offset: int = 0
+):
+    """Build a small ITS_LIVE-like datacube (mid_date, y, x) on a 120 m grid.
+
+    ``x_offset`` shifts the cube east by that many pixels, so neighbouring
+    cubes on the same grid can be built.
+    """
+    import numpy as np
+    import pandas as pd
+    import pyproj
+    import xarray as xr
+
+    rng = np.random.default_rng(seed)
+    cx, cy = pyproj.Transformer.from_crs(
+        "EPSG:4326", "EPSG:3413", always_xy=True
+    ).transform(CUBE_LON, CUBE_LAT)
+    x = np.round(cx / 120) * 120 + 120 * (np.arange(nx) - nx // 2 + x_offset)
+    y = np.round(cy / 120) * 120 - 120 * (np.arange(ny) - ny // 2)
+    mid_date = pd.date_range("2018-01-01", periods=n_time, freq="MS") + pd.Timedelta(
+        days=14
+    )
+    shape = (n_time, ny, nx)
+    data = {
+        name: (("mid_date", "y", "x"), rng.uniform(50, 500, shape).astype("float32"))
+        for name in ("v", "vx", "vy")
+    }
+    data.update(
+        {
+            f"{name}_error": (
+                ("mid_date",),
+                rng.uniform(1, 20, n_time).astype("float32"),
+            )
+            for name in ("v", "vx", "vy")
+        }
+    )
+    satellites = np.array(["1A", "2A", "8", "9"])[np.arange(n_time) % 4]
+    missions = np.array(["S1", "S2", "L8", "L9"])[np.arange(n_time) % 4]
+    data["date_dt"] = (
+        ("mid_date",),
+        np.array([6, 12, 24, 48, 96, 192])[np.arange(n_time) % 6].astype(
+            "timedelta64[D]"
+        ),
+    )
+    data["satellite_img1"] = (("mid_date",), satellites)
+    data["mission_img1"] = (("mid_date",), missions)
+    ds = xr.Dataset(data, coords={"mid_date": mid_date, "y": y, "x": x})
+    ds["mapping"] = xr.DataArray(
+        np.int32(0),
+        attrs={
+            "GeoTransform": f"{x[0] - 60.0} 120.0 0 {y[0] + 60.0} 0 -120.0",
+            "spatial_epsg": 3413,
+        },
+    )
+    ds.attrs["projection"] = "3413"
+    return ds
+
+
+@pytest.fixture
+def velocity_cube_zarr(tmp_path):
+    """Write the synthetic datacube to a chunked local zarr store."""
+    ds = make_velocity_cube()
+    path = tmp_path / "cube.zarr"
+    ds.chunk({"mid_date": 6, "y": 4, "x": 4}).to_zarr(path, zarr_format=2)
+    return str(path)
+
+
+@pytest.fixture
+def two_cubes(tmp_path):
+    """Two neighbouring cubes on the same grid, as returned by the cube search."""
+    cubes = []
+    for i, (offset, seed) in enumerate([(0, 0), (8, 1)]):
+        path = str(tmp_path / f"ITS_LIVE_vel_EPSG3413_G0120_X{i}_Y0.zarr")
+        make_velocity_cube(seed=seed, x_offset=offset).chunk(
+            {"mid_date": 6, "y": 4, "x": 4}
+        ).to_zarr(path, zarr_format=2)
+        cubes.append({"properties": {"epsg": "3413", "zarr_url": path}})
+    with patch("itslive.velocity_cubes._regions._search_cubes", return_value=cubes):
+        yield [c["properties"]["zarr_url"] for c in cubes]
@@ -0,0 +1,255 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from itslive.catalog import (
+    MANIFEST_NAME,
+    build_optimized_catalog,
+    hilbert_index,
+    parse_datetime,
+    read_partition_manifest,
+    select_manifest_partitions,
+)
+from itslive.search import serverless_search
+
+ROI = {
+    "type": "Polygon",
+    "coordinates": [[[-50, 65], [-40, 65], [-40, 75], [-50, 75], [-50, 65]]],
+}
+
+
+class TestHilbertIndex:
+    def test_order_one_visits_quadrants_in_curve_order(self):
+        x = np.array([0, 0, 1, 1])
+        y = np.array([0, 1, 1, 0])
+        assert hilbert_index(x, y, 1).tolist() == [0, 1, 2, 3]
+
+    def test_is_a_bijection(self):
+        gx, gy = np.meshgrid(np.arange(8), np.arange(8))
+        d = hilbert_index(gx.ravel(), gy.ravel(), 3)
+        assert sorted(d.tolist()) == list(range(64))
+
+
+class TestParseDatetime:
+    def test_bare_date(self):
+        assert parse_datetime("2020-01-01").isoformat() == "2020-01-01T00:00:00"
+
+    def test_bare_date_end_of_day(self):
+        assert (
+            parse_datetime("2020-01-01", end_of_day=True).isoformat()
+            == "2020-01-01T23:59:59"
+        )
+
+    def test_zulu_suffix_is_normalized(self):
+        assert parse_datetime("2020-01-01T05:00:00Z").isoformat() == (
+            "2020-01-01T05:00:00"
+        )
+
+
+class TestBuildOptimizedCatalog:
+    def test_writes_manifest_and_partitions(self, stac_geoparquet_catalog, tmp_path):
+        out = tmp_path / "optimized"
+        manifest = build_optimized_catalog(
+            str(stac_geoparquet_catalog), str(out), resolution=1, row_group_size=4
+        )
+        assert (out / MANIFEST_NAME).exists()
+        assert manifest["num_rows"] == 40
+        assert len(manifest["partitions"]) >= 1
+        for partition in manifest["partitions"]:
+            path = out / partition["path"]
+            assert path.exists()
+            assert partition["path"].startswith("grid=h3/level=1/tile=")
+            metadata = pq.ParquetFile(path).metadata
+            assert metadata.num_rows == partition["num_rows"]
+            assert metadata.num_row_groups == partition["num_row_groups"]
+        assert not (out / "_staging").exists()
+
+    def test_partition_rows_are_sorted_by_spatial_key_then_datetime(
+        self, stac_geoparquet_catalog, tmp_path
+    ):
+        out = tmp_path / "optimized"
+        manifest = build_optimized_catalog(
+            str(stac_geoparquet_catalog), str(out), sort_by="h3", sort_precision=1
+        )
+        for partition in manifest["partitions"]:
+            df = pq.read_table(out / partition["path"]).to_pandas()
+            # With the sort key at the partition resolution every row shares
+            # one spatial key, so the partition must be in datetime order.
+            assert df["datetime"].is_monotonic_increasing
+
+    def test_adds_geoparquet_bbox_covering(self, stac_geoparquet_catalog, tmp_path):
+        out = tmp_path / "optimized"
+        manifest = build_optimized_catalog(str(stac_geoparquet_catalog), str(out))
+        schema = pq.read_schema(out / manifest["partitions"][0]["path"])
+        geo = json.loads(schema.metadata[b"geo"])
+        assert geo["version"] == "1.1.0"
+        covering = geo["columns"]["geometry"]["covering"]["bbox"]
+        assert covering["xmin"] == ["bbox", "xmin"]
+        assert manifest["covering"]["bbox"] == covering
+
+    def test_manifest_extent_covers_rows(self, stac_geoparquet_catalog, tmp_path):
+        out = tmp_path / "optimized"
+        manifest = build_optimized_catalog(str(stac_geoparquet_catalog), str(out))
+        for partition in manifest["partitions"]:
+            df = pq.read_table(out / partition["path"]).to_pandas()
+            xmin, ymin, xmax, ymax = partition["bbox"]
+            bbox = pd.DataFrame(df["bbox"].tolist())
+            assert bbox["xmin"].min() == pytest.approx(xmin)
+            assert bbox["ymax"].max() == pytest.approx(ymax)
+            assert partition["datetime"][0].endswith("Z")
+
+    def test_legacy_partition_layout(self, stac_geoparquet_catalog, tmp_path):
+        out = tmp_path / "optimized"
+        manifest = build_optimized_catalog(
+            str(stac_geoparquet_catalog), str(out), use_hive_partitions=False
+        )
+        for partition in manifest["partitions"]:
+            assert partition["path"].split("/")[0].isdigit()
+
+    def test_rebuild_removes_stale_partitions(self, stac_geoparquet_catalog, tmp_path):
+        out = tmp_path / "optimized"
+        before = build_optimized_catalog(str(stac_geoparquet_catalog), str(out))
+        source = tmp_path / "one"
+        source.mkdir()
+        table = pq.read_table(stac_geoparquet_catalog / "a" / "items.parquet")
+        pq.write_table(table.slice(0, 1), source / "items.parquet")
+
+        after = build_optimized_catalog(str(source), str(out))
+
+        assert len(after["partitions"]) < len(before["partitions"])
+        parquet_files = sorted(
+            p.relative_to(out).as_posix() for p in out.rglob("*.parquet")
+        )
+        assert parquet_files == sorted(p["path"] for p in after["partitions"])
+        assert pq.ParquetDataset(out).read().num_rows == 1
+        assert len(list(out.glob("grid=h3/level=1/*"))) == 1
+
+    def test_failed_build_leaves_no_staging(self, stac_geoparquet_catalog, tmp_path):
+        staging = tmp_path / "staging"
+        staging.mkdir()
+        out = tmp_path / "optimized"
+        with (
+            patch("tempfile.mkdtemp", return_value=str(staging)),
+            patch("itslive.catalog._spatial_sort_key", side_effect=RuntimeError),
+            pytest.raises(RuntimeError),
+        ):
+            build_optimized_catalog(str(stac_geoparquet_catalog), str(out))
+        assert not staging.exists()
+        assert list(out.rglob("*.parquet")) == []
+
+    def test_raises_without_parquet_files(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            build_optimized_catalog(str(tmp_path), str(tmp_path / "out"))
+
+    def test_raises_on_unknown_sort(self, stac_geoparquet_catalog, tmp_path):
+        with pytest.raises(NotImplementedError):
+            build_optimized_catalog(
+                str(stac_geoparquet_catalog), str(tmp_path / "out"), sort_by="zorder"
+            )
+
+
+class TestManifestSelection:
+    def _manifest(self):
+        return {
+            "version": 1,
+            "partitions": [
+                {
+                    "path": "grid=h3/level=1/tile=a/part-0.parquet",
+                    "bbox": [-50, 65, -45, 70],
+                    "datetime": ["2019-01-01T00:00:00Z", "2019-12-31T00:00:00Z"],
+                },
+                {
+                    "path": "grid=h3/level=1/tile=b/part-0.parquet",
+                    "bbox": [10, 10, 20, 20],
+                    "datetime": ["2019-01-01T00:00:00Z", "2019-12-31T00:00:00Z"],
+                },
+                {
+                    "path": "grid=h3/level=1/tile=c/part-0.parquet",
+                    "bbox": [-44, 71, -41, 74],
+                    "datetime": ["2022-01-01T00:00:00Z", "2022-06-01T00:00:00Z"],
+                },
+            ],
+        }
+
+    def test_selects_by_extent(self):
+        result = select_manifest_partitions(self._manifest(), "s3://bucket/cat", ROI)
+        assert result == [
+            "s3://bucket/cat/grid=h3/level=1/tile=a/part-0.parquet",
+            "s3://bucket/cat/grid=h3/level=1/tile=c/part-0.parquet",
+        ]
+
+    def test_selects_by_time_range(self):
+        result = select_manifest_partitions(
+            self._manifest(), "/cat", ROI, "2020-01-01", "2021-12-31"
+        )
+        assert result == []
+        result = select_manifest_partitions(
+            self._manifest(), "/cat", ROI, "2019-12-31", "2022-01-01"
+        )
+        assert len(result) == 2
+
+    def test_read_missing_manifest_returns_none(self, tmp_path):
+        assert read_partition_manifest(str(tmp_path / "nothing")) is None
+
+    def test_read_manifest_roundtrip(self, stac_geoparquet_catalog, tmp_path):
+        out = tmp_path / "optimized"
+        built = build_optimized_catalog(str(stac_geoparquet_catalog), str(out))
+        assert read_partition_manifest(str(out)) == built
+
+    def test_read_manifest_follows_the_file(self, stac_geoparquet_catalog, tmp_path):
+        out = tmp_path / "optimized"
+        out.mkdir()
+        (out / MANIFEST_NAME).write_text("{not json")
+        # Unreadable manifests are not remembered
+        assert read_partition_manifest(str(out)) is None
+        built = build_optimized_catalog(str(stac_geoparquet_catalog), str(out))
+        first = read_partition_manifest(str(out))
+        assert first == built
+
+        # Callers get their own copy
+        first["partitions"].clear()
+        assert read_partition_manifest(str(out)) == built
+
+        # A rewritten manifest is read again
+        changed = {**built, "num_rows": 1}
+        (out / MANIFEST_NAME).write_text(json.dumps(changed, indent=4))
+        assert read_partition_manifest(str(out))["num_rows"] == 1
+
+
+class TestServerlessSearchWithManifest:
+    def test_uses_manifest_instead_of_path_exists(
+        self, stac_geoparquet_catalog, tmp_path
+    ):
+        out = tmp_path / "optimized"
+        manifest = build_optimized_catalog(str(stac_geoparquet_catalog), str(out))
+
+        con = MagicMock()
+        con.execute.return_value.df.return_value = pd.DataFrame(
+            {"data_href": ["https://its-live-data.s3.amazonaws.com/x.nc"]}
+        )
+        with (
+            patch("duckdb.connect", return_value=con),
+            patch("itslive.search.path_exists") as mock_path_exists,
+        ):
+            result = serverless_search(
+                start_date="2019-01-01",
+                end_date="2022-12-31",
+                roi=ROI,
+                base_catalog_href=str(out),
+                engine="duckdb",
+            )
+
+        mock_path_exists.assert_not_called()
+        assert result == ["https://its-live-data.s3.amazonaws.com/x.nc"]
+        queries = [
+            c.args[0] for c in con.execute.call_args_list if "SELECT" in c.args[0]
+        ]
+        assert 0 < len(queries) <= len(manifest["partitions"])
+        for query in queries:
+            assert "bbox.xmin <=" in query
+            assert "TIMESTAMPTZ" in query
+            assert str(out) in query
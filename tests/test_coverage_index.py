@@ -0,0 +1,240 @@
+import collections
+import os
+from unittest.mock import patch
+
+import h3
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+import shapely
+from click.testing import CliRunner
+from shapely.geometry import box
+
+from itslive.cli.catalog import catalog
+from itslive.coverage import CoverageIndex
+from itslive.engines import MemoryEngine
+from itslive.search import serverless_aggregate
+from itslive.velocity_pairs import coverage
+
+from .conftest import make_stac_geoparquet_table
+
+GREENLAND = {
+    "type": "Polygon",
+    "coordinates": [[[-60, 60], [-20, 60], [-20, 80], [-60, 80], [-60, 60]]],
+}
+
+
+@pytest.fixture
+def index(stac_geoparquet_catalog, tmp_path):
+    index = CoverageIndex(
+        str(stac_geoparquet_catalog), resolution=2, cache_dir=str(tmp_path / "cov")
+    )
+    index.build()
+    return index
+
+
+def _expected(table, **filters):
+    df = table.to_pandas()
+    df["year"] = df["datetime"].dt.year
+    for name, value in filters.items():
+        df = df[df[name] == value]
+    return df
+
+
+def test_index_matches_the_catalog(index):
+    table = make_stac_geoparquet_table()
+    rows = index.query(GREENLAND)
+    expected = _expected(table).groupby(["year", "platform"])
+    assert len(rows) == expected.ngroups
+    for row in rows:
+        group = expected.get_group((row["year"], row["platform"]))
+        assert row["count"] == len(group)
+        assert row["mean_percent_valid_pixels"] == pytest.approx(
+            group["percent_valid_pixels"].mean()
+        )
+    assert index.query(GREENLAND, group_by=())[0]["count"] == 40
+
+    stored = index.read()
+    assert stored.column_names == [
+        "cells",
+        "year",
+        "month",
+        "platform",
+        "count",
+        "valid_sum",
+        "valid_count",
+        "mean_percent_valid_pixels",
+    ]
+    assert pc.sum(stored.column("count")).as_py() == 40
+
+
+def test_mean_skips_granules_without_percent_valid_pixels(tmp_path):
+    # Every third granule has a copy without percent_valid_pixels in its row
+    table = make_stac_geoparquet_table()
+    copies = table.take(list(range(0, table.num_rows, 3)))
+    i = table.column_names.index("percent_valid_pixels")
+    copies = copies.set_column(
+        i, "percent_valid_pixels", pa.nulls(copies.num_rows, pa.float64())
+    )
+    table = pa.concat_tables([table, copies.cast(table.schema)])
+    (tmp_path / "catalog").mkdir()
+    pq.write_table(table, tmp_path / "catalog" / "items.parquet")
+    index = CoverageIndex(
+        str(tmp_path / "catalog"), resolution=2, cache_dir=str(tmp_path / "cov")
+    )
+    index.build()
+
+    df = _expected(table)
+    for group_by in [(), ("year",), ("platform",)]:
+        for row in index.query(GREENLAND, group_by=group_by):
+            group = df
+            for key in group_by:
+                group = group[group[key] == row[key]]
+            assert row["mean_percent_valid_pixels"] == pytest.approx(
+                group["percent_valid_pixels"].mean()
+            )
+
+
+def test_query_filters(index):
+    table = make_stac_geoparquet_table()
+    df = _expected(table)
+    months = df["datetime"].dt.year * 12 + df["datetime"].dt.month
+    # Monthly resolution: the months of start and end are included whole
+    in_range = df[(months >= 2020 * 12 + 3) & (months <= 2021 * 12 + 6)]
+    rows = index.query(
+        GREENLAND, start="2020-03-20", end="2021-06-02", platforms=["L"], group_by=()
+    )
+    assert rows[0]["count"] == in_range["platform"].str.startswith("L").sum()
+
+    # A granule counts in every cell its bbox overlaps
+    expected = collections.Counter()
+    for bounds in shapely.bounds(shapely.from_wkb(table.column("geometry"))):
+        x0, y0, x1, y1 = bounds
+        footprint = h3.LatLngPoly([(y0, x0), (y0, x1), (y1, x1), (y1, x0)])
+        expected.update(h3.h3shape_to_cells_experimental(footprint, 2, "overlap"))
+    cells = index.query(GREENLAND, group_by=("cell",))
+    assert {row["cell"]: row["count"] for row in cells} == expected
+    assert all(row["cell"] in index.cells(GREENLAND) for row in cells)
+
+    far_away = {"type": "Point", "coordinates": [100.0, 0.0]}
+    assert index.query(far_away, group_by=("year",)) == []
+    assert index.query(far_away, group_by=())[0]["count"] == 0
+    with pytest.raises(ValueError):
+        index.query(GREENLAND, group_by=("mission",))
+
+
+def test_incremental_refresh(stac_geoparquet_catalog, index):
+    assert index.build() == {
+        "files": 2,
+        "read": 0,
+        "removed": 0,
+        "unchanged": 2,
+        "rows": index.read().num_rows,
+    }
+
+    source = stac_geoparquet_catalog / "a" / "items.parquet"
+    first = pq.read_table(source)
+    pq.write_table(first.slice(0, 5), source)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    summary = index.build()
+    assert (summary["read"], summary["unchanged"]) == (1, 1)
+    assert index.query(GREENLAND, group_by=())[0]["count"] == 25
+
+    os.remove(source)
+    summary = index.build()
+    assert (summary["files"], summary["removed"]) == (1, 1)
+    assert index.query(GREENLAND, group_by=())[0]["count"] == 20
+
+    assert index.build(full=True)["read"] == 1
+
+
+def test_missing_index(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        CoverageIndex(str(tmp_path), cache_dir=str(tmp_path)).read()
+    with pytest.raises(FileNotFoundError):
+        CoverageIndex(str(tmp_path / "empty"), cache_dir=str(tmp_path)).build()
+
+
+@patch("pystac_client.Client.open")
+def test_velocity_pairs_coverage_from_index(mock_open, index):
+    rows = coverage(bbox=[-60, 60, -20, 80], mission="landsatOLI", index=index)
+    mock_open.assert_not_called()
+    expected = _expected(make_stac_geoparquet_table())
+    expected = expected[expected["platform"].isin(["L8", "L9"])]
+    assert sum(row["count"] for row in rows) == len(expected)
+    assert {row["mission"] for row in rows} == {"landsatOLI"}
+    assert "mean_percent_valid_pixels" in rows[0]
+
+
+@patch("pystac_client.Client.open")
+def test_velocity_pairs_coverage_warns_on_what_the_index_ignores(
+    mock_open, index, caplog
+):
+    everything = coverage(bbox=[-60, 60, -20, 80], index=index)
+    assert not caplog.records
+
+    rows = coverage(bbox=[-60, 60, -20, 80], mission="landsat", index=index)
+    assert "Unknown mission 'landsat'" in caplog.text
+    assert rows == everything
+
+    caplog.clear()
+    coverage(bbox=[-60, 60, -20, 80], percent_valid_pixels=50, index=index)
+    assert "only applies the area, dates and mission" in caplog.text
+    mock_open.assert_not_called()
+
+
+def test_cli_builds_and_refreshes(stac_geoparquet_catalog, tmp_path):
+    args = [
+        "coverage",
+        str(stac_geoparquet_catalog),
+        "--resolution",
+        "2",
+        "--cache-dir",
+        str(tmp_path / "cov"),
+    ]
+    result = CliRunner().invoke(catalog, args)
+    assert result.exit_code == 0, result.output
+    assert "2 read" in result.output
+    result = CliRunner().invoke(catalog, args)
+    assert "0 read, 2 unchanged" in result.output
+
+
+def test_region_smaller_than_a_granule(tmp_path):
+    # One 3x3 degree granule: every region touching it counts it once
+    granule = box(-46.0, 68.0, -43.0, 71.0)
+    table = make_stac_geoparquet_table().slice(0, 1)
+    table = table.set_column(
+        table.schema.get_field_index("geometry"),
+        "geometry",
+        pa.array([shapely.to_wkb(granule)], pa.binary()),
+    ).set_column(
+        table.schema.get_field_index("bbox"),
+        "bbox",
+        pa.array(
+            [dict(zip(["xmin", "ymin", "xmax", "ymax"], granule.bounds))],
+            table.schema.field("bbox").type,
+        ),
+    )
+    (tmp_path / "catalog").mkdir()
+    pq.write_table(table, tmp_path / "catalog" / "items.parquet")
+    index = CoverageIndex(
+        str(tmp_path / "catalog"), resolution=2, cache_dir=str(tmp_path / "cov")
+    )
+    index.build()
+
+    corner = box(-43.2, 70.8, -43.1, 70.9).__geo_interface__
+    try:
+        for roi in (corner, granule.__geo_interface__, GREENLAND):
+            (searched,) = serverless_aggregate(
+                "2019-01-01",
+                "2022-12-31",
+                roi,
+                base_catalog_href=str(tmp_path / "catalog"),
+                engine="memory",
+                group_by=(),
+            )
+            assert index.query(roi, group_by=())[0]["count"] == searched["count"] == 1
+    finally:
+        MemoryEngine.evict()
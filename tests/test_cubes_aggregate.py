@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from itslive.velocity_cubes import aggregate
+
+from .conftest import CUBE_LAT, CUBE_LON
+
+WIDE_BBOX = [CUBE_LON - 0.05, CUBE_LAT - 0.02, CUBE_LON + 0.05, CUBE_LAT + 0.02]
+
+
+def _left_cube(two_cubes):
+    return xr.open_zarr(two_cubes[0]).sortby("mid_date")
+
+
+class TestAggregate:
+    def test_quarterly_median_matches_in_memory_resample(self, two_cubes):
+        result = aggregate(WIDE_BBOX, freq="QS", statistic="median")
+        left = _left_cube(two_cubes)
+        expected = left.v.load().resample(mid_date="QS").median()
+        got = result.v.sel(x=left.x).transpose("time", "y", "x")
+        np.testing.assert_allclose(got.values, expected.values, rtol=1e-6)
+        assert result.sizes["x"] == 16
+        assert result.attrs["aggregation"] == "median QS"
+
+    def test_annual_mean_with_interval_filter(self, two_cubes):
+        result = aggregate(WIDE_BBOX, freq="annual", max_interval=24)
+        left = _left_cube(two_cubes).load()
+        days = left.date_dt / np.timedelta64(1, "D")
+        expected = left.v.where(days <= 24, drop=True).resample(mid_date="YS").mean()
+        got = result.v.sel(x=left.x).transpose("time", "y", "x")
+        np.testing.assert_allclose(got.values, expected.values, rtol=1e-6)
+        assert result.sizes["time"] == 2
+
+    def test_error_weighted_mean(self, two_cubes):
+        result = aggregate(WIDE_BBOX, freq="annual", error_weighting=True)
+        left = _left_cube(two_cubes).load()
+        weights = 1.0 / left.v_error**2
+        expected = (left.v * weights).resample(mid_date="YS").sum() / (
+            weights.resample(mid_date="YS").sum()
+        )
+        got = result.v.sel(x=left.x).transpose("time", "y", "x")
+        np.testing.assert_allclose(got.values, expected.values, rtol=1e-5)
+
+    def test_error_weighted_mean_falls_back_to_v_error(self, two_cubes, tmp_path):
+        # Cubes without a vx_error layer weight vx with v_error
+        cubes = []
+        for url in two_cubes:
+            path = str(tmp_path / f"no_vx_error_{url.rsplit('/', 1)[-1]}")
+            xr.open_zarr(url).drop_vars("vx_error").to_zarr(path, zarr_format=2)
+            cubes.append({"properties": {"epsg": "3413", "zarr_url": path}})
+        with patch("itslive.velocity_cubes._regions._search_cubes", return_value=cubes):
+            result = aggregate(
+                WIDE_BBOX, variables=["vx"], freq="annual", error_weighting=True
+            )
+        left = _left_cube(two_cubes).load()
+        weights = 1.0 / left.v_error**2
+        expected = (left.vx * weights).resample(mid_date="YS").sum() / (
+            weights.resample(mid_date="YS").sum()
+        )
+        got = result.vx.sel(x=left.x).transpose("time", "y", "x")
+        np.testing.assert_allclose(got.values, expected.values, rtol=1e-5)
+
+    @pytest.mark.parametrize("name", ["agg.zarr", "agg.nc"])
+    def test_writes_to_disk(self, two_cubes, tmp_path, name):
+        if name.endswith(".nc"):
+            pytest.importorskip("netCDF4")
+        expected = aggregate(WIDE_BBOX, freq="seasonal", statistic="max")
+        written = aggregate(
+            WIDE_BBOX, freq="seasonal", statistic="max", outpath=str(tmp_path / name)
+        )
+        assert written.v.chunks is not None
+        xr.testing.assert_allclose(written.v.load(), expected.v)
+
+    def test_invalid_arguments(self, two_cubes):
+        with pytest.raises(ValueError):
+            aggregate(WIDE_BBOX, statistic="mode")
+        with pytest.raises(ValueError):
+            aggregate(WIDE_BBOX, statistic="median", error_weighting=True)
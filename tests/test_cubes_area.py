@@ -0,0 +1,117 @@
+from unittest.mock import patch
+
+import numpy as np
+import pyproj
+import pytest
+import xarray as xr
+
+from itslive.velocity_cubes import _regions, get_area_time_series
+
+from .conftest import make_velocity_cube
+
+TO_LONLAT = pyproj.Transformer.from_crs("EPSG:3413", "EPSG:4326", always_xy=True)
+
+
+def _polygon(x0, x1, y0, y1):
+    """Lon/lat polygon of a projected rectangle around pixel centres."""
+    xs = [x0 - 30, x1 + 30, x1 + 30, x0 - 30]
+    ys = [y0 - 30, y0 - 30, y1 + 30, y1 + 30]
+    lon, lat = TO_LONLAT.transform(xs, ys)
+    return list(zip(lon, lat))
+
+
+def _window(ds, rows, cols):
+    return ds.isel(y=rows, x=cols)
+
+
+@pytest.fixture
+def across_cubes(two_cubes):
+    """Polygon over rows 2-5 of both cubes (cols 4-7 left, 0-2 right)."""
+    left, right = (xr.open_zarr(path).load() for path in two_cubes)
+    pieces = [
+        _window(left, slice(2, 6), slice(4, 8)),
+        _window(right, slice(2, 6), slice(0, 3)),
+    ]
+    polygon = _polygon(
+        float(pieces[0].x.min()),
+        float(pieces[1].x.max()),
+        float(pieces[0].y.min()),
+        float(pieces[0].y.max()),
+    )
+    reference = xr.concat([p.v for p in pieces], dim="x")
+    return polygon, reference, pieces
+
+
+class TestAreaTimeSeries:
+    @pytest.mark.parametrize("stat", ["mean", "median", "min", "max", "std", "count"])
+    def test_matches_in_memory_reduction(self, across_cubes, stat):
+        polygon, reference, _ = across_cubes
+        result = get_area_time_series(polygon, stat=stat, time_block=5)
+        expected = getattr(reference, stat)(dim=["y", "x"])
+        np.testing.assert_allclose(result.v.values, expected.values, rtol=1e-5)
+        assert result.attrs["n_pixels"] == 28
+        assert (result.v_count == 28).all()
+        assert "date_dt" in result
+
+    def test_nan_aware_and_cached_mask(self, tmp_path):
+        cube = make_velocity_cube(n_time=10)
+        rng = np.random.default_rng(5)
+        cube["v"] = cube.v.where(rng.random(cube.v.shape) > 0.4)
+        path = str(tmp_path / "nan_cube.zarr")
+        cube.chunk({"mid_date": 5, "y": 4, "x": 4}).to_zarr(path, zarr_format=2)
+        found = [{"properties": {"epsg": "3413", "zarr_url": path}}]
+        polygon = _polygon(
+            float(cube.x[1]), float(cube.x[6]), float(cube.y[6]), float(cube.y[1])
+        )
+        expected = cube.v.isel(y=slice(1, 7), x=slice(1, 7))
+
+        _regions._cached_area_mask.cache_clear()
+        with patch("itslive.velocity_cubes._regions._search_cubes", return_value=found):
+            median = get_area_time_series(polygon, stat="median", time_block=3)
+            mean = get_area_time_series(polygon)
+
+        np.testing.assert_allclose(
+            median.v.values, expected.median(dim=["y", "x"]).values, rtol=1e-6
+        )
+        np.testing.assert_allclose(
+            mean.v.values, expected.mean(dim=["y", "x"]).values, rtol=1e-5
+        )
+        np.testing.assert_array_equal(
+            mean.v_count.values, expected.count(dim=["y", "x"]).values
+        )
+        assert _regions._cached_area_mask.cache_info().hits == 1
+
+    def test_error_weighted_mean_across_cubes(self, across_cubes):
+        polygon, _, pieces = across_cubes
+        result = get_area_time_series(polygon, error_weighting=True)
+        weights = [1.0 / p.v_error**2 for p in pieces]
+        totals = sum(w * p.v.sum(dim=["y", "x"]) for w, p in zip(weights, pieces))
+        norm = sum(w * p.v.count(dim=["y", "x"]) for w, p in zip(weights, pieces))
+        np.testing.assert_allclose(result.v.values, (totals / norm).values, rtol=1e-5)
+
+    def test_reads_only_chunks_under_the_mask(self, velocity_cube_zarr):
+        cube = make_velocity_cube()
+        found = [{"properties": {"epsg": "3413", "zarr_url": velocity_cube_zarr}}]
+        # Rows/cols 1-2 lie inside the first 4x4 chunk
+        polygon = _polygon(
+            float(cube.x[1]), float(cube.x[2]), float(cube.y[2]), float(cube.y[1])
+        )
+        with (
+            patch("itslive.velocity_cubes._regions._search_cubes", return_value=found),
+            patch(
+                "itslive.velocity_cubes._regions._read_masked_block",
+                wraps=_regions._read_masked_block,
+            ) as reader,
+        ):
+            result = get_area_time_series(polygon, time_block=12)
+        assert reader.call_count == 2
+        assert result.attrs["n_pixels"] == 4
+
+    def test_invalid_arguments(self, across_cubes):
+        polygon, *_ = across_cubes
+        with pytest.raises(ValueError):
+            get_area_time_series(polygon, stat="mode")
+        with pytest.raises(ValueError):
+            get_area_time_series(polygon, stat="median", error_weighting=True)
+        with pytest.raises(ValueError):
+            get_area_time_series({"type": "Point", "coordinates": [-49, 69]})
@@ -0,0 +1,114 @@
+import io
+import json
+from unittest.mock import patch
+
+import pyarrow as pa
+import pytest
+
+from itslive.cli.export import export_time_series
+from itslive.velocity_cubes import export_stream
+
+from .conftest import CUBE_LAT, CUBE_LON
+
+POINTS = [(CUBE_LON, CUBE_LAT), (CUBE_LON + 0.002, CUBE_LAT + 0.001)]
+SEARCH = "itslive.velocity_cubes._cubes._search_cubes"
+
+
+@pytest.fixture
+def search(velocity_cube_zarr):
+    cube = [{"properties": {"epsg": "3413", "zarr_url": velocity_cube_zarr}}]
+    with patch(SEARCH, return_value=cube) as search:
+        yield search
+
+
+class FlushCounter(io.BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.flushed_at = []
+
+    def flush(self):
+        self.flushed_at.append(len(self.getvalue()))
+
+
+class ClosedPipe(io.RawIOBase):
+    def writable(self):
+        return True
+
+    def write(self, data):
+        raise BrokenPipeError
+
+
+def test_ndjson_rows_flushed_per_batch(search):
+    out = FlushCounter()
+    rows = export_stream(POINTS, format="ndjson", stream=out, batch_size=1)
+
+    lines = out.getvalue().decode().splitlines()
+    assert rows == len(lines) == 48
+    assert '"v [m/yr]"' in lines[0]
+    record = json.loads(lines[0])
+    assert record["lon"] == POINTS[0][0]
+    assert record["date_dt [days]"] == 6
+    assert record["mission"] == "S1"
+    assert record["mid_date"].startswith("2018-01-15")
+    # One flush after each batch (point) and a final one
+    assert len(out.flushed_at) == 3
+    assert 0 < out.flushed_at[0] < out.flushed_at[1]
+
+
+def test_csv_has_one_header(search):
+    out = io.BytesIO()
+    export_stream(POINTS, format="csv", stream=out, batch_size=1)
+    lines = out.getvalue().decode().splitlines()
+    assert len(lines) == 49
+    assert lines[0].startswith('"lon","lat","mid_date","v [m/yr]"')
+
+
+def test_arrow_ipc_stream(search):
+    out = io.BytesIO()
+    export_stream(POINTS, format="arrow-ipc", stream=out)
+    table = pa.ipc.open_stream(out.getvalue()).read_all()
+    assert table.num_rows == 48
+    assert table.schema.field("date_dt [days]").type == pa.int32()
+    assert pa.types.is_dictionary(table.schema.field("satellite").type)
+
+
+def test_broken_pipe_stops_reading(search):
+    rows = export_stream(POINTS, format="ndjson", stream=ClosedPipe(), batch_size=1)
+    assert rows == 0
+    assert search.call_count == 1
+
+
+def test_ndjson_rows_match_the_arrow_rows(search):
+    ndjson, ipc = io.BytesIO(), io.BytesIO()
+    export_stream(POINTS, ["v", "vx"], format="ndjson", stream=ndjson)
+    export_stream(POINTS, ["v", "vx"], format="arrow-ipc", stream=ipc)
+
+    records = [json.loads(line) for line in ndjson.getvalue().splitlines()]
+    rows = pa.ipc.open_stream(ipc.getvalue()).read_all().to_pylist()
+    assert records == [{**row, "mid_date": row["mid_date"].isoformat()} for row in rows]
+
+
+def test_stdout_carries_only_rows(search, capsysbinary):
+    export_stream(POINTS, format="csv", batch_size=1)
+    captured = capsysbinary.readouterr()
+    assert len(captured.out.decode().splitlines()) == 49
+    assert b"Processing" not in captured.out
+
+
+def test_invalid_format():
+    with pytest.raises(ValueError):
+        export_stream(POINTS, format="xml")
+
+
+@pytest.mark.parametrize(
+    "format, outdir, streamed",
+    [("ndjson", None, True), ("csv", "-", True), ("csv", "out", False)],
+)
+def test_cli_dispatch(format, outdir, streamed):
+    with (
+        patch("itslive.velocity_cubes.export_stream") as stream,
+        patch("itslive.velocity_cubes.export_csv") as csv,
+    ):
+        export_time_series(POINTS, ["v"], format, outdir)
+    assert stream.called is streamed
+    assert csv.called is not streamed
@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from itslive.velocity_cubes import export_csv, export_stdout, get_time_series
+from itslive.velocity_cubes._export import _export_table
+
+from .conftest import CUBE_LAT, CUBE_LON
+
+POINTS = [(CUBE_LON, CUBE_LAT), (CUBE_LON + 0.002, CUBE_LAT + 0.001)]
+
+
+@pytest.fixture
+def cube_search(velocity_cube_zarr):
+    cube = [{"properties": {"epsg": "3413", "zarr_url": velocity_cube_zarr}}]
+    with patch("itslive.velocity_cubes._cubes._search_cubes", return_value=cube):
+        yield
+
+
+def _results():
+    results = get_time_series(POINTS)
+    # A gap in the second point's series
+    series = results[1]["time_series"]
+    results[1]["time_series"] = series.assign(v=series.v.where(series.v > 100))
+    return results
+
+
+def test_typed_table_for_a_batch(cube_search):
+    results = _results()
+    table, offsets = _export_table(results)
+
+    gaps = int(results[1]["time_series"].v.isnull().sum())
+    assert gaps > 0
+    assert list(offsets) == [0, 24, 48 - gaps]
+    assert table.column_names[:3] == ["lon", "lat", "mid_date"]
+    assert table.schema.field("date_dt [days]").type == pa.int32()
+    for name in ("mission", "satellite", "epsg"):
+        assert pa.types.is_dictionary(table.schema.field(name).type)
+
+    first = table.slice(0, offsets[1]).to_pandas()
+    series = results[0]["time_series"]
+    np.testing.assert_array_equal(first["v [m/yr]"], series.v.values)
+    np.testing.assert_array_equal(
+        first["date_dt [days]"], series.date_dt.values.astype("timedelta64[D]")
+    )
+    assert (first["lon"] == POINTS[0][0]).all()
+    assert list(first["satellite"]) == list(series.satellite_img1.values)
+    assert first["epsg"].iloc[0] == "3413"
+
+
+def test_keep_missing_rows(cube_search):
+    results = _results()
+    table, offsets = _export_table(results, dropna=False)
+    assert list(offsets) == [0, 24, 48]
+    assert np.isnan(table.column("v [m/yr]").to_numpy()).sum() > 0
+
+
+def test_empty_batch():
+    table, offsets = _export_table([])
+    assert table.num_rows == 0
+    assert list(offsets) == [0]
+
+
+def test_csv_batches_match_single_points(cube_search, tmp_path):
+    export_csv(POINTS, outdir=str(tmp_path / "batched"))
+    export_csv(POINTS, outdir=str(tmp_path / "single"), batch_size=1)
+    batched = sorted((tmp_path / "batched").iterdir())
+    assert len(batched) == 2
+    for path in batched:
+        df = pd.read_csv(path)
+        assert len(df) == 24
+        assert {"v [m/yr]", "date_dt [days]", "mission", "epsg"} <= set(df.columns)
+        assert path.read_text() == (tmp_path / "single" / path.name).read_text()
+
+
+def test_stdout_keeps_unit_headers(cube_search, capsys):
+    export_stdout(POINTS[:1])
+    out = capsys.readouterr().out
+    assert "v [m/yr]" in out
+    assert "date_dt [days]" in out
@@ -0,0 +1,126 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from itslive.cli.export import export_time_series
+from itslive.velocity_cubes import export_zarr, get_time_series
+
+from .conftest import make_velocity_cube
+
+SEARCH = "itslive.velocity_cubes._cubes._search_cubes"
+
+
+@pytest.fixture
+def shifted_cubes(tmp_path):
+    """Two neighbouring cubes whose layers are 3 days apart, with extents."""
+    cubes, centres = [], []
+    for i, offset in enumerate([0, 8]):
+        ds = make_velocity_cube(seed=i, x_offset=offset)
+        ds = ds.assign_coords(mid_date=ds.mid_date + pd.Timedelta(days=3 * i))
+        path = str(tmp_path / f"cube{i}.zarr")
+        ds.chunk({"mid_date": 6, "y": 4, "x": 4}).to_zarr(path, zarr_format=2)
+        bbox = [
+            float(ds.x.min()) - 60,
+            float(ds.y.min()) - 60,
+            float(ds.x.max()) + 60,
+            float(ds.y.max()) + 60,
+        ]
+        cubes.append(
+            {"properties": {"epsg": "3413", "zarr_url": path, "proj:bbox": bbox}}
+        )
+        centres.append(ds)
+    return cubes, centres
+
+
+def _points(centres):
+    import pyproj
+
+    to_lonlat = pyproj.Transformer.from_crs("EPSG:3413", "EPSG:4326", always_xy=True)
+    left, right = centres
+    xs = [left.x[1], left.x[4], left.x[6], right.x[2], right.x[5]]
+    ys = [left.y[2], left.y[5], left.y[1], right.y[3], right.y[6]]
+    points = [to_lonlat.transform(float(x), float(y)) for x, y in zip(xs, ys)]
+    # Far outside both cubes
+    points.insert(2, to_lonlat.transform(float(left.x[0]) - 50000, float(left.y[0])))
+    return points
+
+
+class TestExportZarr:
+    def test_one_store_for_all_points(self, shifted_cubes, tmp_path):
+        cubes, centres = shifted_cubes
+        points = _points(centres)
+        store = str(tmp_path / "export.zarr")
+        with patch(SEARCH, return_value=cubes):
+            result = export_zarr(points, ["v", "vx"], store, point_chunk=2, workers=3)
+            expected = [get_time_series([p], ["vx"]) for p in points]
+
+        assert (Path(store) / ".zmetadata").exists()
+        assert result.v.dims == ("point", "mid_date")
+        assert result.v.chunks[0] == (2, 2, 2)
+        assert result.sizes["point"] == 6
+        assert result.sizes["mid_date"] == 48
+        assert result.indexes["mid_date"].is_monotonic_increasing
+        assert result.v.encoding["compressors"][0].codec_id == "zstd"
+
+        for i, found in enumerate(expected):
+            point = result.sel(point=i).dropna("mid_date", subset=["v"])
+            assert point.requested_lon == pytest.approx(points[i][0])
+            if not found:
+                assert point.sizes["mid_date"] == 0
+                assert result.epsg[i] == ""
+                continue
+            series = found[0]["time_series"]
+            np.testing.assert_array_equal(point.mid_date, series.mid_date)
+            np.testing.assert_array_equal(point.vx, series.vx)
+            np.testing.assert_array_equal(point.satellite_img1, series.satellite_img1)
+            np.testing.assert_allclose(
+                point.date_dt, series.date_dt / np.timedelta64(1, "D")
+            )
+            assert float(result.x[i]) == float(series.x)
+            assert result.epsg[i] == "3413"
+
+    def test_time_filters_and_directory_output(self, shifted_cubes, tmp_path):
+        cubes, centres = shifted_cubes
+        with patch(SEARCH, return_value=cubes):
+            result = export_zarr(
+                _points(centres)[:2],
+                outdir=str(tmp_path / "out"),
+                compression="none",
+                start="2019-01-01",
+                max_interval=48,
+            )
+        assert (tmp_path / "out" / "itslive-time-series.zarr").exists()
+        assert result.v.encoding["compressors"] == ()
+        assert (result.mid_date >= np.datetime64("2019-01-01")).all()
+        assert float(result.date_dt.max()) <= 48
+        assert result.attrs["max_interval"] == "48"
+
+    def test_no_cube_and_invalid_compression(self, tmp_path):
+        with patch(SEARCH, return_value=[]):
+            assert export_zarr([(-49.0, 69.0)], outdir=str(tmp_path)) is None
+        with pytest.raises(ValueError):
+            export_zarr([(-49.0, 69.0)], compression="lzma")
+
+
+def test_cli_dispatches_zarr():
+    with patch("itslive.velocity_cubes.export_zarr") as export:
+        export_time_series(
+            [(-49.0, 69.0)], ["v"], "zarr", "out.zarr", compression="gzip", start=None
+        )
+    export.assert_called_once_with(
+        [(-49.0, 69.0)], ["v"], "out.zarr", compression="gzip", start=None
+    )
+
+
+def test_store_opens_lazily_in_one_call(shifted_cubes, tmp_path):
+    cubes, centres = shifted_cubes
+    store = str(tmp_path / "lazy.zarr")
+    with patch(SEARCH, return_value=cubes):
+        export_zarr(_points(centres), outdir=store, point_chunk=4)
+    lazy = xr.open_zarr(store, consolidated=True)
+    assert lazy.v.chunks is not None
+    assert int(lazy.v.count()) > 0
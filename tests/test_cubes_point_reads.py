@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+import numpy as np
+import pyproj
+
+from itslive.velocity_cubes import _cubes
+from itslive.velocity_cubes._cubes import _read_points, _spatial_chunks, get_time_series
+
+from .conftest import CUBE_LAT, CUBE_LON, make_velocity_cube
+
+
+def _transect(n=10, step=0.0005):
+    return [(CUBE_LON + i * step, CUBE_LAT) for i in range(n)]
+
+
+class TestSpatialChunks:
+    def test_in_memory_dataset_reads_single_pixels(self):
+        assert _spatial_chunks(make_velocity_cube()) == (1, 1)
+
+    def test_zarr_chunks(self, velocity_cube_zarr):
+        ds = _cubes._open_cached_dataset(velocity_cube_zarr)
+        assert _spatial_chunks(ds) == (4, 4)
+
+
+class TestReadPoints:
+    def test_points_sharing_a_chunk_are_read_once(self, velocity_cube_zarr):
+        ds = _cubes._open_cached_dataset(velocity_cube_zarr)[["v", "v_error"]]
+        xs = ds.x.values[[0, 1, 2, 3, 3]]
+        ys = ds.y.values[[0, 1, 2, 3, 0]]
+        with patch.object(
+            _cubes, "_load_chunk_block", wraps=_cubes._load_chunk_block
+        ) as load:
+            series = _read_points(ds, xs, ys)
+        assert load.call_count == 1
+        assert len(series) == 5
+
+    def test_values_match_nearest_selection(self, velocity_cube_zarr):
+        ds = _cubes._open_cached_dataset(velocity_cube_zarr)[["v", "v_error"]]
+        xs = ds.x.values[[0, 5, 7]] + 30.0
+        ys = ds.y.values[[6, 1, 4]] - 30.0
+        with patch.object(
+            _cubes, "_load_chunk_block", wraps=_cubes._load_chunk_block
+        ) as load:
+            series = _read_points(ds, xs, ys)
+        assert load.call_count == 3
+        for x, y, ts in zip(xs, ys, series):
+            expected = ds.sel(x=x, y=y, method="nearest")
+            np.testing.assert_array_equal(ts.v.values, expected.v.values)
+            assert ts.x.values == expected.x.values
+            assert ts.y.values == expected.y.values
+
+
+class TestGetTimeSeriesScheduling:
+    def test_transect_costs_one_read_per_chunk(self, velocity_cube_zarr):
+        cube = [{"properties": {"epsg": "3413", "zarr_url": velocity_cube_zarr}}]
+        points = _transect()
+        transformer = pyproj.Transformer.from_crs(
+            "EPSG:4326", "EPSG:3413", always_xy=True
+        )
+        ds = _cubes._open_cached_dataset(velocity_cube_zarr)
+        cols = {
+            int(
+                ds.indexes["x"].get_indexer([transformer.transform(*p)[0]], "nearest")[
+                    0
+                ]
+            )
+            // 4
+            for p in points
+        }
+        with (
+            patch("itslive.velocity_cubes._cubes._search_cubes", return_value=cube),
+            patch.object(
+                _cubes, "_load_chunk_block", wraps=_cubes._load_chunk_block
+            ) as load,
+        ):
+            result = get_time_series(points)
+
+        assert len(result) == len(points)
+        assert load.call_count == len(cols) < len(points)
+        assert [r["requested_point_geographic_coordinates"] for r in result] == points
+        assert result[0]["time_series"].attrs["projection"] == "3413"
@@ -0,0 +1,67 @@
+import numpy as np
+import pyproj
+import pytest
+import xarray as xr
+
+from itslive.velocity_cubes import get_profile_time_series
+
+TO_LONLAT = pyproj.Transformer.from_crs("EPSG:3413", "EPSG:4326", always_xy=True)
+
+
+def _line_across(two_cubes, overshoot=0.0):
+    """A west-east line along one pixel row, from the left into the right cube."""
+    left = xr.open_zarr(two_cubes[0])
+    right = xr.open_zarr(two_cubes[1])
+    y = float(left.y[3])
+    x0, x1 = float(left.x[1]), float(right.x[5]) + overshoot
+    lon, lat = TO_LONLAT.transform([x0, x1], [y, y])
+    return list(zip(lon, lat)), left, right, x0, y
+
+
+class TestProfileTimeSeries:
+    def test_crosses_cube_boundary(self, two_cubes):
+        line, left, right, x0, y = _line_across(two_cubes)
+        profile = get_profile_time_series(line, spacing=120)
+
+        assert profile.v.dims == ("distance", "mid_date")
+        assert profile.distance.values[0] == 0
+        np.testing.assert_allclose(np.diff(profile.distance.values)[:-1], 120)
+        assert set(profile.epsg.values) == {"3413"}
+        assert {"lon", "lat", "x", "y"} <= set(profile.coords)
+
+        # Each sample holds the series of the pixel it falls in, from the
+        # cube that contains it.
+        for i in [0, 5, 8, 12]:
+            x = float(profile.x[i])
+            source = left if x <= float(left.x.max()) else right
+            expected = source.v.sel(x=x, y=float(profile.y[i]))
+            np.testing.assert_array_equal(profile.v[i].values, expected.values)
+        assert float(profile.x[-1]) == float(right.x[5])
+
+    def test_samples_outside_cubes_are_nan(self, two_cubes):
+        line, *_ = _line_across(two_cubes, overshoot=1200)
+        profile = get_profile_time_series(line, spacing=240)
+        assert profile.v.isel(distance=-1).isnull().all()
+        assert profile.v.isel(distance=0).notnull().all()
+
+    def test_dense_spacing_reuses_pixels(self, two_cubes):
+        line, *_ = _line_across(two_cubes)
+        profile = get_profile_time_series(line, spacing=30)
+        assert profile.sizes["distance"] == 49
+        assert len(np.unique(profile.x.values)) == 13
+
+    def test_time_filters_and_layer_metadata(self, two_cubes):
+        line, *_ = _line_across(two_cubes)
+        profile = get_profile_time_series(
+            line, variables=["v", "vx"], start="2019-01-01", max_interval=48
+        )
+        assert profile.sizes["mid_date"] == 8
+        assert "vx" in profile
+        assert (profile.date_dt / np.timedelta64(1, "D") <= 48).all()
+        assert profile.satellite_img1.dims == ("mid_date",)
+
+    def test_rejects_non_lines(self, two_cubes):
+        with pytest.raises(ValueError):
+            get_profile_time_series({"type": "Point", "coordinates": [-49, 69]})
+        with pytest.raises(ValueError):
+            get_profile_time_series([(-49, 69), (-48.9, 69)], spacing=0)
@@ -0,0 +1,126 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pyproj
+from shapely.geometry import box, mapping
+
+from itslive.velocity_cubes import get_time_series
+from itslive.velocity_cubes._cubes import _search_cubes, _select_point_cubes
+
+from .conftest import CUBE_LAT, CUBE_LON, make_velocity_cube
+
+TO_LONLAT_3413 = pyproj.Transformer.from_crs("EPSG:3413", "EPSG:4326", always_xy=True)
+TO_UTM = pyproj.Transformer.from_crs("EPSG:3413", "EPSG:32622", always_xy=True)
+
+X0, Y0 = -200000.0, -2200000.0
+
+
+def _cube(name, epsg="3413", bbox=None, footprint=None):
+    return {
+        "properties": {
+            "epsg": epsg,
+            "zarr_url": name,
+            "proj:bbox": bbox,
+            "footprint": footprint,
+        }
+    }
+
+
+def _point_3413(x, y):
+    return TO_LONLAT_3413.transform(x, y)
+
+
+class TestSelectPointCubes:
+    def test_picks_the_cube_containing_the_point(self):
+        west = _cube("west", bbox=[X0 - 100000, Y0, X0, Y0 + 100000])
+        east = _cube("east", bbox=[X0, Y0, X0 + 100000, Y0 + 100000])
+        points = [_point_3413(X0 - 500, Y0 + 50000), _point_3413(X0 + 500, Y0 + 50000)]
+        # The catalog order puts the wrong cube first for the second point
+        selected = _select_point_cubes(points, [west, east])
+        assert [s[0]["properties"]["zarr_url"] for s in selected] == ["west", "east"]
+
+    def test_prefers_most_interior_cube_across_projections(self):
+        point = _point_3413(X0 + 1000, Y0 + 50000)
+        ux, uy = TO_UTM.transform(X0 + 1000, Y0 + 50000)
+        edge = _cube("polar", bbox=[X0, Y0, X0 + 100000, Y0 + 100000])
+        centre = _cube(
+            "utm", epsg="32622", bbox=[ux - 50000, uy - 50000, ux + 50000, uy + 50000]
+        )
+        assert _select_point_cubes([point], [edge, centre])[0][0] is centre
+        merged = _select_point_cubes([point], [edge, centre], merge=True)[0]
+        assert merged == [centre, edge]
+
+    def test_footprint_and_unknown_extent(self):
+        footprint = mapping(box(CUBE_LON - 1, CUBE_LAT - 1, CUBE_LON + 1, CUBE_LAT + 1))
+        known = _cube("known", footprint=footprint)
+        unknown = _cube("unknown")
+        inside = (CUBE_LON + 0.5, CUBE_LAT)
+        outside = (CUBE_LON + 3, CUBE_LAT)
+        selected = _select_point_cubes([inside, outside], [unknown, known], merge=True)
+        assert selected[0] == [known, unknown]
+        assert selected[1] == [unknown]
+
+    def test_points_outside_every_cube(self):
+        cube = _cube("only", bbox=[X0, Y0, X0 + 1000, Y0 + 1000])
+        assert _select_point_cubes([_point_3413(X0 - 5000, Y0)], [cube]) == [[]]
+
+
+def test_search_cubes_keeps_extent():
+    item = MagicMock()
+    item.properties = {"proj:code": "EPSG:3413", "proj:bbox": [0, 0, 1, 1]}
+    item.geometry = mapping(box(0, 0, 1, 1))
+    asset = MagicMock()
+    asset.roles = ["data"]
+    asset.href = "https://example.com/cube.zarr"
+    item.assets = {"data": asset}
+    client = MagicMock()
+    client.search.return_value.items.return_value = [item]
+    with patch(
+        "itslive.velocity_cubes._cubes.pystac_client.Client.open", return_value=client
+    ):
+        geom = mapping(box(0, 0, 1, 1))
+        properties = _search_cubes(geom, geom)[0]["properties"]
+    assert properties["proj:bbox"] == [0, 0, 1, 1]
+    assert properties["footprint"]["type"] == "Polygon"
+
+
+class TestSeamAwareTimeSeries:
+    def test_one_search_for_all_points_and_skips_outside(self, velocity_cube_zarr):
+        ds = make_velocity_cube()
+        bbox = [
+            float(ds.x.min()) - 60,
+            float(ds.y.min()) - 60,
+            float(ds.x.max()) + 60,
+            float(ds.y.max()) + 60,
+        ]
+        cube = [_cube(velocity_cube_zarr, bbox=bbox)]
+        points = [(CUBE_LON, CUBE_LAT), (CUBE_LON + 0.001, CUBE_LAT), (CUBE_LON, 75.0)]
+        with patch(
+            "itslive.velocity_cubes._cubes._search_cubes", return_value=cube
+        ) as search:
+            results = get_time_series(points)
+        assert search.call_count == 1
+        assert search.call_args.args[0]["type"] == "MultiPoint"
+        assert len(results) == 2
+
+    def test_merge_overlapping_cubes(self, tmp_path):
+        paths = []
+        for i, shift in enumerate([0, 3]):
+            ds = make_velocity_cube(seed=i)
+            ds = ds.assign_coords(mid_date=ds.mid_date + pd.Timedelta(days=shift))
+            paths.append(str(tmp_path / f"cube{i}.zarr"))
+            ds.to_zarr(paths[-1], zarr_format=2)
+        cubes = [_cube(path) for path in paths]
+
+        with patch("itslive.velocity_cubes._cubes._search_cubes", return_value=cubes):
+            single = get_time_series([(CUBE_LON, CUBE_LAT)])[0]
+            merged = get_time_series([(CUBE_LON, CUBE_LAT)], merge_cubes=True)[0]
+
+        series = merged["time_series"]
+        assert single["time_series"].sizes["mid_date"] == 24
+        assert series.sizes["mid_date"] == 48
+        assert series.indexes["mid_date"].is_monotonic_increasing
+        assert len(merged["cubes"]) == 2
+        first = series.sel(mid_date=single["time_series"].mid_date)
+        np.testing.assert_array_equal(first.v.values, single["time_series"].v.values)
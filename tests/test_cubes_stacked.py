@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+import numpy as np
+import pyarrow as pa
+import xarray as xr
+
+from itslive.velocity_cubes import (
+    get_time_series,
+    stack_time_series,
+    time_series_to_arrow,
+)
+
+from .conftest import CUBE_LAT, CUBE_LON
+
+POINTS = [(CUBE_LON, CUBE_LAT), (CUBE_LON + 0.002, CUBE_LAT + 0.001)]
+
+
+def _results(velocity_cube_zarr, **kwargs):
+    cube = [{"properties": {"epsg": "3413", "zarr_url": velocity_cube_zarr}}]
+    with patch("itslive.velocity_cubes._cubes._search_cubes", return_value=cube):
+        return get_time_series(POINTS, **kwargs)
+
+
+def _point(ds, lon, lat, dates):
+    return {
+        "requested_point_geographic_coordinates": (lon, lat),
+        "returned_point_geographic_coordinates": (lon, lat),
+        "returned_point_projected_coordinates": {
+            "epsg": "3413",
+            "coords": (ds.x.values, ds.y.values),
+        },
+        "returned_point_offset_from_requested_in_projection_meters": np.float64(5.0),
+        "time_series": ds.sel(mid_date=dates),
+    }
+
+
+class TestStackedTimeSeries:
+    def test_as_dataset_matches_list_results(self, velocity_cube_zarr):
+        results = _results(velocity_cube_zarr)
+        stacked = _results(velocity_cube_zarr, as_dataset=True)
+
+        assert stacked.v.dims == ("point", "mid_date")
+        assert stacked.sizes["point"] == 2
+        for i, result in enumerate(results):
+            series = result["time_series"]
+            np.testing.assert_array_equal(stacked.v[i].values, series.v.values)
+            assert stacked.x[i] == series.x
+            assert stacked.lon[i] == result["returned_point_geographic_coordinates"][0]
+            assert stacked.requested_lat[i] == POINTS[i][1]
+        assert list(stacked.epsg.values) == ["3413", "3413"]
+        assert (stacked.offset_m >= 0).all()
+
+    def test_points_from_cubes_with_different_layers(self, velocity_cube_zarr):
+        cube = xr.open_zarr(velocity_cube_zarr).isel(y=0, x=0).load()
+        dates = cube.mid_date.values
+        stacked = stack_time_series(
+            [_point(cube, 1.0, 2.0, dates[:10]), _point(cube, 3.0, 4.0, dates[5:])]
+        )
+        assert stacked.sizes["mid_date"] == 24
+        assert stacked.v[0, 10:].isnull().all()
+        assert stacked.v[1, :5].isnull().all()
+        np.testing.assert_array_equal(stacked.v[1, 5:].values, cube.v[5:].values)
+
+        table = time_series_to_arrow(stacked, ["v", "satellite_img1"])
+        assert table.num_rows == 48
+        assert table.column("satellite_img1").null_count == 14 + 5
+
+        dropped = time_series_to_arrow(stacked, ["v"], dropna=True)
+        assert dropped.num_rows == 10 + 19
+
+    def test_arrow_is_long_format_without_copies(self, velocity_cube_zarr):
+        stacked = _results(velocity_cube_zarr, as_dataset=True)
+        table = time_series_to_arrow(stacked)
+
+        assert isinstance(table, pa.Table)
+        assert table.num_rows == 2 * 24
+        assert table.column_names[:5] == ["point_id", "mid_date", "lon", "lat", "epsg"]
+        assert {"v", "v_error", "date_dt", "mission_img1"} <= set(table.column_names)
+        np.testing.assert_array_equal(
+            table.column("v").to_numpy(), stacked.v.values.ravel()
+        )
+        assert table.column("date_dt").type == pa.float64()
+
+        df = table.to_pandas()
+        assert df.groupby("point_id").size().tolist() == [24, 24]
+
+    def test_empty(self):
+        assert len(stack_time_series([]).data_vars) == 0
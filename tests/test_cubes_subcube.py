@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from itslive.velocity_cubes import get_subcube
+
+from .conftest import CUBE_LAT, CUBE_LON
+
+WIDE_BBOX = [CUBE_LON - 0.05, CUBE_LAT - 0.02, CUBE_LON + 0.05, CUBE_LAT + 0.02]
+
+
+def _geotransform(ds):
+    return [float(v) for v in ds["mapping"].attrs["GeoTransform"].split()]
+
+
+class TestGetSubcube:
+    def test_mosaic_spans_both_cubes(self, two_cubes):
+        mosaic = get_subcube(bbox=WIDE_BBOX, variables=["v"])
+        assert mosaic.sizes["x"] == 16
+        assert mosaic.sizes["y"] == 8
+        assert mosaic.indexes["y"].is_monotonic_decreasing
+        left = xr.open_zarr(two_cubes[0])
+        np.testing.assert_array_equal(
+            mosaic.v.sel(x=left.x).values, left.v.transpose(*mosaic.v.dims).values
+        )
+        gt = _geotransform(mosaic)
+        assert gt[0] == float(mosaic.x.min()) - 60.0
+        assert gt[3] == float(mosaic.y.max()) + 60.0
+
+    def test_per_cube_pieces_get_their_own_geotransform(self, two_cubes):
+        pieces = get_subcube(bbox=WIDE_BBOX, mosaic=False)
+        assert len(pieces) == 2
+        for piece in pieces:
+            assert _geotransform(piece)[0] == float(piece.x.min()) - 60.0
+
+    def test_small_window_is_clipped(self, two_cubes):
+        bbox = [CUBE_LON - 0.002, CUBE_LAT - 0.001, CUBE_LON + 0.002, CUBE_LAT + 0.001]
+        pieces = get_subcube(bbox=bbox, mosaic=False)
+        assert len(pieces) == 1
+        assert pieces[0].sizes["x"] < 8
+        assert pieces[0].attrs["url"] == two_cubes[0]
+
+    def test_time_window(self, two_cubes):
+        mosaic = get_subcube(bbox=WIDE_BBOX, start="2019-01-01", end="2019-06-30")
+        assert mosaic.sizes["mid_date"] == 6
+
+    def test_streams_to_zarr_in_time_blocks(self, two_cubes, tmp_path):
+        expected = get_subcube(bbox=WIDE_BBOX, variables=["v"])
+        out = str(tmp_path / "subcube.zarr")
+        with patch.object(
+            xr.Dataset, "to_zarr", autospec=True, side_effect=xr.Dataset.to_zarr
+        ) as to_zarr:
+            streamed = get_subcube(
+                bbox=WIDE_BBOX, variables=["v"], outpath=out, time_block=5
+            )
+        assert to_zarr.call_count == 5
+        xr.testing.assert_allclose(
+            streamed.v.load(), expected.v.transpose(*streamed.v.dims)
+        )
+        assert _geotransform(streamed) == _geotransform(expected)
+
+    def test_streams_per_cube_groups(self, two_cubes, tmp_path):
+        out = str(tmp_path / "pieces.zarr")
+        pieces = get_subcube(bbox=WIDE_BBOX, mosaic=False, outpath=out, time_block=7)
+        assert len(pieces) == 2
+        assert all(p.sizes["mid_date"] == 24 for p in pieces)
+
+    def test_requires_a_region(self):
+        with pytest.raises(ValueError):
+            get_subcube()
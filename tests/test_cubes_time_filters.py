@@ -0,0 +1,111 @@
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from itslive.velocity_cubes._cubes import (
+    _cached_time_index,
+    _select_time_indices,
+    get_annual_time_series,
+    get_time_series,
+    timeseriesException,
+)
+
+from .conftest import CUBE_LAT, CUBE_LON, make_velocity_cube
+
+
+def _time_index():
+    ds = make_velocity_cube()
+    return {
+        "time": ds.mid_date.values,
+        "date_dt": ds.date_dt.values,
+        "satellite_img1": ds.satellite_img1.values,
+        "mission_img1": ds.mission_img1.values,
+    }
+
+
+class TestSelectTimeIndices:
+    def test_no_filters_returns_none(self):
+        assert _select_time_indices(_time_index()) is None
+
+    def test_start_end_inclusive(self):
+        index = _time_index()
+        idx = _select_time_indices(index, start="2018-03-15", end="2018-05-15")
+        assert pd.DatetimeIndex(index["time"][idx]).month.tolist() == [3, 4, 5]
+
+    def test_interval_range(self):
+        index = _time_index()
+        idx = _select_time_indices(index, min_interval=12, max_interval=48)
+        days = index["date_dt"][idx] / np.timedelta64(1, "D")
+        assert set(days) == {12, 24, 48}
+
+    def test_mission_alias_matches_satellite_codes(self):
+        index = _time_index()
+        idx = _select_time_indices(index, mission="landsatOLI")
+        assert set(index["satellite_img1"][idx]) == {"8", "9"}
+
+    def test_mission_name_matches_mission_variable(self):
+        index = _time_index()
+        idx = _select_time_indices(index, mission=["s2"])
+        assert set(index["mission_img1"][idx]) == {"S2"}
+
+    def test_satellite_prefix(self):
+        index = _time_index()
+        idx = _select_time_indices(index, satellite=["1", "9"])
+        assert set(index["satellite_img1"][idx]) == {"1A", "9"}
+
+    def test_interval_without_date_dt_raises(self):
+        index = {"time": _time_index()["time"]}
+        with pytest.raises(timeseriesException):
+            _select_time_indices(index, min_interval=10)
+
+
+class TestGetTimeSeriesFilters:
+    def _cube(self, velocity_cube_zarr):
+        return [{"properties": {"epsg": "3413", "zarr_url": velocity_cube_zarr}}]
+
+    def test_filters_are_applied_before_point_selection(self, velocity_cube_zarr):
+        with patch(
+            "itslive.velocity_cubes._cubes._search_cubes",
+            return_value=self._cube(velocity_cube_zarr),
+        ):
+            full = get_time_series([(CUBE_LON, CUBE_LAT)])[0]["time_series"]
+            subset = get_time_series(
+                [(CUBE_LON, CUBE_LAT)],
+                start="2019-01-01",
+                mission="sentinel1",
+            )[0]["time_series"]
+
+        assert full.sizes["mid_date"] == 24
+        assert subset.sizes["mid_date"] == 3
+        assert (subset.mid_date.values >= np.datetime64("2019-01-01")).all()
+        assert set(subset.satellite_img1.values) == {"1A"}
+        expected = full.sel(mid_date=subset.mid_date)
+        np.testing.assert_array_equal(subset.v.values, expected.v.values)
+
+    def test_time_index_is_cached_per_cube(self, velocity_cube_zarr):
+        _cached_time_index.cache_clear()
+        with patch(
+            "itslive.velocity_cubes._cubes._search_cubes",
+            return_value=self._cube(velocity_cube_zarr),
+        ):
+            get_time_series([(CUBE_LON, CUBE_LAT)], max_interval=24)
+            get_time_series([(CUBE_LON, CUBE_LAT)], min_interval=24)
+        assert _cached_time_index.cache_info().hits == 1
+
+    def test_annual_start_end(self, velocity_cube_zarr):
+        cube = [
+            {"properties": {"epsg": "3413", "composite_zarr_url": velocity_cube_zarr}}
+        ]
+        with (
+            patch("itslive.velocity_cubes._cubes._search_cubes", return_value=cube),
+            patch(
+                "itslive.velocity_cubes._cubes._merge_default_composite_variables",
+                return_value=["v"],
+            ),
+        ):
+            result = get_annual_time_series(
+                [(CUBE_LON, CUBE_LAT)], start="2019-06-01", end="2019-08-31"
+            )
+        assert result[0]["time_series"].sizes["mid_date"] == 3
@@ -20,6 +20,11 @@ def test_imports():
         "get_time_series",
         "export_parquet",
         "export_csv",
+        "export_zarr",
+        "get_subcube",
+        "get_profile_time_series",
+        "get_area_time_series",
+        "stack_time_series",
     ]
     from itslive import velocity_cubes
 
@@ -57,10 +62,10 @@ def test_export_parquet_creates_file():
 
     with tempfile.TemporaryDirectory() as tmpdir:
         with patch(
-            "itslive.velocity_cubes._cubes.get_time_series", return_value=[mock_result]
+            "itslive.velocity_cubes._export.get_time_series", return_value=[mock_result]
         ):
             with patch(
-                "itslive.velocity_cubes._cubes.track", side_effect=lambda x, **kw: x
+                "itslive.velocity_cubes._export.track", side_effect=lambda x, **kw: x
             ):
                 cubes.export_parquet([(-49.09, 70.0)], variables=["v"], outdir=tmpdir)
 
@@ -10,7 +10,7 @@ base_url = "https://nsidc.org/apps/itslive-search/velocities/urls/"
 
 
 def test_imports():
-    functions = ["find", "coverage", "download"]
+    functions = ["find", "coverage", "count", "download"]
     from itslive import velocity_pairs
 
     assert velocity_pairs
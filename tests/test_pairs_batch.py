@@ -0,0 +1,234 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+from click.testing import CliRunner
+from shapely.geometry import box, mapping
+
+from itslive.cli.search import search
+from itslive.search import serverless_batch_search
+from itslive.velocity_pairs import find_batch
+from itslive.velocity_pairs._pairs import _load_rois
+
+ROIS = [
+    ("west", mapping(box(-50, 65, -48, 67))),
+    ("east", mapping(box(-47, 65, -45, 67))),
+]
+
+
+def _feature_collection():
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": {"id": roi_id}, "geometry": geometry}
+            for roi_id, geometry in ROIS
+        ],
+    }
+
+
+def _mock_item(href, geom):
+    item = MagicMock()
+    item.geometry = mapping(geom)
+    asset = MagicMock()
+    asset.roles = ["data"]
+    asset.href = href
+    item.assets = {"data": asset}
+    return item
+
+
+def _items():
+    return [
+        ("https://s3/west.nc", box(-49.5, 65.5, -49, 66)),
+        ("https://s3/both.nc", box(-48.5, 65.5, -46.5, 66)),
+        ("https://s3/none.nc", box(-40, 65.5, -39, 66)),
+    ]
+
+
+class TestLoadRois:
+    def test_feature_collection(self):
+        assert _load_rois(_feature_collection()) == ROIS
+
+    def test_missing_id_property_uses_position(self):
+        assert [r[0] for r in _load_rois(_feature_collection(), "rgi_id")] == [
+            "0",
+            "1",
+        ]
+
+    def test_geojson_file(self, tmp_path):
+        path = tmp_path / "rois.geojson"
+        path.write_text(json.dumps(_feature_collection()))
+        rois = _load_rois(str(path))
+        assert [r[0] for r in rois] == ["west", "east"]
+        assert shapely.geometry.shape(rois[1][1]).equals(box(-47, 65, -45, 67))
+
+    def test_geoparquet_file(self, tmp_path):
+        path = tmp_path / "rois.parquet"
+        table = pa.table(
+            {
+                "id": [roi_id for roi_id, _ in ROIS],
+                "geometry": [shapely.to_wkb(box(-50, 65, -48, 67)) for _ in ROIS],
+            }
+        ).replace_schema_metadata(
+            {b"geo": json.dumps({"primary_column": "geometry"}).encode()}
+        )
+        pq.write_table(table, path)
+        rois = _load_rois(str(path))
+        assert [r[0] for r in rois] == ["west", "east"]
+        assert shapely.geometry.shape(rois[0][1]).equals(box(-50, 65, -48, 67))
+
+
+class TestServerlessBatchSearch:
+    @patch("pystac_client.Client.open")
+    def test_stac_single_search_joined_to_rois(self, mock_open):
+        client = MagicMock()
+        client.search.return_value.items.return_value = [
+            _mock_item(href, geom) for href, geom in _items()
+        ]
+        mock_open.return_value = client
+
+        pairs = list(
+            serverless_batch_search(
+                ROIS,
+                "2020-01-01",
+                "2020-12-31",
+                base_catalog_href="https://stac.itslive.cloud",
+                engine="stac",
+                batch_size=2,
+            )
+        )
+
+        assert client.search.call_count == 1
+        sent = shapely.geometry.shape(client.search.call_args[1]["intersects"])
+        assert sent.covers(box(-50, 65, -45, 67).difference(box(-48, 65, -47, 67)))
+        assert sorted(pairs) == [
+            ("east", "https://s3/both.nc"),
+            ("west", "https://s3/both.nc"),
+            ("west", "https://s3/west.nc"),
+        ]
+
+    @patch("itslive.search.path_exists", return_value=True)
+    def test_duckdb_scans_each_prefix_once(self, mock_path_exists):
+        con = MagicMock()
+        con.execute.return_value.df.return_value = pd.DataFrame(
+            {
+                "data_href": [href for href, _ in _items()],
+                "wkb": [shapely.to_wkb(geom) for _, geom in _items()],
+            }
+        )
+        with patch("duckdb.connect", return_value=con):
+            pairs = list(
+                serverless_batch_search(
+                    ROIS,
+                    "2020-01-01",
+                    "2020-12-31",
+                    base_catalog_href="s3://bucket/h3r1",
+                    engine="duckdb",
+                    use_manifest=False,
+                    extra_cql2_exprs=[
+                        {
+                            "op": "and",
+                            "args": [
+                                {"op": ">=", "args": [{"property": "date_dt"}, 6]},
+                                {"op": "<=", "args": [{"property": "date_dt"}, 48]},
+                            ],
+                        }
+                    ],
+                )
+            )
+
+        calls = [c for c in con.execute.call_args_list if "SELECT" in c.args[0]]
+        queries = [c.args[0] for c in calls]
+        assert len(queries) == len(set(queries))
+        assert "ST_AsWKB(geometry) AS wkb" in queries[0]
+        # Filter values are bound as parameters, not spliced into the SQL
+        assert "date_dt >= ? AND date_dt <= ?" in queries[0]
+        assert calls[0].args[1][-2:] == [6, 48]
+        # Pairs are deduplicated across prefixes.
+        assert sorted(pairs) == [
+            ("east", "https://s3/both.nc"),
+            ("west", "https://s3/both.nc"),
+            ("west", "https://s3/west.nc"),
+        ]
+
+    def test_empty_rois(self):
+        assert list(serverless_batch_search([], "2020-01-01", "2020-12-31")) == []
+
+
+class TestFindBatch:
+    @patch("pystac_client.Client.open")
+    def test_yields_roi_pairs(self, mock_open):
+        client = MagicMock()
+        client.search.return_value.items.return_value = [
+            _mock_item(href, geom) for href, geom in _items()
+        ]
+        mock_open.return_value = client
+
+        pairs = list(find_batch(_feature_collection(), mission="sentinel2"))
+
+        assert ("west", "https://s3/west.nc") in pairs
+        assert len(pairs) == 3
+        cql2 = client.search.call_args[1]["filter"]
+        sentinel2 = [
+            {"op": "=", "args": [{"property": "platform"}, platform]}
+            for platform in ("S2A", "S2B", "S2C")
+        ]
+        assert {"op": "or", "args": sentinel2} in cql2["args"]
+
+    @patch("pystac_client.Client.open")
+    def test_cli_outputs_roi_id_url_rows(self, mock_open, tmp_path):
+        client = MagicMock()
+        client.search.return_value.items.return_value = [
+            _mock_item(href, geom) for href, geom in _items()
+        ]
+        mock_open.return_value = client
+        path = tmp_path / "rois.geojson"
+        path.write_text(json.dumps(_feature_collection()))
+
+        result = CliRunner().invoke(search, ["--rois", str(path)])
+
+        assert result.exit_code == 0, result.output
+        lines = [line for line in result.output.splitlines() if "," in line]
+        assert lines[0] == "roi_id,url"
+        assert "west,https://s3/west.nc" in lines
+
+    @patch("pystac_client.Client.open")
+    def test_cli_outputs_properties(self, mock_open, tmp_path):
+        items = []
+        for href, geom in _items():
+            item = _mock_item(href, geom)
+            item.properties = {"platform": "S2A"}
+            item.bbox = list(geom.bounds)
+            items.append(item)
+        client = MagicMock()
+        client.search.return_value.items.return_value = items
+        mock_open.return_value = client
+        path = tmp_path / "rois.geojson"
+        path.write_text(json.dumps(_feature_collection()))
+
+        args = ["--rois", str(path), "--properties", "platform,bbox"]
+        result = CliRunner().invoke(search, [*args, "--format", "ndjson"])
+        assert result.exit_code == 0, result.output
+        lines = result.output.splitlines()
+        records = [json.loads(line) for line in lines if line.startswith("{")]
+        assert {
+            "roi_id": "west",
+            "url": "https://s3/west.nc",
+            "platform": "S2A",
+            "bbox": [-49.5, 65.5, -49.0, 66.0],
+        } in records
+
+        result = CliRunner().invoke(search, args)
+        lines = [line for line in result.output.splitlines() if "," in line]
+        assert lines[0] == "roi_id,url,platform,bbox"
+        assert 'west,https://s3/west.nc,S2A,"[-49.5, 65.5, -49.0, 66.0]"' in lines
+
+    def test_cli_rois_and_bbox_are_exclusive(self, tmp_path):
+        path = tmp_path / "rois.geojson"
+        path.write_text(json.dumps(_feature_collection()))
+        result = CliRunner().invoke(
+            search, ["--rois", str(path), "--bbox", "-50,65,-40,75"]
+        )
+        assert result.exit_code != 0
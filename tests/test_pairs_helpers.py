@@ -1,11 +1,41 @@
-from itslive.velocity_pairs._pairs import coverage
+from unittest.mock import patch
+
+import pytest
+
+from itslive.velocity_pairs._pairs import (
+    _MISSION_PLATFORMS,
+    _mission_cql2,
+    _platform_mission,
+    coverage,
+)
 
 
 class TestCoverage:
-    def test_returns_empty_list(self):
-        result = coverage(bbox=[-50, 65, -40, 75], polygon=None)
+    def test_returns_empty_list_without_granules(self):
+        with patch("pystac_client.Client.open") as mock_open:
+            mock_open.return_value.search.return_value.items.return_value = []
+            result = coverage(bbox=[-50, 65, -40, 75], polygon=None)
         assert result == []
 
+    def test_needs_an_area(self):
+        with pytest.raises(ValueError):
+            coverage()
+
+
+class TestMissions:
+    def test_platforms_map_back_to_their_mission(self):
+        for mission, platforms in _MISSION_PLATFORMS.items():
+            for platform in platforms:
+                assert _platform_mission(platform) == mission
+        assert _platform_mission("X9") == "X9"
+
+    def test_mission_expression(self):
+        assert _mission_cql2("LANDSATETM") == {
+            "op": "=",
+            "args": [{"property": "platform"}, "L7"],
+        }
+        assert _mission_cql2("nope") is None
+
 
 class TestFindStreamingGeometry:
     """Indirect tests via _pairs internal logic."""
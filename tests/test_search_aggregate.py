@@ -0,0 +1,155 @@
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+from click.testing import CliRunner
+
+from itslive.cli.search import search
+from itslive.engines._base import _date_buckets
+from itslive.search import serverless_aggregate
+from itslive.velocity_pairs import count, coverage
+
+ROI = {
+    "type": "Polygon",
+    "coordinates": [[[-46, 69], [-44, 69], [-44, 71], [-46, 71], [-46, 69]]],
+}
+
+
+def _item(platform, datetime):
+    item = MagicMock()
+    item.properties = {"datetime": datetime, "platform": platform}
+    asset = MagicMock()
+    asset.roles = ["data"]
+    asset.href = f"https://s3/{platform}_{datetime}.nc"
+    item.assets = {"data": asset}
+    return item
+
+
+ITEMS = [
+    _item("S1A", "2019-05-01T00:00:00Z"),
+    _item("S1B", "2019-06-01T00:00:00Z"),
+    _item("L8", "2020-01-01T00:00:00Z"),
+    _item("L8", "2020-02-01T00:00:00Z"),
+]
+
+
+def _client(items=(), matched=None):
+    client = MagicMock()
+    client.search.return_value.items.return_value = list(items)
+    client.search.return_value.matched.side_effect = matched
+    return client
+
+
+def test_date_buckets_are_clipped():
+    assert _date_buckets("2019-06-15", "2021-02-01", ("year",)) == [
+        ((2019,), "2019-06-15T00:00:00Z/2019-12-31T23:59:59Z"),
+        ((2020,), "2020-01-01T00:00:00Z/2020-12-31T23:59:59Z"),
+        ((2021,), "2021-01-01T00:00:00Z/2021-02-01T23:59:59Z"),
+    ]
+    months = _date_buckets("2020-11-20", "2021-01-10", ("year", "month"))
+    assert [key for key, _ in months] == [(2020, 11), (2020, 12), (2021, 1)]
+    assert _date_buckets("2020-01-01", "2020-12-31", ()) == [
+        ((), "2020-01-01T00:00:00Z/2020-12-31T23:59:59Z")
+    ]
+
+
+class TestStac:
+    def _aggregate(self, client, group_by):
+        with patch("pystac_client.Client.open", return_value=client):
+            return serverless_aggregate(
+                start_date="2019-01-01",
+                end_date="2021-12-31",
+                roi=ROI,
+                base_catalog_href="https://stac.itslive.cloud",
+                engine="stac",
+                group_by=group_by,
+            )
+
+    def test_matched_per_year(self):
+        client = _client(matched=[10, 0, 7])
+        rows = self._aggregate(client, ("year",))
+        assert rows == [{"year": 2019, "count": 10}, {"year": 2021, "count": 7}]
+        intervals = [c.kwargs["datetime"] for c in client.search.call_args_list]
+        assert intervals[0] == "2019-01-01T00:00:00Z/2019-12-31T23:59:59Z"
+        client.search.return_value.items.assert_not_called()
+
+    def test_items_counted_without_matched(self):
+        client = _client(ITEMS, matched=[None])
+        assert self._aggregate(client, ("year",)) == [
+            {"year": 2019, "count": 2},
+            {"year": 2020, "count": 2},
+        ]
+
+    def test_property_groups_are_enumerated(self):
+        client = _client(ITEMS)
+        assert self._aggregate(client, ("platform",)) == [
+            {"platform": "L8", "count": 2},
+            {"platform": "S1A", "count": 1},
+            {"platform": "S1B", "count": 1},
+        ]
+        client.search.return_value.matched.assert_not_called()
+
+    def test_total_without_matches(self):
+        assert self._aggregate(_client(matched=[0]), ()) == [{"count": 0}]
+
+
+@patch("itslive.search.path_exists", return_value=True)
+def test_duckdb_group_by_sums_partitions(mock_path_exists):
+    con = MagicMock()
+    con.execute.return_value.df.side_effect = [
+        pd.DataFrame({"g0": [2019, 2020], "g1": ["S1A", "L8"], "count": [3, 1]}),
+        pd.DataFrame({"g0": [2020], "g1": ["L8"], "count": [2]}),
+    ]
+    with (
+        patch("duckdb.connect", return_value=con),
+        patch(
+            "itslive.search.get_overlapping_grid_names",
+            return_value=["s3://bucket/a/*.parquet", "s3://bucket/b/*.parquet"],
+        ),
+    ):
+        rows = serverless_aggregate(
+            start_date="2019-01-01",
+            end_date="2020-12-31",
+            roi=ROI,
+            base_catalog_href="s3://bucket/h3r1",
+            engine="duckdb",
+            use_manifest=False,
+        )
+    assert rows == [
+        {"year": 2019, "platform": "S1A", "count": 3},
+        {"year": 2020, "platform": "L8", "count": 3},
+    ]
+    queries = [c.args[0] for c in con.execute.call_args_list if "SELECT" in c.args[0]]
+    assert len(queries) == 2
+    assert 'year(datetime) AS "g0", "platform" AS "g1", COUNT(*)' in queries[0]
+    assert "GROUP BY ALL" in queries[0]
+    assert "wkb" not in queries[0]
+
+
+@patch("pystac_client.Client.open")
+def test_coverage_by_year_and_mission(mock_open):
+    mock_open.return_value = _client(ITEMS)
+    rows = coverage(bbox=[-50, 65, -40, 75], polygon=None, start="2019-01-01")
+    assert rows == [
+        {"year": 2019, "mission": "sentinel1", "platform": "S1A", "count": 1},
+        {"year": 2019, "mission": "sentinel1", "platform": "S1B", "count": 1},
+        {"year": 2020, "mission": "landsatOLI", "platform": "L8", "count": 2},
+    ]
+
+
+@patch("pystac_client.Client.open")
+def test_count_uses_matched(mock_open):
+    mock_open.return_value = _client(matched=[1234])
+    assert count(bbox=[-50, 65, -40, 75], mission="sentinel2") == 1234
+    kwargs = mock_open.return_value.search.call_args.kwargs
+    platforms = kwargs["filter"]["args"][1]
+    assert platforms["op"] == "or"
+    assert [arg["args"][1] for arg in platforms["args"]] == ["S2A", "S2B", "S2C"]
+
+
+@patch("pystac_client.Client.open")
+def test_cli_count_only_does_not_list_urls(mock_open):
+    mock_open.return_value = _client(ITEMS, matched=[42])
+    result = CliRunner().invoke(search, ["--bbox", "-50,65,-40,75", "--count-only"])
+    assert result.exit_code == 0, result.output
+    assert result.stdout.strip() == "42"
+    mock_open.return_value.search.return_value.items.assert_not_called()
@@ -0,0 +1,259 @@
+import datetime
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from itslive.cache import SearchCache
+from itslive.engines import RustacEngine
+from itslive.search import GTE, serverless_search
+from itslive.velocity_pairs._pairs import find_streaming
+
+ROI = {
+    "type": "Polygon",
+    "coordinates": [[[-50, 65], [-40, 65], [-40, 75], [-50, 75], [-50, 65]]],
+}
+
+
+def _make_mock_item(href: str):
+    item = MagicMock()
+    asset = MagicMock()
+    asset.roles = ["data"]
+    asset.href = href
+    item.assets = {"data": asset}
+    return item
+
+
+def _rustac_item(href: str):
+    return {
+        "assets": {"data": {"href": href, "roles": ["data"]}},
+        "properties": {},
+    }
+
+
+def _mock_client(hrefs: list[str]):
+    mock_client = MagicMock()
+    mock_search = MagicMock()
+    mock_search.items.return_value = [_make_mock_item(h) for h in hrefs]
+    mock_client.search.return_value = mock_search
+    return mock_client
+
+
+class TestMakeKey:
+    def test_same_query_same_key(self):
+        a = SearchCache.make_key("stac", "https://x", ROI, "2020-01-01/2020-12-31")
+        b = SearchCache.make_key("stac", "https://x/", ROI, "2020-01-01/2020-12-31")
+        assert a == b
+
+    def test_vertex_order_does_not_change_key(self):
+        rotated = {
+            "type": "Polygon",
+            "coordinates": [[[-40, 65], [-40, 75], [-50, 75], [-50, 65], [-40, 65]]],
+        }
+        assert SearchCache.make_key("duckdb", "s3://c", ROI, "a/b") == (
+            SearchCache.make_key("duckdb", "s3://c", rotated, "a/b")
+        )
+
+    def test_filter_changes_key(self):
+        cql2 = {"op": "=", "args": [{"property": "platform"}, "S2"]}
+        assert SearchCache.make_key("stac", "x", ROI, "a/b") != (
+            SearchCache.make_key("stac", "x", ROI, "a/b", cql2)
+        )
+
+    def test_engine_options_change_key(self):
+        from itslive.engines import get_engine
+        from itslive.search import _search_cache_key
+
+        def key(**options):
+            engine = get_engine("duckdb", "s3://c", **options)
+            roi_options = {"roi_max_vertices": 1000, "roi_tile_size": 5.0}
+            return _search_cache_key(engine, ROI, "a/b", None, ".nc", "c", roi_options)
+
+        assert key() == key(resolution=1, use_manifest=True)
+        assert key() != key(resolution=2)
+        assert key() != key(use_manifest=False)
+        assert key() != key(partition_type="latlon")
+
+
+class TestSearchCache:
+    def test_put_get_roundtrip(self, tmp_path):
+        cache = SearchCache(cache_dir=tmp_path)
+        cache.put("k", ["b.nc", "a.nc", "a.nc"])
+        entry = cache.get("k")
+        assert entry.hrefs == ["a.nc", "b.nc"]
+        assert not entry.expired
+        assert entry.watermark.endswith("Z")
+
+    def test_watermark_overlaps_the_fetch(self, tmp_path):
+        fetched_at = datetime.datetime(2024, 5, 1, 12, tzinfo=datetime.timezone.utc)
+        cache = SearchCache(cache_dir=tmp_path)
+        cache.put("k", ["a.nc"], fetched_at=fetched_at)
+        assert cache.get("k").watermark == "2024-05-01T11:00:00Z"
+        cache = SearchCache(cache_dir=tmp_path, watermark_margin=0)
+        cache.put("k", ["a.nc"], fetched_at=fetched_at)
+        assert cache.get("k").watermark == "2024-05-01T12:00:00Z"
+
+    def test_missing_key(self, tmp_path):
+        assert SearchCache(cache_dir=tmp_path).get("missing") is None
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = SearchCache(cache_dir=tmp_path, ttl=60)
+        old = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1)
+        cache.put("k", ["a.nc"], fetched_at=old)
+        assert cache.get("k").expired
+
+    def test_merge_adds_new_hrefs(self, tmp_path):
+        cache = SearchCache(cache_dir=tmp_path)
+        cache.put("k", ["a.nc"])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        assert cache.merge("k", ["b.nc"], now) == ["a.nc", "b.nc"]
+        assert cache.get("k").hrefs == ["a.nc", "b.nc"]
+
+    def test_size_eviction_is_lru(self, tmp_path):
+        cache = SearchCache(cache_dir=tmp_path)
+        cache.put("old", [f"{i}.nc" for i in range(100)])
+        cache.put("new", [f"{i}.nc" for i in range(100)])
+        os.utime(tmp_path / "old.parquet", (0, 0))
+        cache.max_size_bytes = os.path.getsize(tmp_path / "new.parquet")
+        cache.evict()
+        assert cache.get("old") is None
+        assert cache.get("new") is not None
+
+    def test_clear(self, tmp_path):
+        cache = SearchCache(cache_dir=tmp_path)
+        cache.put("k", ["a.nc"])
+        cache.clear()
+        assert cache.get("k") is None
+
+
+class TestServerlessSearchCache:
+    def _search(self, cache):
+        return serverless_search(
+            start_date="2020-01-01",
+            end_date="2020-12-31",
+            roi=ROI,
+            base_catalog_href="https://stac.itslive.cloud",
+            engine="stac",
+            cache=cache,
+        )
+
+    @patch("pystac_client.Client.open")
+    def test_second_call_is_served_from_cache(self, mock_open, tmp_path):
+        mock_open.return_value = _mock_client(["https://s3/a.nc"])
+        cache = SearchCache(cache_dir=tmp_path)
+        assert self._search(cache) == ["https://s3/a.nc"]
+        assert self._search(cache) == ["https://s3/a.nc"]
+        assert mock_open.call_count == 1
+
+    @patch("pystac_client.Client.open")
+    def test_stale_entry_refreshes_incrementally(self, mock_open, tmp_path):
+        cache = SearchCache(cache_dir=tmp_path, ttl=0)
+        mock_open.return_value = _mock_client(["https://s3/a.nc"])
+        self._search(cache)
+
+        mock_open.return_value = _mock_client(["https://s3/b.nc"])
+        result = self._search(cache)
+
+        assert result == ["https://s3/a.nc", "https://s3/b.nc"]
+        refresh_filter = mock_open.return_value.search.call_args[1]["filter"]
+        assert refresh_filter["args"][0] == {"property": "updated"}
+
+    @patch("pystac_client.Client.open")
+    def test_failed_search_is_not_cached(self, mock_open, tmp_path):
+        cache = SearchCache(cache_dir=tmp_path)
+        mock_open.return_value.search.side_effect = Exception("502 bad gateway")
+        with pytest.raises(Exception, match="502"):
+            self._search(cache)
+        assert list(tmp_path.glob("*.parquet")) == []
+
+        mock_open.return_value = _mock_client(["https://s3/a.nc"])
+        assert self._search(cache) == ["https://s3/a.nc"]
+
+    def _rustac_search(self, cache, rustac):
+        with patch.object(RustacEngine, "_connect", return_value=rustac):
+            return serverless_search(
+                start_date="2020-01-01",
+                end_date="2020-12-31",
+                roi=ROI,
+                base_catalog_href="s3://bucket/h3r1",
+                engine="rustac",
+                use_manifest=False,
+                reduce_spatial_search=False,
+                cache=cache,
+            )
+
+    def test_failed_rustac_search_is_not_cached(self, tmp_path):
+        cache = SearchCache(cache_dir=tmp_path, ttl=0)
+        rustac = MagicMock()
+        rustac.search.side_effect = OSError("Access Denied")
+        with pytest.raises(OSError, match="Access Denied"):
+            self._rustac_search(cache, rustac)
+        assert list(tmp_path.glob("*.parquet")) == []
+
+        # An empty glob is an empty result
+        rustac.search.side_effect = Exception(
+            "IO Error: No files found that match the pattern"
+        )
+        assert self._rustac_search(cache, rustac) == []
+
+        # and a failed refresh keeps the watermark
+        rustac.search.side_effect = None
+        rustac.search.return_value = [_rustac_item("https://s3/a.nc")]
+        assert self._rustac_search(cache, rustac) == ["https://s3/a.nc"]
+        (key,) = [path.stem for path in tmp_path.glob("*.parquet")]
+        watermark = cache.get(key).watermark
+        rustac.search.side_effect = OSError("Access Denied")
+        with pytest.raises(OSError):
+            self._rustac_search(cache, rustac)
+        assert cache.get(key).watermark == watermark
+
+    @patch("itslive.search.serverless_search")
+    def test_user_updated_filter_forces_full_refresh(self, mock_search, tmp_path):
+        from itslive.search import _search_with_cache
+
+        cache = SearchCache(cache_dir=tmp_path, ttl=0)
+        cache.put("k", ["a.nc"])
+        mock_search.return_value = ["b.nc"]
+        query = {"filters": {"updated": GTE("2024-01-01")}}
+        assert _search_with_cache(cache, "k", query) == ["b.nc"]
+        assert mock_search.call_args[1]["filters"] == query["filters"]
+
+
+class TestFindStreamingCache:
+    @patch("pystac_client.Client.open")
+    def test_stac_stream_is_cached(self, mock_open, tmp_path):
+        mock_open.return_value = _mock_client(["https://s3/a.nc", "https://s3/b.nc"])
+        cache = SearchCache(cache_dir=tmp_path)
+        kwargs = dict(
+            bbox=[-50, 65, -40, 75],
+            start="2020-01-01",
+            end="2020-12-31",
+            engine="stac",
+            cache=cache,
+        )
+        first = list(find_streaming(**kwargs))
+        second = list(find_streaming(**kwargs))
+        assert sorted(first) == second
+        assert mock_open.call_count == 1
+
+    @patch("pystac_client.Client.open")
+    def test_stale_stac_stream_yields_new_and_cached(self, mock_open, tmp_path):
+        cache = SearchCache(cache_dir=tmp_path, ttl=0)
+        kwargs = dict(bbox=[-50, 65, -40, 75], engine="stac", cache=cache)
+        mock_open.return_value = _mock_client(["https://s3/a.nc"])
+        list(find_streaming(**kwargs))
+
+        mock_open.return_value = _mock_client(["https://s3/b.nc"])
+        result = list(find_streaming(**kwargs))
+        assert result == ["https://s3/b.nc", "https://s3/a.nc"]
+
+    @patch("pystac_client.Client.open")
+    def test_failed_stream_is_not_cached(self, mock_open, tmp_path):
+        cache = SearchCache(cache_dir=tmp_path)
+        kwargs = dict(bbox=[-50, 65, -40, 75], engine="stac", cache=cache)
+        mock_open.return_value.search.side_effect = Exception("502 bad gateway")
+        assert list(find_streaming(**kwargs)) == []
+        assert list(tmp_path.glob("*.parquet")) == []
+
+        mock_open.return_value = _mock_client(["https://s3/a.nc"])
+        assert list(find_streaming(**kwargs)) == ["https://s3/a.nc"]
@@ -0,0 +1,151 @@
+"""Interval, mission and percent-valid constraints select the same granules
+whichever engine runs the search."""
+
+from unittest.mock import MagicMock, patch
+
+import duckdb
+import pandas as pd
+import pytest
+import shapely
+from shapely.geometry import box
+
+from itslive.engines import MemoryEngine, RustacEngine, make_query
+from itslive.search import GTE, build_cql2_filter, filters_to_where
+from itslive.velocity_pairs import find
+from itslive.velocity_pairs._pairs import _build_search_params
+
+from .conftest import make_stac_geoparquet_table
+
+BBOX = [-46, 66, -36, 72]
+
+CASES = {
+    "interval": dict(min_interval=30, max_interval=200),
+    "min-interval": dict(min_interval=100),
+    "mission": dict(mission="landsatOLI"),
+    "mission-valid": dict(mission="Sentinel2", percent_valid_pixels=50),
+    "all": dict(
+        mission="sentinel1", percent_valid_pixels=20, min_interval=10, max_interval=300
+    ),
+    "filters-override": dict(
+        mission="landsatOLI",
+        min_interval=1,
+        max_interval=20,
+        filters={"date_dt": GTE(200)},
+    ),
+}
+
+MISSIONS = {"landsatoli": {"L8", "L9"}, "sentinel1": {"S1A"}, "sentinel2": {"S2A"}}
+
+
+@pytest.fixture(autouse=True)
+def evict_catalogs():
+    yield
+    MemoryEngine.evict()
+
+
+def _expected(case, spatial=True):
+    """Brute-force reference: ids of the catalog items matching *case*."""
+    table = make_stac_geoparquet_table()
+    geoms = shapely.from_wkb(table.column("geometry").to_numpy(zero_copy_only=False))
+    filters = case.get("filters", {})
+    min_dt = filters["date_dt"].value if "date_dt" in filters else None
+    max_dt = None
+    if "date_dt" not in filters:
+        min_dt, max_dt = case.get("min_interval"), case.get("max_interval")
+    platforms = MISSIONS.get(case.get("mission", "").lower())
+    return sorted(
+        row["id"]
+        for row, geom in zip(table.to_pylist(), geoms)
+        if (not spatial or geom.intersects(box(*BBOX)))
+        and (platforms is None or row["platform"] in platforms)
+        and row["percent_valid_pixels"] >= case.get("percent_valid_pixels", 1)
+        and (min_dt is None or row["date_dt"] >= min_dt)
+        and (max_dt is None or row["date_dt"] <= max_dt)
+    )
+
+
+def _query(case, engine):
+    """The SearchQuery find() sends to *engine* for *case*."""
+    roi = box(*BBOX).__geo_interface__
+    params, extra_cql2_exprs = _build_search_params(
+        roi,
+        engine=engine,
+        stac_kwargs={"base_catalog_href": "catalog"},
+        **case,
+    )
+    return make_query(
+        roi,
+        params["start_date"],
+        params["end_date"],
+        filters=params["filters"],
+        extra_cql2_exprs=extra_cql2_exprs,
+        asset_type=params["asset_type"],
+    )
+
+
+def _ids(hrefs):
+    return sorted(href.rsplit("/", 1)[-1].removesuffix(".nc") for href in hrefs)
+
+
+@pytest.mark.parametrize("case", CASES.values(), ids=CASES.keys())
+def test_memory_engine(stac_geoparquet_catalog, case):
+    urls = find(
+        bbox=BBOX,
+        engine="memory",
+        base_catalog_href=str(stac_geoparquet_catalog),
+        **case,
+    )
+    assert _ids(urls) == _expected(case)
+
+
+@pytest.mark.parametrize("case", CASES.values(), ids=CASES.keys())
+def test_duckdb_engine(case):
+    query = _query(case, "duckdb")
+
+    # The compiled predicates select the reference items
+    items = make_stac_geoparquet_table()
+    params = []
+    where = filters_to_where(query.filters, params)
+    con = duckdb.connect()
+    con.register("items", items)
+    rows = con.execute(f"SELECT id FROM items WHERE {where}", params).fetchall()
+    assert sorted(row[0] for row in rows) == _expected(case, spatial=False)
+
+    # and are the ones the engine scans with
+    engine_con = MagicMock()
+    engine_con.execute.return_value.df.return_value = pd.DataFrame({"data_href": []})
+    with patch("duckdb.connect", return_value=engine_con):
+        find(
+            bbox=BBOX,
+            engine="duckdb",
+            base_catalog_href="s3://bucket/h3r1",
+            use_manifest=False,
+            reduce_spatial_search=False,
+            **case,
+        )
+    (call,) = [c for c in engine_con.execute.call_args_list if "SELECT" in c.args[0]]
+    assert where in call.args[0]
+    assert call.args[1] == [".nc", *params]
+
+
+@pytest.mark.parametrize("case", CASES.values(), ids=CASES.keys())
+def test_stac_and_rustac_engines(case):
+    client = MagicMock()
+    client.search.return_value.items.return_value = []
+    with patch("pystac_client.Client.open", return_value=client):
+        find(bbox=BBOX, engine="stac", **case)
+    expected = build_cql2_filter(_query(case, "stac").filters)
+    assert client.search.call_args.kwargs["filter"] == expected
+
+    rustac = MagicMock()
+    rustac.search.return_value = []
+    with patch.object(RustacEngine, "_connect", return_value=rustac):
+        find(
+            bbox=BBOX,
+            engine="rustac",
+            base_catalog_href="s3://bucket/h3r1",
+            use_manifest=False,
+            reduce_spatial_search=False,
+            **case,
+        )
+    assert rustac.search.call_args.kwargs["filter"] == expected
@@ -0,0 +1,196 @@
+from unittest.mock import MagicMock, patch
+
+import duckdb
+import pandas as pd
+import pytest
+
+from itslive.cql2 import to_sql
+from itslive.search import expr_to_sql, filters_to_where, serverless_search
+
+PLATFORM = {"property": "platform"}
+DATE_DT = {"property": "date_dt"}
+DATETIME = {"property": "datetime"}
+
+ROWS = """
+    SELECT * FROM (VALUES
+        ('a', 'L8', 6, TIMESTAMPTZ '2020-03-01 00:00:00+00', ['x', 'y'], 'EPSG:3413'),
+        ('b', 'S1A', 48, TIMESTAMPTZ '2020-12-31 12:00:00+00', ['z'], NULL),
+        ('c', 'L9', 100, TIMESTAMPTZ '2021-06-01 00:00:00+00', [], 'O''Brien')
+    ) v(id, platform, date_dt, datetime, tags, "proj:code")
+"""
+
+
+@pytest.fixture(scope="module")
+def con():
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    con.execute(f"CREATE TABLE items AS {ROWS}")
+    return con
+
+
+def _ids(con, expr):
+    """Ids selected by *expr*, checking the inline and parameterized SQL agree."""
+    params = []
+    sql = to_sql(expr, params)
+    bound = con.execute(f"SELECT id FROM items WHERE {sql}", params).fetchall()
+    inline = con.execute(f"SELECT id FROM items WHERE {to_sql(expr)}").fetchall()
+    assert sorted(bound) == sorted(inline)
+    return sorted(row[0] for row in bound)
+
+
+class TestParameters:
+    def test_values_become_placeholders(self):
+        params = []
+        sql = to_sql({"op": "in", "args": [PLATFORM, ["S1A", "S1B"]]}, params)
+        assert sql == "platform IN (?, ?)"
+        assert params == ["S1A", "S1B"]
+
+    def test_inline_strings_are_escaped(self):
+        expr = {"op": "=", "args": [PLATFORM, "x' OR '1'='1"]}
+        assert expr_to_sql(expr) == "platform = 'x'' OR ''1''=''1'"
+
+    def test_identifiers_are_escaped(self):
+        expr = {"op": "isNull", "args": [{"property": 'a"b'}]}
+        assert to_sql(expr) == '"a""b" IS NULL'
+
+    def test_nested_and_is_grouped(self):
+        expr = {
+            "op": "or",
+            "args": [
+                {"op": "=", "args": [PLATFORM, "L8"]},
+                {
+                    "op": "and",
+                    "args": [
+                        {"op": ">=", "args": [DATE_DT, 6]},
+                        {"op": "<=", "args": [DATE_DT, 48]},
+                    ],
+                },
+            ],
+        }
+        params = []
+        assert filters_to_where([expr], params) == (
+            "(platform = ? OR (date_dt >= ? AND date_dt <= ?))"
+        )
+        assert params == ["L8", 6, 48]
+
+    @pytest.mark.parametrize(
+        "expr",
+        [
+            {"op": "sin", "args": [DATE_DT]},
+            {"op": "=", "args": [DATE_DT]},
+            {"op": "between", "args": [DATE_DT, 1]},
+            {"op": "=", "args": [DATE_DT, float("nan")]},
+            {"op": "=", "args": [DATE_DT, {"unknown": 1}]},
+        ],
+    )
+    def test_unsupported_expressions_raise(self, expr):
+        with pytest.raises(ValueError):
+            to_sql(expr, [])
+
+
+class TestOperators:
+    @pytest.mark.parametrize(
+        "expr, ids",
+        [
+            ({"op": "<>", "args": [PLATFORM, "L8"]}, ["b", "c"]),
+            ({"op": "in", "args": [PLATFORM, ["L8", "L9"]]}, ["a", "c"]),
+            ({"op": "in", "args": [PLATFORM, []]}, []),
+            ({"op": "between", "args": [DATE_DT, 6, 48]}, ["a", "b"]),
+            ({"op": "like", "args": [{"property": "proj:code"}, "EPSG:%"]}, ["a"]),
+            ({"op": "like", "args": [{"property": "id"}, "\\%"]}, []),
+            ({"op": "isNull", "args": [{"property": "proj:code"}]}, ["b"]),
+            ({"op": "=", "args": [{"property": "proj:code"}, "O'Brien"]}, ["c"]),
+            (
+                {"op": "not", "args": [{"op": "=", "args": [PLATFORM, "L8"]}]},
+                ["b", "c"],
+            ),
+            (
+                {"op": "=", "args": [{"op": "casei", "args": [PLATFORM]}, "l8"]},
+                ["a"],
+            ),
+            ({"op": ">", "args": [{"op": "*", "args": [DATE_DT, 2]}, 90]}, ["b", "c"]),
+            (
+                {"op": "a_overlaps", "args": [{"property": "tags"}, ["y", "z"]]},
+                ["a", "b"],
+            ),
+            (
+                {"op": "a_containedBy", "args": [{"property": "tags"}, ["x", "y"]]},
+                ["a", "c"],
+            ),
+        ],
+    )
+    def test_comparison_logical_array(self, con, expr, ids):
+        assert _ids(con, expr) == ids
+
+    @pytest.mark.parametrize(
+        "op, ids",
+        [
+            ("t_intersects", ["a", "b"]),
+            ("t_disjoint", ["c"]),
+            ("t_during", ["a", "b"]),
+            ("t_after", ["c"]),
+            ("t_before", []),
+        ],
+    )
+    def test_temporal_with_date_interval(self, con, op, ids):
+        # Date bounds cover whole days: 2020-12-31 12:00 is in the interval
+        interval = {"interval": ["2020-01-01", "2020-12-31"]}
+        assert _ids(con, {"op": op, "args": [DATETIME, interval]}) == ids
+
+    def test_temporal_open_interval_and_instant(self, con):
+        open_end = {"interval": ["2020-06-01T00:00:00Z", ".."]}
+        assert _ids(con, {"op": "t_during", "args": [DATETIME, open_end]}) == [
+            "b",
+            "c",
+        ]
+        instant = {"timestamp": "2020-12-31T12:00:00Z"}
+        assert _ids(con, {"op": "t_equals", "args": [DATETIME, instant]}) == ["b"]
+        assert _ids(con, {"op": "t_before", "args": [DATETIME, instant]}) == ["a"]
+
+    def test_spatial(self):
+        params = []
+        sql = to_sql(
+            {
+                "op": "s_intersects",
+                "args": [
+                    {"property": "geometry"},
+                    {"type": "Point", "coordinates": [-45, 70]},
+                ],
+            },
+            params,
+        )
+        assert sql == "ST_Intersects(geometry, ST_GeomFromGeoJSON(?))"
+        assert params == ['{"type": "Point", "coordinates": [-45, 70]}']
+        sql = to_sql(
+            {
+                "op": "s_within",
+                "args": [{"property": "geometry"}, {"bbox": [0, 1, 2, 3]}],
+            }
+        )
+        assert sql == "ST_Within(geometry, ST_MakeEnvelope(0, 1, 2, 3))"
+
+
+def test_serverless_search_binds_extra_expressions():
+    con = MagicMock()
+    con.execute.return_value.df.return_value = pd.DataFrame({"data_href": []})
+    roi = {
+        "type": "Polygon",
+        "coordinates": [[[-46, 69], [-44, 69], [-44, 71], [-46, 71], [-46, 69]]],
+    }
+    with (
+        patch("duckdb.connect", return_value=con),
+        patch("itslive.search.path_exists", return_value=True),
+    ):
+        serverless_search(
+            "2020-01-01",
+            "2020-12-31",
+            roi,
+            base_catalog_href="s3://bucket/h3r1",
+            engine="duckdb",
+            use_manifest=False,
+            extra_cql2_exprs=[{"op": "in", "args": [PLATFORM, ["L8", "O'B"]]}],
+        )
+    call, *_ = [c for c in con.execute.call_args_list if "SELECT" in c.args[0]]
+    assert "platform IN (?, ?)" in call.args[0]
+    assert "O'B" not in call.args[0]
+    assert call.args[1] == [".nc", "L8", "O'B"]
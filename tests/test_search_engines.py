@@ -0,0 +1,198 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from itslive.engines import (
+    ENGINES,
+    DuckDBEngine,
+    Match,
+    SearchEngine,
+    StacEngine,
+    available_engines,
+    compare_engines,
+    get_engine,
+    make_query,
+    register_engine,
+)
+from itslive.search import serverless_aggregate, serverless_search
+from itslive.velocity_pairs import find
+
+ROI = {
+    "type": "Polygon",
+    "coordinates": [[[-46, 69], [-44, 69], [-44, 71], [-46, 71], [-46, 69]]],
+}
+
+MATCHES = [
+    Match(
+        "s3://b/2.nc",
+        {"platform": "L8", "datetime": "2020-02-01T00:00:00Z"},
+        None,
+        None,
+    ),
+    Match(
+        "s3://b/1.nc",
+        {"platform": "S1A", "datetime": "2019-05-01T00:00:00Z"},
+        None,
+        None,
+    ),
+    # the same item stored in two partitions
+    Match(
+        "s3://b/2.nc",
+        {"platform": "L8", "datetime": "2020-02-01T00:00:00Z"},
+        None,
+        None,
+    ),
+]
+
+
+class FakeEngine(SearchEngine):
+    name = "fake"
+    options = ("resolution",)
+
+    def __init__(self, base_catalog_href, resolution=1):
+        super().__init__(base_catalog_href)
+        self.resolution = resolution
+        self.queries = []
+
+    def _connect(self):
+        return MagicMock()
+
+    def search(self, query):
+        self.open()
+        self.queries.append(query)
+        yield from MATCHES
+
+
+@pytest.fixture
+def fake_engine():
+    register_engine(FakeEngine)
+    created = []
+    original_init = FakeEngine.__init__
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        created.append(self)
+
+    FakeEngine.__init__ = init
+    yield created
+    FakeEngine.__init__ = original_init
+    ENGINES.pop("fake")
+
+
+def test_builtin_engines_are_registered():
+    assert {"duckdb", "rustac", "stac"} <= set(available_engines())
+    assert StacEngine.supports_counts and DuckDBEngine.supports_counts
+    assert not SearchEngine.supports_async
+
+
+def test_unknown_engine():
+    with pytest.raises(NotImplementedError, match="Not a valid query engine: nope"):
+        get_engine("nope", "s3://catalog")
+
+
+def test_register_needs_a_name():
+    class Nameless(SearchEngine):
+        pass
+
+    with pytest.raises(ValueError):
+        register_engine(Nameless)
+
+
+def test_options_an_engine_does_not_take_are_dropped():
+    engine = get_engine("duckdb", "s3://catalog", resolution=2, collection="x")
+    assert engine.resolution == 2
+    assert isinstance(get_engine("stac", "https://stac", resolution=2), StacEngine)
+
+
+def test_make_query_flattens_filters():
+    query = make_query(
+        ROI,
+        "2020-01-01",
+        "2020-12-31",
+        extra_cql2_exprs=[
+            {
+                "op": "and",
+                "args": [
+                    {"op": ">=", "args": [{"property": "date_dt"}, 6]},
+                    {"op": "<=", "args": [{"property": "date_dt"}, 48]},
+                ],
+            }
+        ],
+        properties=["platform"],
+    )
+    assert [f["op"] for f in query.filters] == [">=", "<="]
+    assert query.properties == ("platform",)
+    assert not query.roi.simplified
+
+
+def test_serverless_search_uses_registered_engine(fake_engine):
+    urls = serverless_search(
+        "2019-01-01", "2021-12-31", ROI, base_catalog_href="mem://", engine="fake"
+    )
+    assert urls == ["s3://b/1.nc", "s3://b/2.nc"]
+    (engine,) = fake_engine
+    assert engine.connection is None
+
+    records = serverless_search(
+        "2019-01-01",
+        "2021-12-31",
+        ROI,
+        base_catalog_href="mem://",
+        engine="fake",
+        resolution=3,
+        properties=["platform"],
+    )
+    assert records == [
+        {"url": "s3://b/1.nc", "platform": "S1A"},
+        {"url": "s3://b/2.nc", "platform": "L8"},
+    ]
+    assert fake_engine[1].resolution == 3
+    assert fake_engine[1].queries[0].properties == ("platform",)
+
+
+def test_count_enumerates_without_backend_counts(fake_engine):
+    rows = serverless_aggregate(
+        "2019-01-01",
+        "2021-12-31",
+        ROI,
+        base_catalog_href="mem://",
+        engine="fake",
+        group_by=("year",),
+    )
+    assert rows == [{"year": 2019, "count": 1}, {"year": 2020, "count": 1}]
+    assert fake_engine[0].queries[0].properties == ("datetime",)
+
+
+def test_find_streams_unique_urls_with_intervals(fake_engine):
+    urls = find(
+        bbox=[-46, 69, -44, 71],
+        engine="fake",
+        base_catalog_href="mem://",
+        min_interval=6,
+        max_interval=48,
+    )
+    assert urls == ["s3://b/2.nc", "s3://b/1.nc"]
+    (query,) = fake_engine[0].queries
+    date_dt = [f for f in query.filters if f["args"][0] == {"property": "date_dt"}]
+    assert [f["op"] for f in date_dt] == [">=", "<="]
+
+
+def test_lifecycle_and_asearch(fake_engine):
+    engine = get_engine("fake", "mem://")
+    query = make_query(ROI, "2020-01-01", "2020-12-31")
+    with engine:
+        connection = engine.connection
+        assert asyncio.run(engine.asearch(query)) == MATCHES
+        assert engine.connection is connection
+    connection.close.assert_called_once()
+    assert engine.connection is None
+
+
+def test_compare_engines(fake_engine):
+    query = make_query(ROI, "2020-01-01", "2020-12-31")
+    (result,) = compare_engines([get_engine("fake", "mem://")], query, repeat=2)
+    assert result["engine"] == "fake"
+    assert result["matches"] == 3
+    assert result["hrefs"] == 2
+    assert len(result["seconds"]) == 2
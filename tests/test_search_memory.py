@@ -0,0 +1,220 @@
+import datetime
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+import shapely
+from shapely.geometry import shape
+
+from itslive.engines import MemoryEngine, compare_engines, get_engine, make_query
+from itslive.engines._memory import MemoryCatalog
+from itslive.search import EQ, GTE, serverless_aggregate, serverless_search
+
+from .conftest import make_stac_geoparquet_table
+
+ROI = {
+    "type": "Polygon",
+    "coordinates": [[[-46, 66], [-36, 66], [-36, 72], [-46, 72], [-46, 66]]],
+}
+
+
+@pytest.fixture(autouse=True)
+def evict_catalogs():
+    yield
+    MemoryEngine.evict()
+
+
+def _expected(table, start, end, platform=None, min_valid=None):
+    """Brute-force reference: hrefs of the items matching the query."""
+    geoms = shapely.from_wkb(table.column("geometry").to_numpy(zero_copy_only=False))
+    rows = table.to_pylist()
+    start = datetime.datetime.fromisoformat(start).replace(tzinfo=datetime.timezone.utc)
+    end = datetime.datetime.fromisoformat(end).replace(tzinfo=datetime.timezone.utc)
+    return sorted(
+        row["assets"]["data"]["href"]
+        for row, geom in zip(rows, geoms)
+        if geom.intersects(shape(ROI))
+        and start <= row["datetime"] <= end + datetime.timedelta(days=1)
+        and (platform is None or row["platform"] == platform)
+        and (min_valid is None or row["percent_valid_pixels"] >= min_valid)
+    )
+
+
+def test_search_matches_brute_force(stac_geoparquet_catalog):
+    table = make_stac_geoparquet_table()
+    urls = serverless_search(
+        "2020-01-01",
+        "2021-06-30",
+        ROI,
+        base_catalog_href=str(stac_geoparquet_catalog),
+        engine="memory",
+    )
+    assert urls
+    assert urls == _expected(table, "2020-01-01", "2021-06-30")
+
+    filtered = serverless_search(
+        "2019-01-01",
+        "2022-12-31",
+        ROI,
+        filters={"platform": EQ("L8"), "percent_valid_pixels": GTE(50)},
+        base_catalog_href=str(stac_geoparquet_catalog),
+        engine="memory",
+    )
+    assert filtered == _expected(
+        table, "2019-01-01", "2022-12-31", platform="L8", min_valid=50
+    )
+
+
+def test_properties_and_timestamp_filters(stac_geoparquet_catalog):
+    records = serverless_search(
+        "2019-01-01",
+        "2022-12-31",
+        ROI,
+        filters={"datetime": GTE("2021-01-01T00:00:00Z")},
+        base_catalog_href=str(stac_geoparquet_catalog),
+        engine="memory",
+        properties=["datetime", "platform", "bbox"],
+    )
+    assert records
+    for record in records:
+        assert record["datetime"] >= "2021-01-01"
+        assert len(record["bbox"]) == 4
+
+
+def test_counts_match_search(stac_geoparquet_catalog):
+    kwargs = dict(
+        start_date="2019-01-01",
+        end_date="2022-12-31",
+        roi=ROI,
+        base_catalog_href=str(stac_geoparquet_catalog),
+        engine="memory",
+    )
+    rows = serverless_aggregate(**kwargs, group_by=("year", "platform"))
+    records = serverless_search(**kwargs, properties=["datetime", "platform"])
+    expected = {}
+    for record in records:
+        key = (int(record["datetime"][:4]), record["platform"])
+        expected[key] = expected.get(key, 0) + 1
+    assert {(r["year"], r["platform"]): r["count"] for r in rows} == expected
+    assert serverless_aggregate(**kwargs, group_by=()) == [{"count": len(records)}]
+
+
+def test_items_in_several_partitions_are_loaded_once(tmp_path):
+    table = make_stac_geoparquet_table()
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        pq.write_table(table, tmp_path / name / "items.parquet")
+    engine = get_engine("memory", str(tmp_path))
+    with engine:
+        assert len(engine.connection) == table.num_rows
+
+
+def test_hot_reload(tmp_path):
+    table = make_stac_geoparquet_table()
+    (tmp_path / "a").mkdir()
+    pq.write_table(table.slice(0, 20), tmp_path / "a" / "items.parquet")
+    query = make_query(ROI, "2019-01-01", "2022-12-31")
+
+    engine = MemoryEngine(str(tmp_path), reload_interval=0).open()
+    before = {match.href for match in engine.search(query)}
+    assert engine.reload() is False
+
+    (tmp_path / "b").mkdir()
+    pq.write_table(table.slice(20), tmp_path / "b" / "items.parquet")
+    after = {match.href for match in engine.search(query)}
+    assert before < after
+    assert after == set(_expected(table, "2019-01-01", "2022-12-31"))
+
+    # Other engines on the same catalog share the loaded arrays
+    assert MemoryEngine(str(tmp_path)).open().connection is engine.connection
+
+    os.remove(tmp_path / "b" / "items.parquet")
+    assert engine.reload() is True
+    assert {match.href for match in engine.search(query)} == before
+
+
+def test_one_query_reloads_while_others_use_the_old_catalog(tmp_path):
+    table = make_stac_geoparquet_table()
+    (tmp_path / "a").mkdir()
+    pq.write_table(table.slice(0, 20), tmp_path / "a" / "items.parquet")
+    query = make_query(ROI, "2019-01-01", "2022-12-31")
+    before = {match.href for match in MemoryEngine(str(tmp_path)).open().search(query)}
+
+    (tmp_path / "b").mkdir()
+    pq.write_table(table.slice(20), tmp_path / "b" / "items.parquet")
+    load, loading, release = MemoryCatalog.load, threading.Event(), threading.Event()
+    calls = []
+
+    def slow_load(*args, **kwargs):
+        calls.append(args)
+        loading.set()
+        release.wait(5)
+        return load(*args, **kwargs)
+
+    def search():
+        engine = MemoryEngine(str(tmp_path), reload_interval=0).open()
+        return {match.href for match in engine.search(query)}
+
+    with patch.object(MemoryCatalog, "load", slow_load):
+        with ThreadPoolExecutor(4) as pool:
+            reloading = pool.submit(search)
+            assert loading.wait(5)
+            # Answered from the old catalog while the reload is running
+            assert list(pool.map(lambda _: search(), range(4))) == [before] * 4
+            release.set()
+            after = reloading.result()
+    assert len(calls) == 1
+    assert after == set(_expected(table, "2019-01-01", "2022-12-31"))
+    assert search() == after
+
+
+def test_compare_engines_reports_unsupported_operators(stac_geoparquet_catalog):
+    query = make_query(
+        ROI,
+        "2019-01-01",
+        "2022-12-31",
+        extra_cql2_exprs=[
+            {
+                "op": "t_after",
+                "args": [
+                    {"property": "datetime"},
+                    {"timestamp": "2020-01-01T00:00:00Z"},
+                ],
+            }
+        ],
+    )
+    (result,) = compare_engines([MemoryEngine(str(stac_geoparquet_catalog))], query)
+    assert result["engine"] == "memory"
+    assert "t_after" in result["error"]
+
+
+def test_extent_keeps_a_subset(stac_geoparquet_catalog):
+    engine = MemoryEngine(str(stac_geoparquet_catalog), extent=(-46, 66, -36, 72))
+    with engine:
+        bounds = engine.connection.bounds
+        assert 0 < len(bounds) < make_stac_geoparquet_table().num_rows
+        assert np.all(bounds[:, 0] <= -36) and np.all(bounds[:, 2] >= -46)
+
+
+def test_cql2_operators(stac_geoparquet_catalog):
+    table = make_stac_geoparquet_table()
+    query = make_query(
+        ROI,
+        "2019-01-01",
+        "2022-12-31",
+        extra_cql2_exprs=[
+            {"op": "in", "args": [{"property": "platform"}, ["L8", "L9"]]},
+            {"op": "between", "args": [{"property": "percent_valid_pixels"}, 0, 49]},
+            {"op": "not", "args": [{"op": "isNull", "args": [{"property": "id"}]}]},
+        ],
+    )
+    with MemoryEngine(str(stac_geoparquet_catalog)) as engine:
+        hrefs = sorted(match.href for match in engine.search(query))
+    expected = set(_expected(table, "2019-01-01", "2022-12-31", platform="L8"))
+    expected |= set(_expected(table, "2019-01-01", "2022-12-31", platform="L9"))
+    expected -= set(_expected(table, "2019-01-01", "2022-12-31", min_valid=50))
+    assert hrefs == sorted(expected)
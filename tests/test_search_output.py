@@ -0,0 +1,230 @@
+import datetime
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from click.testing import CliRunner
+
+from itslive.cli.search import search
+from itslive.search import ITEM_PROPERTIES, item_record, serverless_search
+from itslive.velocity_pairs._pairs import find_streaming
+
+BBOX = "-50,65,-40,75"
+ROI = {
+    "type": "Polygon",
+    "coordinates": [[[-46, 69], [-44, 69], [-44, 71], [-46, 71], [-46, 69]]],
+}
+
+
+def _item(href, platform="S2A", date_dt=12):
+    item = MagicMock()
+    item.properties = {
+        "datetime": "2020-01-01T00:00:00Z",
+        "platform": platform,
+        "date_dt": date_dt,
+        "percent_valid_pixels": 80,
+        "proj:code": "EPSG:3413",
+    }
+    item.bbox = [-45.0, 70.0, -44.0, 71.0]
+    asset = MagicMock()
+    asset.roles = ["data"]
+    asset.href = href
+    item.assets = {"data": asset}
+    return item
+
+
+def _client(items):
+    client = MagicMock()
+    client.search.return_value.items.return_value = items
+    return client
+
+
+class TestItemRecord:
+    def test_plain_values(self):
+        record = item_record(
+            "s3://a.nc",
+            {
+                "datetime": pd.Timestamp("2020-01-02T03:00:00"),
+                "date_dt": np.int64(12),
+                "percent_valid_pixels": np.nan,
+                "created": pd.NaT,
+            },
+            bbox={"xmin": 1.0, "ymin": 2.0, "xmax": 3.0, "ymax": 4.0},
+            properties=["datetime", "date_dt", "percent_valid_pixels", "bbox"],
+        )
+        assert record == {
+            "url": "s3://a.nc",
+            "datetime": "2020-01-02T03:00:00",
+            "date_dt": 12,
+            "percent_valid_pixels": None,
+            "bbox": [1.0, 2.0, 3.0, 4.0],
+        }
+        assert type(record["date_dt"]) is int
+        json.dumps(record)
+
+    def test_missing_fields_and_dates(self):
+        record = item_record(
+            "s3://a.nc", {"start": datetime.date(2020, 1, 1)}, None, ["start", "x"]
+        )
+        assert record == {"url": "s3://a.nc", "start": "2020-01-01", "x": None}
+
+
+class TestServerlessSearchProperties:
+    @patch("pystac_client.Client.open")
+    def test_stac_records(self, mock_open):
+        mock_open.return_value = _client(
+            [_item("https://s3/b.nc"), _item("https://s3/a.nc", platform="L8")]
+        )
+        result = serverless_search(
+            start_date="2020-01-01",
+            end_date="2020-12-31",
+            roi=ROI,
+            base_catalog_href="https://stac.itslive.cloud",
+            engine="stac",
+            properties=list(ITEM_PROPERTIES),
+        )
+        assert [r["url"] for r in result] == ["https://s3/a.nc", "https://s3/b.nc"]
+        assert result[0]["platform"] == "L8"
+        assert result[0]["bbox"] == [-45.0, 70.0, -44.0, 71.0]
+        assert result[0]["proj:code"] == "EPSG:3413"
+
+    @patch("itslive.search.path_exists", return_value=True)
+    def test_duckdb_selects_property_columns(self, mock_path_exists):
+        con = MagicMock()
+        con.execute.return_value.df.return_value = pd.DataFrame(
+            {
+                "data_href": ["https://s3/a.nc"],
+                "platform": ["S1A"],
+                "proj:code": ["EPSG:3413"],
+                "bbox": [{"xmin": 0.0, "ymin": 1.0, "xmax": 2.0, "ymax": 3.0}],
+            }
+        )
+        with patch("duckdb.connect", return_value=con):
+            result = serverless_search(
+                start_date="2020-01-01",
+                end_date="2020-12-31",
+                roi=ROI,
+                base_catalog_href="s3://bucket/h3r1",
+                engine="duckdb",
+                use_manifest=False,
+                properties=["platform", "proj:code", "bbox"],
+            )
+        assert result == [
+            {
+                "url": "https://s3/a.nc",
+                "platform": "S1A",
+                "proj:code": "EPSG:3413",
+                "bbox": [0.0, 1.0, 2.0, 3.0],
+            }
+        ]
+        query = [c.args[0] for c in con.execute.call_args_list if "SELECT" in c.args[0]]
+        assert '"proj:code" AS "proj:code"' in query[0]
+
+
+@patch("pystac_client.Client.open")
+def test_find_streaming_yields_records(mock_open):
+    mock_open.return_value = _client([_item("https://s3/a.nc")])
+    records = list(
+        find_streaming(bbox=[-50, 65, -40, 75], properties=["date_dt", "platform"])
+    )
+    assert records == [{"url": "https://s3/a.nc", "date_dt": 12, "platform": "S2A"}]
+
+
+class TestCliFormats:
+    def _run(self, mock_open, *args, n=3):
+        mock_open.return_value = _client(
+            [_item(f"https://s3/g{i}.nc", date_dt=i) for i in range(n)]
+        )
+        result = CliRunner().invoke(search, ["--bbox", BBOX, *args])
+        assert result.exit_code == 0, result.output
+        return result
+
+    @patch("pystac_client.Client.open")
+    def test_json_array_of_urls(self, mock_open):
+        result = self._run(mock_open, "--format", "json")
+        urls = [f"https://s3/g{i}.nc" for i in range(3)]
+        assert result.stdout == json.dumps(urls, indent=2) + "\n"
+
+    @patch("pystac_client.Client.open")
+    def test_ndjson_with_properties(self, mock_open):
+        result = self._run(
+            mock_open, "--format", "ndjson", "--properties", "date_dt,bbox"
+        )
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        assert records[2] == {
+            "url": "https://s3/g2.nc",
+            "date_dt": 2,
+            "bbox": [-45.0, 70.0, -44.0, 71.0],
+        }
+
+    @patch("pystac_client.Client.open")
+    def test_csv_with_properties(self, mock_open):
+        result = self._run(mock_open, "--format", "csv", "--properties", "platform")
+        lines = result.stdout.splitlines()
+        assert lines[0] == "url,filename,platform"
+        assert lines[1] == "https://s3/g0.nc,g0.nc,S2A"
+
+    @patch("pystac_client.Client.open")
+    def test_arrow_ipc_and_parquet_in_batches(self, mock_open):
+        with patch("itslive.cli.search._BATCH_SIZE", 2):
+            ipc = self._run(
+                mock_open, "--format", "arrow-ipc", "--properties", "date_dt", n=5
+            )
+            parquet = self._run(
+                mock_open, "--format", "parquet", "--properties", "platform", n=5
+            )
+        reader = pa.ipc.open_stream(ipc.stdout_bytes)
+        batches = list(reader)
+        assert [b.num_rows for b in batches] == [2, 2, 1]
+        table = pa.Table.from_batches(batches)
+        assert table.column("date_dt").to_pylist() == list(range(5))
+        table = pq.read_table(io.BytesIO(parquet.stdout_bytes))
+        assert table.num_rows == 5
+        assert table.column_names == ["url", "platform"]
+
+    @patch("pystac_client.Client.open")
+    def test_empty_parquet_is_valid(self, mock_open):
+        result = self._run(mock_open, "--format", "parquet", n=0)
+        assert pq.read_table(io.BytesIO(result.stdout_bytes)).num_rows == 0
+
+    @patch("pystac_client.Client.open")
+    def test_count_only(self, mock_open):
+        mock_open.return_value = _client([])
+        mock_open.return_value.search.return_value.matched.return_value = 4
+        result = CliRunner().invoke(
+            search, ["--bbox", BBOX, "--format", "parquet", "--count-only"]
+        )
+        assert result.exit_code == 0, result.output
+        assert result.stdout.strip() == "4"
+
+    @patch("pystac_client.Client.open")
+    def test_schema_does_not_depend_on_the_first_batch(self, mock_open):
+        items = [_item(f"https://s3/g{i}.nc") for i in range(3)]
+        items[0].properties["percent_valid_pixels"] = None
+        items[1].properties["percent_valid_pixels"] = None
+        items[2].properties["percent_valid_pixels"] = 57.0
+        mock_open.return_value = _client(items)
+        args = ["--properties", "datetime,percent_valid_pixels,bbox,proj:code"]
+        with patch("itslive.cli.search._BATCH_SIZE", 2):
+            result = CliRunner().invoke(
+                search, ["--bbox", BBOX, "--format", "parquet", *args]
+            )
+        assert result.exit_code == 0, result.output
+        table = pq.read_table(io.BytesIO(result.stdout_bytes))
+        assert table.schema == pa.schema(
+            [
+                ("url", pa.string()),
+                ("datetime", pa.timestamp("us", tz="UTC")),
+                ("percent_valid_pixels", pa.float64()),
+                ("bbox", pa.list_(pa.float64())),
+                ("proj:code", pa.string()),
+            ]
+        )
+        assert table.column("percent_valid_pixels").to_pylist() == [None, None, 57.0]
+        assert table.column("datetime")[0].as_py() == datetime.datetime(
+            2020, 1, 1, tzinfo=datetime.timezone.utc
+        )
@@ -0,0 +1,140 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import MultiPolygon, Point, box, mapping, shape
+
+from itslive.engines._sql import _tiles_to_sql
+from itslive.search import prepare_roi, roi_intersects, serverless_search
+
+
+def _complex_outline(n_vertices: int = 20000):
+    """Star-shaped outline around (-45, 70) with many vertices."""
+    angles = np.linspace(0, 2 * np.pi, n_vertices, endpoint=False)
+    radius = 1.0 + 0.05 * np.sin(angles * 300)
+    lons = -45.0 + radius * np.cos(angles)
+    lats = 70.0 + 0.5 * radius * np.sin(angles)
+    return {
+        "type": "Polygon",
+        "coordinates": [list(zip(lons, lats)) + [(lons[0], lats[0])]],
+    }
+
+
+class TestPrepareRoi:
+    def test_simple_roi_is_untouched(self):
+        roi = mapping(box(-50, 65, -48, 67))
+        prepared = prepare_roi(roi)
+        assert not prepared.simplified
+        assert shape(prepared.coarse).equals(shape(roi))
+        assert len(prepared.tiles) == 1
+        assert prepared.bbox == (-50.0, 65.0, -48.0, 67.0)
+
+    def test_complex_roi_is_simplified_within_budget(self):
+        roi = _complex_outline()
+        prepared = prepare_roi(roi, max_vertices=500)
+        assert prepared.simplified
+        coarse = shape(prepared.coarse)
+        assert shapely.get_num_coordinates(coarse) <= 500
+        assert coarse.covers(shape(roi))
+
+    def test_fixed_tolerance(self):
+        prepared = prepare_roi(_complex_outline(), max_vertices=10, tolerance=0.01)
+        assert prepared.simplified
+        assert shape(prepared.coarse).covers(shape(_complex_outline()))
+
+    def test_multipolygon_parts_become_tiles(self):
+        roi = mapping(MultiPolygon([box(-50, 65, -49, 66), box(-30, 70, -29, 71)]))
+        prepared = prepare_roi(roi)
+        assert len(prepared.tiles) == 2
+
+    def test_large_polygon_is_split_on_grid(self):
+        roi = mapping(box(-60, 60, -40, 70))
+        prepared = prepare_roi(roi, tile_size=5.0)
+        assert len(prepared.tiles) == 8
+        area = sum(shape(t).area for t in prepared.tiles)
+        assert area == shape(roi).area
+
+
+class TestRoiIntersects:
+    def test_all_true_when_not_simplified(self):
+        prepared = prepare_roi(mapping(box(0, 0, 1, 1)))
+        assert roi_intersects(prepared, [Point(10, 10)]).tolist() == [True]
+
+    def test_exact_check_on_candidates(self):
+        prepared = prepare_roi(_complex_outline(), max_vertices=100)
+        inside = mapping(Point(-45.0, 70.0).buffer(0.01))
+        outside = shapely.to_wkb(Point(-40.0, 70.0).buffer(0.01))
+        assert roi_intersects(prepared, [inside, outside]).tolist() == [True, False]
+
+
+class TestTilesToSql:
+    def test_single_tile_keeps_plain_predicate(self):
+        sql = _tiles_to_sql(prepare_roi(mapping(box(0, 0, 1, 1))))
+        assert sql.startswith("ST_Intersects(geometry")
+        assert "ST_Intersects_Extent" not in sql
+
+    def test_multiple_tiles_get_extent_prefilter(self):
+        sql = _tiles_to_sql(prepare_roi(mapping(box(-60, 60, -40, 70))))
+        assert sql.count("ST_Intersects_Extent") == 8
+        assert " OR " in sql
+
+
+class TestServerlessSearchRoi:
+    @patch("pystac_client.Client.open")
+    def test_stac_sends_coarse_roi_and_checks_exact(self, mock_open):
+        def _item(href, geom):
+            item = MagicMock()
+            item.geometry = mapping(geom)
+            asset = MagicMock()
+            asset.roles = ["data"]
+            asset.href = href
+            item.assets = {"data": asset}
+            return item
+
+        client = MagicMock()
+        client.search.return_value.items.return_value = [
+            _item("https://s3/in.nc", Point(-45.0, 70.0).buffer(0.01)),
+            _item("https://s3/out.nc", Point(-40.0, 70.0).buffer(0.01)),
+        ]
+        mock_open.return_value = client
+
+        result = serverless_search(
+            start_date="2020-01-01",
+            end_date="2020-12-31",
+            roi=_complex_outline(),
+            base_catalog_href="https://stac.itslive.cloud",
+            engine="stac",
+            roi_max_vertices=200,
+        )
+
+        sent = client.search.call_args[1]["intersects"]
+        assert shapely.get_num_coordinates(shape(sent)) <= 200
+        assert result == ["https://s3/in.nc"]
+
+    @patch("itslive.search.path_exists", return_value=True)
+    def test_duckdb_filters_candidates_by_exact_geometry(self, mock_path_exists):
+        con = MagicMock()
+        con.execute.return_value.df.return_value = pd.DataFrame(
+            {
+                "data_href": ["https://s3/in.nc", "https://s3/out.nc"],
+                "wkb": [
+                    shapely.to_wkb(Point(-45.0, 70.0).buffer(0.01)),
+                    shapely.to_wkb(Point(-40.0, 70.0).buffer(0.01)),
+                ],
+            }
+        )
+        with patch("duckdb.connect", return_value=con):
+            result = serverless_search(
+                start_date="2020-01-01",
+                end_date="2020-12-31",
+                roi=_complex_outline(),
+                base_catalog_href="s3://bucket/h3r1",
+                engine="duckdb",
+                use_manifest=False,
+                roi_max_vertices=200,
+            )
+
+        assert result == ["https://s3/in.nc"]
+        query = [c.args[0] for c in con.execute.call_args_list if "SELECT" in c.args[0]]
+        assert "ST_AsWKB(geometry) AS wkb" in query[0]
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from itslive.timeseries import (
+    drop_duplicate_times,
+    forward_fill,
+    period_edges,
+    regular_windows,
+    running_count,
+    running_mean,
+    running_median,
+    window_statistic,
+)
+
+
+def _series(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, 5 * 365, n)
+    times = np.datetime64("2015-01-01") + days.astype("timedelta64[D]")
+    values = rng.normal(500, 50, n)
+    values[rng.random(n) < 0.2] = np.nan
+    return times.astype("datetime64[ns]"), values
+
+
+def _loop_reference(times, values, starts, ends, func, min_count=1):
+    out = np.full(len(starts), np.nan)
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        sel = (times >= start) & (times < end) & ~np.isnan(values)
+        if sel.sum() >= min_count:
+            out[i] = func(values[sel])
+    return out
+
+
+class TestWindowKernels:
+    def setup_method(self):
+        self.times, self.values = _series()
+        self.starts, self.ends, _ = regular_windows(self.times, 30, 90)
+
+    @pytest.mark.parametrize(
+        "statistic,func",
+        [("mean", np.mean), ("median", np.median), ("max", np.max), ("sum", np.sum)],
+    )
+    def test_matches_loop(self, statistic, func):
+        got = window_statistic(
+            self.times, self.values, self.starts, self.ends, statistic, min_count=3
+        )
+        expected = _loop_reference(
+            self.times, self.values, self.starts, self.ends, func, min_count=3
+        )
+        np.testing.assert_allclose(got, expected)
+
+    def test_unsorted_input(self):
+        order = np.random.default_rng(1).permutation(len(self.times))
+        got = running_median(
+            self.times[order], self.values[order], self.starts, self.ends
+        )
+        expected = running_median(self.times, self.values, self.starts, self.ends)
+        np.testing.assert_allclose(got, expected)
+
+    def test_count(self):
+        got = running_count(self.times, self.values, self.starts, self.ends)
+        expected = _loop_reference(
+            self.times, self.values, self.starts, self.ends, len, min_count=0
+        )
+        np.testing.assert_array_equal(got, np.nan_to_num(expected))
+
+    def test_many_points_at_once(self):
+        stack = np.stack([self.values, self.values * 2, np.full_like(self.values, 1)])
+        got = running_median(self.times, stack, self.starts, self.ends)
+        assert got.shape == (3, len(self.starts))
+        for row, values in zip(got, stack):
+            np.testing.assert_allclose(
+                row, running_median(self.times, values, self.starts, self.ends)
+            )
+
+    def test_running_mean_times(self):
+        means, mean_times = running_mean(
+            self.times, self.values, self.starts, self.ends, min_count=2
+        )
+        for i, (start, end) in enumerate(zip(self.starts, self.ends)):
+            sel = (self.times >= start) & (self.times < end) & ~np.isnan(self.values)
+            if sel.sum() < 2:
+                assert np.isnan(means[i]) and np.isnat(mean_times[i])
+                continue
+            expected = self.times[sel].astype(np.int64).mean()
+            assert abs(mean_times[i].astype(np.int64) - expected) < 1e3
+
+    def test_unknown_statistic(self):
+        with pytest.raises(ValueError):
+            window_statistic(self.times, self.values, self.starts, self.ends, "mode")
+
+
+def test_monthly_max_matches_pandas_resample():
+    times, values = _series(seed=3)
+    times = np.concatenate([times, times[:10]])
+    values = np.concatenate([values, values[:10] + 1000])
+
+    series = pd.Series(values, index=times).sort_index(kind="stable")
+    expected = series[~series.index.duplicated(keep="first")].resample("ME").max()
+
+    times, values = drop_duplicate_times(times, values)
+    edges, periods = period_edges(times, "M")
+    got = window_statistic(times, values, edges[:-1], edges[1:], "max")
+    np.testing.assert_allclose(forward_fill(got), expected.ffill().values)
+    np.testing.assert_array_equal(
+        periods.to_timestamp(how="end").normalize(), expected.index
+    )
+
+
+def test_forward_fill_2d():
+    values = np.array([[np.nan, 1, np.nan, 3], [2, np.nan, np.nan, np.nan]])
+    np.testing.assert_array_equal(
+        forward_fill(values), [[np.nan, 1, 1, 3], [2, 2, 2, 2]]
+    )
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from itslive.timeseries import fit_seasonal, seasonal_fit
+
+from .conftest import make_velocity_cube
+
+REFERENCE = np.datetime64("2019-01-01")
+
+
+def _synthetic(n=600, seed=0, spans=None):
+    """Pairs whose values are exact span averages of a known model."""
+    rng = np.random.default_rng(seed)
+    days = np.sort(rng.uniform(0, 6 * 365.25, n))
+    mid = np.datetime64("2016-01-01", "ns") + (days * 86400e9).astype("timedelta64[ns]")
+    if spans is None:
+        spans = rng.choice([6, 12, 48, 120, 240], n).astype(float)
+
+    v0, trend, amp, peak_doy = 800.0, 25.0, 150.0, 200.0
+
+    def model(t_days_from_jan1_2016):
+        years = t_days_from_jan1_2016 / 365.25
+        season = (years % 1) * 365.25
+        return (
+            v0
+            + trend * (years - 3)
+            + amp * np.cos(2 * np.pi * (season - (peak_doy - 1)) / 365.25)
+        )
+
+    # Average of the model over each span by dense sampling
+    offsets = np.linspace(-0.5, 0.5, 201)
+    samples = days[:, None] + spans[:, None] * offsets
+    values = model(samples).mean(axis=1)
+    return mid, values, spans, (v0, trend, amp, peak_doy)
+
+
+def test_recovers_parameters_from_span_averages():
+    mid, values, spans, (v0, trend, amp, peak) = _synthetic()
+    fit = seasonal_fit(mid, values, date_dt=spans, reference_date=REFERENCE)
+    assert fit.mean == pytest.approx(v0, abs=2)
+    assert fit.trend == pytest.approx(trend, abs=1)
+    assert fit.amplitude == pytest.approx(amp, rel=0.02)
+    assert fit.phase == pytest.approx(peak, abs=2)
+    assert fit.count == len(mid)
+
+
+def test_ignoring_date_dt_biases_amplitude_for_long_pairs():
+    mid, values, spans, (_, _, amp, _) = _synthetic(spans=np.full(600, 240.0))
+    aware = seasonal_fit(mid, values, date_dt=spans, reference_date=REFERENCE)
+    naive = seasonal_fit(mid, values, reference_date=REFERENCE)
+    assert aware.amplitude == pytest.approx(amp, rel=0.02)
+    assert naive.amplitude < 0.7 * amp
+
+
+def test_vectorized_matches_per_pixel_and_handles_gaps():
+    mid, values, spans, _ = _synthetic(n=200, seed=3)
+    rng = np.random.default_rng(4)
+    stack = values + rng.normal(0, 10, (3, 4, len(mid)))
+    stack[0, 0, 5:] = np.nan  # too few observations
+    stack[1, 2, ::2] = np.nan
+    errors = rng.uniform(5, 30, len(mid))
+
+    fit = seasonal_fit(mid, stack, errors, spans, REFERENCE)
+    assert fit.mean.shape == (3, 4)
+    assert np.isnan(fit.mean[0, 0]) and fit.count[0, 0] == 5
+    single = seasonal_fit(mid, stack[1, 2], errors, spans, REFERENCE)
+    for got, expected in zip(fit, single):
+        np.testing.assert_allclose(got[1, 2], expected)
+    assert np.isfinite(fit.mean_error[1:]).all()
+
+
+def test_fit_seasonal_blockwise_to_zarr(velocity_cube_zarr, tmp_path):
+    lazy = xr.open_zarr(velocity_cube_zarr)
+    out = str(tmp_path / "seasonal.zarr")
+    result = fit_seasonal(lazy, variables=["v", "vx"], outpath=out)
+
+    assert result.v0.chunks is not None
+    assert {"v0", "dv_dt", "v_amp", "v_phase", "count0", "vx_amp", "mapping"} <= set(
+        result.data_vars
+    )
+    assert result.v0.dims == ("y", "x")
+
+    eager = make_velocity_cube()
+    expected = seasonal_fit(
+        eager.mid_date.values,
+        eager.v.transpose("y", "x", "mid_date").values,
+        eager.v_error.values,
+        eager.date_dt.values,
+        reference_date=result.attrs["reference_date"],
+    )
+    np.testing.assert_allclose(result.v0.values, expected.mean)
+    np.testing.assert_allclose(result.v_amp.values, expected.amplitude)
+
+
+def test_fit_seasonal_missing_variable():
+    with pytest.raises(ValueError):
+        fit_seasonal(make_velocity_cube(), variables=["speed"])
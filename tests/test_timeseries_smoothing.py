@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from itslive.timeseries import regular_grid, smooth, smooth_time_series
+from itslive.timeseries._smoothing import _overlap_sums
+
+from .conftest import make_velocity_cube
+
+
+def _pairs(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    mid = np.datetime64("2018-01-01") + rng.integers(0, 3 * 365, n).astype(
+        "timedelta64[D]"
+    )
+    date_dt = rng.choice([6, 12, 24, 96, 365], n).astype("timedelta64[D]")
+    truth = 1000 + 100 * np.sin(2 * np.pi * np.arange(n) / n)
+    return mid.astype("datetime64[ns]"), date_dt, truth, rng
+
+
+def test_overlap_sums_match_brute_force():
+    rng = np.random.default_rng(1)
+    mid = rng.uniform(0, 100, 50)
+    span = rng.choice([0.0, 3.0, 40.0], 50)
+    weights = rng.uniform(0.5, 2, (2, 50))
+    starts = np.arange(-10, 110, 5.0)
+    ends = starts + 12
+
+    got = _overlap_sums(mid, span, weights, starts, ends)
+
+    expected = np.zeros((2, len(starts)))
+    for j, (s, e) in enumerate(zip(starts, ends)):
+        for i in range(50):
+            if span[i] == 0:
+                fraction = float(s <= mid[i] < e)
+            else:
+                a, b = mid[i] - span[i] / 2, mid[i] + span[i] / 2
+                fraction = max(0.0, min(b, e) - max(a, s)) / span[i]
+            expected[:, j] += weights[:, i] * fraction
+    np.testing.assert_allclose(got, expected, atol=1e-9)
+
+
+def test_error_weighted_mean_of_instantaneous_pairs():
+    times = np.array(["2020-01-01", "2020-01-02"], dtype="datetime64[ns]")
+    result = smooth(
+        times,
+        [100.0, 200.0],
+        errors=[1.0, 2.0],
+        grid=times[:1],
+        window_days=10,
+        mad_threshold=None,
+    )
+    expected = (100 * 1 + 200 * 0.25) / 1.25
+    np.testing.assert_allclose(result.value, [expected])
+    np.testing.assert_allclose(result.error, [1 / np.sqrt(1.25)])
+    np.testing.assert_allclose(result.count, [2.0])
+
+
+def test_long_pairs_are_spread_over_their_span():
+    times = np.array(["2020-01-01", "2020-07-01"], dtype="datetime64[ns]")
+    grid = np.array(["2020-07-01"], dtype="datetime64[ns]")
+    result = smooth(
+        times,
+        [0.0, 10.0],
+        date_dt=np.array([400, 10], dtype="timedelta64[D]"),
+        grid=grid,
+        window_days=10,
+        mad_threshold=None,
+        min_count=0,
+    )
+    # The 400-day pair covers the window but only 10/400 of its span is in it
+    np.testing.assert_allclose(result.count, [1 + 10 / 400])
+    np.testing.assert_allclose(result.value, [10 / (1 + 10 / 400)])
+
+
+def test_outliers_are_rejected():
+    times, date_dt, truth, rng = _pairs()
+    errors = np.full(len(times), 20.0)
+    values = truth + rng.normal(0, 20, len(times))
+    values[::25] += 5000
+
+    kwargs = dict(errors=errors, date_dt=date_dt, freq="W", window_days=60)
+    robust = smooth(times, values, **kwargs)
+    naive = smooth(times, values, mad_threshold=None, **kwargs)
+
+    assert np.nanmax(np.abs(robust.value - 1000)) < 200
+    assert np.nanmax(np.abs(naive.value - 1000)) > 300
+    assert len(robust.time) == len(regular_grid(times, "W"))
+
+
+def test_many_points_match_single_point():
+    times, date_dt, truth, rng = _pairs(seed=2)
+    values = truth + rng.normal(0, 30, (4, len(times)))
+    values[1, ::3] = np.nan
+    errors = rng.uniform(5, 50, len(times))
+    stacked = smooth(times, values, errors, date_dt, freq=5)
+    for row in range(4):
+        single = smooth(times, values[row], errors, date_dt, freq=5)
+        np.testing.assert_allclose(stacked.value[row], single.value)
+        np.testing.assert_allclose(stacked.error[row], single.error)
+
+
+def test_smooth_time_series_on_cube(velocity_cube_zarr):
+    lazy = xr.open_zarr(velocity_cube_zarr)
+    eager = make_velocity_cube()
+
+    result = smooth_time_series(lazy, freq="W", window_days=90)
+    assert result.v.chunks is not None
+    assert set(result.dims) == {"time", "y", "x"}
+
+    expected = smooth(
+        eager.mid_date.values,
+        eager.v.transpose("y", "x", "mid_date").values,
+        eager.v_error.values,
+        eager.date_dt.values,
+        freq="W",
+        window_days=90,
+    )
+    np.testing.assert_allclose(
+        result.v.transpose("y", "x", "time").values, expected.value
+    )
+    np.testing.assert_array_equal(result.time.values, expected.time)
+
+
+def test_smooth_time_series_requires_errors_when_weighting():
+    ds = make_velocity_cube().drop_vars(["v_error"])
+    with pytest.raises(ValueError):
+        smooth_time_series(ds)
+    assert "v" in smooth_time_series(ds, error_weighting=False)